@@ -0,0 +1,177 @@
+# benchmark/detection_fallback_benchmark.py
+"""
+Gain de rappel et coût de la détection de repli (src/core/detection_fallback.py).
+
+Chaque image de benchmark/test_data sur laquelle Mediapipe détecte un visage est réduite
+puis collée dans un grand cadre (1920x1440) dont le fond est une autre image du dossier,
+mélangée par blocs et floutée : le visage occupe une fraction donnée de la hauteur (sujet
+éloigné). La variante "groupe" juxtapose trois personnes. Pour chaque échantillon on mesure la passe pleine
+image seule, puis le repli dans le budget courant (FALLBACK_* ou --budget-ms) :
+  - rappel sans / avec repli et gain ;
+  - coût ajouté moyen (sur tous les échantillons) et p95 (sur ceux qui ont déclenché le repli) ;
+  - nombre de tentatives et d'arrêts par budget.
+
+Usage :
+    python -m benchmark.detection_fallback_benchmark [--max-images 40] [--budget-ms 150] [--output rapport.json]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from benchmark.history import settings_snapshot
+from src.core.config import settings
+from src.core.decoding import decode_image_rgb
+from src.core.detection_fallback import detect_with_fallback
+from src.core.models import get_face_landmarker
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.fallback")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+CANVAS_SIZE = (1920, 1440)
+FACE_SCALES = (0.5, 0.35, 0.25, 0.18)
+
+
+def _background(image: np.ndarray, size: Tuple[int, int], rng: np.random.Generator, blocks: int = 8) -> np.ndarray:
+    """
+    Fond encombré sans visage : l'image couvre `size`, ses blocs (blocks x blocks) sont
+    mélangés (plus de structure de visage détectable) puis floutés.
+    """
+    width, height = size
+    resized = cv2.resize(image, (width, height))
+    block_h, block_w = height // blocks, width // blocks
+    tiles = [resized[j * block_h:(j + 1) * block_h, i * block_w:(i + 1) * block_w] for j in range(blocks) for i in range(blocks)]
+    order = rng.permutation(len(tiles))
+    rows = [np.hstack([tiles[k] for k in order[j * blocks:(j + 1) * blocks]]) for j in range(blocks)]
+    scrambled = cv2.resize(np.vstack(rows), (width, height))
+    return cv2.GaussianBlur(scrambled, (0, 0), 15)
+
+
+def compose(subjects: Sequence[np.ndarray], background: np.ndarray, fraction: float, rng: np.random.Generator) -> np.ndarray:
+    """ Colle les sujets (hauteur = fraction du cadre) côte à côte à une position aléatoire. """
+    canvas = background.copy()
+    height, width = canvas.shape[:2]
+    target_h = int(height * fraction)
+    resized = [cv2.resize(s, (max(1, int(s.shape[1] * target_h / s.shape[0])), target_h), interpolation=cv2.INTER_AREA) for s in subjects]
+    total_w = sum(r.shape[1] for r in resized)
+    x = int(rng.integers(0, max(1, width - total_w)))
+    y = int(rng.integers(0, max(1, height - target_h)))
+    for r in resized:
+        w = min(r.shape[1], width - x)
+        canvas[y:y + target_h, x:x + w] = r[:, :w]
+        x += w
+    return canvas
+
+
+def iter_samples(images: List[np.ndarray], seed: int = 0) -> Iterator[Tuple[str, np.ndarray]]:
+    """ (variante, image composée) : sujets éloignés à plusieurs échelles puis photos de groupe. """
+    rng = np.random.default_rng(seed)
+    for i, image in enumerate(images):
+        background = _background(images[(i + 1) % len(images)], CANVAS_SIZE, rng)
+        for fraction in FACE_SCALES:
+            yield f"visage_{fraction:.0%}", compose([image], background, fraction, rng)
+        group = [images[(i + k) % len(images)] for k in range(3)]
+        yield "groupe_30%", compose(group, background, 0.3, rng)
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    """ Rappel sans/avec repli et coût ajouté. """
+    n = len(samples)
+    single = sum(s["single_detected"] for s in samples)
+    fallback = [s for s in samples if not s["single_detected"]]
+    recovered = sum(s["fallback_detected"] for s in fallback)
+    added = [s["fallback_ms"] for s in fallback]
+    return {
+        "num_samples": n,
+        "recall_single_pass": single / n if n else 0.0,
+        "recall_with_fallback": (single + recovered) / n if n else 0.0,
+        "recall_gain": recovered / n if n else 0.0,
+        "fallback_triggered": len(fallback),
+        "fallback_recovered": recovered,
+        "single_pass_ms_mean": float(np.mean([s["single_ms"] for s in samples])) if samples else 0.0,
+        "added_ms_mean": sum(added) / n if n else 0.0,
+        "added_ms_p95_when_triggered": float(np.percentile(added, 95)) if added else 0.0,
+        "attempts_mean_when_triggered": float(np.mean([s["attempts"] for s in fallback])) if fallback else 0.0,
+        "budget_exhausted": sum(s["budget_exhausted"] for s in fallback),
+    }
+
+
+def run_detection_fallback_benchmark(data_dir: Path, max_images: int = 40, budget_ms: Optional[float] = None) -> Dict:
+    landmarker = get_face_landmarker()
+    if landmarker is None:
+        raise RuntimeError("FaceLandmarker non disponible.")
+
+    def detect(image: np.ndarray):
+        return landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(image)))
+
+    # Seules les images où le visage est trouvé en gros plan servent de sujets
+    images = []
+    for path in sorted(p for p in data_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS):
+        image = decode_image_rgb(path.read_bytes())
+        if image is not None and detect(image).face_landmarks:
+            images.append(image)
+        if len(images) >= max_images:
+            break
+    if not images:
+        raise RuntimeError(f"Aucune image exploitable dans {data_dir}")
+
+    budget_ms = settings.FALLBACK_DETECTION_BUDGET_MS if budget_ms is None else budget_ms
+    samples = []
+    for variant, image in iter_samples(images):
+        start = time.perf_counter()
+        detected = bool(detect(image).face_landmarks)
+        single_ms = (time.perf_counter() - start) * 1000
+        sample = {"variant": variant, "single_detected": detected, "single_ms": single_ms,
+                  "fallback_detected": False, "fallback_ms": 0.0, "attempts": 0, "budget_exhausted": False}
+        if not detected:
+            outcome = detect_with_fallback(detect, image, budget_ms / 1000.0, expected_attempt_s=single_ms / 1000.0)
+            sample.update(fallback_detected=outcome.result is not None, fallback_ms=outcome.elapsed_s * 1000,
+                          attempts=outcome.attempts, budget_exhausted=outcome.budget_exhausted)
+        samples.append(sample)
+
+    variants = list(dict.fromkeys(s["variant"] for s in samples))
+    return {
+        "evaluation_date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "num_subjects": len(images),
+        "settings": settings_snapshot("FALLBACK_") | {"budget_ms": budget_ms},
+        "overall": summarize(samples),
+        "per_variant": {variant: summarize([s for s in samples if s["variant"] == variant]) for variant in variants},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mesure le gain de rappel et le coût de la détection de repli.")
+    parser.add_argument("--data-dir", type=Path, default=TEST_DATA_DIR, help="Dossier d'images.")
+    parser.add_argument("--max-images", type=int, default=40, help="Nombre maximal d'images sujets.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Budget du repli (défaut : FALLBACK_DETECTION_BUDGET_MS).")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    report = run_detection_fallback_benchmark(args.data_dir, args.max_images, args.budget_ms)
+
+    print("\n" + "=" * 15 + f" DÉTECTION DE REPLI (budget {report['settings']['budget_ms']:.0f} ms) " + "=" * 15)
+    for variant, summary in [("TOTAL", report["overall"])] + list(report["per_variant"].items()):
+        print(f"  - {variant:<12}: {summary['num_samples']:>4} images | rappel {summary['recall_single_pass']:6.1%} -> "
+              f"{summary['recall_with_fallback']:6.1%} (+{summary['recall_gain']:.1%}) | passe simple {summary['single_pass_ms_mean']:6.1f} ms | "
+              f"ajouté {summary['added_ms_mean']:6.1f} ms/image (p95 {summary['added_ms_p95_when_triggered']:6.1f} ms si repli, "
+              f"{summary['attempts_mean_when_triggered']:.1f} tentatives) | budget atteint {summary['budget_exhausted']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# benchmark/gfxmath_benchmark.py
+"""
+Micro-benchmarks des utilitaires de transformation (src/utils/gfxmath_utils.py).
+
+Compare, pour N poses / N paires de points, les versions unitaires d'origine appelées en boucle
+(copiées ci-dessous : 4 matrices 4x4 et 3 produits par makePose, somme Python pour VecDist,
+np.linalg.inv par pose) aux versions vectorisées :
+  - poses      : makePose x N            vs makePoses (forme fermée, diffusion)
+  - distances  : VecDist x N             vs VecDists (einsum)
+  - inversion  : np.linalg.inv x N       vs np.linalg.inv par lot vs InvertPoses (R^T, -R^T t)
+  - transform  : points homogènes . M^T  vs TransformPoints (N poses x 478 points)
+  - world_pts  : GetWorldPoints (21 points, inversion 4x4) vs GetWorldPoints généralisé (478 points)
+Chaque ligne vérifie aussi que les sorties sont identiques (écart max).
+
+Usage :
+    python -m benchmark.gfxmath_benchmark [--sizes 1 100 10000] [--repeats 20] [--output rapport.json]
+"""
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.utils.gfxmath_utils import (GetPsudoCamera, GetWorldPoints, InvertPoses, TransformPoints,
+                                     VecDists, makePoses)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.gfxmath")
+
+NUM_LANDMARKS = 478
+
+
+# --- Implémentations d'origine (référence) ---
+def reference_make_pose(translation=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+    translation_matrix = np.array([[1, 0, 0, translation[0]], [0, 1, 0, translation[1]],
+                                   [0, 0, 1, translation[2]], [0, 0, 0, 1]])
+    rotation = [i * (np.pi / 180.0) for i in rotation]
+    rot_x = np.array([[1, 0, 0, 0], [0, np.cos(rotation[0]), -np.sin(rotation[0]), 0],
+                      [0, np.sin(rotation[0]), np.cos(rotation[0]), 0], [0, 0, 0, 1]])
+    rot_y = np.array([[np.cos(rotation[1]), 0, np.sin(rotation[1]), 0], [0, 1, 0, 0],
+                      [-np.sin(rotation[1]), 0, np.cos(rotation[1]), 0], [0, 0, 0, 1]])
+    rot_z = np.array([[np.cos(rotation[2]), -np.sin(rotation[2]), 0, 0],
+                      [np.sin(rotation[2]), np.cos(rotation[2]), 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+    rotation_matrix = np.dot(np.dot(rot_x, rot_y), rot_z)
+    scaling_matrix = np.array([[scale[0], 0, 0, 0], [0, scale[1], 0, 0], [0, 0, scale[2], 0], [0, 0, 0, 1]])
+    return np.dot(translation_matrix, np.dot(rotation_matrix, scaling_matrix))
+
+
+def reference_vec_dist(vecA, vecB):
+    return math.sqrt(sum((px - qx) ** 2.0 for px, qx in zip(vecA, vecB)))
+
+
+def reference_get_world_points(model_points, image_points, camera_matrix, distortion):
+    _, _, translation_vector = cv2.solvePnP(model_points, image_points, camera_matrix, distortion, flags=cv2.SOLVEPNP_SQPNP)
+    transformation = np.eye(4)
+    transformation[0:3, 3] = translation_vector.squeeze()
+    model_points_hom = np.concatenate((model_points, np.ones((len(model_points), 1))), axis=1)
+    return model_points_hom.dot(np.linalg.inv(transformation).T)
+
+
+def time_call(func: Callable[[], object], repeats: int) -> float:
+    """ Durée médiane d'un appel (µs), après un appel d'échauffement. """
+    func()
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations) * 1e6)
+
+
+def _entry(reference_us: float, candidates: Dict[str, float], max_abs_diff: float) -> Dict:
+    return {
+        "reference_us": reference_us,
+        **{f"{name}_us": value for name, value in candidates.items()},
+        "speedup": reference_us / min(candidates.values()),
+        "max_abs_diff": max_abs_diff,
+    }
+
+
+def run_gfxmath_benchmark(sizes: List[int], repeats: int = 20, seed: int = 0) -> Dict:
+    rng = np.random.default_rng(seed)
+    report: Dict[str, Dict] = {}
+    for n in sizes:
+        translations = rng.normal(0, 10, (n, 3))
+        rotations = rng.uniform(-60, 60, (n, 3))
+        scales = rng.uniform(0.5, 2.0, (n, 3))
+        points_a, points_b = rng.normal(size=(n, 3)), rng.normal(size=(n, 3))
+
+        reference_poses = np.stack([reference_make_pose(t, r, s) for t, r, s in zip(translations, rotations, scales)])
+        poses = makePoses(translations, rotations, scales)
+        report[f"poses_n{n}"] = _entry(
+            time_call(lambda: [reference_make_pose(t, r, s) for t, r, s in zip(translations, rotations, scales)], repeats),
+            {"batched": time_call(lambda: makePoses(translations, rotations, scales), repeats)},
+            float(np.abs(poses - reference_poses).max()),
+        )
+
+        reference_distances = np.array([reference_vec_dist(a, b) for a, b in zip(points_a, points_b)])
+        report[f"distances_n{n}"] = _entry(
+            time_call(lambda: [reference_vec_dist(a, b) for a, b in zip(points_a, points_b)], repeats),
+            {"batched": time_call(lambda: VecDists(points_a, points_b), repeats)},
+            float(np.abs(VecDists(points_a, points_b) - reference_distances).max()),
+        )
+
+        reference_inverse = np.stack([np.linalg.inv(pose) for pose in poses])
+        report[f"inversion_n{n}"] = _entry(
+            time_call(lambda: [np.linalg.inv(pose) for pose in poses], repeats),
+            {
+                "linalg_batched": time_call(lambda: np.linalg.inv(poses), repeats),
+                "batched": time_call(lambda: InvertPoses(poses), repeats),
+            },
+            float(np.abs(InvertPoses(poses) - reference_inverse).max()),
+        )
+
+        # Transformation de maillages de 478 points (limitée à 1000 poses : N x 478 x 3 flottants)
+        transform_poses = poses[:1000]
+        mesh = rng.normal(size=(NUM_LANDMARKS, 3))
+        mesh_hom = np.concatenate((mesh, np.ones((NUM_LANDMARKS, 1))), axis=1)
+        reference_points = np.stack([mesh_hom.dot(pose.T)[:, :3] for pose in transform_poses])
+        report[f"transform_n{len(transform_poses)}"] = _entry(
+            time_call(lambda: [mesh_hom.dot(pose.T)[:, :3] for pose in transform_poses], repeats),
+            {"batched": time_call(lambda: TransformPoints(mesh, transform_poses), repeats)},
+            float(np.abs(TransformPoints(mesh, transform_poses) - reference_points).max()),
+        )
+
+    camera_matrix, distortion = GetPsudoCamera(640, 480)
+    for num_points in (21, NUM_LANDMARKS):
+        model_points = rng.normal(0, 5, (num_points, 3))
+        image_points = rng.uniform(100, 400, (num_points, 2))
+        report[f"world_points_{num_points}pts"] = _entry(
+            time_call(lambda: reference_get_world_points(model_points, image_points, camera_matrix, distortion), repeats),
+            {"generalized": time_call(lambda: GetWorldPoints(model_points, image_points, camera_matrix, distortion), repeats)},
+            float(np.abs(GetWorldPoints(model_points, image_points, camera_matrix, distortion)
+                         - reference_get_world_points(model_points, image_points, camera_matrix, distortion)).max()),
+        )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des transformations unitaires vs vectorisées.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000], help="Nombres de poses/points.")
+    parser.add_argument("--repeats", type=int, default=20, help="Mesures par cas (médiane).")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    report = run_gfxmath_benchmark(args.sizes, args.repeats)
+
+    print("\n" + "=" * 15 + " TRANSFORMATIONS : BOUCLE UNITAIRE vs LOT " + "=" * 15)
+    for name, entry in report.items():
+        candidates = " | ".join(f"{key[:-3]} {value:10.1f} µs" for key, value in entry.items()
+                                if key.endswith("_us") and key != "reference_us")
+        print(f"  - {name:<20}: référence {entry['reference_us']:10.1f} µs | {candidates} | "
+              f"x{entry['speedup']:7.1f} | écart max {entry['max_abs_diff']:.1e}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    # Les versions vectorisées doivent reproduire les originales
+    return 0 if all(entry["max_abs_diff"] < 1e-9 for entry in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+# benchmark/history.py
+"""
+Historique des exécutions de benchmark et détection des régressions de performance.
+
+Chaque exécution est ajoutée (une ligne JSON) à benchmark/history.jsonl, avec le commit,
+l'empreinte de la machine (modèle de CPU, nombre de cœurs, versions des librairies) et les
+distributions complètes des mesures (échantillons de latence, débit par fenêtre). La commande
+`compare` applique un test de Mann-Whitney (bilatéral, approximation normale avec correction
+des ex-aequo) à chaque métrique commune de deux exécutions : une régression est signalée si la
+différence est significative (p < --alpha) et dépasse --min-effect en variation relative de la
+médiane. Le code de sortie est 1 en cas de régression : un changement peut être conditionné
+aux performances.
+
+Usage :
+    python -m benchmark.history list [--benchmark optical_factory_evaluation]
+    python -m benchmark.history compare [--baseline -2] [--candidate -1] [--alpha 0.01] [--min-effect 0.05]
+Une exécution est désignée par son index (-1 = la dernière), un préfixe de run_id ou de commit.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.config import settings
+
+logger = logging.getLogger("benchmark.history")
+
+DEFAULT_HISTORY_PATH = settings.BASE_DIR / "benchmark" / "history.jsonl"
+# Versions relevées dans l'empreinte machine (absentes = non installées)
+TRACKED_PACKAGES = ("numpy", "opencv-python-headless", "opencv-python", "mediapipe", "fastapi", "pydantic", "orjson", "Pillow", "onnxruntime")
+MIN_SAMPLES = 5
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_fingerprint() -> Dict:
+    """ Machine et environnement logiciel ; `id` ne change que si l'un de ces éléments change. """
+    packages = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    host = {
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "system": f"{platform.system()} {platform.release()}",
+        "python": platform.python_version(),
+        "packages": packages,
+    }
+    host["id"] = hashlib.sha256(json.dumps(host, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return host
+
+
+def current_commit(repo_dir: Path = settings.BASE_DIR) -> Dict:
+    """ Commit courant et présence de modifications non commitées (None hors d'un dépôt git). """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_dir, capture_output=True, text=True, check=True).stdout
+        return {"commit": commit, "dirty": bool(status.strip())}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def settings_snapshot(prefix: str) -> Dict:
+    """ Réglages dont le nom commence par `prefix`, pour le contexte d'un rapport de benchmark. """
+    return {key: value for key, value in settings.model_dump().items() if key.startswith(prefix)}
+
+
+def metric(samples: Iterable[float], unit: str, higher_is_better: bool = False) -> Dict:
+    """ Entrée de métrique de l'historique : distribution complète et sens d'amélioration. """
+    return {"unit": unit, "higher_is_better": higher_is_better, "samples": [float(v) for v in samples]}
+
+
+def windowed_throughput(latencies_s: Sequence[float], window: int = 10) -> List[float]:
+    """ Débit (requêtes/s) par fenêtre de `window` requêtes séquentielles : distribution comparable. """
+    latencies = np.asarray(latencies_s, dtype=np.float64)
+    windows = len(latencies) // window
+    if windows == 0:
+        return [len(latencies) / latencies.sum()] if latencies.sum() > 0 else []
+    return (window / latencies[:windows * window].reshape(windows, window).sum(axis=1)).tolist()
+
+
+def append_run(benchmark: str, metrics: Dict[str, Dict], context: Optional[Dict] = None,
+               history_path: Path = DEFAULT_HISTORY_PATH) -> Dict:
+    """ Ajoute une exécution à l'historique (JSONL, ajout seul) et la retourne. """
+    record = {
+        "run_id": uuid.uuid4().hex[:12],
+        "benchmark": benchmark,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **current_commit(),
+        "host": host_fingerprint(),
+        "context": context or {},
+        "metrics": metrics,
+    }
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    logger.info(f"Exécution {record['run_id']} ajoutée à l'historique {history_path}.")
+    return record
+
+
+def load_runs(history_path: Path = DEFAULT_HISTORY_PATH, benchmark: Optional[str] = None) -> List[Dict]:
+    if not history_path.exists():
+        return []
+    runs = []
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                run = json.loads(line)
+                if benchmark is None or run["benchmark"] == benchmark:
+                    runs.append(run)
+    return runs
+
+
+def select_run(runs: List[Dict], ref: str) -> Dict:
+    """
+    Exécution désignée par un index (-1 = dernière, au plus 5 chiffres), un préfixe de run_id ou
+    de commit (la plus récente). Un préfixe entièrement numérique doit donc compter 6 caractères.
+    """
+    if len(ref.lstrip("-")) <= 5 and ref.lstrip("-").isdigit():
+        try:
+            return runs[int(ref)]
+        except IndexError:
+            raise LookupError(f"Pas d'exécution d'index {ref} ({len(runs)} dans l'historique).")
+    for run in reversed(runs):
+        if run["run_id"].startswith(ref) or (run.get("commit") or "").startswith(ref):
+            return run
+    raise LookupError(f"Aucune exécution ne correspond à '{ref}'.")
+
+
+def mann_whitney_u(a: Sequence[float], b: Sequence[float]) -> Dict[str, float]:
+    """
+    Test U de Mann-Whitney bilatéral (approximation normale, correction de continuité et des
+    ex-aequo). `effect` = probabilité qu'une valeur de b dépasse une valeur de a (0.5 = aucun effet).
+    """
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    n1, n2 = len(a), len(b)
+    _, inverse, counts = np.unique(np.concatenate([a, b]), return_inverse=True, return_counts=True)
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2.0  # Rangs à partir de 1, moyennés sur les ex-aequo
+    u_a = float(average_ranks[inverse[:n1]].sum() - n1 * (n1 + 1) / 2.0)
+    n = n1 + n2
+    tie_correction = float((counts ** 3 - counts).sum()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_correction))
+    if sigma == 0:
+        p_value = 1.0
+    else:
+        z = max(abs(u_a - n1 * n2 / 2.0) - 0.5, 0.0) / sigma
+        p_value = min(1.0, math.erfc(z / math.sqrt(2.0)))
+    return {"u": u_a, "p_value": p_value, "effect": 1.0 - u_a / (n1 * n2)}
+
+
+def compare_runs(baseline: Dict, candidate: Dict, alpha: float = 0.01, min_effect: float = 0.05) -> List[Dict]:
+    """ Verdict par métrique commune : "regression", "improvement", "unchanged" ou "insufficient_samples". """
+    verdicts = []
+    for name in sorted(set(baseline["metrics"]) & set(candidate["metrics"])):
+        before, after = baseline["metrics"][name], candidate["metrics"][name]
+        entry = {"metric": name, "unit": after.get("unit"), "n_baseline": len(before["samples"]), "n_candidate": len(after["samples"])}
+        if min(entry["n_baseline"], entry["n_candidate"]) < MIN_SAMPLES:
+            verdicts.append({**entry, "verdict": "insufficient_samples"})
+            continue
+        median_before, median_after = float(np.median(before["samples"])), float(np.median(after["samples"]))
+        change = (median_after - median_before) / abs(median_before) if median_before else 0.0
+        test = mann_whitney_u(before["samples"], after["samples"])
+        worse = change < 0 if after.get("higher_is_better") else change > 0
+        verdict = "unchanged"
+        if test["p_value"] < alpha and abs(change) >= min_effect:
+            verdict = "regression" if worse else "improvement"
+        verdicts.append({
+            **entry,
+            "baseline_median": median_before,
+            "candidate_median": median_after,
+            "relative_change": change,
+            "p_value": test["p_value"],
+            "verdict": verdict,
+        })
+    return verdicts
+
+
+def _describe(run: Dict) -> str:
+    commit = (run.get("commit") or "sans commit")[:10] + (" (modifié)" if run.get("dirty") else "")
+    return f"{run['run_id']} | {run['timestamp']} | {commit} | hôte {run['host']['id']}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Historique des benchmarks et détection de régressions.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH, help="Fichier d'historique JSONL.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="Liste les exécutions enregistrées.")
+    list_parser.add_argument("--benchmark", default=None, help="Filtre sur le nom du benchmark.")
+    compare_parser = subparsers.add_parser("compare", help="Compare deux exécutions ; code 1 en cas de régression.")
+    compare_parser.add_argument("--benchmark", default="optical_factory_evaluation", help="Benchmark comparé.")
+    compare_parser.add_argument("--baseline", default="-2", help="Exécution de référence (défaut : l'avant-dernière).")
+    compare_parser.add_argument("--candidate", default="-1", help="Exécution évaluée (défaut : la dernière).")
+    compare_parser.add_argument("--alpha", type=float, default=0.01, help="Seuil de significativité (p-value).")
+    compare_parser.add_argument("--min-effect", type=float, default=0.05, help="Variation relative minimale de la médiane.")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        runs = load_runs(args.history, args.benchmark)
+        for index, run in enumerate(runs):
+            print(f"  [{index - len(runs)}] {run['benchmark']:<28} {_describe(run)} | {', '.join(run['metrics'])}")
+        return 0
+
+    runs = load_runs(args.history, args.benchmark)
+    try:
+        baseline, candidate = select_run(runs, args.baseline), select_run(runs, args.candidate)
+    except LookupError as e:
+        logger.error(str(e))
+        return 2
+    print("\n" + "=" * 15 + f" COMPARAISON {args.benchmark} " + "=" * 15)
+    print(f"  référence : {_describe(baseline)}")
+    print(f"  candidat  : {_describe(candidate)}")
+    if baseline["host"]["id"] != candidate["host"]["id"]:
+        print("  ATTENTION : empreintes machine différentes, les écarts peuvent venir de l'environnement.")
+
+    verdicts = compare_runs(baseline, candidate, args.alpha, args.min_effect)
+    for v in verdicts:
+        if v["verdict"] == "insufficient_samples":
+            print(f"  - {v['metric']:<24}: échantillons insuffisants ({v['n_baseline']} / {v['n_candidate']})")
+            continue
+        print(f"  - {v['metric']:<24}: {v['baseline_median']:10.2f} -> {v['candidate_median']:10.2f} {v['unit'] or ''} "
+              f"({v['relative_change']:+.1%}, p={v['p_value']:.2g}) {v['verdict'].upper()}")
+    regressions = [v["metric"] for v in verdicts if v["verdict"] == "regression"]
+    if regressions:
+        print(f"\nRégression(s) significative(s) : {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# benchmark/landmark_backend_benchmark.py
+"""
+Comparaison des backends de landmarks (src/core/landmark_backends.py) sur benchmark/test_data.
+
+Pour chaque backend disponible : latence de detect (médiane, p95) et concordance avec le
+FaceLandmarker Mediapipe pris comme référence :
+  - taux de détection et accord de détection ;
+  - erreur moyenne des landmarks normalisée par la distance inter-oculaire (NME, 468 points) ;
+  - écart de pose (lacet/tangage/roulis, degrés).
+La ligne "géométrie" mesure le pipeline géométrique utilisé par le backend ONNX
+(face_geometry.py) appliqué aux landmarks Mediapipe : écart avec la matrice du FaceLandmarker.
+Le backend ONNX nécessite onnxruntime et un modèle (--onnx-model ou ONNX_FACE_MESH_PATH) ;
+--intra-op peut être répété pour balayer le nombre de threads.
+
+Usage :
+    python -m benchmark.landmark_backend_benchmark [--onnx-model models/face_mesh_192x192.onnx] \
+        [--intra-op 1 --intra-op 2 --intra-op 4] [--max-images 60] [--output rapport.json]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.decoding import decode_image_rgb
+from src.core.face_geometry import get_face_geometry
+from src.core.landmark_backends import MESH_LANDMARKS, MediaPipeLandmarkBackend, OnnxFaceMeshBackend, ort
+from src.core.models import get_face_landmarker
+from src.utils.gfxmath_utils import DecomposePose
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.backends")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+# Coins externes des yeux : normalisation de l'erreur (NME inter-oculaire)
+OUTER_EYE_CORNERS = (33, 263)
+
+
+def _landmarks(result) -> Optional[np.ndarray]:
+    if not result.face_landmarks:
+        return None
+    return np.array([(lm.x, lm.y, lm.z) for lm in result.face_landmarks[0]], dtype=np.float64)
+
+
+def normalized_mean_error(points: np.ndarray, reference: np.ndarray, width: int, height: int) -> float:
+    """ Erreur moyenne 2D (pixels) sur le maillage, divisée par la distance inter-oculaire de référence. """
+    scale = np.array([width, height])
+    errors = np.linalg.norm((points[:MESH_LANDMARKS, :2] - reference[:MESH_LANDMARKS, :2]) * scale, axis=1)
+    interocular = np.linalg.norm((reference[OUTER_EYE_CORNERS[0], :2] - reference[OUTER_EYE_CORNERS[1], :2]) * scale)
+    return float(errors.mean() / interocular) if interocular > 0 else float("nan")
+
+
+def pose_error_deg(matrix: np.ndarray, reference: np.ndarray) -> float:
+    """ Plus grand écart absolu entre angles (lacet, tangage, roulis), en degrés. """
+    return float(np.abs(DecomposePose(np.asarray(matrix)) - DecomposePose(np.asarray(reference))).max())
+
+
+def summarize(latencies: List[float], records: List[Dict]) -> Dict:
+    both = [r for r in records if r["detected"] and r["reference_detected"]]
+    nme = [r["nme"] for r in both]
+    pose = [r["pose_error_deg"] for r in both]
+    return {
+        "num_images": len(records),
+        "latency_ms_median": float(np.median(latencies)) if latencies else 0.0,
+        "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies else 0.0,
+        "detection_rate": sum(r["detected"] for r in records) / len(records) if records else 0.0,
+        "detection_agreement": sum(r["detected"] == r["reference_detected"] for r in records) / len(records) if records else 0.0,
+        "nme_mean": float(np.mean(nme)) if nme else None,
+        "nme_p95": float(np.percentile(nme, 95)) if nme else None,
+        "pose_error_deg_mean": float(np.mean(pose)) if pose else None,
+        "pose_error_deg_p95": float(np.percentile(pose, 95)) if pose else None,
+    }
+
+
+def run_landmark_backend_benchmark(
+    data_dir: Path,
+    onnx_model: Optional[Path] = None,
+    intra_op_threads: Optional[List[int]] = None,
+    max_images: int = 60,
+    repeats: int = 3,
+) -> Dict:
+    landmarker = get_face_landmarker()
+    if landmarker is None:
+        raise RuntimeError("FaceLandmarker non disponible (référence).")
+    reference_backend = MediaPipeLandmarkBackend(landmarker)
+    geometry = get_face_geometry()
+
+    backends = {"mediapipe": reference_backend}
+    onnx_model = onnx_model or Path(settings.ONNX_FACE_MESH_PATH)
+    if not onnx_model.is_absolute():
+        onnx_model = settings.BASE_DIR / onnx_model
+    if ort is None:
+        logger.warning("onnxruntime non installé : backend ONNX non mesuré.")
+    elif not onnx_model.exists():
+        logger.warning(f"Modèle ONNX absent ({onnx_model}) : backend ONNX non mesuré.")
+    elif geometry is None:
+        logger.warning("Métadonnées géométriques indisponibles : backend ONNX non mesuré.")
+    else:
+        for threads in intra_op_threads or [settings.ONNX_INTRA_OP_THREADS]:
+            backends[f"onnx_intra{threads}"] = OnnxFaceMeshBackend(
+                onnx_model, geometry, intra_op_threads=threads, inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+                presence_threshold=settings.ONNX_FACE_PRESENCE_THRESHOLD, roi_scale=settings.ONNX_ROI_SCALE,
+            )
+
+    images = []
+    for path in sorted(p for p in data_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS):
+        image = decode_image_rgb(path.read_bytes())
+        if image is not None:
+            images.append(image)
+        if len(images) >= max_images:
+            break
+    if not images:
+        raise RuntimeError(f"Aucune image exploitable dans {data_dir}")
+
+    references = [reference_backend.detect(image) for image in images]
+    report = {"evaluation_date": time.strftime("%Y-%m-%d %H:%M:%S"), "num_images": len(images), "backends": {}}
+    for name, backend in backends.items():
+        backend.detect(images[0])  # Échauffement
+        latencies, records = [], []
+        for image, reference in zip(images, references):
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = backend.detect(image)
+                latencies.append((time.perf_counter() - start) * 1000)
+            points, reference_points = _landmarks(result), _landmarks(reference)
+            record = {"detected": points is not None, "reference_detected": reference_points is not None}
+            if points is not None and reference_points is not None:
+                height, width = image.shape[:2]
+                record["nme"] = normalized_mean_error(points, reference_points, width, height)
+                record["pose_error_deg"] = pose_error_deg(result.facial_transformation_matrixes[0], reference.facial_transformation_matrixes[0])
+            records.append(record)
+        report["backends"][name] = summarize(latencies, records)
+
+    if geometry is not None:
+        latencies, errors = [], []
+        for image, reference in zip(images, references):
+            points = _landmarks(reference)
+            if points is None:
+                continue
+            start = time.perf_counter()
+            matrix = geometry.estimate_pose(points, image.shape[1], image.shape[0])
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors.append(float(np.abs(matrix - np.asarray(reference.facial_transformation_matrixes[0])).max()))
+        report["geometry"] = {
+            "num_faces": len(errors),
+            "latency_ms_median": float(np.median(latencies)) if latencies else 0.0,
+            "matrix_abs_error_max": max(errors) if errors else None,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare les backends de landmarks (latence, concordance).")
+    parser.add_argument("--data-dir", type=Path, default=TEST_DATA_DIR, help="Dossier d'images.")
+    parser.add_argument("--onnx-model", type=Path, default=None, help="Modèle ONNX (défaut : ONNX_FACE_MESH_PATH).")
+    parser.add_argument("--intra-op", type=int, action="append", default=None, help="Threads intra-op ONNX (répétable).")
+    parser.add_argument("--max-images", type=int, default=60, help="Nombre maximal d'images.")
+    parser.add_argument("--repeats", type=int, default=3, help="Mesures de latence par image.")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    report = run_landmark_backend_benchmark(args.data_dir, args.onnx_model, args.intra_op, args.max_images, args.repeats)
+
+    def fmt(value, spec):
+        return "   n/a" if value is None else format(value, spec)
+
+    print("\n" + "=" * 15 + " BACKENDS DE LANDMARKS " + "=" * 15)
+    for name, summary in report["backends"].items():
+        print(f"  - {name:<14}: latence {summary['latency_ms_median']:6.1f} ms (p95 {summary['latency_ms_p95']:6.1f}) | "
+              f"détection {summary['detection_rate']:6.1%} (accord {summary['detection_agreement']:6.1%}) | "
+              f"NME {fmt(summary['nme_mean'], '6.4f')} (p95 {fmt(summary['nme_p95'], '6.4f')}) | "
+              f"pose {fmt(summary['pose_error_deg_mean'], '5.2f')}° (p95 {fmt(summary['pose_error_deg_p95'], '5.2f')}°)")
+    if "geometry" in report:
+        geometry = report["geometry"]
+        print(f"  - {'géométrie':<14}: {geometry['num_faces']} visages | {geometry['latency_ms_median']:.2f} ms/visage | "
+              f"écart max à la matrice Mediapipe {fmt(geometry['matrix_abs_error_max'], '.2e')}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# benchmark/memory_soak.py
+"""
+Test d'endurance mémoire du pipeline en processus (détection de fuites).
+
+Enchaîne analyze_face_from_image_bytes + sérialisation de la réponse sur les images de
+benchmark/test_data pendant des milliers d'itérations. Après un échauffement (caches,
+initialisations paresseuses), il échantillonne à intervalles réguliers :
+  - le RSS du processus (/proc/self/statm, sinon psutil) : couvre aussi les allocations natives
+    (Mediapipe, OpenCV) ;
+  - des instantanés tracemalloc : allocations Python, avec les sites dont la taille croît le plus.
+La croissance est la pente (régression linéaire) ramenée à 1000 requêtes. Le code de sortie
+est non nul si elle dépasse les seuils, pour bloquer une régression en CI.
+
+Usage :
+    python -m benchmark.memory_soak [--iterations 5000] [--sample-every 250] \
+        [--max-rss-growth-mb 2.0] [--max-traced-growth-kb 256] [--output rapport.json]
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.config import settings
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.memory")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def current_rss_bytes() -> Optional[int]:
+    """ RSS courant du processus (Linux : /proc/self/statm ; ailleurs : psutil si installé). """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def growth_per_1k(requests: Sequence[int], values: Sequence[float]) -> float:
+    """ Pente (valeur par 1000 requêtes) de la régression linéaire des échantillons. """
+    if len(requests) < 2:
+        return 0.0
+    slope = np.polyfit(np.asarray(requests, dtype=np.float64), np.asarray(values, dtype=np.float64), 1)[0]
+    return float(slope * 1000)
+
+
+def default_pipeline() -> Callable[[bytes], Any]:
+    """ Pipeline de l'API sans HTTP : analyse complète puis sérialisation de la réponse. """
+    from src.api.responses import FastJSONResponse
+    from src.core.processing import analyze_face_from_image_bytes
+
+    def run(image_bytes: bytes) -> bytes:
+        return FastJSONResponse(content=analyze_face_from_image_bytes(image_bytes)).body
+
+    return run
+
+
+def run_soak(
+    pipeline: Callable[[bytes], Any],
+    payloads: List[bytes],
+    iterations: int = 5000,
+    warmup: int = 200,
+    sample_every: int = 250,
+    trace: bool = True,
+    top_sites: int = 10,
+) -> Dict:
+    """ Exécute le pipeline en boucle et mesure la croissance RSS / tracemalloc après l'échauffement. """
+    for i in range(warmup):
+        pipeline(payloads[i % len(payloads)])
+    gc.collect()
+
+    if trace:
+        tracemalloc.start(25)
+    baseline = tracemalloc.take_snapshot() if trace else None
+    samples: List[Dict] = []
+
+    def sample(done: int) -> None:
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] if trace else None
+        samples.append({"requests": done, "rss_bytes": current_rss_bytes(), "traced_bytes": traced, "time": time.perf_counter()})
+
+    sample(0)
+    for i in range(iterations):
+        pipeline(payloads[(warmup + i) % len(payloads)])
+        if (i + 1) % sample_every == 0 or i + 1 == iterations:
+            sample(i + 1)
+
+    sites = []
+    if trace:
+        final = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        project_root = str(settings.BASE_DIR / "src")
+        for stat in final.compare_to(baseline, "traceback")[:top_sites]:
+            # Frames de la plus ancienne à la plus récente : la dernière est le site d'allocation,
+            # la dernière frame du projet (src/) indique quel code l'a déclenché
+            allocation = stat.traceback[-1]
+            project_frames = [f for f in stat.traceback if f.filename.startswith(project_root)]
+            origin = project_frames[-1] if project_frames else allocation
+            sites.append({
+                "site": f"{allocation.filename}:{allocation.lineno}",
+                "project_frame": f"{origin.filename}:{origin.lineno}",
+                "size_diff_kb": stat.size_diff / 1024,
+                "count_diff": stat.count_diff,
+            })
+
+    requests = [s["requests"] for s in samples]
+    rss = [s["rss_bytes"] for s in samples]
+    elapsed = samples[-1]["time"] - samples[0]["time"]
+    report = {
+        "iterations": iterations,
+        "warmup": warmup,
+        "requests_per_s": iterations / elapsed if elapsed > 0 else 0.0,
+        "rss_start_mb": rss[0] / 2**20 if rss[0] is not None else None,
+        "rss_end_mb": rss[-1] / 2**20 if rss[-1] is not None else None,
+        "rss_growth_mb_per_1k": growth_per_1k(requests, [v / 2**20 for v in rss]) if None not in rss else None,
+        "traced_growth_kb_per_1k": growth_per_1k(requests, [s["traced_bytes"] / 1024 for s in samples]) if trace else None,
+        "top_allocation_sites": sites,
+        "samples": [{k: v for k, v in s.items() if k != "time"} for s in samples],
+    }
+    return report
+
+
+def check_thresholds(report: Dict, max_rss_growth_mb: float, max_traced_growth_kb: float) -> List[str]:
+    """ Liste des dépassements de seuils (vide si la croissance est acceptable). """
+    failures = []
+    rss_growth = report["rss_growth_mb_per_1k"]
+    if rss_growth is not None and rss_growth > max_rss_growth_mb:
+        failures.append(f"RSS +{rss_growth:.2f} Mo / 1000 requêtes (seuil {max_rss_growth_mb} Mo)")
+    traced_growth = report["traced_growth_kb_per_1k"]
+    if traced_growth is not None and traced_growth > max_traced_growth_kb:
+        failures.append(f"tracemalloc +{traced_growth:.1f} Ko / 1000 requêtes (seuil {max_traced_growth_kb} Ko)")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Test d'endurance mémoire du pipeline d'analyse.")
+    parser.add_argument("--data-dir", type=Path, default=TEST_DATA_DIR, help="Dossier d'images.")
+    parser.add_argument("--iterations", type=int, default=5000, help="Requêtes mesurées (après échauffement).")
+    parser.add_argument("--warmup", type=int, default=200, help="Requêtes d'échauffement non mesurées.")
+    parser.add_argument("--sample-every", type=int, default=250, help="Intervalle d'échantillonnage (requêtes).")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="RSS seul (pas de surcoût tracemalloc).")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de sites d'allocation rapportés.")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=2.0, help="Seuil de croissance RSS (Mo / 1000 requêtes).")
+    parser.add_argument("--max-traced-growth-kb", type=float, default=256.0, help="Seuil de croissance tracemalloc (Ko / 1000 requêtes).")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    payloads = [p.read_bytes() for p in sorted(args.data_dir.iterdir()) if p.suffix.lower() in IMAGE_EXTENSIONS]
+    if not payloads:
+        logger.error(f"Aucune image dans {args.data_dir}")
+        return 1
+
+    report = run_soak(default_pipeline(), payloads, args.iterations, args.warmup, args.sample_every,
+                      trace=not args.no_tracemalloc, top_sites=args.top)
+    failures = check_thresholds(report, args.max_rss_growth_mb, args.max_traced_growth_kb)
+    report["failures"] = failures
+
+    print("\n" + "=" * 15 + " ENDURANCE MÉMOIRE " + "=" * 15)
+    print(f"  - {report['iterations']} requêtes ({report['requests_per_s']:.1f} req/s), "
+          f"RSS {report['rss_start_mb']:.1f} -> {report['rss_end_mb']:.1f} Mo")
+    print(f"  - Croissance RSS       : {report['rss_growth_mb_per_1k']:+.3f} Mo / 1000 requêtes")
+    if report["traced_growth_kb_per_1k"] is not None:
+        print(f"  - Croissance Python    : {report['traced_growth_kb_per_1k']:+.1f} Ko / 1000 requêtes")
+        print("  - Principaux sites d'allocation (croissance) :")
+        for site in report["top_allocation_sites"]:
+            print(f"      {site['size_diff_kb']:+9.1f} Ko {site['count_diff']:+7d} blocs  {site['site']}  (via {site['project_frame']})")
+    print("  - Résultat             : " + ("ÉCHEC - " + " ; ".join(failures) if failures else "OK"))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 # benchmark/optical_factory_evaluation.py
 import sys
+import argparse
 import requests # Pour faire les appels API
 import json
 import time
@@ -10,10 +11,14 @@ import os
 from typing import List # Assure que List est importé
 # Importe l'objet settings depuis la configuration centrale
 from src.core.config import settings
+from benchmark.history import DEFAULT_HISTORY_PATH, append_run, metric, windowed_throughput
 
 # --- Configuration (Utilise l'objet settings) ---
 API_BASE_URL = settings.API_BASE_URL if hasattr(settings, 'API_BASE_URL') else "http://localhost:8000"
 ANALYZE_RECOMMEND_ENDPOINT = f"{API_BASE_URL}/api/v1/analyze_and_recommend"
+ANALYZE_FACE_ENDPOINT = f"{API_BASE_URL}/api/v1/analyze_face"
+# Niveaux de /analyze_face comparés (du plus léger au plus complet)
+ANALYSIS_LEVELS = ("pose", "landmarks", "full")
 # Construit le chemin des données de test à partir de BASE_DIR de settings
 TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
 # Construit le chemin du rapport de sortie à partir de BASE_DIR
@@ -40,6 +45,7 @@ def evaluate_detection_and_shape(test_image_paths: List[Path]) -> dict:
     """
     logger.info(f"Évaluation de la détection/forme sur {len(test_image_paths)} images...")
     results = []
+    request_latencies_ms = [] # Distribution complète, enregistrée dans l'historique
     successful_detections = 0
     # correct_shapes = 0 # Pourrait être réintroduit si ground truth
     total_processed = 0
@@ -56,10 +62,13 @@ def evaluate_detection_and_shape(test_image_paths: List[Path]) -> dict:
                 extension = image_path.suffix.lower().strip('.')
                 mime_type = f"image/{extension}" if extension in ['jpg', 'jpeg', 'png', 'bmp'] else 'application/octet-stream'
                 files = {"image_file": (image_path.name, f, mime_type)}
+                start_time = time.perf_counter()
                 response = requests.post(ANALYZE_RECOMMEND_ENDPOINT, files=files, timeout=15) # Augmente un peu le timeout
+                request_latency_ms = (time.perf_counter() - start_time) * 1000
 
             # Vérifie si le code status est 2xx (succès)
             if 200 <= response.status_code < 300:
+                request_latencies_ms.append(request_latency_ms)
                 data = response.json()
                 analysis_data = data.get("analysis", {})
                 detected_shape = analysis_data.get("detected_face_shape")
@@ -106,6 +115,7 @@ def evaluate_detection_and_shape(test_image_paths: List[Path]) -> dict:
         "details": {
             "total_images": total_processed,
             "successful_detections": successful_detections,
+            "request_latencies_ms": request_latencies_ms,
             "individual_results": results
         }
     }
@@ -172,9 +182,82 @@ def evaluate_inference_latency(test_image_paths: List[Path], num_runs: int = 10)
         "details": {"num_runs_requested": num_runs, "num_runs_successful": len(latencies), "latencies_ms": latencies}
     }
 
+def evaluate_analysis_levels(test_image_paths: List[Path], num_images: int = 20) -> dict:
+    """
+    Latence de /analyze_face par niveau d'analyse (pose, landmarks, full) sur les mêmes images.
+    Les niveaux sont alternés image par image : une dérive de la machine les affecte tous pareil.
+    """
+    image_paths = [p for p in test_image_paths if p.is_file()][:num_images]
+    logger.info(f"Latence par niveau d'analyse sur {len(image_paths)} images...")
+    latencies = {level: [] for level in ANALYSIS_LEVELS}
+    response_bytes = {level: [] for level in ANALYSIS_LEVELS}
+    for index, image_path in enumerate(image_paths):
+        image_bytes = image_path.read_bytes()
+        extension = image_path.suffix.lower().strip('.')
+        mime_type = f"image/{extension}" if extension in ['jpg', 'jpeg', 'png', 'bmp'] else 'application/octet-stream'
+        # Ordre des niveaux tourné à chaque image (le premier appel profite des caches froids en moins)
+        for level in ANALYSIS_LEVELS[index % 3:] + ANALYSIS_LEVELS[:index % 3]:
+            try:
+                start_time = time.perf_counter()
+                response = requests.post(ANALYZE_FACE_ENDPOINT, files={"image_file": (image_path.name, image_bytes, mime_type)},
+                                         data={"analysis_level": level}, timeout=15)
+                response.raise_for_status()
+                latencies[level].append((time.perf_counter() - start_time) * 1000)
+                response_bytes[level].append(len(response.content))
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erreur API ({level}) pour {image_path.name}: {e}")
+
+    levels = {}
+    for level in ANALYSIS_LEVELS:
+        values = latencies[level]
+        levels[level] = {
+            "mean_ms": float(np.mean(values)) if values else -1,
+            "median_ms": float(np.median(values)) if values else -1,
+            "p95_ms": float(np.percentile(values, 95)) if values else -1,
+            "mean_response_bytes": float(np.mean(response_bytes[level])) if values else -1,
+            "latencies_ms": values,
+        }
+        logger.info(f"Niveau {level}: médiane {levels[level]['median_ms']:.2f} ms ({len(values)} appels)")
+    return levels
+
+def _portable_path(path: Path) -> str:
+    """ Chemin relatif à BASE_DIR, séparateurs '/' (absolu seulement hors du projet). """
+    try:
+        return path.resolve().relative_to(settings.BASE_DIR.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def record_history(report: dict, history_path: Path) -> dict:
+    """
+    Ajoute l'exécution à l'historique (benchmark/history.py) : latences de chaque requête de la
+    passe de détection, latences répétées sur une image et débit par fenêtre de 10 requêtes.
+    """
+    metrics_by_name = {m.get("metric"): m for m in report.get("metrics", [])}
+    details = metrics_by_name.get("facial_detection_precision", {}).get("details", {})
+    latency_details = metrics_by_name.get("inference_latency_ms", {}).get("details", {})
+    request_latencies = details.get("request_latencies_ms", []) if isinstance(details, dict) else []
+    repeated_latencies = latency_details.get("latencies_ms", []) if isinstance(latency_details, dict) else []
+    level_metrics = {f"{level}_level_latency_ms": metric(stats["latencies_ms"], "ms")
+                     for level, stats in report.get("analysis_levels", {}).items()}
+    return append_run(
+        "optical_factory_evaluation",
+        {
+            "request_latency_ms": metric(request_latencies, "ms"),
+            "repeated_latency_ms": metric(repeated_latencies, "ms"),
+            "throughput_rps": metric(windowed_throughput([v / 1000 for v in request_latencies]), "req/s", higher_is_better=True),
+            **level_metrics,
+        },
+        context={
+            "api_url": report.get("api_url"),
+            "test_data_source": report.get("test_data_source"),
+            "detection_precision": metrics_by_name.get("facial_detection_precision", {}).get("value"),
+        },
+        history_path=history_path,
+    )
+
 # --- Fonction Principale du Benchmark ---
 
-def generate_evaluation_report(test_data_path: Path):
+def generate_evaluation_report(test_data_path: Path, latency_runs: int = 10, level_images: int = 20):
     """
     Génère un rapport d'évaluation complet en exécutant les différentes métriques.
     """
@@ -183,7 +266,7 @@ def generate_evaluation_report(test_data_path: Path):
         "project": "Optical Factory",
         "evaluation_date": time.strftime("%Y-%m-%d %H:%M:%S"),
         "api_url": API_BASE_URL, # Depuis settings
-        "test_data_source": str(test_data_path),
+        "test_data_source": _portable_path(test_data_path), # Relatif au projet : comparable entre machines
         "target_criteria": TARGET_CRITERIA, # Inclut les seuils utilisés
         "metrics": []
     }
@@ -214,11 +297,17 @@ def generate_evaluation_report(test_data_path: Path):
         report["metrics"].append({"metric": "facial_detection_precision", "status": "Erreur Script", "error": str(e)})
 
     try:
-        report["metrics"].append(evaluate_inference_latency(test_image_paths, num_runs=10))
+        report["metrics"].append(evaluate_inference_latency(test_image_paths, num_runs=latency_runs))
     except Exception as e:
         logger.error(f"Erreur lors de l'évaluation de latence: {e}", exc_info=True)
         report["metrics"].append({"metric": "inference_latency_ms", "status": "Erreur Script", "error": str(e)})
 
+    # Latence par niveau d'analyse : informative, hors critères cibles
+    if level_images > 0:
+        try:
+            report["analysis_levels"] = evaluate_analysis_levels(test_image_paths, num_images=level_images)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'évaluation par niveau d'analyse: {e}", exc_info=True)
 
     # --- Calcule le résumé global ---
     total_criteria = len(report["metrics"])
@@ -235,6 +324,13 @@ def generate_evaluation_report(test_data_path: Path):
 # --- Exécution du Script ---
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Évalue l'API (détection, latence) et enregistre l'exécution dans l'historique.")
+    parser.add_argument("--latency-runs", type=int, default=10, help="Appels répétés pour la mesure de latence.")
+    parser.add_argument("--level-images", type=int, default=20, help="Images pour la latence par niveau d'analyse (0 = désactivé).")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH, help="Historique JSONL des exécutions.")
+    parser.add_argument("--no-history", action="store_true", help="N'ajoute pas l'exécution à l'historique.")
+    args = parser.parse_args()
+
     # Vérifie si l'API est accessible
     logger.info(f"Vérification de l'API à {API_BASE_URL}...")
     api_ok = False
@@ -263,7 +359,7 @@ if __name__ == "__main__":
 
     # Génère le rapport
     logger.info(f"Lancement de la génération du rapport avec les données de {TEST_DATA_DIR}...")
-    final_report = generate_evaluation_report(TEST_DATA_DIR) # Utilise TEST_DATA_DIR global
+    final_report = generate_evaluation_report(TEST_DATA_DIR, latency_runs=args.latency_runs, level_images=args.level_images) # Utilise TEST_DATA_DIR global
 
     # Affiche le résumé
     print("\n" + "="*15 + " RÉSUMÉ DE L'ÉVALUATION " + "="*15)
@@ -286,6 +382,12 @@ if __name__ == "__main__":
 
         print(f"  - {metric_result.get('metric', 'Inconnue'):<30}: {value_str:<15} (Seuil: {metric_result.get('threshold', 'N/A')}) -> {metric_result.get('status', 'N/A')}")
 
+    if final_report.get("analysis_levels"):
+        print("\nLatence par niveau d'analyse (/analyze_face):")
+        for level, stats in final_report["analysis_levels"].items():
+            print(f"  - {level:<10}: moyenne {stats['mean_ms']:8.2f} ms | médiane {stats['median_ms']:8.2f} ms | "
+                  f"p95 {stats['p95_ms']:8.2f} ms | réponse {stats['mean_response_bytes']:8.0f} octets")
+
     # Sauvegarde le rapport
     logger.info(f"Sauvegarde du rapport dans {OUTPUT_REPORT_PATH}...")
     try:
@@ -295,4 +397,8 @@ if __name__ == "__main__":
             json.dump(final_report, f, indent=2)
         logger.info(f"Rapport d'évaluation complet sauvegardé.")
     except Exception as e:
-        logger.error(f"Erreur lors de la sauvegarde du rapport JSON : {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Erreur lors de la sauvegarde du rapport JSON : {e}", exc_info=True)
+
+    # Historique (ajout seul) : comparer avec python -m benchmark.history compare
+    if not args.no_history and "error" not in final_report:
+        record_history(final_report, args.history)
\ No newline at end of file
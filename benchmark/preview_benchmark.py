@@ -0,0 +1,140 @@
+# benchmark/preview_benchmark.py
+"""
+Coût du compositeur d'aperçus d'essayage (src/core/preview.py), sur un cœur (cv2.setNumThreads(1)).
+
+Les poses des images de benchmark/test_data sont estimées une fois (analyse "pose", hors mesure).
+Mesures :
+  - sprite     : rendu d'un sprite depuis l'OBJ (une fois par monture et tranche d'angles) ;
+  - composite  : placement + warpAffine + mélange sur l'image déjà décodée et réduite ;
+  - aperçu     : chaîne complète d'un lot sans cache (décodage, réduction, composition par monture,
+                 encodage JPEG), sprites déjà en mémoire ;
+  - cache      : aperçu relu depuis le cache disque (empreinte SHA-256 comprise).
+Le résultat est ajouté à l'historique (benchmark/history.py) sous "preview_benchmark".
+
+Usage :
+    python -m benchmark.preview_benchmark [--images 20] [--max-size 800] [--repeats 5]
+"""
+import argparse
+import hashlib
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from benchmark.history import DEFAULT_HISTORY_PATH, append_run, metric, windowed_throughput
+from src.core.config import settings
+from src.core.preview import (PreviewCache, SpriteCache, fit_preview_size, preview_variant, render_preview,
+                              render_previews, sprite_placement)
+
+logger = logging.getLogger("benchmark.preview_benchmark")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+
+
+def load_posed_images(test_data_dir: Path, num_images: int) -> List[Dict]:
+    """ Images de test avec visage détecté : octets, image décodée et matrice de pose. """
+    from src.core.processing import analyze_face_from_image_bytes
+    posed = []
+    for path in sorted(test_data_dir.glob("*.jp*g")):
+        image_bytes = path.read_bytes()
+        result = analyze_face_from_image_bytes(image_bytes, analysis_level="pose")
+        if not result.detection_successful or result.facial_transformation_matrix is None:
+            continue
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        posed.append({"bytes": image_bytes, "image": image, "matrix": np.asarray(result.facial_transformation_matrix)})
+        if len(posed) == num_images:
+            break
+    return posed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Coût du compositeur CPU d'aperçus d'essayage.")
+    parser.add_argument("--test-data", type=Path, default=TEST_DATA_DIR)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--models", nargs="+", default=list(settings.MODEL_IDS_TO_PATHS))
+    parser.add_argument("--max-size", type=int, default=settings.PREVIEW_MAX_SIZE, help="Côté le plus long des aperçus (px).")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes sur les images pour la composition.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true")
+    args = parser.parse_args(argv)
+    cv2.setNumThreads(1)
+    settings.PREVIEW_MAX_SIZE = args.max_size
+
+    posed = load_posed_images(args.test_data, args.images)
+    if not posed:
+        logger.error(f"Aucun visage détecté dans {args.test_data}.")
+        return 1
+    logger.info(f"{len(posed)} images avec pose, {len(args.models)} montures.")
+
+    # Sprites : toutes les tranches utilisées par les images, rendues à froid (sans disque)
+    sprites = SpriteCache()
+    sprite_ms = []
+    for item in posed:
+        resized = fit_preview_size(item["image"])
+        item["resized"] = resized
+        (pitch, yaw), _, _, _ = sprite_placement(item["matrix"], resized.shape[1], resized.shape[0])
+        for model_id in args.models:
+            before = sprites.rendered
+            start = time.perf_counter()
+            sprites.get(model_id, pitch, yaw)
+            if sprites.rendered > before:
+                sprite_ms.append((time.perf_counter() - start) * 1000)
+
+    composite_ms = []
+    for _ in range(args.repeats):
+        for item in posed:
+            for model_id in args.models:
+                start = time.perf_counter()
+                render_preview(item["resized"], item["matrix"], model_id, sprites)
+                composite_ms.append((time.perf_counter() - start) * 1000)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PreviewCache(Path(cache_dir))
+        preview_ms, hit_ms, preview_bytes = [], [], []
+        for item in posed:
+            start = time.perf_counter()
+            previews = render_previews(item["bytes"], item["matrix"], args.models, sprites, cache)
+            preview_ms.append((time.perf_counter() - start) * 1000 / len(args.models))
+            preview_bytes.extend(len(jpeg) for jpeg in previews.values())
+        for item in posed:
+            start = time.perf_counter()
+            digest = hashlib.sha256(item["bytes"]).hexdigest()
+            for model_id in args.models:
+                cache.get(digest, model_id, preview_variant(sprites.mesh(model_id)))
+            hit_ms.append((time.perf_counter() - start) * 1000 / len(args.models))
+
+    composite_rate = 1000 / float(np.mean(composite_ms))
+    preview_rate = 1000 / float(np.mean(preview_ms))
+    print(f"\n--- Aperçus d'essayage (1 cœur, {args.max_size} px max) ---")
+    print(f"  sprite (rendu OBJ)   : médiane {np.median(sprite_ms):.1f} ms ({len(sprite_ms)} sprites)" if sprite_ms else "  sprite : aucun rendu")
+    print(f"  composition seule    : médiane {np.median(composite_ms):.2f} ms | {composite_rate:.0f} aperçus/s")
+    print(f"  aperçu JPEG complet  : médiane {np.median(preview_ms):.2f} ms | {preview_rate:.0f} aperçus/s"
+          f" | {np.mean(preview_bytes) / 1024:.1f} Ko")
+    print(f"  cache (relecture)    : médiane {np.median(hit_ms):.3f} ms")
+
+    if not args.no_history:
+        append_run(
+            "preview_benchmark",
+            {
+                "sprite_render_ms": metric(sprite_ms, "ms"),
+                "composite_ms": metric(composite_ms, "ms"),
+                "composite_throughput_per_core": metric(windowed_throughput([v / 1000 for v in composite_ms]), "previews/s", higher_is_better=True),
+                "preview_ms": metric(preview_ms, "ms"),
+                "cache_hit_ms": metric(hit_ms, "ms"),
+            },
+            context={"images": len(posed), "models": args.models, "max_size": args.max_size, "repeats": args.repeats,
+                     "sprite_px_per_cm": settings.PREVIEW_SPRITE_PX_PER_CM},
+            history_path=args.history,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger("src").setLevel(logging.WARNING)  # Une ligne par analyse sinon
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# benchmark/quality_gate_benchmark.py
+"""
+Efficacité du pré-contrôle qualité (src/core/quality.py) sur benchmark/test_data.
+
+Chaque image est mesurée par le pré-contrôle PUIS passée à Mediapipe (quelle que soit la
+décision), ce qui donne pour les seuils courants (QUALITY_* via .env / variables d'environnement) :
+  - le calcul économisé : temps de détection des images rejetées - coût du pré-contrôle sur toutes ;
+  - le taux de faux rejets : images rejetées sur lesquelles Mediapipe détecte pourtant un visage ;
+  - la part des échecs de détection interceptés.
+Avec --degrade, des variantes dégradées (flou, sous/surexposition, miniature, image uniforme)
+de chaque image sont ajoutées pour éprouver les seuils.
+
+Usage :
+    python -m benchmark.quality_gate_benchmark [--data-dir benchmark/test_data] [--degrade] [--output rapport.json]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from benchmark.history import settings_snapshot
+from src.core.config import settings
+from src.core.decoding import decode_image_rgb
+from src.core.models import get_face_landmarker
+from src.core.quality import assess_image_quality
+
+logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.quality")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def _degradations() -> Dict[str, Callable[[np.ndarray], np.ndarray]]:
+    """ Variantes dégradées d'une image RGB. """
+    def blur(image):
+        return cv2.GaussianBlur(image, (0, 0), max(image.shape[:2]) / 40)
+
+    def underexposed(image):
+        return (image * 0.02).astype(np.uint8)
+
+    def overexposed(image):
+        return np.clip(image.astype(np.int32) * 6 + 120, 0, 255).astype(np.uint8)
+
+    def thumbnail(image):
+        height, width = image.shape[:2]
+        return cv2.resize(image, (24, max(1, round(24 * height / width))), interpolation=cv2.INTER_AREA)
+
+    def flat(image):
+        return np.full_like(image, int(image.mean()))
+
+    return {"flou": blur, "sous_exposee": underexposed, "surexposee": overexposed, "miniature": thumbnail, "uniforme": flat}
+
+
+def iter_samples(data_dir: Path, degrade: bool) -> Iterator[Tuple[str, str, np.ndarray]]:
+    """ (nom, variante, image RGB) pour chaque image décodable du dossier. """
+    degradations = _degradations() if degrade else {}
+    for path in sorted(p for p in data_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS):
+        image = decode_image_rgb(path.read_bytes())
+        if image is None:
+            logger.warning(f"Image indécodable ignorée : {path.name}")
+            continue
+        yield path.name, "originale", image
+        for name, degradation in degradations.items():
+            yield path.name, name, np.ascontiguousarray(degradation(image))
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    """ Calcul économisé, faux rejets et échecs interceptés pour une liste de mesures. """
+    rejected = [s for s in samples if s["rejected"]]
+    detected = [s for s in samples if s["detected"]]
+    failures = [s for s in samples if not s["detected"]]
+    false_rejects = [s for s in rejected if s["detected"]]
+    detect_ms = sum(s["detect_ms"] for s in samples)
+    gate_ms = sum(s["gate_ms"] for s in samples)
+    saved_ms = sum(s["detect_ms"] for s in rejected) - gate_ms
+    return {
+        "num_samples": len(samples),
+        "num_detection_failures": len(failures),
+        "num_rejected": len(rejected),
+        "false_rejects": len(false_rejects),
+        "false_reject_rate": len(false_rejects) / len(detected) if detected else 0.0,
+        "failures_intercepted": len(rejected) - len(false_rejects),
+        "failure_interception_rate": (len(rejected) - len(false_rejects)) / len(failures) if failures else 0.0,
+        "detect_ms_total": detect_ms,
+        "gate_ms_total": gate_ms,
+        "gate_ms_mean": gate_ms / len(samples) if samples else 0.0,
+        "net_saved_ms": saved_ms,
+        "net_saved_fraction": saved_ms / detect_ms if detect_ms > 0 else 0.0,
+        "reasons": sorted({s["reason"] for s in rejected}),
+    }
+
+
+def run_quality_gate_benchmark(data_dir: Path, degrade: bool = False) -> Dict:
+    landmarker = get_face_landmarker()
+    if landmarker is None:
+        raise RuntimeError("FaceLandmarker non disponible.")
+    samples = []
+    for name, variant, image in iter_samples(data_dir, degrade):
+        start = time.perf_counter()
+        report = assess_image_quality(image)
+        gate_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        result = landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=image))
+        detect_ms = (time.perf_counter() - start) * 1000
+        samples.append({
+            "image": name,
+            "variant": variant,
+            "rejected": not report.accepted,
+            "reason": report.reason.split(" (")[0] if report.reason else None,
+            "detected": bool(result.face_landmarks),
+            "gate_ms": gate_ms,
+            "detect_ms": detect_ms,
+        })
+    variants = sorted({s["variant"] for s in samples})
+    return {
+        "evaluation_date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "thresholds": settings_snapshot("QUALITY_"),
+        "overall": summarize(samples),
+        "per_variant": {variant: summarize([s for s in samples if s["variant"] == variant]) for variant in variants},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mesure le calcul économisé et les faux rejets du pré-contrôle qualité.")
+    parser.add_argument("--data-dir", type=Path, default=TEST_DATA_DIR, help="Dossier d'images.")
+    parser.add_argument("--degrade", action="store_true", help="Ajoute des variantes dégradées de chaque image.")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    report = run_quality_gate_benchmark(args.data_dir, args.degrade)
+
+    print("\n" + "=" * 15 + " PRÉ-CONTRÔLE QUALITÉ " + "=" * 15)
+    for variant, summary in [("TOTAL", report["overall"])] + list(report["per_variant"].items()):
+        print(f"  - {variant:<13}: {summary['num_samples']:>4} images | échecs détection {summary['num_detection_failures']:>4} | "
+              f"rejetées {summary['num_rejected']:>4} | faux rejets {summary['false_rejects']:>3} ({summary['false_reject_rate']:.1%}) | "
+              f"échecs interceptés {summary['failure_interception_rate']:.1%} | calcul économisé {summary['net_saved_ms']:8.1f} ms "
+              f"({summary['net_saved_fraction']:.1%}) | pré-contrôle {summary['gate_ms_mean']:.2f} ms/image")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
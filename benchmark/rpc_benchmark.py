@@ -0,0 +1,211 @@
+# benchmark/rpc_benchmark.py
+"""
+Comparaison REST (multipart + JSON) / RPC binaire (src/api/rpc.py) sur les mêmes images.
+
+Cible : une instance lancée avec RPC_ENABLED=true. Les images de benchmark/test_data sont
+réduites (--max-side, petites images : cas où le coût du protocole pèse le plus) et encodées
+en JPEG une fois. Mesures, client compris (décodage JSON / protobuf de la réponse) :
+  - séquentiel : latence par appel de /api/v1/analyze_face et d'AnalyzeFace, alternés image par
+    image (une dérive de la machine affecte les deux protocoles pareil) ;
+  - débit : --window requêtes en vol ; REST : clients httpx concurrents (une connexion chacun) ;
+    RPC : appels AnalyzeFace pipelinés sur une connexion, et flux Analyze (images traitées une
+    à une dans l'ordre, comme une vidéo lissée par session) ;
+  - taille des réponses et écart maximal des landmarks entre les deux protocoles (float32).
+Le résultat est ajouté à l'historique (benchmark/history.py) sous "rpc_benchmark".
+
+Usage :
+    RPC_ENABLED=true uvicorn src.main:app &
+    python -m benchmark.rpc_benchmark [--images 20] [--max-side 320] [--rounds 3] [--window 8]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import httpx
+import numpy as np
+
+from benchmark.history import DEFAULT_HISTORY_PATH, append_run, metric, windowed_throughput
+from src.api.rpc import RpcClient
+from src.core.config import settings
+
+logger = logging.getLogger("benchmark.rpc_benchmark")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+ANALYZE_FACE_PATH = "/api/v1/analyze_face"
+
+
+def load_images(test_data_dir: Path, num_images: int, max_side: int) -> List[bytes]:
+    """ Images de test réduites à max_side (côté le plus long) et encodées en JPEG. """
+    images = []
+    for path in sorted(p for p in test_data_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES):
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        scale = max_side / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        images.append(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+        if len(images) == num_images:
+            break
+    return images
+
+
+def _rest_landmarks(body: Dict) -> Optional[np.ndarray]:
+    if not body.get("face_landmarks"):
+        return None
+    return np.array([(lm["x"], lm["y"], lm["z"]) for lm in body["face_landmarks"]], dtype=np.float64)
+
+
+def sequential_latencies(images: List[bytes], rest: httpx.Client, rpc: RpcClient) -> Dict:
+    """ Latences (ms) appel par appel, protocoles alternés ; tailles de réponse et écart des landmarks. """
+    latencies = {"rest": [], "rpc": []}
+    response_bytes = {"rest": [], "rpc": []}
+    max_landmark_delta = 0.0
+    for index, image in enumerate(images):
+        results = {}
+        for protocol in (("rest", "rpc") if index % 2 == 0 else ("rpc", "rest")):
+            start = time.perf_counter()
+            if protocol == "rest":
+                response = rest.post(ANALYZE_FACE_PATH, files={"image_file": ("image.jpg", image, "image/jpeg")})
+                response.raise_for_status()
+                results[protocol] = _rest_landmarks(response.json())
+                size = len(response.content)
+            else:
+                received = rpc.bytes_received
+                results[protocol] = rpc.analyze_face(image)["face_landmarks"]
+                size = rpc.bytes_received - received
+            latencies[protocol].append((time.perf_counter() - start) * 1000)
+            response_bytes[protocol].append(size)
+        if results["rest"] is not None and results["rpc"] is not None:
+            max_landmark_delta = max(max_landmark_delta, float(np.abs(results["rest"] - results["rpc"]).max()))
+    return {"latencies_ms": latencies, "response_bytes": response_bytes, "max_landmark_delta": max_landmark_delta}
+
+
+async def _rest_throughput(images: List[bytes], base_url: str, window: int) -> float:
+    """ Requêtes/s avec `window` clients concurrents (une connexion keep-alive chacun). """
+    queue: asyncio.Queue = asyncio.Queue()
+    for image in images:
+        queue.put_nowait(image)
+
+    async def worker():
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            while not queue.empty():
+                image = queue.get_nowait()
+                response = await client.post(ANALYZE_FACE_PATH, files={"image_file": ("image.jpg", image, "image/jpeg")})
+                response.raise_for_status()
+                response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(window)))
+    return len(images) / (time.perf_counter() - start)
+
+
+def throughput(images: List[bytes], base_url: str, rpc: RpcClient, window: int) -> Dict[str, float]:
+    """ Débit (requêtes/s) des deux protocoles avec `window` requêtes en vol. """
+    rates = {"rest": asyncio.run(_rest_throughput(images, base_url, window))}
+    for name, call in (("rpc_pipelined", rpc.analyze_face_pipelined), ("rpc_stream", rpc.analyze_stream)):
+        start = time.perf_counter()
+        count = sum(1 for _ in call(({"image": image} for image in images), window=window))
+        rates[name] = count / (time.perf_counter() - start)
+    return rates
+
+
+def _stats(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"mean": -1, "median": -1, "p95": -1}
+    return {"mean": float(np.mean(values)), "median": float(np.median(values)), "p95": float(np.percentile(values, 95))}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark REST vs RPC binaire sur les mêmes images.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rpc-host", default="127.0.0.1")
+    parser.add_argument("--rpc-port", type=int, default=settings.RPC_PORT)
+    parser.add_argument("--test-data", type=Path, default=TEST_DATA_DIR)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--max-side", type=int, default=320, help="Côté le plus long des images envoyées (px).")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes sur les images (séquentiel et débit).")
+    parser.add_argument("--window", type=int, default=8, help="Requêtes en vol pour la mesure de débit.")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON détaillé.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true")
+    args = parser.parse_args(argv)
+
+    images = load_images(args.test_data, args.images, args.max_side)
+    if not images:
+        logger.error(f"Aucune image dans {args.test_data}.")
+        return 1
+    logger.info(f"{len(images)} images (JPEG, {args.max_side} px max, {np.mean([len(i) for i in images]) / 1024:.1f} Ko en moyenne).")
+
+    latencies = {"rest": [], "rpc": []}
+    response_bytes = {"rest": [], "rpc": []}
+    throughputs = {"rest": [], "rpc_pipelined": [], "rpc_stream": []}
+    max_landmark_delta = 0.0
+    with httpx.Client(base_url=args.base_url, timeout=60) as rest, RpcClient(args.rpc_host, args.rpc_port, timeout=60) as rpc:
+        # Échauffement : premier appel de chaque protocole hors mesure
+        rest.post(ANALYZE_FACE_PATH, files={"image_file": ("image.jpg", images[0], "image/jpeg")}).raise_for_status()
+        rpc.analyze_face(images[0])
+        for round_index in range(args.rounds):
+            sequential = sequential_latencies(images, rest, rpc)
+            for protocol in latencies:
+                latencies[protocol].extend(sequential["latencies_ms"][protocol])
+                response_bytes[protocol].extend(sequential["response_bytes"][protocol])
+            max_landmark_delta = max(max_landmark_delta, sequential["max_landmark_delta"])
+            for protocol, value in throughput(images, args.base_url, rpc, args.window).items():
+                throughputs[protocol].append(value)
+            logger.info(f"Passe {round_index + 1}/{args.rounds} terminée.")
+
+    report = {
+        "images": len(images),
+        "max_side": args.max_side,
+        "window": args.window,
+        "latency_ms": {protocol: _stats(values) for protocol, values in latencies.items()},
+        "mean_response_bytes": {protocol: float(np.mean(values)) for protocol, values in response_bytes.items()},
+        "throughput_rps": {protocol: float(np.median(values)) for protocol, values in throughputs.items()},
+        "max_landmark_delta": max_landmark_delta,
+    }
+    print("\n--- REST (multipart + JSON) vs RPC binaire (protobuf) ---")
+    for protocol in ("rest", "rpc"):
+        stats = report["latency_ms"][protocol]
+        print(f"  {protocol:4s} : médiane {stats['median']:.2f} ms | moyenne {stats['mean']:.2f} ms | p95 {stats['p95']:.2f} ms"
+              f" | réponse {report['mean_response_bytes'][protocol] / 1024:.1f} Ko")
+    print(f"  débit ({args.window} en vol) : REST {report['throughput_rps']['rest']:.1f} req/s"
+          f" | RPC pipeliné {report['throughput_rps']['rpc_pipelined']:.1f} req/s"
+          f" | RPC flux {report['throughput_rps']['rpc_stream']:.1f} req/s")
+    print(f"  écart max des landmarks (float32) : {max_landmark_delta:.2e}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**report, "latencies_ms": latencies}, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    if not args.no_history:
+        append_run(
+            "rpc_benchmark",
+            {
+                "rest_latency_ms": metric(latencies["rest"], "ms"),
+                "rpc_latency_ms": metric(latencies["rpc"], "ms"),
+                "rest_sequential_throughput_rps": metric(windowed_throughput([v / 1000 for v in latencies["rest"]]), "req/s", higher_is_better=True),
+                "rpc_sequential_throughput_rps": metric(windowed_throughput([v / 1000 for v in latencies["rpc"]]), "req/s", higher_is_better=True),
+                "rest_concurrent_throughput_rps": metric(throughputs["rest"], "req/s", higher_is_better=True),
+                "rpc_pipelined_throughput_rps": metric(throughputs["rpc_pipelined"], "req/s", higher_is_better=True),
+                "rpc_stream_throughput_rps": metric(throughputs["rpc_stream"], "req/s", higher_is_better=True),
+            },
+            context={"images": len(images), "max_side": args.max_side, "window": args.window, "rounds": args.rounds,
+                     "base_url": args.base_url, "rpc": f"{args.rpc_host}:{args.rpc_port}"},
+            history_path=args.history,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # Une ligne par requête sinon
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# benchmark/serialization_benchmark.py
+"""
+Coût de sérialisation d'une réponse /analyze_and_recommend (en processus, sans réseau).
+
+Compare, pour un même AnalyzeAndRecommendResult (478 landmarks) :
+  - fastapi_default : chemin FastAPI par défaut (validation response_model + jsonable_encoder + JSONResponse)
+  - model_dump_json : sérialiseur pydantic
+  - fast_response   : FastJSONResponse (landmarks et matrice écrits depuis NumPy)
+
+Usage :
+    python -m benchmark.serialization_benchmark [--image benchmark/test_data/x.jpg] [--repeats 500]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from src.api.endpoints import router
+from src.api.responses import FastJSONResponse
+from src.core.config import settings
+from src.schemas.schemas import AnalyzeAndRecommendResult, FaceAnalysisResult, RecommendationResult
+
+logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.serialization")
+
+NUM_LANDMARKS = 478
+
+
+def synthetic_analysis(seed: int = 0) -> FaceAnalysisResult:
+    """ Résultat d'analyse réaliste (valeurs float32 comme Mediapipe), tableaux NumPy attachés. """
+    rng = np.random.default_rng(seed)
+    landmarks = rng.random((NUM_LANDMARKS, 3), dtype=np.float32).astype(np.float64)
+    matrix = np.eye(4, dtype=np.float32) + rng.normal(0, 0.05, (4, 4)).astype(np.float32)
+    result = FaceAnalysisResult(
+        detection_successful=True,
+        facial_transformation_matrix=matrix.tolist(),
+        face_landmarks=[{"x": x, "y": y, "z": z} for x, y, z in landmarks.tolist()],
+        detected_face_shape="long",
+    )
+    result.attach_arrays(landmarks=landmarks, matrix=matrix)
+    return result
+
+
+def build_response_model(image: Optional[Path]) -> AnalyzeAndRecommendResult:
+    """ Réponse à sérialiser : analyse réelle de l'image si fournie, sinon synthétique. """
+    analysis = synthetic_analysis()
+    if image is not None:
+        from src.core.processing import analyze_face_from_image_bytes
+        analysis = analyze_face_from_image_bytes(image.read_bytes())
+        if not analysis.detection_successful:
+            logger.warning(f"Aucun visage dans {image}, utilisation d'un résultat synthétique.")
+            analysis = synthetic_analysis()
+    recommendation = RecommendationResult(
+        recommended_glasses_ids=["sunglass_model_2", "sunglass_model_3"],
+        analysis_info="Forme de visage simplifiée utilisée : Long",
+    )
+    return AnalyzeAndRecommendResult(analysis=analysis, recommendation=recommendation)
+
+
+def _fastapi_default_serializer() -> Callable[[AnalyzeAndRecommendResult], bytes]:
+    """ Reproduit le chemin FastAPI d'un endpoint retournant le modèle (response_model du routeur). """
+    route = next(r for r in router.routes if getattr(r, "path", None) == "/analyze_and_recommend")
+    field = getattr(route, "secure_cloned_response_field", None) or route.response_field
+    loop = asyncio.new_event_loop()
+
+    def serialize(model: AnalyzeAndRecommendResult) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model))
+        return JSONResponse(content=content).body
+
+    return serialize
+
+
+def time_serializer(serialize: Callable[[AnalyzeAndRecommendResult], bytes], model: AnalyzeAndRecommendResult, repeats: int) -> Dict:
+    """ Temps par réponse (µs) : médiane et p95 sur `repeats` sérialisations. """
+    serialize(model)  # Échauffement
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        body = serialize(model)
+        timings[i] = time.perf_counter() - start
+    return {
+        "median_us": float(np.median(timings) * 1e6),
+        "p95_us": float(np.percentile(timings, 95) * 1e6),
+        "bytes": len(body),
+    }
+
+
+def run_serialization_benchmark(model: AnalyzeAndRecommendResult, repeats: int = 500) -> Dict:
+    """ Compare les sérialiseurs et vérifie qu'ils produisent le même JSON. """
+    serializers = {
+        "fastapi_default": _fastapi_default_serializer(),
+        "model_dump_json": lambda m: m.model_dump_json().encode("utf-8"),
+        "fast_response": lambda m: FastJSONResponse(content=m).body,
+    }
+    reference = json.loads(serializers["fastapi_default"](model))
+    results = {}
+    for name, serialize in serializers.items():
+        results[name] = time_serializer(serialize, model, repeats)
+        results[name]["same_json"] = json.loads(serialize(model)) == reference
+    baseline = results["fastapi_default"]["median_us"]
+    for entry in results.values():
+        entry["speedup"] = baseline / entry["median_us"] if entry["median_us"] > 0 else 0.0
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mesure le coût de sérialisation d'une réponse d'analyse.")
+    parser.add_argument("--image", type=Path, default=None, help="Image analysée pour construire la réponse (sinon synthétique).")
+    parser.add_argument("--repeats", type=int, default=500, help="Nombre de sérialisations par méthode.")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    args = parser.parse_args(argv)
+
+    results = run_serialization_benchmark(build_response_model(args.image), args.repeats)
+
+    print("\n" + "=" * 15 + " SÉRIALISATION D'UNE RÉPONSE /analyze_and_recommend " + "=" * 15)
+    for name, entry in results.items():
+        print(f"  - {name:<16}: médiane {entry['median_us']:8.1f} µs | p95 {entry['p95_us']:8.1f} µs | "
+              f"{entry['bytes']} octets | x{entry['speedup']:.1f} | JSON identique : {entry['same_json']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    return 0 if all(entry["same_json"] for entry in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
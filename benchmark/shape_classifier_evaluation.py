@@ -0,0 +1,179 @@
+# benchmark/shape_classifier_evaluation.py
+"""
+Évaluation (précision + débit) des classifieurs de forme sur un manifeste annoté.
+
+Manifeste CSV (chemins relatifs au fichier manifeste) :
+    image,label
+    photos/001.jpg,long
+    photos/002.jpg,proportionné
+
+Usage :
+    python -m benchmark.shape_classifier_evaluation manifest.csv \
+        --classifier models/shape_classifiers/rules_v1.json [--classifier autre.json] \
+        [--landmarks-cache landmarks.npz] [--fit-nearest-centroid models/shape_classifiers/nc_v1.json --version nc-v1]
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.shape_classifier import (
+    FaceShapeClassifier,
+    UNKNOWN_SHAPE,
+    extract_geometry_features,
+    fit_nearest_centroid,
+    load_classifier,
+    save_classifier,
+)
+
+logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark.shape")
+
+NUM_LANDMARKS = 478
+OUTPUT_REPORT_PATH = settings.BASE_DIR / "benchmark" / "shape_classifier_results.json"
+
+
+def load_manifest(manifest_path: Path) -> List[Tuple[Path, str]]:
+    """ Lit le manifeste CSV (colonnes image, label). """
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            entries.append((manifest_path.parent / row["image"], row["label"].strip().lower()))
+    return entries
+
+
+def extract_landmarks(image_paths: List[Path]) -> np.ndarray:
+    """ Détection en processus (sans API HTTP). Les échecs de détection donnent des lignes NaN. """
+    from src.core.processing import analyze_face_from_image_bytes
+    landmarks = np.full((len(image_paths), NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    for i, path in enumerate(image_paths):
+        result = analyze_face_from_image_bytes(path.read_bytes())
+        if result.face_landmarks:
+            points = np.array([(lm.x, lm.y, lm.z) for lm in result.face_landmarks], dtype=np.float32)
+            landmarks[i, :len(points)] = points[:NUM_LANDMARKS]
+        else:
+            logger.warning(f"Pas de landmarks pour {path.name}: {result.error_message}")
+    return landmarks
+
+
+def evaluate_classifier(classifier: FaceShapeClassifier, landmarks: np.ndarray, labels: List[str], repeats: int = 20) -> Dict:
+    """ Précision (globale, sur visages détectés, par forme) et coût par appel d'un classifieur. """
+    labels_arr = np.array(labels)
+    predictions = classifier.classify_batch(landmarks)
+    correct = predictions == labels_arr
+    detected = ~np.isnan(landmarks).any(axis=(1, 2))
+
+    confusion: Dict[str, Dict[str, int]] = {}
+    for truth, predicted in zip(labels_arr.tolist(), predictions.tolist()):
+        confusion.setdefault(truth, {}).setdefault(predicted, 0)
+        confusion[truth][predicted] += 1
+    per_label_recall = {label: float(correct[labels_arr == label].mean()) for label in sorted(set(labels))}
+
+    # Débit vectorisé (tout le lot) et coût d'un appel unitaire (1 visage)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        classifier.classify_batch(landmarks)
+    batch_elapsed = time.perf_counter() - start
+    single = landmarks[:1]
+    start = time.perf_counter()
+    for _ in range(repeats * 10):
+        classifier.classify_batch(single)
+    single_elapsed = time.perf_counter() - start
+
+    accuracy = float(correct.mean()) if len(labels) else 0.0
+    threshold = settings.SHAPE_DETERMINATION_ACCURACY
+    return {
+        "metric": "shape_determination_accuracy",
+        "classifier": {"type": classifier.type_name, "version": classifier.version},
+        "value": accuracy,
+        "threshold": threshold,
+        "status": "Atteint" if accuracy >= threshold else "Non atteint",
+        "details": {
+            "num_samples": len(labels),
+            "num_detected": int(detected.sum()),
+            "accuracy_on_detected": float(correct[detected].mean()) if detected.any() else 0.0,
+            "unknown_rate": float((predictions == UNKNOWN_SHAPE).mean()) if len(labels) else 0.0,
+            "per_label_recall": per_label_recall,
+            "confusion": confusion,
+            "throughput_faces_per_s": repeats * len(labels) / batch_elapsed if batch_elapsed > 0 else 0.0,
+            "single_call_us": single_elapsed / (repeats * 10) * 1e6,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Évalue des classifieurs de forme sur un manifeste annoté.")
+    parser.add_argument("manifest", type=Path, help="Manifeste CSV (colonnes image,label).")
+    parser.add_argument("--classifier", type=Path, action="append", default=[], help="Artefact(s) de classifieur à évaluer.")
+    parser.add_argument("--landmarks-cache", type=Path, default=None, help="Cache NPZ des landmarks (créé si absent).")
+    parser.add_argument("--fit-nearest-centroid", type=Path, default=None, help="Entraîne et sauvegarde un artefact plus-proche-centroïde.")
+    parser.add_argument("--version", default=None, help="Version de l'artefact entraîné.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction réservée à l'évaluation du modèle entraîné.")
+    parser.add_argument("--output", type=Path, default=OUTPUT_REPORT_PATH, help="Rapport JSON de sortie.")
+    args = parser.parse_args(argv)
+
+    entries = load_manifest(args.manifest)
+    if not entries:
+        logger.error(f"Manifeste vide : {args.manifest}")
+        return 1
+    image_paths = [path for path, _ in entries]
+    labels = [label for _, label in entries]
+
+    if args.landmarks_cache and args.landmarks_cache.exists():
+        with np.load(args.landmarks_cache) as cache:
+            landmarks = cache["landmarks"]
+        logger.info(f"Landmarks chargés depuis le cache {args.landmarks_cache}.")
+    else:
+        logger.info(f"Extraction des landmarks pour {len(image_paths)} images...")
+        landmarks = extract_landmarks(image_paths)
+        if args.landmarks_cache:
+            np.savez(args.landmarks_cache, landmarks=landmarks, paths=np.array([str(p) for p in image_paths]))
+
+    classifier_paths = args.classifier or [Path(settings.SHAPE_CLASSIFIER_PATH)]
+    classifiers = [load_classifier(p if p.is_absolute() else settings.BASE_DIR / p) for p in classifier_paths]
+    eval_indices = np.arange(len(labels))
+
+    if args.fit_nearest_centroid:
+        # Séparation déterministe entraînement / évaluation
+        rng = np.random.default_rng(0)
+        permutation = rng.permutation(len(labels))
+        n_holdout = int(round(len(labels) * args.holdout))
+        eval_indices, train_indices = np.sort(permutation[:n_holdout]), permutation[n_holdout:]
+        version = args.version or f"nc-{time.strftime('%Y%m%d')}"
+        model = fit_nearest_centroid(extract_geometry_features(landmarks[train_indices]), [labels[i] for i in train_indices], version)
+        save_classifier(model, args.fit_nearest_centroid)
+        logger.info(f"Classifieur {version} entraîné sur {len(train_indices)} images et sauvegardé dans {args.fit_nearest_centroid}.")
+        classifiers.append(model)
+
+    eval_landmarks = landmarks[eval_indices]
+    eval_labels = [labels[i] for i in eval_indices]
+    report = {
+        "evaluation_date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "manifest": str(args.manifest),
+        "num_eval_samples": len(eval_labels),
+        "metrics": [evaluate_classifier(c, eval_landmarks, eval_labels) for c in classifiers],
+    }
+
+    print("\n" + "=" * 15 + " ÉVALUATION DES CLASSIFIEURS DE FORME " + "=" * 15)
+    for metric in report["metrics"]:
+        details = metric["details"]
+        print(f"  - {metric['classifier']['type']:<17} {metric['classifier']['version']:<20}: "
+              f"précision {metric['value']:.1%} (seuil {metric['threshold']:.0%}) -> {metric['status']} | "
+              f"{details['throughput_faces_per_s']:,.0f} visages/s, {details['single_call_us']:.1f} µs/appel")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info(f"Rapport sauvegardé dans {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# benchmark/traffic_replay.py
+"""
+Rejeu déterministe d'un trafic capturé (src/core/traffic_capture.py) contre une instance locale.
+
+Les requêtes sont envoyées en boucle ouverte, aux instants d'arrivée capturés (inter-arrivées
+divisées par --speed) : l'ordre, les routes, les formats et les résolutions d'images reproduisent
+le trafic réel. Corps envoyés :
+  - payload capturé (comptes de test consentants) : octets exacts ;
+  - sinon, corps multipart reconstruit : chaque fichier est une image de benchmark/test_data
+    (choisie de façon déterministe), redimensionnée aux dimensions capturées et encodée dans le
+    format capturé ; session_id est remplacé par son empreinte (même regroupement par session).
+Les corps sont construits avant l'envoi pour que l'encodage ne décale pas l'échéancier.
+Le rapport reprend les statistiques de latence du benchmark (moyenne, médiane, p95, p99 vs
+TARGET_LATENCY_MS) et l'exécution est ajoutée à l'historique (benchmark/history.py). Le débit est
+celui effectivement servi : requêtes réussies terminées par fenêtre d'horloge murale
+(THROUGHPUT_WINDOW_S), les requêtes étant concurrentes (pas de débit tiré des latences).
+
+Usage :
+    python -m benchmark.traffic_replay --capture data/traffic_capture [--speed 2] [--base-url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import httpx
+import numpy as np
+
+from benchmark.history import DEFAULT_HISTORY_PATH, append_run, metric
+from src.core.config import settings
+from src.core.traffic_capture import REQUESTS_FILE
+
+logger = logging.getLogger("benchmark.traffic_replay")
+
+TEST_DATA_DIR = settings.BASE_DIR / "benchmark" / "test_data"
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+# Formats sans encodeur OpenCV (gif, inconnus) : rejoués en JPEG
+_ENCODE_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "bmp": ".bmp"}
+_MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "bmp": "image/bmp"}
+# Largeur des fenêtres de débit (s depuis le début du rejeu)
+THROUGHPUT_WINDOW_S = 1.0
+
+
+def load_capture(capture_dir: Path) -> List[Dict]:
+    """ Requêtes capturées, triées par heure d'arrivée. """
+    records = []
+    with open(capture_dir / REQUESTS_FILE, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return sorted(records, key=lambda record: record["ts"])
+
+
+def build_schedule(records: List[Dict], speed: float = 1.0) -> List[float]:
+    """ Instant d'envoi de chaque requête (s depuis le début du rejeu), inter-arrivées divisées par speed. """
+    if not records:
+        return []
+    start = records[0]["ts"]
+    return [(record["ts"] - start) / speed for record in records]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {f"p{q}": float(np.percentile(values, q)) for q in (5, 50, 95)}
+
+
+def summarize_capture(records: List[Dict]) -> Dict:
+    """ Forme du trafic capturé : volume, durée, routes, formats, résolutions et tailles d'images. """
+    files = [part for record in records for part in record.get("parts", []) if part.get("file")]
+    pixels = [part["width"] * part["height"] / 1e6 for part in files if part.get("width") and part.get("height")]
+    schedule = build_schedule(records)
+    return {
+        "requests": len(records),
+        "duration_s": schedule[-1] if schedule else 0.0,
+        "paths": dict(Counter(record["path"] for record in records)),
+        "formats": dict(Counter(part.get("format") for part in files)),
+        "image_megapixels": _percentiles(pixels),
+        "image_bytes": _percentiles([part["bytes"] for part in files]),
+        "with_payload": sum(1 for record in records if record.get("payload")),
+    }
+
+
+class BodySynthesizer:
+    """ Corps de requête rejouables ; images encodées une seule fois par (source, format, dimensions). """
+
+    def __init__(self, capture_dir: Path, test_data_dir: Path = TEST_DATA_DIR):
+        self.capture_dir = Path(capture_dir)
+        self.sources = sorted(p for p in Path(test_data_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not self.sources:
+            raise FileNotFoundError(f"Aucune image source dans {test_data_dir}.")
+        self._next_source = 0
+        self._built = 0
+        self._encoded: Dict[Tuple, bytes] = {}
+
+    def _image(self, part: Dict) -> Tuple[bytes, str]:
+        source_index = self._next_source % len(self.sources)
+        self._next_source += 1
+        image_format = part.get("format") if part.get("format") in _ENCODE_EXTENSIONS else "jpeg"
+        key = (source_index, image_format, part.get("width"), part.get("height"))
+        if key not in self._encoded:
+            image = cv2.imread(str(self.sources[source_index]), cv2.IMREAD_COLOR)
+            if part.get("width") and part.get("height"):
+                image = cv2.resize(image, (part["width"], part["height"]), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode(_ENCODE_EXTENSIONS[image_format], image)
+            if not ok:
+                raise ValueError(f"Encodage {image_format} impossible pour {self.sources[source_index]}.")
+            self._encoded[key] = buffer.tobytes()
+        return self._encoded[key], image_format
+
+    def build(self, record: Dict) -> Tuple[bytes, Optional[str]]:
+        """ (corps, content-type) de la requête : payload exact si capturé, sinon multipart reconstruit. """
+        if record.get("payload"):
+            return (self.capture_dir / record["payload"]).read_bytes(), record.get("content_type")
+        if "parts" not in record:
+            return b"", record.get("content_type") or None
+        boundary = f"replay-boundary-{self._built:08d}"  # Déterministe d'un rejeu à l'autre
+        self._built += 1
+        chunks = []
+        for index, part in enumerate(record["parts"]):
+            if part.get("file"):
+                data, image_format = self._image(part)
+                headers = (f'Content-Disposition: form-data; name="{part["name"]}"; filename="replay_{index}{_ENCODE_EXTENSIONS[image_format]}"\r\n'
+                           f'Content-Type: {_MIME_TYPES[image_format]}')
+            else:
+                data = (part.get("hash") or part.get("value") or "").encode("utf-8")
+                headers = f'Content-Disposition: form-data; name="{part["name"]}"'
+            chunks.append(f"--{boundary}\r\n{headers}\r\n\r\n".encode("utf-8") + data + b"\r\n")
+        chunks.append(f"--{boundary}--\r\n".encode("utf-8"))
+        return b"".join(chunks), f"multipart/form-data; boundary={boundary}"
+
+
+async def replay(records: List[Dict], bodies: List[Tuple[bytes, Optional[str]]], base_url: str,
+                 speed: float = 1.0, timeout: float = 30.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None) -> List[Dict]:
+    """ Envoi en boucle ouverte selon l'échéancier ; une mesure par requête (latence, statut, retard d'envoi, fin). """
+    schedule = build_schedule(records, speed)
+    results: List[Optional[Dict]] = [None] * len(records)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits, transport=transport) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def send(index: int) -> None:
+            record, (body, content_type) = records[index], bodies[index]
+            await asyncio.sleep(max(0.0, start + schedule[index] - loop.time()))
+            lag_ms = (loop.time() - start - schedule[index]) * 1000
+            url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+            headers = {"content-type": content_type} if content_type else {}
+            sent = time.perf_counter()
+            try:
+                response = await client.request(record["method"], url, content=body, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                logger.debug(f"Requête {index} en erreur : {e}")
+                status = None
+            results[index] = {"path": record["path"], "status": status, "latency_ms": (time.perf_counter() - sent) * 1000,
+                              "lag_ms": lag_ms, "completed_s": loop.time() - start, "captured_status": record.get("status")}
+
+        await asyncio.gather(*(send(index) for index in range(len(records))))
+    return results
+
+
+def completions_per_window(results: List[Dict], window_s: float = THROUGHPUT_WINDOW_S) -> List[float]:
+    """
+    Débit atteint (req/s) par fenêtre d'horloge murale : requêtes réussies terminées dans chaque
+    fenêtre complète depuis le début du rejeu. Rejeu plus court qu'une fenêtre : débit moyen.
+    """
+    completed = np.array([r["completed_s"] for r in results if r["status"] is not None and r["status"] < 400], dtype=np.float64)
+    if not len(completed) or completed.max() <= 0:
+        return []
+    windows = int(completed.max() // window_s)
+    if windows == 0:
+        return [len(completed) / completed.max()]
+    counts, _ = np.histogram(completed, bins=windows, range=(0.0, windows * window_s))
+    return (counts / window_s).tolist()
+
+
+def summarize_replay(results: List[Dict], wall_time_s: float) -> Dict:
+    """ Statistiques de latence (requêtes réussies), par route et par statut, débit et retard d'envoi. """
+    ok = [r["latency_ms"] for r in results if r["status"] is not None and r["status"] < 400]
+    summary = {
+        "requests": len(results),
+        "successful": len(ok),
+        "statuses": dict(Counter(str(r["status"]) for r in results)),
+        "status_mismatches": sum(1 for r in results if r["captured_status"] is not None and r["status"] != r["captured_status"]),
+        "throughput_rps": len(results) / wall_time_s if wall_time_s > 0 else 0.0,
+        "max_schedule_lag_ms": max((r["lag_ms"] for r in results), default=0.0),
+        "target_latency_ms": settings.TARGET_LATENCY_MS,
+        "per_path": {},
+    }
+    if ok:
+        summary.update(mean_ms=float(np.mean(ok)), median_ms=float(np.median(ok)),
+                       p95_ms=float(np.percentile(ok, 95)), p99_ms=float(np.percentile(ok, 99)))
+        summary["status"] = "Atteint" if summary["mean_ms"] <= settings.TARGET_LATENCY_MS else "Non atteint"
+    by_path = defaultdict(list)
+    for r in results:
+        if r["status"] is not None and r["status"] < 400:
+            by_path[r["path"]].append(r["latency_ms"])
+    for path, latencies in by_path.items():
+        summary["per_path"][path] = {"count": len(latencies), "median_ms": float(np.median(latencies)),
+                                     "p95_ms": float(np.percentile(latencies, 95))}
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rejoue un trafic capturé contre une instance locale.")
+    parser.add_argument("--capture", type=Path, default=settings.BASE_DIR / settings.TRAFFIC_CAPTURE_DIR, help="Dossier de capture.")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="URL de l'instance cible.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Facteur d'accélération des inter-arrivées (2 = deux fois plus rapide).")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal de requêtes rejouées.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout par requête (s).")
+    parser.add_argument("--summary-only", action="store_true", help="Affiche la forme du trafic capturé sans le rejouer.")
+    parser.add_argument("--output", type=Path, default=None, help="Rapport JSON de sortie (optionnel).")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH, help="Historique des exécutions.")
+    parser.add_argument("--no-history", action="store_true", help="N'ajoute pas l'exécution à l'historique.")
+    args = parser.parse_args(argv)
+
+    records = load_capture(args.capture)[:args.limit]
+    if not records:
+        logger.error(f"Aucune requête capturée dans {args.capture}.")
+        return 2
+    capture_summary = summarize_capture(records)
+    print("\n" + "=" * 15 + " TRAFIC CAPTURÉ " + "=" * 15)
+    print(json.dumps(capture_summary, indent=2, ensure_ascii=False))
+    if args.summary_only:
+        return 0
+
+    synthesizer = BodySynthesizer(args.capture)
+    bodies = [synthesizer.build(record) for record in records]
+    logger.info(f"Rejeu de {len(records)} requêtes sur {capture_summary['duration_s'] / args.speed:.1f} s (x{args.speed}).")
+    start = time.perf_counter()
+    results = asyncio.run(replay(records, bodies, args.base_url, args.speed, args.timeout))
+    summary = summarize_replay(results, time.perf_counter() - start)
+
+    print("\n" + "=" * 15 + f" REJEU x{args.speed} " + "=" * 15)
+    if "mean_ms" in summary:
+        print(f"  latence : moyenne {summary['mean_ms']:.1f} ms | médiane {summary['median_ms']:.1f} ms | "
+              f"p95 {summary['p95_ms']:.1f} ms | p99 {summary['p99_ms']:.1f} ms "
+              f"(cible {summary['target_latency_ms']} ms : {summary['status']})")
+    for path, stats in summary["per_path"].items():
+        print(f"  - {path:<32}: {stats['count']:5d} req | médiane {stats['median_ms']:8.1f} ms | p95 {stats['p95_ms']:8.1f} ms")
+    print(f"  statuts : {summary['statuses']} ({summary['status_mismatches']} différents de la capture)")
+    print(f"  débit : {summary['throughput_rps']:.1f} req/s | retard d'envoi max : {summary['max_schedule_lag_ms']:.1f} ms")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"capture": capture_summary, "replay": summary}, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport sauvegardé dans {args.output}.")
+    if not args.no_history:
+        latencies = [r["latency_ms"] for r in results if r["status"] is not None and r["status"] < 400]
+        append_run(
+            "traffic_replay",
+            {
+                "request_latency_ms": metric(latencies, "ms"),
+                "throughput_rps": metric(completions_per_window(results), "req/s", higher_is_better=True),
+            },
+            context={"capture": str(args.capture), "speed": args.speed, "requests": len(records), "base_url": args.base_url,
+                     "throughput_window_s": THROUGHPUT_WINDOW_S},
+            history_path=args.history,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # Une ligne par requête sinon
+    sys.exit(main())
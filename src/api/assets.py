@@ -0,0 +1,106 @@
+# src/api/assets.py
+"""
+Service des assets 3D construits par src/tools/build_assets.py.
+
+GET /models/{model_id}/assets choisit les fichiers à télécharger selon le client : taille de
+texture (paramètre max_texture_size, sinon indices Sec-CH-Viewport-Width / Sec-CH-DPR), WebP si
+l'en-tête Accept le permet, maillage gzip si Accept-Encoding le permet. Les fichiers, nommés par
+leur empreinte de contenu, sont servis par GET /assets/{file_name} avec un cache immuable.
+"""
+
+import logging
+import re
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from src.api.responses import FastJSONResponse
+from src.core.assets import asset_build_dir, get_asset_manifest, resolve_model_assets, texture_size_hint
+from src.core.models import get_available_model_ids
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+ASSETS_URL_PREFIX = "/api/v1/assets/"
+# Noms produits par le build : empreinte + extension (aucun chemin)
+_ASSET_NAME_RE = re.compile(r"^[0-9a-f]{16}\.(obj|obj\.gz|mtl|png|webp)$")
+_MEDIA_TYPES = {"obj": "model/obj", "mtl": "model/mtl", "png": "image/png", "webp": "image/webp"}
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _require_manifest() -> Dict:
+    manifest = get_asset_manifest()
+    if manifest is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Assets non construits (python -m src.tools.build_assets).")
+    return manifest
+
+
+def _with_urls(resolved: Dict) -> Dict:
+    """ Ajoute l'URL de chaque fichier choisi. """
+    for item in [resolved["mesh"], resolved["material"], resolved["preview"], *resolved["textures"]]:
+        if item is not None:
+            item["url"] = ASSETS_URL_PREFIX + item["file"]
+    return resolved
+
+
+@router.get(
+    "/models",
+    summary="Identifiants des modèles de lunettes du catalogue",
+    tags=["Models"]
+)
+async def list_models_endpoint():
+    return FastJSONResponse(content=get_available_model_ids())
+
+
+@router.get(
+    "/models/{model_id}/assets",
+    summary="Fichiers d'un modèle à télécharger, adaptés au client (taille de texture, formats)",
+    tags=["Models"]
+)
+async def model_assets_endpoint(
+    model_id: str,
+    max_texture_size: Optional[int] = Query(None, ge=1, description="Côté le plus long des textures (px). Défaut : indices client ou ASSET_DEFAULT_TEXTURE_SIZE."),
+    accept: str = Header("", include_in_schema=False),
+    accept_encoding: str = Header("", include_in_schema=False),
+    sec_ch_viewport_width: Optional[float] = Header(None, include_in_schema=False),
+    sec_ch_dpr: Optional[float] = Header(None, include_in_schema=False),
+):
+    """
+    Maillage, MTL, textures (niveau de mip et format choisis) et aperçu, avec leurs URLs et
+    tailles. Le MTL référence les textures pleine taille en PNG : un client qui suit le manifeste
+    charge à la place les variantes indiquées ici.
+    """
+    manifest = _require_manifest()
+    entry = manifest["models"].get(model_id)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Modèle inconnu : {model_id}")
+    max_size = texture_size_hint(max_texture_size, sec_ch_viewport_width, sec_ch_dpr)
+    resolved = _with_urls(resolve_model_assets(entry, max_size, accept_webp="image/webp" in accept, accept_gzip="gzip" in accept_encoding))
+    return FastJSONResponse(
+        content={"model_id": model_id, "max_texture_size": max_size, **resolved},
+        headers={"Accept-CH": "Sec-CH-Viewport-Width, Sec-CH-DPR", "Vary": "Accept, Accept-Encoding, Sec-CH-Viewport-Width, Sec-CH-DPR"},
+    )
+
+
+@router.get(
+    "/assets/{file_name}",
+    summary="Fichier d'asset construit (nom = empreinte du contenu, cache immuable)",
+    tags=["Models"]
+)
+async def asset_file_endpoint(file_name: str, accept_encoding: str = Header("", include_in_schema=False)):
+    """ Maillages OBJ servis compressés (gzip précalculé) si le client l'accepte. """
+    match = _ASSET_NAME_RE.match(file_name)
+    path = asset_build_dir() / file_name
+    if match is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Asset inconnu.")
+    extension = match.group(1)
+    headers = {"Cache-Control": _IMMUTABLE_CACHE}
+    if extension == "obj":
+        headers["Vary"] = "Accept-Encoding"
+        gzip_path = path.with_name(path.name + ".gz")
+        if "gzip" in accept_encoding and gzip_path.is_file():
+            headers["Content-Encoding"] = "gzip"
+            path = gzip_path
+    media_type = _MEDIA_TYPES.get(extension, "application/gzip")
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,31 +1,120 @@
 # src/api/endpoints.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Body
-# Imports simplifiés : plus besoin de Form, Response, cv2, numpy ici
-from src.core.processing import analyze_face_from_image_bytes, get_recommendations_for_face, get_recommendations_based_on_analysis
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Body, Response
+# Imports simplifiés : plus besoin de cv2, numpy ici
+from src.core.processing import analyze_face_from_image_bytes, get_recommendations_for_face, get_recommendations_based_on_analysis, HEAD_TURNED_MESSAGE
 # from src.core.rendering import render_overlay <<< SUPPRIMÉ
 # from src.core.models import get_3d_model_path <<< SUPPRIMÉ (sauf si on ajoute /list_models)
-from src.schemas.schemas import FaceAnalysisResult, RecommendationResult, RecommendationRequest, AnalyzeAndRecommendResult
+from src.core.result_store import get_result_store
+from src.core.recommendation_table import get_recommendation_table
+from src.core.expression import BLENDSHAPE_NAMES
+from src.core.config import settings
+from src.api.responses import FastJSONResponse, dumps
+from src.core.executor import run_in_analysis_executor
+from src.core.singleflight import SingleFlight
+from src.schemas.schemas import AnalysisLevel, FaceAnalysisResult, RecommendationResult, RecommendationRequest, AnalyzeAndRecommendResult
+import hashlib
 import logging
 from typing import Optional, List # Ajout List si non présent
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Noms des blendshapes (ordre du tableau FaceAnalysisResult.blendshapes), sérialisés une fois
+_BLENDSHAPE_NAMES_BODY = dumps(list(BLENDSHAPE_NAMES))
+
+# Regroupe les uploads identiques concurrents sur une seule analyse (compteurs exposés par /health)
+analysis_single_flight = SingleFlight()
+
+# --- Persistance optionnelle des résultats (RESULT_STORE_DIR) ---
+def _persist_analysis(image_bytes: bytes, analysis_result: FaceAnalysisResult, result_id: Optional[str] = None) -> None:
+    """ Ajoute le résultat au store local (ID = SHA-256 de l'image) si celui-ci est configuré. """
+    store = get_result_store()
+    if store is None:
+        return
+    result_id = result_id or hashlib.sha256(image_bytes).hexdigest()
+    try:
+        if result_id not in store:
+            store.append_analysis(result_id, analysis_result)
+            if len(store) % settings.RESULT_STORE_FLUSH_EVERY == 0:
+                store.flush()
+    except Exception as e:
+        logger.error(f"Erreur lors de la persistance du résultat {result_id}: {e}", exc_info=True)
+
+# --- Analyse partagée entre requêtes identiques concurrentes ---
+async def _analyze_image(image_bytes: bytes, session_id: Optional[str] = None, timestamp: Optional[float] = None,
+                         analysis_level: AnalysisLevel = "full") -> FaceAnalysisResult:
+    """
+    Analyse (et persiste) l'image dans le pool d'analyse. Avec SINGLE_FLIGHT_ENABLED, une requête
+    identique (même contenu, mêmes paramètres, même niveau) arrivant pendant l'analyse attend son
+    résultat. Chaque appelant reçoit sa propre copie (les endpoints peuvent modifier error_message).
+    """
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+
+    async def analyze() -> FaceAnalysisResult:
+        # Analyse dans le pool dédié : la boucle d'événements reste libre pendant l'inférence
+        result = await run_in_analysis_executor(analyze_face_from_image_bytes, image_bytes, session_id=session_id,
+                                                timestamp=timestamp, analysis_level=analysis_level)
+        if session_id is None and analysis_level == "full":
+            # Un résultat lissé dépend de la session, un résultat partiel du niveau : seul le
+            # résultat brut complet est indexé par contenu
+            await run_in_analysis_executor(_persist_analysis, image_bytes, result, image_hash)
+        return result
+
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await analyze()
+    result, shared = await analysis_single_flight.do((image_hash, session_id, timestamp, analysis_level), analyze)
+    if shared:
+        logger.info(f"Analyse partagée avec une requête identique en cours ({image_hash[:12]}).")
+    return result.model_copy()
+
+# --- Recommandation à partir d'une analyse (endpoint combiné et jobs) ---
+def _combine_with_recommendation(analysis_result: FaceAnalysisResult) -> AnalyzeAndRecommendResult:
+    """ Ajoute les recommandations à une analyse réussie ; sinon complète error_message. """
+    # Gère les erreurs internes SANS lever d'exception ici
+    if not analysis_result.detection_successful and "interne" in (analysis_result.error_message or "").lower():
+         logger.error(f"[analyze_and_recommend] Erreur interne durant l'analyse: {analysis_result.error_message}")
+         # L'erreur sera dans la partie 'analysis' de la réponse
+
+    # Générer les recommandations si l'analyse a réussi
+    recommendation_result: Optional[RecommendationResult] = None
+    if analysis_result.detection_successful and analysis_result.detected_face_shape and "erreur" not in analysis_result.detected_face_shape:
+        # Appelle la fonction qui utilise get_recommendations_for_face
+        recommendation_result = get_recommendations_based_on_analysis(analysis_result)
+        if recommendation_result: logger.info("[analyze_and_recommend] Recommandations générées.")
+        else: logger.warning("[analyze_and_recommend] Impossible de générer des recommandations."); analysis_result.error_message = (analysis_result.error_message or "") + " Recommandations non générées."
+    else:
+         log_msg_suffix = "pas de recommandations."
+         if not analysis_result.detection_successful: logger.info(f"[analyze_and_recommend] Analyse non réussie, {log_msg_suffix}")
+         elif (analysis_result.error_message or "").startswith(HEAD_TURNED_MESSAGE): logger.info(f"[analyze_and_recommend] Tête hors du budget d'angles, {log_msg_suffix}")
+         else: logger.info(f"[analyze_and_recommend] Forme non déterminée, {log_msg_suffix}"); analysis_result.error_message = (analysis_result.error_message or "") + " Forme non déterminée."
+
+    # Construire la réponse combinée
+    return AnalyzeAndRecommendResult(
+        analysis=analysis_result,
+        recommendation=recommendation_result
+    )
+
 # --- Endpoint d'Analyse (Retourne Pose + Landmarks + Forme) ---
 @router.post(
     "/analyze_face",
     response_model=FaceAnalysisResult,
+    response_class=FastJSONResponse,
     summary="Analyse une image pour détecter pose, landmarks et forme du visage",
     tags=["Analysis"]
 )
 async def analyze_face_endpoint(
-    image_file: UploadFile = File(..., description="Fichier image à analyser (ex: JPG, PNG)")
+    image_file: UploadFile = File(..., description="Fichier image à analyser (ex: JPG, PNG)"),
+    session_id: Optional[str] = Form(None, max_length=128, description="Identifiant de session : active le lissage temporel avec les captures précédentes."),
+    capture_timestamp_ms: Optional[float] = Form(None, description="Date de capture côté client (ms), utilisée par le lissage. Défaut : heure de réception."),
+    analysis_level: AnalysisLevel = Form("full", description="'pose' : matrice et orientation seules (ré-ancrage) ; 'landmarks' : sans forme du visage ; 'full' : analyse complète."),
 ):
     """
     Accepte un fichier image, le traite et retourne les détails de l'analyse faciale,
     incluant la matrice de pose, les landmarks, et la forme de visage estimée (simplifiée).
     Ces données sont destinées au client pour le rendu 3D et la logique d'affichage.
+    Avec `session_id`, landmarks et pose sont lissés d'une capture à l'autre (One-Euro).
+    `analysis_level` limite le calcul (et la réponse) au nécessaire : les champs non calculés valent null.
     """
     logger.info(f"[analyze_face] Requête reçue pour le fichier: {image_file.filename}")
     try:
@@ -37,7 +126,8 @@ async def analyze_face_endpoint(
          logger.error(f"Erreur lecture image uploadée: {e}", exc_info=True)
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lors de la lecture du fichier image.")
 
-    analysis_result = analyze_face_from_image_bytes(image_bytes)
+    timestamp = capture_timestamp_ms / 1000.0 if capture_timestamp_ms is not None else None
+    analysis_result = await _analyze_image(image_bytes, session_id=session_id, timestamp=timestamp, analysis_level=analysis_level)
 
     if not analysis_result.detection_successful and "interne" in (analysis_result.error_message or "").lower():
          logger.error(f"[analyze_face] Erreur interne: {analysis_result.error_message}")
@@ -47,7 +137,8 @@ async def analyze_face_endpoint(
     else:
         logger.info("[analyze_face] Analyse réussie.")
 
-    return analysis_result # Retourne le JSON FaceAnalysisResult
+    # Sérialisation directe (landmarks/matrice depuis NumPy), sans passer par jsonable_encoder
+    return FastJSONResponse(content=analysis_result) # Retourne le JSON FaceAnalysisResult
 
 # --- Endpoint de Recommandation (Basé sur forme fournie) ---
 @router.post(
@@ -63,15 +154,24 @@ async def recommend_glasses_endpoint(
     Accepte une forme de visage simplifiée (long, proportionné, autre)
     et retourne une liste d'IDs de modèles de lunettes suggérés.
     """
-    logger.info(f"[recommend_glasses] Requête reçue avec forme: {request_body.face_shape}")
     if not request_body.face_shape or not isinstance(request_body.face_shape, str):
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'face_shape' requis (string).")
 
-    # Utilise la fonction de recommandation (qui a été adaptée aux formes simples)
-    recommended_ids, analysis_info_str = get_recommendations_for_face(request_body.face_shape)
-    response = RecommendationResult(recommended_glasses_ids=recommended_ids, analysis_info=analysis_info_str)
-    logger.info(f"[recommend_glasses] Réponse : {response}")
-    return response
+    # Simple lecture dans la table précompilée : le corps JSON est déjà sérialisé
+    entry = get_recommendation_table().lookup(request_body.face_shape)
+    logger.debug(f"[recommend_glasses] Forme '{request_body.face_shape}' -> {entry.recommended_ids}")
+    return Response(content=entry.response_body, media_type="application/json")
+
+# --- Noms des Blendshapes (index du tableau compact) ---
+@router.get(
+    "/blendshape_names",
+    response_model=List[str],
+    summary="Noms des blendshapes, dans l'ordre du champ 'blendshapes' des analyses",
+    tags=["Analysis"]
+)
+async def blendshape_names_endpoint():
+    """ Liste statique : à récupérer une fois par le client pour interpréter FaceAnalysisResult.blendshapes. """
+    return Response(content=_BLENDSHAPE_NAMES_BODY, media_type="application/json")
 
 # --- Endpoint de Rendu <<< SECTION SUPPRIMÉE ---
 # @router.post("/render_glasses", ...)
@@ -82,6 +182,7 @@ async def recommend_glasses_endpoint(
 @router.post(
     "/analyze_and_recommend",
     response_model=AnalyzeAndRecommendResult,
+    response_class=FastJSONResponse,
     summary="Analyse une image ET recommande des lunettes basées sur la forme détectée",
     tags=["Combined Workflow"]
 )
@@ -104,31 +205,11 @@ async def analyze_and_recommend_endpoint(
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erreur lecture fichier image.")
 
     # 1. Effectuer l'analyse complète
-    analysis_result = analyze_face_from_image_bytes(image_bytes)
-
-    # Gère les erreurs internes SANS lever d'exception ici
-    if not analysis_result.detection_successful and "interne" in (analysis_result.error_message or "").lower():
-         logger.error(f"[analyze_and_recommend] Erreur interne durant l'analyse: {analysis_result.error_message}")
-         # L'erreur sera dans la partie 'analysis' de la réponse
-
-    # 2. Générer les recommandations si l'analyse a réussi
-    recommendation_result: Optional[RecommendationResult] = None
-    if analysis_result.detection_successful and analysis_result.detected_face_shape and "erreur" not in analysis_result.detected_face_shape:
-        # Appelle la fonction qui utilise get_recommendations_for_face
-        recommendation_result = get_recommendations_based_on_analysis(analysis_result)
-        if recommendation_result: logger.info("[analyze_and_recommend] Recommandations générées.")
-        else: logger.warning("[analyze_and_recommend] Impossible de générer des recommandations."); analysis_result.error_message = (analysis_result.error_message or "") + " Recommandations non générées."
-    else:
-         log_msg_suffix = "pas de recommandations."
-         if not analysis_result.detection_successful: logger.info(f"[analyze_and_recommend] Analyse non réussie, {log_msg_suffix}")
-         else: logger.info(f"[analyze_and_recommend] Forme non déterminée, {log_msg_suffix}"); analysis_result.error_message = (analysis_result.error_message or "") + " Forme non déterminée."
+    analysis_result = await _analyze_image(image_bytes)
 
-    # 3. Construire la réponse combinée
-    final_response = AnalyzeAndRecommendResult(
-        analysis=analysis_result,
-        recommendation=recommendation_result
-    )
-    return final_response
+    # 2. Générer les recommandations et construire la réponse combinée
+    final_response = _combine_with_recommendation(analysis_result)
+    return FastJSONResponse(content=final_response)
 
 # --- (Optionnel) Endpoint pour lister les modèles ---
 # Décommente et adapte si besoin
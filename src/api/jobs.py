@@ -0,0 +1,181 @@
+# src/api/jobs.py
+"""
+API de jobs asynchrones : soumission d'un lot d'images, suivi et flux des résultats.
+
+Les images sont persistées dans la file durable (src/core/job_queue.py) puis analysées par les
+workers de jobs avec les mêmes fonctions que /analyze_and_recommend ; chaque résultat est une
+réponse AnalyzeAndRecommendResult. Les workers cèdent la place aux analyses interactives.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from src.api.endpoints import _combine_with_recommendation, _persist_analysis
+from src.api.responses import FastJSONResponse, dumps, render_model
+from src.core.config import settings
+from src.core.executor import interactive_analyses_in_flight
+from src.core.job_queue import JobQueue, JobWorkerPool, get_job_queue
+from src.core.processing import analyze_face_from_image_bytes
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+_job_worker_pool: Optional[JobWorkerPool] = None
+
+
+def _process_job_image(image_bytes: bytes) -> bytes:
+    """ Analyse + recommandation d'une image de job ; réponse JSON sérialisée. """
+    analysis_result = analyze_face_from_image_bytes(image_bytes)
+    _persist_analysis(image_bytes, analysis_result)
+    return render_model(_combine_with_recommendation(analysis_result))
+
+
+def start_job_workers() -> Optional[JobWorkerPool]:
+    """ Démarre les workers de jobs (JOB_WORKERS) si la file est activée. """
+    global _job_worker_pool
+    queue = get_job_queue()
+    if queue is None or _job_worker_pool is not None:
+        return _job_worker_pool
+    _job_worker_pool = JobWorkerPool(
+        queue,
+        _process_job_image,
+        is_busy=lambda: interactive_analyses_in_flight() > 0,
+        workers=settings.JOB_WORKERS,
+        idle_poll_s=settings.JOB_IDLE_POLL_S,
+        yield_poll_s=settings.JOB_YIELD_POLL_S,
+        retention_s=settings.JOB_RETENTION_HOURS * 3600,
+        purge_interval_s=settings.JOB_PURGE_INTERVAL_S,
+    )
+    _job_worker_pool.start()
+    return _job_worker_pool
+
+
+def stop_job_workers() -> None:
+    """ Arrête les workers après leur tâche en cours (les tâches restantes restent en file). """
+    global _job_worker_pool
+    if _job_worker_pool is not None:
+        _job_worker_pool.stop()
+        _job_worker_pool = None
+
+
+def get_job_worker_pool() -> Optional[JobWorkerPool]:
+    return _job_worker_pool
+
+
+def _require_queue() -> JobQueue:
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Les jobs asynchrones sont désactivés.")
+    return queue
+
+
+def _job_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Images trop volumineuses pour un job (maximum {settings.JOB_MAX_BYTES} octets au total).",
+    )
+
+
+@router.post(
+    "/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Soumet un lot d'images à analyser en arrière-plan",
+    tags=["Jobs"]
+)
+async def submit_job_endpoint(
+    images: List[UploadFile] = File(..., description="Images à analyser (ex: JPG, PNG)"),
+    priority: int = Form(0, ge=0, le=9, description="Priorité du job (9 = la plus haute). Les analyses interactives passent toujours avant."),
+):
+    """
+    Persiste les images dans la file durable et retourne immédiatement l'ID du job.
+    Suivi : GET /api/v1/jobs/{job_id} ; résultats : GET /api/v1/jobs/{job_id}/results (NDJSON).
+    """
+    queue = _require_queue()
+    if len(images) > settings.JOB_MAX_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Trop d'images pour un job ({len(images)} > {settings.JOB_MAX_IMAGES}).",
+        )
+    # Les images sont lues en mémoire avant l'insertion SQLite : volume total borné par JOB_MAX_BYTES
+    # (tailles connues des fichiers reçus vérifiées avant toute lecture, puis cumul des octets lus)
+    if sum(image_file.size or 0 for image_file in images) > settings.JOB_MAX_BYTES:
+        raise _job_too_large()
+    items = []
+    total_bytes = 0
+    for image_file in images:
+        image_bytes = await image_file.read()
+        if not image_bytes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Fichier image vide : {image_file.filename}")
+        total_bytes += len(image_bytes)
+        if total_bytes > settings.JOB_MAX_BYTES:
+            raise _job_too_large()
+        items.append((image_file.filename, image_bytes))
+
+    # Écriture SQLite hors de la boucle d'événements (et hors du pool d'analyse)
+    job_id = await run_in_threadpool(queue.submit, items, priority)
+    if _job_worker_pool is not None:
+        _job_worker_pool.notify()
+    logger.info(f"[jobs] Job {job_id} soumis : {len(items)} image(s), priorité {priority}.")
+    progress = await run_in_threadpool(queue.progress, job_id)
+    return FastJSONResponse(
+        content=progress.as_dict(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/api/v1/jobs/{job_id}"},
+    )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Avancement d'un job",
+    tags=["Jobs"]
+)
+async def job_progress_endpoint(job_id: str):
+    """ Compteurs par statut (queued, running, succeeded, failed) et statut global du job. """
+    queue = _require_queue()
+    progress = await run_in_threadpool(queue.progress, job_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job inconnu.")
+    return FastJSONResponse(content=progress.as_dict())
+
+
+@router.get(
+    "/jobs/{job_id}/results",
+    summary="Résultats d'un job en flux NDJSON",
+    tags=["Jobs"]
+)
+async def job_results_endpoint(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Nombre de résultats déjà reçus (reprise d'un flux interrompu)."),
+    follow: bool = Query(False, description="Garde le flux ouvert jusqu'à la fin du job."),
+):
+    """
+    Une ligne JSON par image terminée, dans l'ordre de fin : {"index", "filename", "status",
+    "result" | "error"}, où index est le rang de l'image dans la soumission et "result" un
+    AnalyzeAndRecommendResult. Avec follow=true, les résultats sont envoyés au fil de l'eau
+    jusqu'à ce que le job soit terminé.
+    """
+    queue = _require_queue()
+    if await run_in_threadpool(queue.progress, job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job inconnu.")
+
+    async def lines() -> AsyncIterator[bytes]:
+        sent = offset
+        while True:
+            # Avancement lu avant les résultats : un job terminé n'a plus de résultat à venir
+            progress = await run_in_threadpool(queue.progress, job_id)
+            rows = await run_in_threadpool(queue.results, job_id, sent)
+            for seq, filename, task_status, result, error in rows:
+                header = dumps({"index": seq, "filename": filename, "status": task_status})[:-1]
+                payload = b',"result":' + result if result is not None else b',"error":' + dumps(error)
+                yield header + payload + b"}\n"
+                sent += 1
+            if not follow or progress is None or progress.status == "completed":
+                return
+            await asyncio.sleep(settings.JOB_STREAM_POLL_S)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,203 @@
+# src/api/middleware.py
+"""
+Limitation de concurrence adaptative (AIMD) et délestage.
+
+Les requêtes hors voies prioritaires (les analyses) passent par un AdaptiveConcurrencyLimiter :
+au-delà de la limite courante de requêtes en cours, elles sont rejetées immédiatement en 503
+(avec Retry-After) au lieu d'attendre dans une file sans fin. La limite s'adapte à la latence
+observée : +1 par fenêtre de `limite` requêtes sous la cible (augmentation additive), x BACKOFF
+quand une requête dépasse la cible (diminution multiplicative, au plus une fois par fenêtre
+de latence). Les routes légères (/health, /api/v1/recommend_glasses...) sont servies hors limite.
+
+TrafficCaptureMiddleware (opt-in) enregistre le trafic des routes d'analyse pour le rejouer
+(src/core/traffic_capture.py, benchmark/traffic_replay.py).
+"""
+
+import json
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+from src.core.config import settings
+from src.core.traffic_capture import TrafficRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite AIMD du nombre de requêtes en cours. Utilisé depuis la boucle d'événements
+    uniquement (acquire/release ne sont pas appelés depuis d'autres threads).
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        target_latency_s: float = 2.0,
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.target_latency_s = target_latency_s
+        self.backoff = backoff
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._last_decrease = float("-inf")
+
+    def try_acquire(self) -> bool:
+        """ Admet la requête si le nombre de requêtes en cours reste sous la limite. """
+        if self.in_flight >= int(self.limit):
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, latency_s: float, now: Optional[float] = None) -> None:
+        """ Fin d'une requête admise : ajuste la limite selon sa latence. """
+        now = time.monotonic() if now is None else now
+        self.in_flight -= 1
+        if latency_s > self.target_latency_s:
+            # Une seule diminution par fenêtre : les requêtes lentes déjà en cours datent de l'ancienne limite
+            if now - self._last_decrease >= self.target_latency_s:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                logger.info(f"Latence {latency_s * 1000:.0f} ms > cible : limite de concurrence -> {self.limit:.1f}")
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "admitted": self.admitted, "shed": self.shed}
+
+
+class AdaptiveConcurrencyMiddleware:
+    """ Middleware ASGI : délestage 503 au-delà de la limite, voies prioritaires non limitées. """
+
+    def __init__(self, app, limiter: AdaptiveConcurrencyLimiter, priority_paths: Iterable[str] = ()):
+        self.app = app
+        self.limiter = limiter
+        # Chemins exacts, ou préfixes si l'entrée se termine par "*" (ex. "/api/v1/jobs/*")
+        self.priority_paths = frozenset(p for p in priority_paths if not p.endswith("*"))
+        self.priority_prefixes = tuple(p[:-1] for p in priority_paths if p.endswith("*"))
+        self._shed_body = json.dumps(
+            {"detail": "Service saturé, réessayez dans quelques instants."}, ensure_ascii=False
+        ).encode("utf-8")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._is_priority(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if not self.limiter.try_acquire():
+            await self._send_shed_response(send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.perf_counter() - start)
+
+    def _is_priority(self, path: str) -> bool:
+        return path in self.priority_paths or (bool(self.priority_prefixes) and path.startswith(self.priority_prefixes))
+
+    async def _send_shed_response(self, send) -> None:
+        retry_after = max(1, round(self.limiter.target_latency_s))
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self._shed_body)).encode("ascii")),
+                (b"retry-after", str(retry_after).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": self._shed_body})
+
+
+class TrafficCaptureMiddleware:
+    """
+    Middleware ASGI : copie le corps des requêtes capturées (au plus max_body_bytes) et les
+    transmet au recorder avec l'heure d'arrivée, le statut et la latence. Placé en premier (le
+    plus externe) pour capturer aussi les requêtes délestées. Corps complet conservé seulement
+    pour les comptes consentants (en-tête account_header) ; pour les autres, le recorder n'en
+    garde que les métadonnées des parties, lues avant la mise en file.
+    """
+
+    def __init__(
+        self,
+        app,
+        recorder: TrafficRecorder,
+        paths: Iterable[str] = (),
+        account_header: str = "x-test-account",
+        consenting_accounts: Iterable[str] = (),
+        max_body_bytes: int = 20 * 1024 * 1024,
+    ):
+        self.app = app
+        self.recorder = recorder
+        self.paths = frozenset(paths)
+        self.account_header = account_header.lower().encode("latin-1")
+        self.consenting_accounts = frozenset(consenting_accounts)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        arrival = time.time()
+        start = time.perf_counter()
+        headers = dict(scope["headers"])
+        account = headers.get(self.account_header, b"").decode("latin-1")
+        chunks = []
+        received = 0
+        status_code = 500
+
+        async def capture_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received <= self.max_body_bytes:
+                    chunks.append(body)
+            return message
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            truncated = received > self.max_body_bytes
+            record = {
+                "ts": arrival,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1"),
+                "body_bytes": received,
+                "status": status_code,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+            }
+            if truncated:
+                record["truncated"] = True
+            keep_payload = bool(account) and account in self.consenting_accounts and not truncated
+            if keep_payload:
+                record["account"] = account
+            self.recorder.submit(record, b"" if truncated else b"".join(chunks), keep_payload)
+
+
+def create_concurrency_limiter() -> AdaptiveConcurrencyLimiter:
+    """ Limiteur configuré depuis les settings ADAPTIVE_CONCURRENCY_*. """
+    return AdaptiveConcurrencyLimiter(
+        initial_limit=settings.ADAPTIVE_CONCURRENCY_INITIAL_LIMIT,
+        min_limit=settings.ADAPTIVE_CONCURRENCY_MIN_LIMIT,
+        max_limit=settings.ADAPTIVE_CONCURRENCY_MAX_LIMIT,
+        target_latency_s=settings.ADAPTIVE_CONCURRENCY_TARGET_LATENCY_MS / 1000.0,
+        backoff=settings.ADAPTIVE_CONCURRENCY_BACKOFF,
+    )
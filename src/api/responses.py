@@ -0,0 +1,104 @@
+# src/api/responses.py
+"""
+Réponse JSON optimisée pour les endpoints d'analyse.
+
+Le chemin par défaut de FastAPI (validation response_model + jsonable_encoder + json.dumps)
+parcourt les ~478 modèles Landmark et la matrice 4x4 à chaque réponse. FastJSONResponse
+sérialise directement les modèles pydantic, champ par champ dans l'ordre du schéma, et
+écrit landmarks et matrice depuis les tableaux NumPy attachés par le traitement
+(FaceAnalysisResult.field_array, ignorés si le champ a été réassigné). Le JSON produit est celui du schéma
+(mêmes clés, même ordre, mêmes valeurs). orjson est utilisé s'il est installé, sinon json.
+"""
+
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.schemas.schemas import FaceAnalysisResult
+
+try:
+    import orjson
+except ImportError: # Dépendance optionnelle : repli sur json (plus lent)
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=8)
+def _landmark_key_fragments(num_landmarks: int) -> Tuple[bytes, ...]:
+    """ Fragments JSON à intercaler entre les 3*N valeurs : '{"x":', ',"y":', ',"z":', '},{"x":', ... """
+    return (b'{"x":', b',"y":', b',"z":') + (b'},{"x":', b',"y":', b',"z":') * (num_landmarks - 1)
+
+
+def dumps(content: Any) -> bytes:
+    """ JSON compact UTF-8 (orjson avec support NumPy si disponible). """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    if isinstance(content, np.ndarray):
+        content = content.tolist()
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def landmarks_array_to_json(points: np.ndarray) -> bytes:
+    """ Tableau (N, 3) -> liste JSON [{"x":..,"y":..,"z":..}, ...] (schéma Landmark). """
+    if len(points) == 0:
+        return b"[]"
+    # Les valeurs float32 sont élargies en float64 : même représentation que les floats Python du schéma
+    values = dumps(np.ascontiguousarray(points[:, :3], dtype=np.float64).ravel())[1:-1].split(b",")
+    parts = [b""] * (2 * len(values))
+    parts[0::2] = _landmark_key_fragments(len(points))
+    parts[1::2] = values
+    return b"[" + b"".join(parts) + b"}]"
+
+
+def matrix_array_to_json(matrix: np.ndarray) -> bytes:
+    """ Matrice (4, 4) -> liste de listes JSON. """
+    return dumps(np.ascontiguousarray(matrix, dtype=np.float64))
+
+
+# Champ de FaceAnalysisResult -> sérialiseur de sa copie NumPy
+ARRAY_FIELDS: Dict[str, Callable[[np.ndarray], bytes]] = {
+    "face_landmarks": landmarks_array_to_json,
+    "facial_transformation_matrix": matrix_array_to_json,
+}
+
+
+def _render_value(value: Any) -> bytes:
+    if value is None:
+        return b"null"
+    if isinstance(value, BaseModel):
+        return render_model(value)
+    if isinstance(value, list) and value and isinstance(value[0], BaseModel):
+        return b"[" + b",".join(_render_value(item) for item in value) + b"]"
+    return dumps(value)
+
+
+def render_model(model: BaseModel) -> bytes:
+    """ Sérialise un modèle pydantic (champs dans l'ordre du schéma, None inclus). """
+    parts = []
+    has_arrays = isinstance(model, FaceAnalysisResult)
+    for name, field in type(model).model_fields.items():
+        value = getattr(model, name)
+        key = dumps(field.alias or name)
+        array = model.field_array(name) if has_arrays and name in ARRAY_FIELDS else None
+        if array is not None:
+            parts.append(key + b":" + ARRAY_FIELDS[name](array))
+        else:
+            parts.append(key + b":" + _render_value(value))
+    return b"{" + b",".join(parts) + b"}"
+
+
+class FastJSONResponse(JSONResponse):
+    """ JSONResponse acceptant directement modèles pydantic, tableaux NumPy ou bytes déjà sérialisés. """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, BaseModel):
+            return render_model(content)
+        return dumps(content)
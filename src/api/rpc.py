@@ -0,0 +1,380 @@
+# src/api/rpc.py
+"""
+Interface RPC binaire pour les appelants internes à fort volume, à côté de l'API REST.
+
+Pour de petites images, l'analyse du formulaire multipart et le JSON des landmarks pèsent une
+part notable de chaque appel REST. Ce serveur TCP (asyncio, RPC_ENABLED) expose les mêmes
+opérations avec des messages protobuf (src/schemas/rpc_messages.py, schéma
+src/schemas/optical_factory.proto) :
+  - AnalyzeFace et AnalyzeAndRecommend (unaires) ;
+  - Analyze (flux bidirectionnel) : suite d'images sur un même flux (vidéo, lissage par
+    session), une réponse par image, dans l'ordre d'envoi.
+Le traitement est celui des endpoints REST (_analyze_image : pool d'analyse, single-flight,
+persistance ; _combine_with_recommendation) et chaque image passe par le même limiteur de
+concurrence adaptatif que les requêtes HTTP (statut 503 au-delà de la limite).
+
+Protocole (grpcio n'est pas une dépendance du projet : tramage minimal au lieu de HTTP/2) :
+le client envoie PREFACE, puis des trames FRAME_HEADER (12 octets, gros-boutiste : méthode,
+drapeaux, statut, identifiant de flux, longueur) suivies du message. Une connexion multiplexe
+les flux : les requêtes unaires peuvent être envoyées sans attendre les réponses, qui reviennent
+dans l'ordre de fin avec leur identifiant de flux. Statut 0 = succès, sinon code HTTP équivalent
+et message d'erreur UTF-8. Un flux Analyze se termine par une trame FLAG_END_STREAM du client
+(éventuellement vide), à laquelle le serveur répond par une trame FLAG_END_STREAM vide.
+"""
+
+import asyncio
+import logging
+import socket
+import struct
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from src.api.endpoints import _analyze_image, _combine_with_recommendation
+from src.api.middleware import AdaptiveConcurrencyLimiter
+from src.core.config import settings
+from src.schemas.rpc_messages import (
+    MessageDecodeError,
+    decode_analyze_and_recommend,
+    decode_analyze_request,
+    decode_face_analysis,
+    encode_analyze_and_recommend,
+    encode_analyze_request,
+    encode_face_analysis,
+)
+
+logger = logging.getLogger(__name__)
+
+PREFACE = b"OFRPC/1\n"
+FRAME_HEADER = struct.Struct(">BBHII")
+
+METHOD_ANALYZE_FACE = 1
+METHOD_ANALYZE_AND_RECOMMEND = 2
+METHOD_ANALYZE_STREAM = 3
+METHOD_NAMES = {METHOD_ANALYZE_FACE: "AnalyzeFace", METHOD_ANALYZE_AND_RECOMMEND: "AnalyzeAndRecommend", METHOD_ANALYZE_STREAM: "Analyze"}
+
+FLAG_END_STREAM = 0x01
+STATUS_OK = 0
+
+
+class RpcError(Exception):
+    """ Réponse d'erreur : statut (code HTTP équivalent) et message. """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status} : {message}")
+        self.status = status
+        self.message = message
+
+
+def encode_frame(method: int, stream_id: int, payload: bytes = b"", flags: int = 0, status: int = STATUS_OK) -> bytes:
+    return FRAME_HEADER.pack(method, flags, status, stream_id, len(payload)) + payload
+
+
+class _Connection:
+    """ Écritures d'une connexion (trames entières, une à la fois) et requêtes en cours. """
+
+    def __init__(self, writer: asyncio.StreamWriter, max_in_flight: int):
+        self.writer = writer
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.tasks: Set[asyncio.Task] = set()
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, method: int, stream_id: int, payload: bytes = b"", flags: int = 0, status: int = STATUS_OK) -> None:
+        async with self._write_lock:
+            self.writer.write(encode_frame(method, stream_id, payload, flags, status))
+            await self.writer.drain()
+
+    def spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+class RpcServer:
+    """
+    Serveur RPC : une tâche de lecture par connexion, une tâche par requête unaire ou par flux.
+    Au-delà de max_in_flight requêtes en cours sur une connexion, la lecture est suspendue
+    (contre-pression TCP vers le client).
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 max_message_bytes: Optional[int] = None, max_in_flight: Optional[int] = None):
+        self.limiter = limiter
+        self.max_message_bytes = max_message_bytes or settings.RPC_MAX_MESSAGE_BYTES
+        self.max_in_flight = max_in_flight or settings.RPC_MAX_IN_FLIGHT_PER_CONNECTION
+        self.port: Optional[int] = None
+        self.requests = 0
+        self.errors = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[_Connection] = set()
+
+    async def start(self, host: str, port: int) -> int:
+        """ Écoute sur host:port (0 = port libre) et retourne le port effectif. """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """ Ferme l'écoute et les connexions ouvertes (requêtes en cours annulées). """
+        if self._server is None:
+            return
+        self._server.close()
+        for connection in list(self._connections):
+            for task in connection.tasks:
+                task.cancel()
+            connection.writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"port": self.port, "connections": len(self._connections), "requests": self.requests, "errors": self.errors}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        connection = _Connection(writer, self.max_in_flight)
+        streams: Dict[int, asyncio.Queue] = {}
+        try:
+            if await reader.readexactly(len(PREFACE)) != PREFACE:
+                logger.warning(f"Connexion RPC refusée (préambule invalide) : {peer}")
+                return
+            self._connections.add(connection)
+            while True:
+                method, flags, _, stream_id, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                if length > self.max_message_bytes:
+                    # Le reste de la trame n'est pas lu : la connexion ne peut pas continuer
+                    self.errors += 1
+                    await connection.send(method, stream_id, f"Message trop volumineux ({length} octets).".encode("utf-8"), FLAG_END_STREAM, 413)
+                    return
+                payload = await reader.readexactly(length)
+                if method == METHOD_ANALYZE_STREAM:
+                    queue = streams.get(stream_id)
+                    if queue is None:
+                        queue = streams[stream_id] = asyncio.Queue()
+                        connection.spawn(self._run_stream(connection, stream_id, queue, streams))
+                    if payload or not flags & FLAG_END_STREAM:
+                        await connection.in_flight.acquire()
+                        queue.put_nowait(payload)
+                    if flags & FLAG_END_STREAM:
+                        queue.put_nowait(None)
+                elif method in METHOD_NAMES:
+                    await connection.in_flight.acquire()
+                    connection.spawn(self._run_unary(connection, method, stream_id, payload))
+                else:
+                    self.errors += 1
+                    await connection.send(method, stream_id, f"Méthode inconnue : {method}".encode("utf-8"), FLAG_END_STREAM, 404)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Connexion fermée par le client
+        finally:
+            self._connections.discard(connection)
+            for task in connection.tasks:
+                task.cancel()
+            writer.close()
+
+    async def _run_unary(self, connection: _Connection, method: int, stream_id: int, payload: bytes) -> None:
+        try:
+            response, status = await self._respond(method, payload)
+        finally:
+            connection.in_flight.release()
+        await connection.send(method, stream_id, response, FLAG_END_STREAM, status)
+
+    async def _run_stream(self, connection: _Connection, stream_id: int, queue: asyncio.Queue, streams: Dict[int, asyncio.Queue]) -> None:
+        """ Images du flux traitées une à une (ordre nécessaire au lissage par session). """
+        try:
+            while (payload := await queue.get()) is not None:
+                # Une image en erreur n'interrompt pas le flux : trame d'erreur à sa place
+                try:
+                    response, status = await self._respond(METHOD_ANALYZE_STREAM, payload)
+                finally:
+                    connection.in_flight.release()
+                await connection.send(METHOD_ANALYZE_STREAM, stream_id, response, status=status)
+        finally:
+            streams.pop(stream_id, None)
+        await connection.send(METHOD_ANALYZE_STREAM, stream_id, flags=FLAG_END_STREAM)
+
+    async def _respond(self, method: int, payload: bytes) -> Tuple[bytes, int]:
+        """ (message, statut) : réponse encodée, ou message d'erreur UTF-8 et son statut. """
+        try:
+            return await self._call(method, payload), STATUS_OK
+        except RpcError as e:
+            return e.message.encode("utf-8"), e.status
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"[rpc {METHOD_NAMES[method]}] Erreur inattendue: {e}", exc_info=True)
+            return "Erreur interne lors de l'analyse".encode("utf-8"), 500
+
+    async def _call(self, method: int, payload: bytes) -> bytes:
+        """ Décode la requête, analyse l'image comme les endpoints REST et encode la réponse. """
+        self.requests += 1
+        try:
+            try:
+                request = decode_analyze_request(payload)
+            except MessageDecodeError as e:
+                raise RpcError(400, str(e))
+            if not request["image"]:
+                raise RpcError(400, "Le fichier image fourni est vide.")
+            if request["session_id"] is not None and len(request["session_id"]) > 128:
+                raise RpcError(400, "session_id trop long (128 caractères max).")
+            if self.limiter is not None and not self.limiter.try_acquire():
+                raise RpcError(503, "Service saturé, réessayez dans quelques instants.")
+
+            start = time.perf_counter()
+            try:
+                if method == METHOD_ANALYZE_AND_RECOMMEND:
+                    analysis_result = await _analyze_image(request["image"])
+                    return encode_analyze_and_recommend(_combine_with_recommendation(analysis_result))
+                timestamp = request["capture_timestamp_ms"] / 1000.0 if request["capture_timestamp_ms"] is not None else None
+                analysis_result = await _analyze_image(request["image"], session_id=request["session_id"], timestamp=timestamp,
+                                                       analysis_level=request["analysis_level"])
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(time.perf_counter() - start)
+            if not analysis_result.detection_successful and "interne" in (analysis_result.error_message or "").lower():
+                logger.error(f"[rpc {METHOD_NAMES[method]}] Erreur interne: {analysis_result.error_message}")
+                raise RpcError(500, analysis_result.error_message or "Erreur interne lors de l'analyse")
+            return encode_face_analysis(analysis_result)
+        except RpcError:
+            self.errors += 1
+            raise
+
+
+# --- Cycle de vie (startup/shutdown de l'application) ---
+_rpc_server_instance: Optional[RpcServer] = None
+
+
+async def start_rpc_server(limiter: Optional[AdaptiveConcurrencyLimiter] = None) -> Optional[RpcServer]:
+    """ Démarre le serveur RPC si RPC_ENABLED (une seule instance). """
+    global _rpc_server_instance
+    if not settings.RPC_ENABLED or _rpc_server_instance is not None:
+        return _rpc_server_instance
+    server = RpcServer(limiter)
+    port = await server.start(settings.RPC_HOST, settings.RPC_PORT)
+    _rpc_server_instance = server
+    logger.info(f"Serveur RPC binaire à l'écoute sur {settings.RPC_HOST}:{port}.")
+    return server
+
+
+def get_rpc_server() -> Optional[RpcServer]:
+    return _rpc_server_instance
+
+
+async def stop_rpc_server() -> None:
+    global _rpc_server_instance
+    if _rpc_server_instance is not None:
+        await _rpc_server_instance.stop()
+        _rpc_server_instance = None
+        logger.info("Serveur RPC arrêté.")
+
+
+# --- Client ---
+class RpcClient:
+    """
+    Client bloquant (benchmarks, appelants Python internes) sur une connexion. Réponses décodées
+    par src/schemas/rpc_messages.py (landmarks et matrice en tableaux NumPy float32).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None, timeout: float = 30.0):
+        self._sock = socket.create_connection((host, port or settings.RPC_PORT), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.sendall(PREFACE)
+        self._file = self._sock.makefile("rb")
+        self._next_stream_id = 1
+        self.bytes_received = 0  # Trames comprises (mesure de la taille des réponses)
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "RpcClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _new_stream_id(self) -> int:
+        stream_id = self._next_stream_id
+        self._next_stream_id = stream_id % 0xFFFFFFFF + 1
+        return stream_id
+
+    def _send(self, method: int, stream_id: int, payload: bytes, flags: int = 0) -> None:
+        self._sock.sendall(encode_frame(method, stream_id, payload, flags))
+
+    def _receive(self) -> Tuple[int, int, int, bytes]:
+        """ Trame suivante : (drapeaux, statut, identifiant de flux, message). """
+        header = self._file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionError("Connexion RPC fermée par le serveur.")
+        _, flags, status, stream_id, length = FRAME_HEADER.unpack(header)
+        payload = self._file.read(length)
+        if len(payload) < length:
+            raise ConnectionError("Connexion RPC fermée par le serveur.")
+        self.bytes_received += FRAME_HEADER.size + length
+        return flags, status, stream_id, payload
+
+    def _unary(self, method: int, request: bytes) -> bytes:
+        self._send(method, self._new_stream_id(), request, FLAG_END_STREAM)
+        _, status, _, payload = self._receive()
+        if status != STATUS_OK:
+            raise RpcError(status, payload.decode("utf-8", errors="replace"))
+        return payload
+
+    def analyze_face(self, image: bytes, analysis_level: str = "full", session_id: Optional[str] = None,
+                     capture_timestamp_ms: Optional[float] = None) -> Dict:
+        return decode_face_analysis(self._unary(METHOD_ANALYZE_FACE, encode_analyze_request(image, analysis_level, session_id, capture_timestamp_ms)))
+
+    def analyze_and_recommend(self, image: bytes) -> Dict:
+        return decode_analyze_and_recommend(self._unary(METHOD_ANALYZE_AND_RECOMMEND, encode_analyze_request(image)))
+
+    def analyze_face_pipelined(self, requests: Iterable[Dict], window: int = 8) -> Iterator[Dict]:
+        """
+        AnalyzeFace pour chaque requête, avec `window` appels en vol sur la connexion : le serveur
+        les traite en parallèle (un flux Analyze les traite un à un). Réponses dans l'ordre des
+        requêtes ; une erreur lève RpcError.
+        """
+        pending_requests = iter(requests)
+        order: deque = deque()
+        responses: Dict[int, Tuple[int, bytes]] = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(order) < window:
+                request = next(pending_requests, None)
+                if request is None:
+                    exhausted = True
+                else:
+                    order.append(self._new_stream_id())
+                    self._send(METHOD_ANALYZE_FACE, order[-1], encode_analyze_request(**request), FLAG_END_STREAM)
+            if not order:
+                return
+            while order[0] not in responses:
+                _, status, stream_id, payload = self._receive()
+                responses[stream_id] = (status, payload)
+            status, payload = responses.pop(order.popleft())
+            if status != STATUS_OK:
+                raise RpcError(status, payload.decode("utf-8", errors="replace"))
+            yield decode_face_analysis(payload)
+
+    def analyze_stream(self, requests: Iterable[Dict], window: int = 8) -> Iterator[Dict]:
+        """
+        Flux Analyze : chaque requête (arguments d'encode_analyze_request) est envoyée sans attendre
+        les réponses précédentes, avec au plus `window` réponses en attente (rester sous
+        RPC_MAX_IN_FLIGHT_PER_CONNECTION). Réponses dans l'ordre ; une image en erreur lève RpcError
+        et la connexion n'est plus utilisable.
+        """
+        stream_id = self._new_stream_id()
+        pending_requests = iter(requests)
+        pending, exhausted = 0, False
+        while True:
+            while not exhausted and pending < window:
+                request = next(pending_requests, None)
+                if request is None:
+                    exhausted = True
+                    self._send(METHOD_ANALYZE_STREAM, stream_id, b"", FLAG_END_STREAM)
+                else:
+                    self._send(METHOD_ANALYZE_STREAM, stream_id, encode_analyze_request(**request))
+                    pending += 1
+            flags, status, _, payload = self._receive()
+            if flags & FLAG_END_STREAM:
+                return
+            pending -= 1
+            if status != STATUS_OK:
+                raise RpcError(status, payload.decode("utf-8", errors="replace"))
+            yield decode_face_analysis(payload)
@@ -0,0 +1,122 @@
+# src/core/assets.py
+"""
+Manifeste des assets 3D construits (src/tools/build_assets.py) et choix des variantes par client.
+
+Le build écrit dans ASSET_BUILD_DIR des fichiers nommés par leur empreinte de contenu
+(cache immuable côté client) et un manifest.json : pour chaque modèle du catalogue, le maillage
+(OBJ allégé + version gzip), le MTL réduit aux matériaux utilisés, les textures référencées
+(niveaux de mip en PNG et WebP) et l'aperçu du catalogue. Ce module choisit, pour une taille de
+texture demandée et les formats acceptés, les fichiers à télécharger.
+"""
+
+import json
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+# Part de la largeur d'écran (px physiques) couverte au plus par la monture pendant l'essayage
+VIEWPORT_TEXTURE_RATIO = 0.5
+
+
+def texture_size_hint(max_texture_size: Optional[int] = None, viewport_width: Optional[float] = None,
+                      dpr: Optional[float] = None) -> int:
+    """
+    Taille de texture (côté le plus long, px) à servir : valeur demandée, sinon déduite des indices
+    client (largeur d'écran x densité, puissance de 2 supérieure), sinon ASSET_DEFAULT_TEXTURE_SIZE.
+    """
+    if max_texture_size is None and viewport_width:
+        physical = viewport_width * (dpr or 1.0) * VIEWPORT_TEXTURE_RATIO
+        max_texture_size = 2 ** math.ceil(math.log2(max(physical, 1.0)))
+    if max_texture_size is None:
+        max_texture_size = settings.ASSET_DEFAULT_TEXTURE_SIZE
+    return int(min(max(max_texture_size, 1), settings.ASSET_MAX_TEXTURE_SIZE))
+
+
+def select_texture_level(texture: Dict, max_size: int, accept_webp: bool = True) -> Dict:
+    """ Plus grand niveau de mip ne dépassant pas max_size (sinon le plus petit), en WebP si accepté. """
+    levels = sorted(texture["levels"], key=lambda level: level["size"], reverse=True)
+    level = next((level for level in levels if level["size"] <= max_size), levels[-1])
+    image_format = "webp" if accept_webp and "webp" in level else "png"
+    return {"format": image_format, "width": level["width"], "height": level["height"], **level[image_format]}
+
+
+def resolve_model_assets(entry: Dict, max_size: int, accept_webp: bool = True, accept_gzip: bool = True) -> Dict:
+    """ Fichiers d'un modèle du manifeste à télécharger pour ce client (bytes = taille transférée). """
+    mesh = entry["mesh"]["obj_gzip"] if accept_gzip and "obj_gzip" in entry["mesh"] else entry["mesh"]["obj"]
+    return {
+        "mesh": {"file": entry["mesh"]["obj"]["file"], "bytes": mesh["bytes"], "encoding": "gzip" if mesh is not entry["mesh"]["obj"] else None},
+        "material": dict(entry["mtl"]) if entry.get("mtl") else None,
+        "textures": [
+            {"material": texture["material"], "map": texture["map"], **select_texture_level(texture, max_size, accept_webp)}
+            for texture in entry["textures"]
+        ],
+        "preview": select_texture_level(entry["preview"], max_size, accept_webp) if entry.get("preview") else None,
+    }
+
+
+def session_transfer_bytes(manifest: Dict, model_ids: Optional[Iterable[str]] = None, max_size: Optional[int] = None,
+                           accept_webp: bool = True, accept_gzip: bool = True) -> int:
+    """
+    Octets transférés pour une session d'essayage (aperçus du catalogue + modèles essayés) ; fichiers
+    partagés comptés une fois. max_size=None : sources d'origine (avant le build).
+    """
+    models = manifest["models"]
+    model_ids = list(models) if model_ids is None else list(model_ids)
+    files: Dict[str, int] = {}
+    for model_id, entry in models.items():
+        if max_size is None:
+            if entry.get("preview"):
+                files[entry["preview"]["source"]] = entry["preview"]["source_bytes"]
+            if model_id in model_ids:
+                files.update(entry["source_files"])
+            continue
+        resolved = resolve_model_assets(entry, max_size, accept_webp, accept_gzip)
+        if resolved["preview"]:
+            files[resolved["preview"]["file"]] = resolved["preview"]["bytes"]
+        if model_id in model_ids:
+            files[resolved["mesh"]["file"]] = resolved["mesh"]["bytes"]
+            if resolved["material"]:
+                files[resolved["material"]["file"]] = resolved["material"]["bytes"]
+            files.update((texture["file"], texture["bytes"]) for texture in resolved["textures"])
+    return sum(files.values())
+
+
+def asset_build_dir() -> Path:
+    build_dir = Path(settings.ASSET_BUILD_DIR)
+    return build_dir if build_dir.is_absolute() else settings.BASE_DIR / build_dir
+
+
+_asset_manifest_instance: Optional[Dict] = None
+_asset_manifest_lock = threading.Lock()
+
+
+def get_asset_manifest() -> Optional[Dict]:
+    """ Manifeste du dernier build (None si aucun build). Chargé une fois, thread-safe. """
+    global _asset_manifest_instance
+    if _asset_manifest_instance is None:
+        with _asset_manifest_lock:
+            if _asset_manifest_instance is None:
+                manifest_path = asset_build_dir() / MANIFEST_FILE
+                if not manifest_path.exists():
+                    logger.debug(f"Manifeste d'assets absent ({manifest_path}).")
+                    return None
+                with open(manifest_path, encoding="utf-8") as f:
+                    _asset_manifest_instance = json.load(f)
+                logger.info(f"Manifeste d'assets chargé : {len(_asset_manifest_instance['models'])} modèles.")
+    return _asset_manifest_instance
+
+
+def reload_asset_manifest() -> Optional[Dict]:
+    """ Relit le manifeste (après un nouveau build). """
+    global _asset_manifest_instance
+    with _asset_manifest_lock:
+        _asset_manifest_instance = None
+    return get_asset_manifest()
@@ -1,7 +1,7 @@
 # src/core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
-from typing import Dict # Importe Dict pour le type hint
+from typing import Dict, List, Optional # Importe Dict pour le type hint
 
 # Calcule BASE_DIR une seule fois au niveau du module
 _project_root = Path(__file__).resolve().parent.parent.parent
@@ -27,6 +27,177 @@ class Settings(BaseSettings):
     API_BASE_URL: str = "http://localhost:8000"
     # Optionnel : Seuil pour la précision de forme
     SHAPE_DETERMINATION_ACCURACY: float = 0.70
+    # Artefact versionné du classifieur de forme (voir src/core/shape_classifier.py)
+    SHAPE_CLASSIFIER_PATH: str = "./models/shape_classifiers/rules_v1.json"
+    # Règles forme -> modèles, compilées en table au démarrage et à chaque modification (voir src/core/recommendation_table.py)
+    RECOMMENDATION_RULES_PATH: str = "./config/recommendation_rules.json"
+    # Intervalle de vérification des règles et du catalogue (table recompilée s'ils changent ; < 0 : jamais)
+    RECOMMENDATION_RELOAD_CHECK_S: float = 1.0
+
+    # --- Backend de landmarks (voir src/core/landmark_backends.py) ---
+    # "mediapipe" (FaceLandmarker complet) ou "onnx" (maillage facial ONNX Runtime CPU, plus léger)
+    LANDMARK_BACKEND: str = "mediapipe"
+    ONNX_FACE_MESH_PATH: str = "./models/face_mesh_192x192.onnx"
+    ONNX_INTRA_OP_THREADS: int = 2
+    ONNX_INTER_OP_THREADS: int = 1
+    ONNX_FACE_PRESENCE_THRESHOLD: float = 0.5
+    # Sans détecteur : carré centré analysé, en fraction du petit côté de l'image
+    ONNX_ROI_SCALE: float = 0.8
+
+    # --- Décodage des images ---
+    # Backend JPEG : "auto" (sélection par disponibilité + micro-benchmark), "opencv", "pillow" ou "turbojpeg"
+    IMAGE_DECODER_BACKEND: str = "auto"
+    IMAGE_DECODER_BENCHMARK_ON_STARTUP: bool = True
+    IMAGE_DECODER_BENCHMARK_DIR: str = "./benchmark/test_data"
+    IMAGE_DECODER_BENCHMARK_SAMPLES: int = 8
+    # Réduction DCT au décodage (1, 2, 4 ou 8). 1 = pleine résolution (sortie identique à cv2.imdecode).
+    # Au-delà de 1, seuls les backends à réduction identique à OpenCV sont proposés (pas Pillow : l'identité
+    # vérifiée sur IMAGE_DECODER_BENCHMARK_SAMPLES images ne garantit pas celle de Image.draft() sur les autres)
+    IMAGE_DECODE_SCALE_DENOMINATOR: int = 1
+
+    # --- Store local des résultats d'analyse (désactivé si vide) ---
+    RESULT_STORE_DIR: Optional[str] = None
+    RESULT_STORE_SEGMENT_SIZE: int = 65536
+    # Persiste l'en-tête (nombre de lignes) tous les N ajouts depuis l'API
+    RESULT_STORE_FLUSH_EVERY: int = 100
+
+    # --- Exécution des analyses et limitation de charge (voir src/api/middleware.py) ---
+    # Threads du pool d'analyse (la détection Mediapipe reste sérialisée par un verrou)
+    ANALYSIS_WORKERS: int = 4
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = True
+    ADAPTIVE_CONCURRENCY_INITIAL_LIMIT: int = 8
+    ADAPTIVE_CONCURRENCY_MIN_LIMIT: int = 1
+    ADAPTIVE_CONCURRENCY_MAX_LIMIT: int = 64
+    # Cible de latence serveur, avec marge sous TARGET_LATENCY_MS (2500 ms, evaluation_criteria.json)
+    ADAPTIVE_CONCURRENCY_TARGET_LATENCY_MS: float = 2000.0
+    ADAPTIVE_CONCURRENCY_BACKOFF: float = 0.9
+    # Uploads identiques concurrents : une seule analyse partagée (pas de cache au-delà)
+    SINGLE_FLIGHT_ENABLED: bool = True
+    # Voies prioritaires : jamais limitées ni délestées ("*" final = préfixe). Pour les jobs, seulement le suivi
+    # (GET /api/v1/jobs/{id}[/results]) : la soumission, qui lit et persiste les images, reste limitée
+    ADAPTIVE_CONCURRENCY_PRIORITY_PATHS: List[str] = ["/", "/health", "/api/v1/recommend_glasses", "/api/v1/blendshape_names", "/api/v1/jobs/*", "/api/v1/models*", "/api/v1/assets/*", "/docs", "/openapi.json"]
+
+    # --- Jobs asynchrones (file SQLite durable, voir src/core/job_queue.py) ---
+    JOBS_ENABLED: bool = True
+    JOB_QUEUE_PATH: str = "./data/jobs.sqlite3"
+    # Workers d'arrière-plan : ils cèdent la place dès qu'une analyse interactive est en cours
+    JOB_WORKERS: int = 1
+    JOB_MAX_IMAGES: int = 500
+    # Volume total des images d'une soumission (lues en mémoire avant insertion) : au-delà, 413
+    JOB_MAX_BYTES: int = 100 * 1024 * 1024
+    JOB_IDLE_POLL_S: float = 0.5
+    JOB_YIELD_POLL_S: float = 0.02
+    # Intervalle de lecture des nouveaux résultats pour GET /jobs/{id}/results?follow=true
+    JOB_STREAM_POLL_S: float = 0.25
+    # Jobs terminés supprimés au-delà de cette durée : au démarrage, puis par les workers toutes les JOB_PURGE_INTERVAL_S
+    JOB_RETENTION_HOURS: float = 72.0
+    JOB_PURGE_INTERVAL_S: float = 3600.0
+
+    # --- Capture de trafic pour rejeu (opt-in, voir src/core/traffic_capture.py et benchmark/traffic_replay.py) ---
+    TRAFFIC_CAPTURE_ENABLED: bool = False
+    TRAFFIC_CAPTURE_DIR: str = "./data/traffic_capture"
+    TRAFFIC_CAPTURE_PATHS: List[str] = ["/api/v1/analyze_face", "/api/v1/analyze_and_recommend", "/api/v1/jobs"]
+    # Corps complets (images) enregistrés uniquement pour ces comptes de test consentants
+    TRAFFIC_CAPTURE_ACCOUNT_HEADER: str = "X-Test-Account"
+    TRAFFIC_CAPTURE_PAYLOAD_ACCOUNTS: List[str] = []
+    TRAFFIC_CAPTURE_MAX_BODY_BYTES: int = 20 * 1024 * 1024
+    # Requêtes en attente d'écriture au-delà desquelles la capture est abandonnée (jamais bloquante)
+    TRAFFIC_CAPTURE_QUEUE_SIZE: int = 1000
+    # Octets de corps (payloads consentants) en attente d'écriture au-delà desquels la capture est abandonnée
+    TRAFFIC_CAPTURE_QUEUE_MAX_BYTES: int = 200 * 1024 * 1024
+
+    # --- Interface RPC binaire pour les appelants internes (voir src/api/rpc.py) ---
+    RPC_ENABLED: bool = False
+    # Boucle locale par défaut : le service n'a ni TLS ni authentification. Pour le joindre depuis
+    # d'autres hôtes (ex. conteneur), définir explicitement RPC_HOST=0.0.0.0 sur un réseau interne
+    RPC_HOST: str = "127.0.0.1"
+    RPC_PORT: int = 50051
+    RPC_MAX_MESSAGE_BYTES: int = 20 * 1024 * 1024
+    # Requêtes en cours par connexion au-delà desquelles la lecture est suspendue (contre-pression)
+    RPC_MAX_IN_FLIGHT_PER_CONNECTION: int = 32
+
+    # --- Pré-contrôle qualité avant détection (voir src/core/quality.py) ---
+    # Désactivé par défaut : sur benchmark/test_data, aucun échec de détection n'est distinguable des succès par
+    # ces mesures (0 image rejetée), et le pré-contrôle (~0,8 ms) serait payé par chaque requête sans rien économiser.
+    # À activer pour un trafic riche en captures floues ou sombres. Seuils tirés des distributions de
+    # python -m benchmark.quality_gate_benchmark --degrade (mesures sur la copie réduite à QUALITY_ANALYSIS_MAX_SIDE) :
+    #   - luminance : sous-exposées <= 4, originales >= 35 ;
+    #   - variance du Laplacien : flou gaussien (sigma = côté / 40) <= 3,5, originales >= 310 ;
+    #   - contraste : uniformes 0, sous-exposées <= 2, flou >= 20, originales >= 37.
+    QUALITY_GATE_ENABLED: bool = False
+    QUALITY_ANALYSIS_MAX_SIDE: int = 256
+    QUALITY_MIN_SIDE_PX: int = 16
+    QUALITY_MIN_BRIGHTNESS: float = 10.0
+    QUALITY_MAX_BRIGHTNESS: float = 254.5
+    QUALITY_MIN_CONTRAST: float = 5.0
+    QUALITY_MIN_BLUR_VARIANCE: float = 20.0
+
+    # --- Détection de repli sur recadrages (visages petits ou lointains, voir src/core/detection_fallback.py) ---
+    # Seulement si la passe pleine image ne trouve aucun visage ; budget strict par requête
+    FALLBACK_DETECTION_ENABLED: bool = True
+    FALLBACK_DETECTION_BUDGET_MS: float = 150.0
+    # Recadrage zoomé sur la zone saillante (teinte chair) avant les grilles de tuiles
+    FALLBACK_SALIENCY_CROP: bool = True
+    # Grilles successives (2 = 2x2, 3 = 3x3) et recouvrement des tuiles (fraction de la tuile)
+    FALLBACK_GRID_LEVELS: List[int] = [2, 3]
+    FALLBACK_TILE_OVERLAP: float = 0.25
+    FALLBACK_MIN_REGION_SIDE_PX: int = 96
+
+    # --- Orientation de la tête (lacet/tangage/roulis, degrés) ---
+    # Hors budget : pas de calcul de forme ni de recommandation, le client est invité à tourner la tête
+    POSE_GATING_ENABLED: bool = True
+    POSE_MAX_YAW_DEG: float = 30.0
+    POSE_MAX_PITCH_DEG: float = 25.0
+    POSE_MAX_ROLL_DEG: float = 45.0
+    # Mesure la forme sur les landmarks redressés (rotation de la tête annulée)
+    SHAPE_FRONTALIZE_LANDMARKS: bool = False
+
+    # --- Blendshapes et verdict de capture (voir src/core/expression.py) ---
+    # Scores calculés par le même appel detect (coût non mesurable sur benchmark/test_data)
+    OUTPUT_FACE_BLENDSHAPES: bool = True
+    # Seuils du verdict (scores 0-1) : p99 du clignement sur benchmark/test_data = 0.45
+    CAPTURE_MAX_EYE_BLINK: float = 0.5
+    CAPTURE_MAX_EYE_SQUINT: float = 0.85
+    CAPTURE_MAX_EXPRESSION: float = 0.6
+
+    # --- Lissage temporel par session (One-Euro, voir src/core/smoothing.py) ---
+    # Landmarks en coordonnées normalisées, pose en unités Mediapipe (cm)
+    SMOOTHING_LANDMARK_MIN_CUTOFF: float = 1.0
+    SMOOTHING_LANDMARK_BETA: float = 10.0
+    SMOOTHING_POSE_MIN_CUTOFF: float = 1.0
+    SMOOTHING_POSE_BETA: float = 0.5
+    SMOOTHING_SESSION_TTL_S: float = 30.0
+    SMOOTHING_MAX_SESSIONS: int = 10000
+
+    # --- Assets 3D : build (python -m src.tools.build_assets) et service selon le client ---
+    ASSET_BUILD_DIR: str = "./data/assets"
+    ASSET_MIN_MIP_SIZE: int = 64  # Plus petit niveau de mip (côté le plus long, px)
+    ASSET_WEBP_QUALITY: int = 85
+    ASSET_MESH_DECIMALS: int = 5  # Décimales conservées dans les OBJ construits
+    # Taille de texture servie sans indice client (max_texture_size ou Sec-CH-Viewport-Width/DPR)
+    ASSET_DEFAULT_TEXTURE_SIZE: int = 1024
+    ASSET_MAX_TEXTURE_SIZE: int = 4096
+
+    # --- Aperçus d'essayage (compositeur CPU, voir src/core/preview.py et src/tools/render_previews.py) ---
+    PREVIEW_SPRITE_DIR: str = "./data/preview_sprites"
+    PREVIEW_CACHE_DIR: str = "./data/previews"
+    PREVIEW_SPRITE_PX_PER_CM: float = 24.0  # Résolution des sprites (réduits ou agrandis à la composition)
+    PREVIEW_YAW_STEP_DEG: int = 10
+    PREVIEW_PITCH_STEP_DEG: int = 10
+    PREVIEW_MAX_YAW_DEG: int = 50
+    PREVIEW_MAX_PITCH_DEG: int = 30
+    PREVIEW_MAX_SIZE: int = 800  # Côté le plus long des aperçus (px)
+    PREVIEW_JPEG_QUALITY: int = 85
+    # Ajustement des montures sur le visage canonique : largeur relative au visage, avance devant l'arête du nez (cm)
+    PREVIEW_FRAME_WIDTH_RATIO: float = 0.95
+    PREVIEW_FRAME_DEPTH_OFFSET_CM: float = 1.0
+    # Rotation (degrés x, y, z) ramenant chaque OBJ en x à droite, y en haut, face avant vers +z
+    # (les trois OBJ du catalogue sont exportés tournés d'environ 53° autour de y)
+    PREVIEW_MODEL_ROTATIONS: Dict[str, List[float]] = {
+        "sunglass_model_1": [0.0, -53.3, 0.0],
+        "sunglass_model_2": [0.0, -53.3, 0.0],
+        "sunglass_model_3": [0.0, -53.3, 0.0],
+    }
 
     # --- Configuration Statique (non lue depuis .env mais partie des settings) ---
     MODEL_IDS_TO_PATHS: Dict[str, str] = {
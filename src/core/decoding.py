@@ -0,0 +1,361 @@
+# src/core/decoding.py
+
+import io
+import math
+import struct
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+import cv2
+import numpy as np
+
+from src.core.config import settings
+
+# Dépendances optionnelles : chaque backend n'est proposé que si sa librairie est installée
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    Image = None
+    ImageOps = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    TurboJPEG = None
+    TJPF_RGB = None
+
+logger = logging.getLogger(__name__)
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+# Facteurs de réduction DCT supportés par libjpeg (et donc par les trois backends)
+SUPPORTED_SCALE_DENOMINATORS = (1, 2, 4, 8)
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+# --- Orientation EXIF (reproduit le comportement de cv2.imdecode) ---
+def read_jpeg_exif_orientation(image_bytes: bytes) -> int:
+    """
+    Lit le tag d'orientation EXIF d'un JPEG sans décoder l'image.
+    Retourne 1 (orientation normale) si absent ou illisible.
+    """
+    try:
+        offset = 2  # Saute le marqueur SOI
+        size = len(image_bytes)
+        while offset + 4 <= size:
+            if image_bytes[offset] != 0xFF:
+                return 1
+            marker = image_bytes[offset + 1]
+            if marker == 0xDA:  # SOS : plus de segments de métadonnées ensuite
+                return 1
+            segment_length = struct.unpack(">H", image_bytes[offset + 2:offset + 4])[0]
+            if marker == 0xE1 and image_bytes[offset + 4:offset + 10] == b"Exif\x00\x00":
+                tiff = image_bytes[offset + 10:offset + 2 + segment_length]
+                endian = "<" if tiff[:2] == b"II" else ">"
+                ifd_offset = struct.unpack(endian + "I", tiff[4:8])[0]
+                num_entries = struct.unpack(endian + "H", tiff[ifd_offset:ifd_offset + 2])[0]
+                for i in range(num_entries):
+                    entry = ifd_offset + 2 + i * 12
+                    tag = struct.unpack(endian + "H", tiff[entry:entry + 2])[0]
+                    if tag == EXIF_ORIENTATION_TAG:
+                        value = struct.unpack(endian + "H", tiff[entry + 8:entry + 10])[0]
+                        return value if 1 <= value <= 8 else 1
+                return 1
+            offset += 2 + segment_length
+    except (struct.error, IndexError):
+        logger.debug("Segment EXIF illisible, orientation par défaut utilisée.")
+    return 1
+
+
+# --- Format et dimensions sans décodage (capture de trafic) ---
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_image_header(image_bytes: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Format ("jpeg", "png", "webp", "bmp", "gif" ou "other") et dimensions (largeur, hauteur) lues
+    dans l'en-tête, sans décoder les pixels. Dimensions None si l'en-tête est illisible.
+    """
+    try:
+        if image_bytes.startswith(JPEG_MAGIC):
+            offset, size = 2, len(image_bytes)
+            while offset + 9 <= size and image_bytes[offset] == 0xFF:
+                marker = image_bytes[offset + 1]
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack(">HH", image_bytes[offset + 5:offset + 9])
+                    return "jpeg", width, height
+                if marker == 0xDA:
+                    break
+                offset += 2 + struct.unpack(">H", image_bytes[offset + 2:offset + 4])[0]
+            return "jpeg", None, None
+        if image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+            width, height = struct.unpack(">II", image_bytes[16:24])
+            return "png", width, height
+        if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+            chunk = image_bytes[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", image_bytes[26:30])
+                return "webp", width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(image_bytes[21:25], "little")
+                return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return "webp", int.from_bytes(image_bytes[24:27], "little") + 1, int.from_bytes(image_bytes[27:30], "little") + 1
+            return "webp", None, None
+        if image_bytes.startswith(b"BM"):
+            width, height = struct.unpack("<ii", image_bytes[18:26])
+            return "bmp", width, abs(height)
+        if image_bytes[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", image_bytes[6:10])
+            return "gif", width, height
+    except (struct.error, IndexError):
+        pass
+    return "other", None, None
+
+
+def apply_exif_orientation(image: np.ndarray, orientation: int) -> np.ndarray:
+    """ Applique une orientation EXIF (1-8) à un tableau HxWxC (équivalent de ImageOps.exif_transpose). """
+    if orientation == 2:
+        return image[:, ::-1]
+    if orientation == 3:
+        return image[::-1, ::-1]
+    if orientation == 4:
+        return image[::-1]
+    if orientation == 5:
+        return image.transpose(1, 0, 2)
+    if orientation == 6:
+        return np.rot90(image, k=-1)
+    if orientation == 7:
+        return image[::-1, ::-1].transpose(1, 0, 2)
+    if orientation == 8:
+        return np.rot90(image, k=1)
+    return image
+
+
+# --- Interface des Décodeurs ---
+class ImageDecoder(ABC):
+    """
+    Décodeur JPEG produisant un tableau RGB uint8 contigu (HxWx3).
+    Tous les backends doivent produire exactement les mêmes pixels que OpenCV.
+    """
+    name: str = "abstract"
+    # Réduction DCT identique à cv2.IMREAD_REDUCED_* ; sinon backend réservé à la pleine résolution
+    exact_scaling: bool = True
+
+    @classmethod
+    @abstractmethod
+    def is_available(cls) -> bool:
+        """ Indique si la librairie sous-jacente est installée. """
+
+    @abstractmethod
+    def decode_jpeg(self, image_bytes: bytes, scale_denominator: int = 1) -> Optional[np.ndarray]:
+        """ Décode un JPEG (avec réduction DCT optionnelle 1/2, 1/4, 1/8). Retourne None si indécodable. """
+
+
+class OpenCVDecoder(ImageDecoder):
+    name = "opencv"
+    _FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def decode_jpeg(self, image_bytes: bytes, scale_denominator: int = 1) -> Optional[np.ndarray]:
+        return self.decode_any(image_bytes, self._FLAGS[scale_denominator])
+
+    def decode_any(self, image_bytes: bytes, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """ Décode n'importe quel format supporté par OpenCV (PNG, BMP, ...). """
+        image_bgr = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flags)
+        if image_bgr is None:
+            return None
+        return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+
+class PillowDecoder(ImageDecoder):
+    """
+    Pillow (ou Pillow-SIMD, même API). La réduction passe par Image.draft(), qui ne reproduit pas
+    cv2.IMREAD_REDUCED_* sur toutes les images : backend utilisé seulement en pleine résolution.
+    """
+    name = "pillow"
+    exact_scaling = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return Image is not None
+
+    def decode_jpeg(self, image_bytes: bytes, scale_denominator: int = 1) -> Optional[np.ndarray]:
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            if scale_denominator > 1:
+                width, height = image.size
+                image.draft("RGB", (math.ceil(width / scale_denominator), math.ceil(height / scale_denominator)))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            return np.array(image)  # Copie inscriptible, comme la sortie OpenCV
+        except Exception as e:
+            logger.debug(f"Pillow n'a pas pu décoder l'image: {e}")
+            return None
+
+
+class TurboJPEGDecoder(ImageDecoder):
+    """ libjpeg-turbo via PyTurboJPEG (nécessite la librairie système libturbojpeg). """
+    name = "turbojpeg"
+
+    def __init__(self):
+        self._turbo = TurboJPEG()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        if TurboJPEG is None:
+            return False
+        try:
+            TurboJPEG()
+            return True
+        except Exception as e:  # Librairie Python présente mais libturbojpeg introuvable
+            logger.debug(f"PyTurboJPEG installé mais inutilisable: {e}")
+            return False
+
+    def decode_jpeg(self, image_bytes: bytes, scale_denominator: int = 1) -> Optional[np.ndarray]:
+        try:
+            image_rgb = self._turbo.decode(image_bytes, pixel_format=TJPF_RGB, scaling_factor=(1, scale_denominator))
+        except Exception as e:
+            logger.debug(f"TurboJPEG n'a pas pu décoder l'image: {e}")
+            return None
+        orientation = read_jpeg_exif_orientation(image_bytes)
+        return np.ascontiguousarray(apply_exif_orientation(image_rgb, orientation))
+
+
+# Ordre de préférence utilisé quand le micro-benchmark est désactivé ou impossible
+DECODER_CLASSES: Dict[str, Type[ImageDecoder]] = {
+    TurboJPEGDecoder.name: TurboJPEGDecoder,
+    PillowDecoder.name: PillowDecoder,
+    OpenCVDecoder.name: OpenCVDecoder,
+}
+
+
+def get_available_decoder_names(scale_denominator: int = 1) -> List[str]:
+    """ Retourne les noms des backends installés utilisables à ce facteur de réduction, par ordre de préférence. """
+    return [
+        name for name, decoder_cls in DECODER_CLASSES.items()
+        if decoder_cls.is_available() and (scale_denominator == 1 or decoder_cls.exact_scaling)
+    ]
+
+
+# --- Micro-benchmark de sélection ---
+def _list_benchmark_images(max_images: int) -> List[Path]:
+    sample_dir = Path(settings.IMAGE_DECODER_BENCHMARK_DIR)
+    if not sample_dir.is_absolute():
+        sample_dir = settings.BASE_DIR / sample_dir
+    if not sample_dir.is_dir():
+        return []
+    jpeg_paths = sorted(p for p in sample_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg"))
+    return jpeg_paths[:max_images]
+
+
+def benchmark_image_decoders(
+    image_paths: List[Path],
+    decoder_names: Optional[List[str]] = None,
+    repeats: int = 3,
+    scale_denominator: int = 1,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Mesure le temps de décodage moyen (ms/image) de chaque backend et vérifie
+    que sa sortie est identique à celle d'OpenCV (référence).
+    """
+    samples = [p.read_bytes() for p in image_paths]
+    reference = OpenCVDecoder()
+    expected = [reference.decode_jpeg(data, scale_denominator) for data in samples]
+    report: Dict[str, Dict[str, float]] = {}
+
+    for name in decoder_names or get_available_decoder_names(scale_denominator):
+        decoder = DECODER_CLASSES[name]()
+        identical = all(
+            (out is None and ref is None) or (out is not None and ref is not None and np.array_equal(out, ref))
+            for out, ref in zip((decoder.decode_jpeg(data, scale_denominator) for data in samples), expected)
+        )
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for data in samples:
+                decoder.decode_jpeg(data, scale_denominator)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        report[name] = {
+            "ms_per_image": elapsed_ms / max(1, repeats * len(samples)),
+            "identical_output": float(identical),
+        }
+    return report
+
+
+# --- Sélection et Accès au Décodeur Actif ---
+_image_decoder_instance: Optional[ImageDecoder] = None
+_image_decoder_lock = threading.Lock()
+_opencv_decoder = OpenCVDecoder()
+
+
+def _select_image_decoder() -> ImageDecoder:
+    scale_denominator = get_scale_denominator()
+    available = get_available_decoder_names(scale_denominator)
+    requested = settings.IMAGE_DECODER_BACKEND.lower().strip()
+
+    if requested != "auto":
+        if requested in available:
+            logger.info(f"Décodeur JPEG imposé par la configuration : {requested}")
+            return DECODER_CLASSES[requested]()
+        if requested in DECODER_CLASSES and DECODER_CLASSES[requested].is_available():
+            logger.warning(f"Décodeur JPEG '{requested}' non conforme à OpenCV avec la réduction 1/{scale_denominator}, "
+                           f"sélection automatique parmi {available}.")
+        else:
+            logger.warning(f"Décodeur JPEG '{requested}' indisponible, sélection automatique parmi {available}.")
+
+    if settings.IMAGE_DECODER_BENCHMARK_ON_STARTUP and len(available) > 1:
+        sample_paths = _list_benchmark_images(settings.IMAGE_DECODER_BENCHMARK_SAMPLES)
+        if sample_paths:
+            report = benchmark_image_decoders(sample_paths, available, scale_denominator=scale_denominator)
+            logger.info(f"Micro-benchmark des décodeurs JPEG ({len(sample_paths)} images) : {report}")
+            candidates = [name for name, stats in report.items() if stats["identical_output"]]
+            if candidates:
+                fastest = min(candidates, key=lambda name: report[name]["ms_per_image"])
+                logger.info(f"Décodeur JPEG sélectionné (le plus rapide) : {fastest}")
+                return DECODER_CLASSES[fastest]()
+        else:
+            logger.info("Aucune image de benchmark trouvée, sélection du décodeur par ordre de préférence.")
+
+    logger.info(f"Décodeur JPEG sélectionné (préférence) : {available[0]}")
+    return DECODER_CLASSES[available[0]]()
+
+
+def get_image_decoder() -> ImageDecoder:
+    """
+    Sélectionne (au premier appel) et retourne le décodeur JPEG actif. Thread-safe.
+    """
+    global _image_decoder_instance
+    if _image_decoder_instance is None:
+        with _image_decoder_lock:
+            if _image_decoder_instance is None:
+                _image_decoder_instance = _select_image_decoder()
+    return _image_decoder_instance
+
+
+def get_scale_denominator() -> int:
+    """ Facteur de réduction DCT configuré (1 = pleine résolution). """
+    scale = settings.IMAGE_DECODE_SCALE_DENOMINATOR
+    if scale not in SUPPORTED_SCALE_DENOMINATORS:
+        logger.warning(f"IMAGE_DECODE_SCALE_DENOMINATOR={scale} non supporté {SUPPORTED_SCALE_DENOMINATORS}, utilisation de 1.")
+        return 1
+    return scale
+
+
+def decode_image_rgb(image_bytes: bytes) -> Optional[np.ndarray]:
+    """
+    Décode une image en tableau RGB uint8. Les JPEG passent par le backend sélectionné,
+    les autres formats par OpenCV. Retourne None si l'image est indécodable.
+    """
+    if image_bytes[:3] == JPEG_MAGIC:
+        return get_image_decoder().decode_jpeg(image_bytes, get_scale_denominator())
+    return _opencv_decoder.decode_any(image_bytes)
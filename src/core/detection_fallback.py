@@ -0,0 +1,219 @@
+# src/core/detection_fallback.py
+"""
+Détection de repli pour les visages petits ou lointains (photos de groupe, sujet éloigné).
+
+Le FaceLandmarker réduit toute l'image à l'entrée du détecteur : un visage qui n'occupe
+qu'un quart de la hauteur devient trop petit pour être trouvé. Quand la passe pleine image
+ne détecte rien, on relance la détection sur des recadrages, du plus probable au plus fin :
+  1. un recadrage zoomé sur la zone saillante (plus grande zone de teinte chair, mesurée sur
+     une copie décimée) ;
+  2. des grilles de tuiles qui se recouvrent (2x2 puis 3x3 par défaut), tuiles centrales d'abord.
+On s'arrête au premier recadrage qui contient un visage ; landmarks et matrice de pose sont
+ramenés dans le repère de l'image complète. Le budget (FALLBACK_DETECTION_BUDGET_MS) est
+vérifié avant chaque tentative en réservant le coût de la plus lente déjà observée : le
+repli ne peut pas faire exploser la latence.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+from mediapipe.tasks.python.vision import FaceLandmarkerResult
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Champ vertical de la caméra virtuelle du pipeline géométrique Mediapipe (face_geometry)
+MEDIAPIPE_VERTICAL_FOV_DEG = 63.0
+
+# Seuils de teinte chair dans l'espace YCrCb (Cr, Cb), indépendants de la luminance
+_SKIN_YCRCB_LOWER = (0, 133, 77)
+_SKIN_YCRCB_UPPER = (255, 173, 127)
+
+Region = Tuple[int, int, int, int]  # (x0, y0, x1, y1) en pixels, bornes x1/y1 exclues
+
+
+@dataclass
+class FallbackOutcome:
+    """ Résultat du repli : détection remappée (None si aucun visage) et coût engagé. """
+    result: Optional[FaceLandmarkerResult]
+    region: Optional[Region]
+    attempts: int
+    elapsed_s: float
+    budget_exhausted: bool
+
+
+def tile_grid(width: int, height: int, grid: int, overlap: float) -> List[Region]:
+    """ Grille grid x grid de tuiles se recouvrant de `overlap` (fraction de tuile), centrales d'abord. """
+    if grid <= 1:
+        return [(0, 0, width, height)]
+    tile_w = width / (grid - (grid - 1) * overlap)
+    tile_h = height / (grid - (grid - 1) * overlap)
+    step_x, step_y = tile_w * (1 - overlap), tile_h * (1 - overlap)
+    regions = [
+        (round(i * step_x), round(j * step_y), min(width, round(i * step_x + tile_w)), min(height, round(j * step_y + tile_h)))
+        for j in range(grid) for i in range(grid)
+    ]
+    # Les visages sont plus souvent proches du centre du cadre
+    return sorted(regions, key=lambda r: ((r[0] + r[2] - width) ** 2 + (r[1] + r[3] - height) ** 2, r[1], r[0]))
+
+
+def saliency_crop(image_rgb: np.ndarray, analysis_max_side: int = 128, context: float = 2.5) -> Optional[Region]:
+    """
+    Recadrage carré autour de la plus grande zone de teinte chair (copie décimée, ~0.2 ms).
+    `context` : côté du recadrage en multiple de la zone. None si rien de saillant ou si le
+    recadrage couvrirait presque toute l'image (la passe pleine image l'a déjà essayé).
+    """
+    height, width = image_rgb.shape[:2]
+    step = max(1, math.ceil(max(height, width) / analysis_max_side))
+    small = np.ascontiguousarray(image_rgb[::step, ::step])
+    mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_RGB2YCrCb), _SKIN_YCRCB_LOWER, _SKIN_YCRCB_UPPER)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    if count <= 1:
+        return None
+    best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    x, y, w, h, area = stats[best]
+    if area < 4:
+        return None
+
+    side = min(max(w, h) * step * context, min(width, height))
+    if side >= 0.8 * min(width, height):
+        return None
+    center_x, center_y = (x + w / 2) * step, (y + h / 2) * step
+    x0 = int(round(min(max(center_x - side / 2, 0), width - side)))
+    y0 = int(round(min(max(center_y - side / 2, 0), height - side)))
+    return (x0, y0, x0 + int(side), y0 + int(side))
+
+
+def candidate_regions(
+    image_rgb: np.ndarray,
+    grid_levels: Sequence[int] = (2, 3),
+    overlap: float = 0.25,
+    use_saliency: bool = True,
+    min_region_side: int = 96,
+) -> List[Region]:
+    """ Recadrages à essayer, dans l'ordre : zone saillante puis grilles de plus en plus fines. """
+    height, width = image_rgb.shape[:2]
+    regions: List[Region] = []
+    if use_saliency:
+        crop = saliency_crop(image_rgb)
+        if crop is not None:
+            regions.append(crop)
+    for grid in grid_levels:
+        regions.extend(tile_grid(width, height, grid, overlap))
+    full_frame = (0, 0, width, height)
+    return [r for r in regions if r != full_frame and min(r[2] - r[0], r[3] - r[1]) >= min_region_side]
+
+
+def remap_landmarks(landmarks: np.ndarray, region: Region, width: int, height: int) -> np.ndarray:
+    """ Landmarks normalisés (N, 3) du recadrage -> repère normalisé de l'image complète. """
+    x0, y0, x1, y1 = region
+    crop_w, crop_h = x1 - x0, y1 - y0
+    remapped = np.array(landmarks, dtype=np.float64, copy=True)
+    remapped[:, 0] = (x0 + remapped[:, 0] * crop_w) / width
+    remapped[:, 1] = (y0 + remapped[:, 1] * crop_h) / height
+    remapped[:, 2] *= crop_w / width  # z à l'échelle de x (convention Mediapipe)
+    return remapped
+
+
+def remap_transformation_matrix(
+    matrix: np.ndarray,
+    region: Region,
+    width: int,
+    height: int,
+    vertical_fov_deg: float = MEDIAPIPE_VERTICAL_FOV_DEG,
+) -> np.ndarray:
+    """
+    Matrice de pose estimée sur un recadrage -> caméra de l'image complète.
+    La rotation est conservée ; la translation est recalculée pour que le centre du visage se
+    projette au même pixel et que sa taille apparente (profondeur) corresponde au champ complet.
+    """
+    x0, y0, x1, y1 = region
+    crop_w, crop_h = x1 - x0, y1 - y0
+    focal = 1.0 / math.tan(math.radians(vertical_fov_deg) / 2)
+    remapped = np.array(matrix, dtype=np.float64, copy=True)
+    tx, ty, tz = remapped[:3, 3]
+
+    # Projection du centre dans le recadrage (NDC puis pixels de l'image complète)
+    ndc_x = focal * tx / (-tz) / (crop_w / crop_h)
+    ndc_y = focal * ty / (-tz)
+    pixel_x = x0 + (ndc_x + 1) / 2 * crop_w
+    pixel_y = y0 + (1 - ndc_y) / 2 * crop_h
+
+    # Même taille en pixels dans un champ height/crop_h fois plus large : visage plus loin
+    full_tz = tz * height / crop_h
+    remapped[0, 3] = (pixel_x / width * 2 - 1) * (width / height) * (-full_tz) / focal
+    remapped[1, 3] = (1 - pixel_y / height * 2) * (-full_tz) / focal
+    remapped[2, 3] = full_tz
+    return remapped
+
+
+def remap_result(result: FaceLandmarkerResult, region: Region, width: int, height: int) -> FaceLandmarkerResult:
+    """ FaceLandmarkerResult d'un recadrage exprimé dans le repère de l'image complète. """
+    face_landmarks = []
+    for face in result.face_landmarks:
+        points = remap_landmarks(np.array([(lm.x, lm.y, lm.z) for lm in face], dtype=np.float64), region, width, height)
+        face_landmarks.append([
+            NormalizedLandmark(x=x, y=y, z=z, visibility=lm.visibility, presence=lm.presence)
+            for (x, y, z), lm in zip(points.tolist(), face)
+        ])
+    matrixes = [
+        remap_transformation_matrix(np.asarray(matrix), region, width, height)
+        for matrix in (result.facial_transformation_matrixes or [])
+    ]
+    return FaceLandmarkerResult(
+        face_landmarks=face_landmarks,
+        face_blendshapes=result.face_blendshapes,  # Indépendants du cadrage
+        facial_transformation_matrixes=matrixes,
+    )
+
+
+def detect_with_fallback(
+    detect: Callable[[np.ndarray], Optional[FaceLandmarkerResult]],
+    image_rgb: np.ndarray,
+    budget_s: float,
+    expected_attempt_s: float = 0.0,
+    regions: Optional[List[Region]] = None,
+) -> FallbackOutcome:
+    """
+    Essaie `detect` sur les recadrages jusqu'au premier visage ou à l'épuisement du budget.
+    `expected_attempt_s` (ex. durée de la passe pleine image) amorce l'estimation du coût
+    d'une tentative : aucune tentative n'est lancée si elle risque de dépasser le budget.
+    """
+    height, width = image_rgb.shape[:2]
+    start = time.perf_counter()
+    if regions is None:
+        regions = candidate_regions(
+            image_rgb,
+            grid_levels=settings.FALLBACK_GRID_LEVELS,
+            overlap=settings.FALLBACK_TILE_OVERLAP,
+            use_saliency=settings.FALLBACK_SALIENCY_CROP,
+            min_region_side=settings.FALLBACK_MIN_REGION_SIDE_PX,
+        )
+
+    attempts = 0
+    slowest = expected_attempt_s
+    for region in regions:
+        elapsed = time.perf_counter() - start
+        if elapsed + slowest > budget_s:
+            logger.info(f"Détection de repli : budget atteint après {attempts} tentative(s) ({elapsed * 1000:.0f} ms).")
+            return FallbackOutcome(None, None, attempts, elapsed, True)
+
+        x0, y0, x1, y1 = region
+        attempt_start = time.perf_counter()
+        result = detect(np.ascontiguousarray(image_rgb[y0:y1, x0:x1]))
+        slowest = max(slowest, time.perf_counter() - attempt_start)
+        attempts += 1
+        if result is not None and result.face_landmarks:
+            elapsed = time.perf_counter() - start
+            logger.info(f"Détection de repli : visage trouvé dans {region} ({attempts} tentative(s), {elapsed * 1000:.0f} ms).")
+            return FallbackOutcome(remap_result(result, region, width, height), region, attempts, elapsed, False)
+
+    return FallbackOutcome(None, None, attempts, time.perf_counter() - start, False)
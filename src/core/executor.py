@@ -0,0 +1,65 @@
+# src/core/executor.py
+"""
+Pool de threads dédié aux analyses.
+
+Les endpoints async y déportent le travail CPU (décodage, pré-contrôle, détection,
+sérialisation) pour ne pas bloquer la boucle d'événements : /health et les autres routes
+légères restent servies pendant les analyses, et le middleware de concurrence adaptative
+(src/api/middleware.py) peut mesurer et rejeter les requêtes en excès.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_analysis_executor: Optional[ThreadPoolExecutor] = None
+_analysis_executor_lock = threading.Lock()
+_interactive_in_flight = 0
+
+
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """ Retourne le pool d'analyse (ANALYSIS_WORKERS threads, créé au premier appel). """
+    global _analysis_executor
+    if _analysis_executor is None:
+        with _analysis_executor_lock:
+            if _analysis_executor is None:
+                _analysis_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.ANALYSIS_WORKERS), thread_name_prefix="analysis"
+                )
+                logger.info(f"Pool d'analyse initialisé ({settings.ANALYSIS_WORKERS} threads).")
+    return _analysis_executor
+
+
+async def run_in_analysis_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """ Exécute func(*args, **kwargs) dans le pool d'analyse et attend le résultat. """
+    global _interactive_in_flight
+    loop = asyncio.get_running_loop()
+    # Compteur lu par les workers de jobs (src/core/job_queue.py) : modifié sur la seule boucle d'événements
+    _interactive_in_flight += 1
+    try:
+        return await loop.run_in_executor(get_analysis_executor(), functools.partial(func, *args, **kwargs))
+    finally:
+        _interactive_in_flight -= 1
+
+
+def interactive_analyses_in_flight() -> int:
+    """ Nombre de travaux interactifs soumis au pool d'analyse et non terminés. """
+    return _interactive_in_flight
+
+
+def shutdown_analysis_executor() -> None:
+    """ Arrête le pool (attend la fin des analyses en cours). """
+    global _analysis_executor
+    with _analysis_executor_lock:
+        if _analysis_executor is not None:
+            _analysis_executor.shutdown(wait=True)
+            _analysis_executor = None
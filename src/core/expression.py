@@ -0,0 +1,103 @@
+# src/core/expression.py
+"""
+Blendshapes du FaceLandmarker et verdict de qualité de capture.
+
+Les 52 scores (0-1) sont produits par le même appel `detect` que les landmarks
+(OUTPUT_FACE_BLENDSHAPES) et exposés sous forme compacte : un tableau de flottants indexé
+par BLENDSHAPE_NAMES (noms servis une fois par GET /api/v1/blendshape_names). Le verdict de
+capture (yeux ouverts, expression neutre) est calculé côté serveur, de façon vectorisée
+sur un tableau (N, 52) : le client n'a plus besoin de son propre modèle d'expression pour
+décider du déclenchement. Il est indicatif et ne bloque pas l'analyse.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.core.config import settings
+from src.schemas.schemas import CaptureQuality
+
+logger = logging.getLogger(__name__)
+
+# Ordre des catégories du modèle face_blendshapes (ARKit), identique à Category.index
+BLENDSHAPE_NAMES = (
+    "_neutral", "browDownLeft", "browDownRight", "browInnerUp", "browOuterUpLeft", "browOuterUpRight",
+    "cheekPuff", "cheekSquintLeft", "cheekSquintRight", "eyeBlinkLeft", "eyeBlinkRight",
+    "eyeLookDownLeft", "eyeLookDownRight", "eyeLookInLeft", "eyeLookInRight", "eyeLookOutLeft",
+    "eyeLookOutRight", "eyeLookUpLeft", "eyeLookUpRight", "eyeSquintLeft", "eyeSquintRight",
+    "eyeWideLeft", "eyeWideRight", "jawForward", "jawLeft", "jawOpen", "jawRight", "mouthClose",
+    "mouthDimpleLeft", "mouthDimpleRight", "mouthFrownLeft", "mouthFrownRight", "mouthFunnel",
+    "mouthLeft", "mouthLowerDownLeft", "mouthLowerDownRight", "mouthPressLeft", "mouthPressRight",
+    "mouthPucker", "mouthRight", "mouthRollLower", "mouthRollUpper", "mouthShrugLower",
+    "mouthShrugUpper", "mouthSmileLeft", "mouthSmileRight", "mouthStretchLeft", "mouthStretchRight",
+    "mouthUpperUpLeft", "mouthUpperUpRight", "noseSneerLeft", "noseSneerRight",
+)
+_INDEX = {name: i for i, name in enumerate(BLENDSHAPE_NAMES)}
+
+_BLINK = np.array([_INDEX["eyeBlinkLeft"], _INDEX["eyeBlinkRight"]])
+_SQUINT = np.array([_INDEX["eyeSquintLeft"], _INDEX["eyeSquintRight"]])
+# Expressions qui déforment le contour du visage (sourire, bouche ouverte...) ; "_neutral" vaut toujours 0
+_EXPRESSION = np.array([_INDEX[name] for name in (
+    "mouthSmileLeft", "mouthSmileRight", "jawOpen", "mouthPucker", "mouthFunnel",
+    "cheekPuff", "browInnerUp", "mouthStretchLeft", "mouthStretchRight",
+)])
+
+
+def blendshape_scores(categories: Iterable) -> Optional[np.ndarray]:
+    """ Scores (52,) float32 rangés par Category.index ; None si aucune catégorie. """
+    scores = np.zeros(len(BLENDSHAPE_NAMES), dtype=np.float32)
+    found = False
+    for category in categories:
+        if 0 <= category.index < len(scores):
+            scores[category.index] = category.score
+            found = True
+    return scores if found else None
+
+
+def capture_verdicts(scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Verdict vectorisé pour des scores (N, 52) : ouverture des yeux (1 - clignement max),
+    plissement, intensité d'expression (max des blendshapes d'expression) et acceptabilité
+    selon les seuils CAPTURE_MAX_*.
+    """
+    scores = np.atleast_2d(scores)
+    blink = scores[:, _BLINK].max(axis=1)
+    squint = scores[:, _SQUINT].max(axis=1)
+    expression = scores[:, _EXPRESSION].max(axis=1)
+    eyes_open = (blink <= settings.CAPTURE_MAX_EYE_BLINK) & (squint <= settings.CAPTURE_MAX_EYE_SQUINT)
+    neutral = expression <= settings.CAPTURE_MAX_EXPRESSION
+    return {
+        "eye_openness": 1.0 - blink,
+        "eye_squint": squint,
+        "expression_intensity": expression,
+        "dominant_expression": _EXPRESSION[scores[:, _EXPRESSION].argmax(axis=1)],
+        "eyes_open": eyes_open,
+        "neutral_expression": neutral,
+        "acceptable": eyes_open & neutral,
+    }
+
+
+def assess_capture(scores: np.ndarray) -> CaptureQuality:
+    """ Verdict d'une capture (scores (52,)) avec les raisons d'un refus. """
+    verdict = {key: value[0] for key, value in capture_verdicts(scores).items()}
+    reasons: List[str] = []
+    if verdict["eye_openness"] < 1.0 - settings.CAPTURE_MAX_EYE_BLINK:
+        reasons.append("yeux fermés")
+    elif verdict["eye_squint"] > settings.CAPTURE_MAX_EYE_SQUINT:
+        reasons.append("yeux plissés")
+    if not verdict["neutral_expression"]:
+        reasons.append(f"expression non neutre ({BLENDSHAPE_NAMES[verdict['dominant_expression']]})")
+    return CaptureQuality(
+        acceptable=bool(verdict["acceptable"]),
+        eyes_open=bool(verdict["eyes_open"]),
+        neutral_expression=bool(verdict["neutral_expression"]),
+        eye_openness=round(float(verdict["eye_openness"]), 4),
+        expression_intensity=round(float(verdict["expression_intensity"]), 4),
+        reasons=reasons,
+    )
+
+
+def compact_scores(scores: np.ndarray) -> List[float]:
+    """ Scores arrondis à 4 décimales pour la réponse JSON (~6 octets par score). """
+    return np.round(scores.astype(np.float64), 4).tolist()
@@ -0,0 +1,191 @@
+# src/core/face_geometry.py
+"""
+Matrice de transformation faciale à partir des landmarks (pipeline géométrique Mediapipe).
+
+Le FaceLandmarker calcule `facial_transformation_matrixes` dans son graphe ; un autre backend
+de landmarks (ex. ONNX Runtime, voir landmark_backends.py) n'en fournit pas. Ce module
+reproduit la conversion écran -> espace métrique de Mediapipe (face_geometry/geometry_pipeline) :
+caméra virtuelle en perspective (champ vertical 63°, plan proche à 1), deux itérations
+d'estimation d'échelle, puis Procrustes pondéré du visage canonique vers les landmarks
+métriques. Le visage canonique et les poids sont lus dans le fichier .task
+(geometry_pipeline_metadata_landmarks.binarypb), décodé sans dépendance protobuf.
+"""
+
+import logging
+import math
+import struct
+import threading
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_METADATA_ENTRY = "geometry_pipeline_metadata_landmarks.binarypb"
+VERTICAL_FOV_DEG = 63.0
+NEAR = 1.0
+_VERTEX_SIZE = 5  # x, y, z, u, v (Mesh3d.VERTEX_PT)
+
+
+def _read_varint(buffer: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return result, pos
+
+
+def _iter_fields(buffer: bytes) -> Iterator[Tuple[int, int, object]]:
+    """ (numéro de champ, type filaire, valeur) d'un message protobuf sérialisé. """
+    pos = 0
+    while pos < len(buffer):
+        tag, pos = _read_varint(buffer, pos)
+        field, wire_type = tag >> 3, tag & 7
+        if wire_type == 0:
+            value, pos = _read_varint(buffer, pos)
+        elif wire_type == 1:
+            value, pos = buffer[pos:pos + 8], pos + 8
+        elif wire_type == 2:
+            length, pos = _read_varint(buffer, pos)
+            value, pos = buffer[pos:pos + length], pos + length
+        elif wire_type == 5:
+            value, pos = buffer[pos:pos + 4], pos + 4
+        else:
+            raise ValueError(f"Type filaire protobuf non supporté : {wire_type}")
+        yield field, wire_type, value
+
+
+def _floats(wire_type: int, value: bytes) -> list:
+    """ Flottant(s) d'un champ `repeated float`, encodé ou non en mode packed. """
+    return list(struct.unpack(f"<{len(value) // 4}f", value)) if wire_type in (2, 5) else []
+
+
+@dataclass(frozen=True)
+class GeometryMetadata:
+    """ Visage canonique (N, 3) en cm et poids Procrustes (N,), nuls hors de la base. """
+    canonical_vertices: np.ndarray
+    procrustes_weights: np.ndarray
+
+
+def parse_geometry_metadata(data: bytes) -> GeometryMetadata:
+    """
+    Décode GeometryPipelineMetadata : canonical_mesh (champ 1, Mesh3d dont vertex_buffer = champ 3)
+    et procrustes_landmark_basis (champ 2, répété : landmark_id = 1, weight = 2).
+    """
+    vertex_buffer: list = []
+    basis = []
+    for field, wire_type, value in _iter_fields(data):
+        if field == 1 and wire_type == 2:
+            for mesh_field, mesh_wire, mesh_value in _iter_fields(value):
+                if mesh_field == 3:
+                    vertex_buffer.extend(_floats(mesh_wire, mesh_value))
+        elif field == 2 and wire_type == 2:
+            landmark_id, weight = 0, 0.0
+            for ref_field, ref_wire, ref_value in _iter_fields(value):
+                if ref_field == 1:
+                    landmark_id = ref_value
+                elif ref_field == 2:
+                    weight = _floats(ref_wire, ref_value)[0]
+            basis.append((landmark_id, weight))
+
+    if not vertex_buffer or len(vertex_buffer) % _VERTEX_SIZE:
+        raise ValueError("Métadonnées géométriques invalides : maillage canonique absent ou tronqué.")
+    vertices = np.asarray(vertex_buffer, dtype=np.float64).reshape(-1, _VERTEX_SIZE)[:, :3]
+    weights = np.zeros(len(vertices), dtype=np.float64)
+    for landmark_id, weight in basis:
+        weights[landmark_id] = weight
+    if not weights.any():
+        raise ValueError("Métadonnées géométriques invalides : base Procrustes vide.")
+    return GeometryMetadata(canonical_vertices=vertices, procrustes_weights=weights)
+
+
+def weighted_similarity_transform(source: np.ndarray, target: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """ Similitude 4x4 (échelle, rotation, translation) minimisant sum w |s.R.source + t - target|². """
+    w = weights / weights.sum()
+    source_mean = w @ source
+    target_mean = w @ target
+    source_c, target_c = source - source_mean, target - target_mean
+    covariance = (target_c * w[:, None]).T @ source_c
+    u, singular, vt = np.linalg.svd(covariance)
+    correction = np.diag([1.0, 1.0, np.sign(np.linalg.det(u @ vt))])
+    rotation = u @ correction @ vt
+    scale = float(np.trace(np.diag(singular) @ correction) / (w @ (source_c ** 2).sum(axis=1)))
+    transform = np.eye(4)
+    transform[:3, :3] = scale * rotation
+    transform[:3, 3] = target_mean - scale * rotation @ source_mean
+    return transform
+
+
+class FaceGeometry:
+    """ Conversion landmarks normalisés -> matrice de pose, identique en convention à Mediapipe. """
+
+    def __init__(self, metadata: GeometryMetadata, vertical_fov_deg: float = VERTICAL_FOV_DEG):
+        self.canonical = metadata.canonical_vertices
+        self.weights = metadata.procrustes_weights
+        self.vertical_fov_deg = vertical_fov_deg
+
+    def _frustum(self, width: int, height: int) -> Tuple[float, float, float, float]:
+        height_at_near = 2.0 * NEAR * math.tan(math.radians(self.vertical_fov_deg) / 2)
+        width_at_near = height_at_near * width / height
+        return -width_at_near / 2, width_at_near, -height_at_near / 2, height_at_near
+
+    def _estimate_scale(self, landmarks: np.ndarray) -> float:
+        return float(np.linalg.norm(weighted_similarity_transform(self.canonical, landmarks, self.weights)[:3, 0]))
+
+    def estimate_pose(self, landmarks: np.ndarray, width: int, height: int) -> np.ndarray:
+        """ Matrice 4x4 (visage canonique -> caméra) pour des landmarks normalisés (N >= 468, 3). """
+        left, x_scale, bottom, y_scale = self._frustum(width, height)
+        screen = np.array(landmarks[:len(self.canonical)], dtype=np.float64, copy=True)
+        # Projection sur le plan proche (origine en haut à gauche, z à l'échelle de x)
+        screen[:, 0] = screen[:, 0] * x_scale + left
+        screen[:, 1] = (1.0 - screen[:, 1]) * y_scale + bottom
+        screen[:, 2] = screen[:, 2] * x_scale
+        depth_offset = float(screen[:, 2].mean())
+
+        def to_metric(scale: float) -> np.ndarray:
+            metric = screen.copy()
+            metric[:, 2] = (metric[:, 2] - depth_offset + NEAR) / scale
+            metric[:, :2] *= metric[:, 2:3] / NEAR
+            metric[:, 2] *= -1.0
+            return metric
+
+        flipped = screen * np.array([1.0, 1.0, -1.0])
+        first_scale = self._estimate_scale(flipped)
+        second_scale = self._estimate_scale(to_metric(first_scale))
+        return weighted_similarity_transform(self.canonical, to_metric(first_scale * second_scale), self.weights)
+
+
+_face_geometry_instance: Optional[FaceGeometry] = None
+_face_geometry_lock = threading.Lock()
+
+
+def load_face_geometry(task_path: Path) -> FaceGeometry:
+    """ Lit les métadonnées géométriques dans un bundle .task Mediapipe (archive zip). """
+    with zipfile.ZipFile(task_path) as bundle:
+        return FaceGeometry(parse_geometry_metadata(bundle.read(GEOMETRY_METADATA_ENTRY)))
+
+
+def get_face_geometry() -> Optional[FaceGeometry]:
+    """ Instance unique, chargée depuis FACE_MODEL_PATH. None si le bundle est absent ou invalide. """
+    global _face_geometry_instance
+    if _face_geometry_instance is None:
+        with _face_geometry_lock:
+            if _face_geometry_instance is None:
+                task_path = Path(settings.FACE_MODEL_PATH)
+                if not task_path.is_absolute():
+                    task_path = settings.BASE_DIR / task_path
+                try:
+                    _face_geometry_instance = load_face_geometry(task_path)
+                    logger.info(f"Visage canonique chargé depuis {task_path} ({len(_face_geometry_instance.canonical)} sommets).")
+                except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+                    logger.error(f"Impossible de charger les métadonnées géométriques depuis {task_path}: {e}")
+                    return None
+    return _face_geometry_instance
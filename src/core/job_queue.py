@@ -0,0 +1,360 @@
+# src/core/job_queue.py
+"""
+File de jobs d'analyse durable (SQLite) et workers d'arrière-plan.
+
+Un job regroupe N images soumises en une fois (POST /api/v1/jobs) ; chaque image est une
+tâche persistée avec son contenu dans la base (mode WAL). Les workers réclament les tâches par
+priorité de job décroissante puis par ordre de soumission, et stockent la réponse JSON sérialisée.
+Le contenu de l'image est effacé dès la tâche terminée. Une tâche restée "running" (arrêt brutal du
+processus) est remise en file au redémarrage : aucun travail accepté n'est perdu.
+
+Le trafic interactif passe toujours avant les jobs : un worker ne réclame pas de tâche tant
+qu'une analyse interactive est en cours (`is_busy`, cf. executor.interactive_analyses_in_flight),
+et chaque tâche ne monopolise le détecteur que le temps d'une image.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    filename TEXT,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    image BLOB,
+    result BLOB,
+    error TEXT,
+    finished_at REAL,
+    -- Rang de fin dans le job (0, 1, ...) : curseur de reprise du flux de résultats
+    done_rank INTEGER,
+    PRIMARY KEY (job_id, seq)
+);
+-- Le rowid (ordre de soumission) termine implicitement chaque entrée d'index
+CREATE INDEX IF NOT EXISTS tasks_pending ON tasks(status, priority DESC);
+CREATE INDEX IF NOT EXISTS tasks_done ON tasks(job_id, done_rank);
+"""
+
+
+@dataclass(frozen=True)
+class JobTask:
+    """ Tâche réclamée par un worker : une image d'un job. """
+    job_id: str
+    seq: int
+    filename: Optional[str]
+    image: bytes
+
+
+@dataclass(frozen=True)
+class JobProgress:
+    """ Avancement d'un job (compteurs par statut de tâche). """
+    job_id: str
+    priority: int
+    total: int
+    queued: int
+    running: int
+    done: int
+    failed: int
+    created_at: float
+    finished_at: Optional[float]
+
+    @property
+    def status(self) -> str:
+        if self.done + self.failed == self.total:
+            return "completed"
+        return "queued" if self.queued == self.total else "running"
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "total": self.total,
+            "completed": self.done + self.failed,
+            "succeeded": self.done,
+            "failed": self.failed,
+            "running": self.running,
+            "queued": self.queued,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """ File durable sur une base SQLite locale, partagée par les threads du processus. """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit : les transactions sont explicites (BEGIN IMMEDIATE pour réclamer une tâche)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+        requeued = self.requeue_interrupted()
+        if requeued:
+            logger.warning(f"{requeued} tâche(s) interrompue(s) remise(s) en file ({self.path}).")
+
+    def submit(self, images: Sequence[Tuple[Optional[str], bytes]], priority: int = 0) -> str:
+        """ Enregistre un job (liste de (nom de fichier, contenu)) et retourne son ID. """
+        if not images:
+            raise ValueError("Un job doit contenir au moins une image.")
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, priority, total, created_at) VALUES (?, ?, ?, ?)",
+                    (job_id, priority, len(images), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO tasks (job_id, seq, filename, priority, status, image) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(job_id, seq, filename, priority, QUEUED, image) for seq, (filename, image) in enumerate(images)],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim_next(self) -> Optional[JobTask]:
+        """ Réclame la tâche en attente la plus prioritaire (la plus ancienne à priorité égale). """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT rowid, job_id, seq, filename, image FROM tasks WHERE status = ? "
+                    "ORDER BY priority DESC, rowid LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE tasks SET status = ? WHERE rowid = ?", (RUNNING, row[0]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return JobTask(job_id=row[1], seq=row[2], filename=row[3], image=bytes(row[4]))
+
+    def complete(self, task: JobTask, result_json: bytes) -> None:
+        """ Stocke le résultat (JSON sérialisé) et libère le contenu de l'image. """
+        self._finish(task, DONE, result=result_json)
+
+    def fail(self, task: JobTask, error: str) -> None:
+        self._finish(task, FAILED, error=error)
+
+    def _finish(self, task: JobTask, status: str, result: Optional[bytes] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, image = NULL, finished_at = ?, "
+                "done_rank = (SELECT COUNT(done_rank) FROM tasks WHERE job_id = ?) WHERE job_id = ? AND seq = ?",
+                (status, result, error, time.time(), task.job_id, task.job_id, task.seq),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """ Remet en file les tâches "running" (à n'appeler qu'au démarrage, aucun worker actif). """
+        with self._lock:
+            return self._conn.execute("UPDATE tasks SET status = ? WHERE status = ?", (QUEUED, RUNNING)).rowcount
+
+    def progress(self, job_id: str) -> Optional[JobProgress]:
+        """ Avancement du job, None s'il n'existe pas. """
+        with self._lock:
+            job = self._conn.execute("SELECT priority, total, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            finished_at = self._conn.execute("SELECT MAX(finished_at) FROM tasks WHERE job_id = ?", (job_id,)).fetchone()[0]
+        progress = JobProgress(
+            job_id=job_id, priority=job[0], total=job[1], created_at=job[2], finished_at=None,
+            queued=counts.get(QUEUED, 0), running=counts.get(RUNNING, 0),
+            done=counts.get(DONE, 0), failed=counts.get(FAILED, 0),
+        )
+        if progress.status == "completed":
+            progress = replace(progress, finished_at=finished_at)
+        return progress
+
+    def results(self, job_id: str, offset: int = 0) -> List[Tuple[int, Optional[str], str, Optional[bytes], Optional[str]]]:
+        """
+        Tâches terminées dans l'ordre de fin, à partir de la offset-ième :
+        (seq, nom de fichier, statut, résultat JSON, erreur).
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, filename, status, result, error FROM tasks "
+                "WHERE job_id = ? AND done_rank >= ? ORDER BY done_rank",
+                (job_id, offset),
+            ).fetchall()
+
+    def purge_finished(self, older_than_s: float) -> int:
+        """ Supprime les jobs terminés depuis plus de older_than_s secondes. Retourne le nombre supprimé. """
+        cutoff = time.time() - older_than_s
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE id NOT IN (SELECT job_id FROM tasks WHERE status IN (?, ?)) "
+                "AND id NOT IN (SELECT job_id FROM tasks WHERE finished_at >= ?)",
+                (QUEUED, RUNNING, cutoff),
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """
+    Threads qui vident la file : process(image_bytes) -> résultat JSON (bytes).
+    Tant que is_busy() est vrai (analyses interactives en cours), aucun worker ne réclame de tâche.
+    Toutes les purge_interval_s secondes, un worker supprime les jobs terminés depuis plus de
+    retention_s (rétention appliquée sans redémarrage ; retention_s None = jamais).
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        process: Callable[[bytes], bytes],
+        is_busy: Callable[[], bool] = lambda: False,
+        workers: int = 1,
+        idle_poll_s: float = 0.5,
+        yield_poll_s: float = 0.02,
+        retention_s: Optional[float] = None,
+        purge_interval_s: float = 3600.0,
+    ):
+        self.queue = queue
+        self.process = process
+        self.is_busy = is_busy
+        self.workers = max(1, workers)
+        self.idle_poll_s = idle_poll_s
+        self.yield_poll_s = yield_poll_s
+        self.retention_s = retention_s
+        self.purge_interval_s = purge_interval_s
+        self._last_purge = time.monotonic()
+        self._purge_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.processed = 0
+        self.yields = 0
+        self.purged = 0
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Workers de jobs démarrés ({self.workers} thread(s), file {self.queue.path}).")
+
+    def notify(self) -> None:
+        """ Réveille les workers en attente (nouveau job soumis). """
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """ Arrête les workers après leur tâche en cours ; les tâches restantes restent en file. """
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def snapshot(self) -> dict:
+        return {"workers": self.workers, "processed": self.processed, "yields": self.yields, "purged": self.purged}
+
+    def _maybe_purge(self) -> None:
+        """ Purge des jobs terminés expirés, au plus une fois par purge_interval_s (tous workers confondus). """
+        if self.retention_s is None:
+            return
+        with self._purge_lock:
+            now = time.monotonic()
+            if now - self._last_purge < self.purge_interval_s:
+                return
+            self._last_purge = now
+        try:
+            purged = self.queue.purge_finished(self.retention_s)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur de purge de la file de jobs : {e}", exc_info=True)
+            return
+        if purged:
+            self.purged += purged
+            logger.info(f"{purged} job(s) terminé(s) purgé(s) de la file.")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._maybe_purge()
+            if self.is_busy():
+                # Priorité au trafic interactif : on ne prend pas de nouvelle tâche
+                self.yields += 1
+                self._stop.wait(self.yield_poll_s)
+                continue
+            try:
+                task = self.queue.claim_next()
+            except sqlite3.Error as e:
+                logger.error(f"Erreur de la file de jobs : {e}", exc_info=True)
+                self._stop.wait(self.idle_poll_s)
+                continue
+            if task is None:
+                self._wakeup.wait(self.idle_poll_s)
+                self._wakeup.clear()
+                continue
+            try:
+                result = self.process(task.image)
+            except Exception as e:
+                logger.error(f"Échec de la tâche {task.job_id}/{task.seq} : {e}", exc_info=True)
+                self.queue.fail(task, str(e))
+            else:
+                self.queue.complete(task, result)
+            self.processed += 1
+
+
+_job_queue_instance: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """ File globale (JOB_QUEUE_PATH), None si JOBS_ENABLED est faux. Thread-safe. """
+    global _job_queue_instance
+    if not settings.JOBS_ENABLED:
+        return None
+    if _job_queue_instance is None:
+        with _job_queue_lock:
+            if _job_queue_instance is None:
+                queue_path = Path(settings.JOB_QUEUE_PATH)
+                if not queue_path.is_absolute():
+                    queue_path = settings.BASE_DIR / queue_path
+                _job_queue_instance = JobQueue(queue_path)
+                purged = _job_queue_instance.purge_finished(settings.JOB_RETENTION_HOURS * 3600)
+                if purged:
+                    logger.info(f"{purged} job(s) terminé(s) purgé(s) de la file.")
+    return _job_queue_instance
+
+
+def close_job_queue() -> None:
+    """ Ferme la file globale (arrêt de l'application). """
+    global _job_queue_instance
+    with _job_queue_lock:
+        if _job_queue_instance is not None:
+            _job_queue_instance.close()
+            _job_queue_instance = None
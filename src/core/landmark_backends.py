@@ -0,0 +1,232 @@
+# src/core/landmark_backends.py
+"""
+Backends de landmarks interchangeables (LANDMARK_BACKEND).
+
+Tous les backends retournent un FaceLandmarkerResult Mediapipe (478 landmarks normalisés +
+matrice de transformation faciale) : processing.py, les schémas et la détection de repli ne
+dépendent pas du backend actif.
+  - "mediapipe" : FaceLandmarker complet (détecteur + maillage + iris), backend par défaut ;
+  - "onnx" : modèle de maillage facial ONNX (ex. export 192x192 du face mesh Mediapipe) exécuté
+    par ONNX Runtime CPU, threads intra/inter-op configurables. Sans détecteur, il analyse un
+    carré centré (ONNX_ROI_SCALE) : adapté aux selfies cadrés, les tuiles de la détection de
+    repli couvrant les autres cas. Les 10 points d'iris (468-477) sont approchés à partir des
+    contours des yeux et la matrice est calculée par le pipeline géométrique (face_geometry.py).
+onnxruntime est optionnel : sans lui (ou sans modèle), le backend Mediapipe est utilisé.
+Comparaison latence / concordance : python -m benchmark.landmark_backend_benchmark
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+from mediapipe.tasks.python.vision import FaceLandmarkerResult
+
+from src.core.config import settings
+from src.core.detection_fallback import Region, remap_landmarks
+from src.core.face_geometry import FaceGeometry, get_face_geometry
+from src.core.models import get_face_landmarker
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Dépendance optionnelle
+    ort = None
+
+logger = logging.getLogger(__name__)
+
+MESH_LANDMARKS = 468
+# Contours des yeux (16 points) et coins (externe, interne) : œil droit du sujet (gauche de l'image) puis gauche
+_RIGHT_EYE_RING = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+_LEFT_EYE_RING = [263, 249, 390, 373, 374, 380, 381, 382, 362, 398, 384, 385, 386, 387, 388, 466]
+_RIGHT_EYE_CORNERS = (33, 133)
+_LEFT_EYE_CORNERS = (362, 263)
+# Rayon de l'iris / largeur de l'œil, mesuré sur les sorties du FaceLandmarker (benchmark/test_data)
+_IRIS_RADIUS_RATIO = 0.22
+
+
+class LandmarkBackend(ABC):
+    """ Détection d'un visage : FaceLandmarkerResult au format Mediapipe (vide si aucun visage). """
+
+    name: str = ""
+    # False : les appels à detect doivent être sérialisés par l'appelant (cf. processing._detect)
+    thread_safe: bool = False
+
+    @abstractmethod
+    def detect(self, image_rgb: np.ndarray) -> FaceLandmarkerResult:
+        """ Landmarks et pose pour une image RGB uint8 contiguë. """
+
+
+class MediaPipeLandmarkBackend(LandmarkBackend):
+    """ FaceLandmarker Mediapipe (mode IMAGE, non garanti thread-safe). """
+
+    name = "mediapipe"
+    thread_safe = False
+
+    def __init__(self, landmarker):
+        self._landmarker = landmarker
+
+    def detect(self, image_rgb: np.ndarray) -> FaceLandmarkerResult:
+        return self._landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb))
+
+
+def approximate_iris(mesh: np.ndarray) -> np.ndarray:
+    """
+    Ajoute les 10 landmarks d'iris (centre puis 4 points : +axe, -perpendiculaire, -axe,
+    +perpendiculaire, comme le FaceLandmarker) à un maillage (468, 3) : centre = moyenne du
+    contour de l'œil, rayon proportionnel à la largeur de l'œil.
+    """
+    iris = []
+    for ring, (start, end) in ((_RIGHT_EYE_RING, _RIGHT_EYE_CORNERS), (_LEFT_EYE_RING, _LEFT_EYE_CORNERS)):
+        center = mesh[ring].mean(axis=0)
+        axis = mesh[end, :2] - mesh[start, :2]
+        eye_width = float(np.linalg.norm(axis))
+        axis = axis / eye_width if eye_width > 0 else np.array([1.0, 0.0])
+        perpendicular = np.array([-axis[1], axis[0]])
+        radius = _IRIS_RADIUS_RATIO * eye_width
+        iris.append(center)
+        for offset in (axis, -perpendicular, -axis, perpendicular):
+            iris.append(np.array([center[0] + radius * offset[0], center[1] + radius * offset[1], center[2]]))
+    return np.vstack([mesh[:MESH_LANDMARKS], np.asarray(iris)])
+
+
+def build_landmarker_result(landmarks: np.ndarray, matrix: np.ndarray) -> FaceLandmarkerResult:
+    """ FaceLandmarkerResult d'un visage à partir d'un tableau (N, 3) normalisé et d'une matrice 4x4. """
+    return FaceLandmarkerResult(
+        face_landmarks=[[NormalizedLandmark(x=x, y=y, z=z) for x, y, z in landmarks.tolist()]],
+        face_blendshapes=[],
+        facial_transformation_matrixes=[matrix],
+    )
+
+
+class OnnxFaceMeshBackend(LandmarkBackend):
+    """ Maillage facial ONNX sur ONNX Runtime CPU (InferenceSession.run est thread-safe). """
+
+    name = "onnx"
+    thread_safe = True
+
+    def __init__(
+        self,
+        model_path: Path,
+        geometry: FaceGeometry,
+        intra_op_threads: int = 2,
+        inter_op_threads: int = 1,
+        presence_threshold: float = 0.5,
+        roi_scale: float = 0.8,
+    ):
+        if ort is None:
+            raise RuntimeError("onnxruntime n'est pas installé (pip install onnxruntime).")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+        self._session = ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+        self._geometry = geometry
+        self.presence_threshold = presence_threshold
+        self.roi_scale = roi_scale
+
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        # NHWC (export TFLite -> ONNX) ou NCHW ; côté carré, 192 si la dimension est symbolique
+        self._channels_first = model_input.shape[1] == 3
+        side = model_input.shape[2] if self._channels_first else model_input.shape[1]
+        self.input_size = side if isinstance(side, int) else 192
+        self._landmarks_output, self._presence_output = self._identify_outputs()
+
+    def _identify_outputs(self) -> Tuple[int, Optional[int]]:
+        """ Indices des sorties : landmarks (>= 468 x 3 valeurs) et score de présence (1 valeur). """
+        landmarks_output, presence_output = None, None
+        for index, output in enumerate(self._session.get_outputs()):
+            size = int(np.prod([d for d in output.shape if isinstance(d, int)] or [0]))
+            if size >= MESH_LANDMARKS * 3 and landmarks_output is None:
+                landmarks_output = index
+            elif size == 1 and presence_output is None:
+                presence_output = index
+        if landmarks_output is None:
+            raise ValueError(f"Aucune sortie de {MESH_LANDMARKS} x 3 valeurs dans le modèle ONNX.")
+        return landmarks_output, presence_output
+
+    def region_of_interest(self, width: int, height: int) -> Region:
+        """ Carré centré de côté roi_scale x petit côté de l'image. """
+        side = max(1, int(min(width, height) * self.roi_scale))
+        x0, y0 = (width - side) // 2, (height - side) // 2
+        return (x0, y0, x0 + side, y0 + side)
+
+    def detect(self, image_rgb: np.ndarray) -> FaceLandmarkerResult:
+        height, width = image_rgb.shape[:2]
+        region = self.region_of_interest(width, height)
+        x0, y0, x1, y1 = region
+        crop = cv2.resize(image_rgb[y0:y1, x0:x1], (self.input_size, self.input_size), interpolation=cv2.INTER_LINEAR)
+        tensor = crop.astype(np.float32) * (1.0 / 255.0)  # Même plage [0, 1] que le graphe Mediapipe
+        tensor = tensor.transpose(2, 0, 1)[None] if self._channels_first else tensor[None]
+
+        outputs = self._session.run(None, {self._input_name: tensor})
+        if self._presence_output is not None:
+            presence = float(np.ravel(outputs[self._presence_output])[0])
+            if not 0.0 <= presence <= 1.0:
+                presence = 1.0 / (1.0 + np.exp(-presence))  # Logit -> probabilité
+            if presence < self.presence_threshold:
+                return FaceLandmarkerResult(face_landmarks=[], face_blendshapes=[], facial_transformation_matrixes=[])
+
+        # Pixels de l'entrée du modèle -> coordonnées normalisées du recadrage, puis de l'image
+        mesh = np.asarray(outputs[self._landmarks_output], dtype=np.float64).reshape(-1, 3)[:MESH_LANDMARKS] / self.input_size
+        landmarks = approximate_iris(remap_landmarks(mesh, region, width, height))
+        return build_landmarker_result(landmarks, self._geometry.estimate_pose(landmarks, width, height))
+
+
+def create_landmark_backend(name: str) -> Optional[LandmarkBackend]:
+    """ Backend demandé ; repli sur Mediapipe si le backend ONNX n'est pas disponible. None si aucun. """
+    if name == "onnx":
+        model_path = Path(settings.ONNX_FACE_MESH_PATH)
+        if not model_path.is_absolute():
+            model_path = settings.BASE_DIR / model_path
+        geometry = get_face_geometry()
+        try:
+            if geometry is None:
+                raise RuntimeError("métadonnées géométriques indisponibles (FACE_MODEL_PATH)")
+            backend = OnnxFaceMeshBackend(
+                model_path,
+                geometry,
+                intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+                inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+                presence_threshold=settings.ONNX_FACE_PRESENCE_THRESHOLD,
+                roi_scale=settings.ONNX_ROI_SCALE,
+            )
+            logger.info(f"Backend de landmarks ONNX Runtime initialisé depuis {model_path} (entrée {backend.input_size} px).")
+            return backend
+        except Exception as e:
+            logger.error(f"Backend ONNX indisponible ({e}) : repli sur Mediapipe.")
+    elif name != "mediapipe":
+        logger.warning(f"Backend de landmarks inconnu '{name}' : utilisation de Mediapipe.")
+
+    landmarker = get_face_landmarker()
+    return MediaPipeLandmarkBackend(landmarker) if landmarker is not None else None
+
+
+def available_landmark_backends() -> List[str]:
+    """ Backends utilisables dans cet environnement (dépendances et modèles présents). """
+    names = ["mediapipe"]
+    model_path = Path(settings.ONNX_FACE_MESH_PATH)
+    if not model_path.is_absolute():
+        model_path = settings.BASE_DIR / model_path
+    if ort is not None and model_path.exists():
+        names.append("onnx")
+    return names
+
+
+_landmark_backend_instance: Optional[LandmarkBackend] = None
+_landmark_backend_lock = threading.Lock()
+
+
+def get_landmark_backend() -> Optional[LandmarkBackend]:
+    """ Instance unique du backend configuré (LANDMARK_BACKEND). None si aucun backend n'a pu être initialisé. """
+    global _landmark_backend_instance
+    if _landmark_backend_instance is None:
+        with _landmark_backend_lock:
+            if _landmark_backend_instance is None:
+                _landmark_backend_instance = create_landmark_backend(settings.LANDMARK_BACKEND)
+    return _landmark_backend_instance
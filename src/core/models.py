@@ -51,6 +51,7 @@ def get_face_landmarker() -> Optional[vision.FaceLandmarker]:
                         base_options=base_options,
                         running_mode=vision.RunningMode.IMAGE, # Mode image pour appels API uniques
                         output_facial_transformation_matrixes=True, # Requis pour la pose
+                        output_face_blendshapes=settings.OUTPUT_FACE_BLENDSHAPES, # Scores d'expression, même inférence
                         # output_face_landmarks=True, # <<< LIGNE SUPPRIMÉE (argument invalide)
                         num_faces=1 # Traite un seul visage par image
                     )
@@ -0,0 +1,57 @@
+# src/core/mtl.py
+"""
+Lecture des fichiers Wavefront (OBJ/MTL) partagée par le build des assets (src/tools/build_assets.py)
+et le compositeur d'aperçus (src/core/preview.py) : bibliothèques et matériaux référencés par un
+OBJ, blocs `newmtl` d'un MTL, textures référencées, fichiers résolus sans tenir compte de la casse.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Directives MTL référençant un fichier de texture (le nom de fichier est le dernier argument)
+TEXTURE_DIRECTIVES = frozenset({"map_ka", "map_kd", "map_ks", "map_ke", "map_ns", "map_d", "map_bump", "bump", "disp", "norm", "refl"})
+
+
+def resolve_file(directory: Path, name: str) -> Optional[Path]:
+    """ Fichier `name` du dossier, à défaut avec une casse différente (exports Windows). """
+    path = directory / name
+    if path.is_file():
+        return path
+    lowered = Path(name).name.lower()
+    return next((p for p in directory.iterdir() if p.is_file() and p.name.lower() == lowered), None)
+
+
+def parse_obj_materials(obj_bytes: bytes) -> Tuple[List[str], List[str]]:
+    """ (fichiers mtllib, matériaux utilisés par usemtl), dans l'ordre d'apparition, sans doublon. """
+    libraries, used = [], []
+    for line in obj_bytes.splitlines():
+        if line.startswith(b"mtllib "):
+            libraries.extend(name for name in line[7:].decode("utf-8", "replace").split() if name not in libraries)
+        elif line.startswith(b"usemtl "):
+            name = line[7:].decode("utf-8", "replace").strip()
+            if name not in used:
+                used.append(name)
+    return libraries, used
+
+
+def parse_mtl(text: str) -> Dict[str, List[str]]:
+    """ Blocs `newmtl` : nom du matériau -> lignes de définition (sans commentaires). """
+    materials: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("newmtl "):
+            current = materials.setdefault(stripped[7:].strip(), [])
+        elif current is not None:
+            current.append(stripped)
+    return materials
+
+
+def texture_reference(line: str) -> Optional[Tuple[str, str]]:
+    """ (directive, fichier) si la ligne MTL référence une texture, options (-s, -bm...) ignorées. """
+    parts = line.split()
+    if len(parts) >= 2 and parts[0].lower() in TEXTURE_DIRECTIVES:
+        return parts[0], parts[-1]
+    return None
@@ -0,0 +1,445 @@
+# src/core/preview.py
+"""
+Aperçus d'essayage calculés sur CPU (liens de partage, e-mails), sans rendu 3D côté serveur.
+
+Chaque monture (OBJ du catalogue) est pré-rendue en sprite BGRA par tranche d'angles de tête
+(tangage x lacet, PREVIEW_PITCH_STEP_DEG / PREVIEW_YAW_STEP_DEG) : projection orthographique,
+ombrage plat, algorithme du peintre (cv2.fillConvexPoly). Les sprites sont rendus une fois puis
+gardés en mémoire et sur disque (PREVIEW_SPRITE_DIR).
+
+Un aperçu plaque le sprite de la tranche la plus proche sur la photo avec une seule transformation
+affine (cv2.warpAffine) : le roulis est une rotation dans le plan de l'image, l'échelle et la
+position viennent de la matrice de pose projetée avec les intrinsèques de GetPsudoCamera (centre
+optique au centre de l'image). La focale est celle de la caméra virtuelle Mediapipe (champ
+vertical 63°) qui a produit la matrice : la focale par défaut de GetPsudoCamera (largeur de
+l'image) décalerait la monture. Le rendu final est mis en cache par (empreinte de l'image, monture,
+variante) : la variante résume la monture ajustée et les réglages PREVIEW_* qui changent l'aperçu.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.config import settings
+from src.core.face_geometry import VERTICAL_FOV_DEG
+from src.core.mtl import parse_mtl, resolve_file
+from src.utils.gfxmath_utils import GetPsudoCamera, makePose
+
+logger = logging.getLogger(__name__)
+
+# Repères du visage canonique Mediapipe (cm) : hauteur des coins externes des yeux (33/263),
+# profondeur de l'arête du nez (168) et largeur du visage à hauteur des yeux (127/356)
+CANONICAL_EYE_LINE_Y = 2.664
+CANONICAL_NOSE_BRIDGE_Z = 5.236
+CANONICAL_FACE_WIDTH = 15.486
+# Sur-échantillonnage du rendu des sprites (anticrénelage par réduction INTER_AREA)
+SPRITE_SUPERSAMPLING = 2
+_AMBIENT = 0.35
+# À incrémenter quand le rendu change : invalide les aperçus déjà en cache
+PREVIEW_RENDER_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FrameMesh:
+    """ Monture dans le repère du visage canonique (cm) : triangles, couleur BGR et opacité par triangle. """
+    vertices: np.ndarray   # (V, 3)
+    triangles: np.ndarray  # (F, 3) indices
+    colors: np.ndarray     # (F, 3) BGR 0-255
+    alphas: np.ndarray     # (F,) 0-1
+    key: str               # Empreinte (OBJ, MTL, ajustement) : nomme les sprites sur disque
+
+
+@dataclass(frozen=True)
+class FrameSprite:
+    """ Image BGRA prémultipliée, point de l'image où se projette l'origine du visage, échelle. """
+    image: np.ndarray
+    anchor: Tuple[float, float]
+    px_per_cm: float
+
+
+# --- Chargement des montures ---
+def _material_colors(obj_path: Path, libraries) -> Dict[str, Tuple[np.ndarray, float]]:
+    """ Matériau -> (couleur BGR, opacité) : couleur moyenne de map_Kd si présente, sinon Kd ; opacité d (ou 1 - Tr). """
+    materials = {}
+    for library in libraries:
+        mtl_path = resolve_file(obj_path.parent, library)
+        if mtl_path is None:
+            continue
+        for name, lines in parse_mtl(mtl_path.read_text(encoding="utf-8", errors="replace")).items():
+            color, alpha = np.array([204.0, 204.0, 204.0]), 1.0
+            for line in lines:
+                keyword, *values = line.split()
+                if keyword == "Kd" and len(values) >= 3:
+                    color = np.array([float(v) for v in values[2::-1]]) * 255  # RGB -> BGR
+                elif keyword == "d" and values:
+                    alpha = float(values[-1])
+                elif keyword == "Tr" and values:
+                    alpha = 1.0 - float(values[-1])
+                elif keyword == "map_Kd" and values:
+                    texture_path = resolve_file(obj_path.parent, values[-1])
+                    texture = cv2.imread(str(texture_path), cv2.IMREAD_COLOR) if texture_path else None
+                    if texture is not None:
+                        color = texture.reshape(-1, 3).mean(axis=0)
+            materials[name] = (color, min(max(alpha, 0.0), 1.0))
+    return materials
+
+
+def load_frame_mesh(obj_path: Path, rotation=(0.0, 0.0, 0.0)) -> FrameMesh:
+    """
+    Lit un OBJ (faces triangulées en éventail) et le place sur le visage canonique : rotation
+    (degrés, makePose) vers la convention x à droite, y en haut, face avant vers +z ; largeur
+    x = CANONICAL_FACE_WIDTH * PREVIEW_FRAME_WIDTH_RATIO ; centrée en x, centre vertical à hauteur
+    des yeux, face avant PREVIEW_FRAME_DEPTH_OFFSET_CM devant l'arête du nez.
+    """
+    obj_bytes = obj_path.read_bytes()
+    vertices, triangles, face_materials, libraries = [], [], [], []
+    material = None
+    for line in obj_bytes.decode("utf-8", errors="replace").splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "v":
+            vertices.append([float(v) for v in parts[1:4]])
+        elif parts[0] == "f":
+            indices = [int(p.split("/")[0]) for p in parts[1:]]
+            indices = [i - 1 if i > 0 else len(vertices) + i for i in indices]
+            for k in range(1, len(indices) - 1):
+                triangles.append((indices[0], indices[k], indices[k + 1]))
+                face_materials.append(material)
+        elif parts[0] == "usemtl":
+            material = " ".join(parts[1:])
+        elif parts[0] == "mtllib":
+            libraries.extend(parts[1:])
+    if not vertices or not triangles:
+        raise ValueError(f"Maillage vide : {obj_path}")
+
+    points = np.asarray(vertices, dtype=np.float64)
+    points = points @ makePose(rotation=rotation)[:3, :3].T
+    low, high = points.min(axis=0), points.max(axis=0)
+    scale = CANONICAL_FACE_WIDTH * settings.PREVIEW_FRAME_WIDTH_RATIO / max(high[0] - low[0], 1e-9)
+    offset = np.array([-(low[0] + high[0]) / 2, -(low[1] + high[1]) / 2, -high[2]]) * scale
+    points = points * scale + offset + np.array([0.0, CANONICAL_EYE_LINE_Y, CANONICAL_NOSE_BRIDGE_Z + settings.PREVIEW_FRAME_DEPTH_OFFSET_CM])
+
+    colors_by_material = _material_colors(obj_path, libraries)
+    default = (np.array([204.0, 204.0, 204.0]), 1.0)
+    colors = np.array([colors_by_material.get(m, default)[0] for m in face_materials])
+    alphas = np.array([colors_by_material.get(m, default)[1] for m in face_materials])
+
+    digest = hashlib.sha256(obj_bytes)
+    digest.update(json.dumps([list(rotation), settings.PREVIEW_FRAME_WIDTH_RATIO, settings.PREVIEW_FRAME_DEPTH_OFFSET_CM,
+                              {m: [c.tolist(), a] for m, (c, a) in colors_by_material.items()}]).encode("utf-8"))
+    return FrameMesh(points, np.asarray(triangles, dtype=np.int64), colors, alphas, digest.hexdigest()[:16])
+
+
+# --- Sprites ---
+def render_sprite(mesh: FrameMesh, pitch: float, yaw: float, px_per_cm: float) -> FrameSprite:
+    """
+    Vue orthographique de la monture tournée de Rx(pitch).Ry(yaw) (degrés, autour de l'origine du
+    visage) : triangles du plus lointain au plus proche, ombrage plat (lumière face à la caméra).
+    """
+    rotated = mesh.vertices @ makePose(rotation=(pitch, yaw, 0.0))[:3, :3].T
+    scale = px_per_cm * SPRITE_SUPERSAMPLING
+    margin = 2 * SPRITE_SUPERSAMPLING
+    low, high = rotated[:, :2].min(axis=0), rotated[:, :2].max(axis=0)
+    # Image : x à droite, y vers le bas ; dimensions multiples du sur-échantillonnage
+    width = int(math.ceil(((high[0] - low[0]) * scale + 2 * margin) / SPRITE_SUPERSAMPLING)) * SPRITE_SUPERSAMPLING
+    height = int(math.ceil(((high[1] - low[1]) * scale + 2 * margin) / SPRITE_SUPERSAMPLING)) * SPRITE_SUPERSAMPLING
+    origin = np.array([margin - low[0] * scale, margin + high[1] * scale])
+    pixels = np.empty((len(rotated), 2))
+    pixels[:, 0] = origin[0] + rotated[:, 0] * scale
+    pixels[:, 1] = origin[1] - rotated[:, 1] * scale
+
+    corners = rotated[mesh.triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    shade = _AMBIENT + (1 - _AMBIENT) * np.abs(normals[:, 2]) / np.maximum(lengths, 1e-12)
+    colors = np.clip(mesh.colors * shade[:, None], 0, 255)
+    order = np.argsort(corners[:, :, 2].mean(axis=1), kind="stable")  # +z vers la caméra : les plus proches en dernier
+
+    canvas = np.zeros((height, width, 4), dtype=np.float32)
+    polygons = np.round(pixels[mesh.triangles] * 16).astype(np.int32)  # 4 bits de précision sous-pixel
+    for index in order:
+        if lengths[index] == 0:
+            continue
+        alpha = mesh.alphas[index]
+        color = (*colors[index] * alpha, alpha)  # Prémultiplié
+        if alpha >= 1.0:
+            cv2.fillConvexPoly(canvas, polygons[index], color, lineType=cv2.LINE_8, shift=4)
+            continue
+        # Triangle translucide (verres) : opérateur "over" sur sa boîte englobante
+        x0, y0 = np.maximum(polygons[index].min(axis=0) >> 4, 0)
+        x1, y1 = np.minimum((polygons[index].max(axis=0) >> 4) + 2, (width, height))
+        if x1 <= x0 or y1 <= y0:
+            continue
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+        cv2.fillConvexPoly(mask, polygons[index] - np.array([x0 << 4, y0 << 4], dtype=np.int32), 1.0, lineType=cv2.LINE_8, shift=4)
+        region = canvas[y0:y1, x0:x1]
+        region *= 1.0 - alpha * mask[..., None]
+        region += mask[..., None] * np.array(color, dtype=np.float32)
+
+    canvas[..., :3] = np.minimum(canvas[..., :3], 255.0)
+    canvas[..., 3] *= 255.0
+    image = cv2.resize(canvas, (width // SPRITE_SUPERSAMPLING, height // SPRITE_SUPERSAMPLING), interpolation=cv2.INTER_AREA)
+    anchor = (origin / SPRITE_SUPERSAMPLING - 0.5 * (1 - 1 / SPRITE_SUPERSAMPLING)).tolist()
+    return FrameSprite(np.round(image).astype(np.uint8), (anchor[0], anchor[1]), float(px_per_cm))
+
+
+def angle_bucket(pitch: float, yaw: float) -> Tuple[int, int]:
+    """ Tranche d'angles (degrés, multiples des pas) la plus proche, bornée aux angles rendus. """
+    pitch_step, yaw_step = settings.PREVIEW_PITCH_STEP_DEG, settings.PREVIEW_YAW_STEP_DEG
+    pitch_limit = settings.PREVIEW_MAX_PITCH_DEG // pitch_step * pitch_step
+    yaw_limit = settings.PREVIEW_MAX_YAW_DEG // yaw_step * yaw_step
+    return (int(np.clip(round(pitch / pitch_step) * pitch_step, -pitch_limit, pitch_limit)),
+            int(np.clip(round(yaw / yaw_step) * yaw_step, -yaw_limit, yaw_limit)))
+
+
+class SpriteCache:
+    """
+    Sprites par (monture, tranche d'angles) : mémoire (LRU), puis disque (si directory), sinon rendus
+    depuis l'OBJ. Thread-safe ; un sprite manquant est rendu sous le verrou (une seule fois).
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_items: int = 256, px_per_cm: Optional[float] = None):
+        self.directory = directory
+        self.max_items = max_items
+        self.px_per_cm = px_per_cm or settings.PREVIEW_SPRITE_PX_PER_CM
+        self.rendered = self.loaded = self.hits = 0
+        self._meshes: Dict[str, FrameMesh] = {}
+        self._sprites: "OrderedDict[Tuple[str, int, int], FrameSprite]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mesh(self, model_id: str) -> FrameMesh:
+        """ Monture du catalogue (MODEL_IDS_TO_PATHS), chargée une fois. KeyError si l'identifiant est inconnu. """
+        mesh = self._meshes.get(model_id)
+        if mesh is None:
+            obj_path = Path(settings.MODEL_IDS_TO_PATHS[model_id])
+            mesh = load_frame_mesh(obj_path, settings.PREVIEW_MODEL_ROTATIONS.get(model_id, (0.0, 0.0, 0.0)))
+            self._meshes[model_id] = mesh
+        return mesh
+
+    def get(self, model_id: str, pitch: int, yaw: int) -> FrameSprite:
+        key = (model_id, pitch, yaw)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+            mesh = self.mesh(model_id)
+            path = self.directory / f"{model_id}_{mesh.key}_p{pitch}_y{yaw}_{self.px_per_cm:g}.npz" if self.directory else None
+            if path is not None and path.is_file():
+                with np.load(path) as data:
+                    sprite = FrameSprite(data["image"], tuple(data["anchor"].tolist()), float(data["px_per_cm"]))
+                self.loaded += 1
+            else:
+                sprite = render_sprite(mesh, pitch, yaw, self.px_per_cm)
+                self.rendered += 1
+                if path is not None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_suffix(f".{os.getpid()}.tmp.npz")  # Workers concurrents : un fichier temporaire chacun
+                    np.savez_compressed(tmp_path, image=sprite.image, anchor=np.array(sprite.anchor), px_per_cm=sprite.px_per_cm)
+                    tmp_path.replace(path)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.max_items:
+                self._sprites.popitem(last=False)
+            return sprite
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"sprites": len(self._sprites), "hits": self.hits, "loaded": self.loaded, "rendered": self.rendered}
+
+
+# --- Composition ---
+def pose_camera(width: int, height: int) -> np.ndarray:
+    """ Intrinsèques GetPsudoCamera (centre optique au centre), focale de la caméra virtuelle Mediapipe. """
+    camera_matrix, _ = GetPsudoCamera(width, height)
+    camera_matrix[0, 0] = camera_matrix[1, 1] = height / (2.0 * math.tan(math.radians(VERTICAL_FOV_DEG) / 2))
+    return camera_matrix
+
+
+def sprite_placement(matrix: np.ndarray, width: int, height: int) -> Tuple[Tuple[int, int], float, Tuple[float, float], float]:
+    """
+    Pour une matrice de pose (visage canonique -> caméra, y en haut, visage vers -z) :
+    (tranche (tangage, lacet), roulis en degrés, projection de l'origine du visage en pixels,
+    pixels par cm à cette profondeur). La rotation est exprimée par rapport au rayon de vue vers
+    le visage (un visage décentré est vu de biais), puis décomposée en Rz(roulis).Rx(tangage).Ry(lacet).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    scale = float(np.linalg.norm(matrix[:3, 0]))
+    rotation = matrix[:3, :3] / np.linalg.norm(matrix[:3, :3], axis=0, keepdims=True)
+    translation = matrix[:3, 3]
+
+    # Rotation minimale amenant l'axe de vue (0, 0, -1) sur le rayon vers le visage
+    ray = translation / np.linalg.norm(translation)
+    axis = np.cross([0.0, 0.0, -1.0], ray)
+    sin_angle, cos_angle = np.linalg.norm(axis), -ray[2]
+    view = np.eye(3)
+    if sin_angle > 1e-9:
+        k = axis / sin_angle
+        cross = np.array([[0, -k[2], k[1]], [k[2], 0, -k[0]], [-k[1], k[0], 0]])
+        view = np.eye(3) + sin_angle * cross + (1 - cos_angle) * cross @ cross
+    relative = view.T @ rotation
+
+    pitch = math.degrees(math.asin(np.clip(relative[2, 1], -1.0, 1.0)))
+    yaw = math.degrees(math.atan2(-relative[2, 0], relative[2, 2]))
+    roll = math.degrees(math.atan2(-relative[0, 1], relative[1, 1]))
+
+    camera_matrix = pose_camera(width, height)
+    focal, center_x, center_y = camera_matrix[0, 0], camera_matrix[0, 2], camera_matrix[1, 2]
+    depth = -translation[2]
+    anchor = (center_x + focal * translation[0] / depth, center_y - focal * translation[1] / depth)
+    # Échelle le long du rayon (distance au visage), ramenée au plan image
+    px_per_cm = focal * scale / (np.linalg.norm(translation) * cos_angle)
+    return angle_bucket(pitch, yaw), roll, anchor, px_per_cm
+
+
+def composite_sprite(image: np.ndarray, sprite: FrameSprite, anchor: Tuple[float, float], px_per_cm: float, roll: float) -> None:
+    """ Plaque le sprite (tourné du roulis, mis à l'échelle, ancre sur anchor) sur l'image BGR, en place. """
+    zoom = px_per_cm / sprite.px_per_cm
+    # Roulis positif = sens trigonométrique avec y en haut, donc horaire dans l'image (y vers le bas)
+    cos_r, sin_r = math.cos(math.radians(roll)) * zoom, math.sin(math.radians(roll)) * zoom
+    linear = np.array([[cos_r, sin_r], [-sin_r, cos_r]])
+    affine = np.hstack([linear, (np.array(anchor) - linear @ np.array(sprite.anchor))[:, None]])
+
+    sprite_height, sprite_width = sprite.image.shape[:2]
+    corners = np.array([[0, 0], [sprite_width, 0], [0, sprite_height], [sprite_width, sprite_height]], dtype=np.float64)
+    projected = corners @ linear.T + affine[:, 2]
+    x0, y0 = np.maximum(np.floor(projected.min(axis=0)).astype(int), 0)
+    x1, y1 = np.minimum(np.ceil(projected.max(axis=0)).astype(int) + 1, (image.shape[1], image.shape[0]))
+    if x1 <= x0 or y1 <= y0:
+        return
+    affine[:, 2] -= (x0, y0)
+    warped = cv2.warpAffine(sprite.image, affine, (int(x1 - x0), int(y1 - y0)), flags=cv2.INTER_LINEAR,
+                            borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0))
+    region = image[y0:y1, x0:x1]
+    # "over" prémultiplié : sprite + image * (1 - alpha), en entiers 16 bits
+    transparency = 255 - warped[..., 3:4].astype(np.uint16)
+    blended = warped[..., :3] + (region.astype(np.uint16) * transparency + 127) // 255
+    region[:] = np.minimum(blended, 255).astype(np.uint8)
+
+
+def render_preview(image: np.ndarray, matrix: np.ndarray, model_id: str, sprites: "SpriteCache") -> np.ndarray:
+    """ Copie de l'image BGR avec la monture plaquée selon la matrice de pose. """
+    height, width = image.shape[:2]
+    (pitch, yaw), roll, anchor, px_per_cm = sprite_placement(matrix, width, height)
+    preview = image.copy()
+    composite_sprite(preview, sprites.get(model_id, pitch, yaw), anchor, px_per_cm, roll)
+    return preview
+
+
+def fit_preview_size(image: np.ndarray, max_size: Optional[int] = None) -> np.ndarray:
+    """ Image réduite à max_size (côté le plus long). Centre optique et focale suivent la taille : la pose reste valable. """
+    max_size = max_size or settings.PREVIEW_MAX_SIZE
+    scale = max_size / max(image.shape[:2])
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+
+
+# --- Cache des aperçus ---
+def preview_variant(mesh: FrameMesh) -> str:
+    """ Empreinte de ce qui change un aperçu à image et monture égales : monture ajustée (mesh.key) et réglages PREVIEW_*. """
+    params = [PREVIEW_RENDER_VERSION, mesh.key, settings.PREVIEW_SPRITE_PX_PER_CM, settings.PREVIEW_PITCH_STEP_DEG,
+              settings.PREVIEW_YAW_STEP_DEG, settings.PREVIEW_MAX_PITCH_DEG, settings.PREVIEW_MAX_YAW_DEG,
+              settings.PREVIEW_MAX_SIZE, settings.PREVIEW_JPEG_QUALITY]
+    return hashlib.sha256(json.dumps(params).encode("utf-8")).hexdigest()[:12]
+
+
+class PreviewCache:
+    """
+    Aperçus JPEG sur disque, par (SHA-256 de l'image source, monture, variante) :
+    <dossier>/<2 premiers>/<sha>_<monture>_<variante>.jpg. Un changement d'OBJ, de MTL ou de réglage
+    change la variante : l'ancien aperçu n'est plus relu (et peut être supprimé).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def path(self, digest: str, model_id: str, variant: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}_{model_id}_{variant}.jpg"
+
+    def get(self, digest: str, model_id: str, variant: str) -> Optional[bytes]:
+        try:
+            return self.path(digest, model_id, variant).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest: str, model_id: str, variant: str, jpeg: bytes) -> Path:
+        path = self.path(digest, model_id, variant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(jpeg)
+        tmp_path.replace(path)
+        return path
+
+
+def render_previews(image_bytes: bytes, matrix, model_ids, sprites: SpriteCache,
+                    cache: Optional[PreviewCache] = None) -> Dict[str, bytes]:
+    """
+    Aperçus JPEG d'une photo pour plusieurs montures (décodage et réduction faits une fois).
+    Les aperçus déjà en cache sont relus, les autres composés puis ajoutés au cache.
+    """
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    variants = {model_id: preview_variant(sprites.mesh(model_id)) for model_id in model_ids}
+    previews: Dict[str, bytes] = {}
+    missing = []
+    for model_id in model_ids:
+        cached = cache.get(digest, model_id, variants[model_id]) if cache is not None else None
+        if cached is not None:
+            previews[model_id] = cached
+        else:
+            missing.append(model_id)
+    if not missing:
+        return previews
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Image indécodable.")
+    image = fit_preview_size(image)
+    for model_id in missing:
+        preview = render_preview(image, matrix, model_id, sprites)
+        ok, encoded = cv2.imencode(".jpg", preview, [cv2.IMWRITE_JPEG_QUALITY, settings.PREVIEW_JPEG_QUALITY])
+        if not ok:
+            raise ValueError("Encodage JPEG de l'aperçu impossible.")
+        previews[model_id] = encoded.tobytes()
+        if cache is not None:
+            cache.put(digest, model_id, variants[model_id], previews[model_id])
+    return previews
+
+
+# --- Instances partagées ---
+_sprite_cache: Optional[SpriteCache] = None
+_preview_cache: Optional[PreviewCache] = None
+_preview_lock = threading.Lock()
+
+
+def _resolve(directory: str) -> Path:
+    path = Path(directory)
+    return path if path.is_absolute() else settings.BASE_DIR / path
+
+
+def get_sprite_cache() -> SpriteCache:
+    global _sprite_cache
+    if _sprite_cache is None:
+        with _preview_lock:
+            if _sprite_cache is None:
+                _sprite_cache = SpriteCache(_resolve(settings.PREVIEW_SPRITE_DIR))
+    return _sprite_cache
+
+
+def get_preview_cache() -> PreviewCache:
+    global _preview_cache
+    if _preview_cache is None:
+        with _preview_lock:
+            if _preview_cache is None:
+                _preview_cache = PreviewCache(_resolve(settings.PREVIEW_CACHE_DIR))
+    return _preview_cache
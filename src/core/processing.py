@@ -1,23 +1,46 @@
 # src/core/processing.py
 
-import cv2
 import numpy as np
-import mediapipe as mp
 from mediapipe.tasks.python.vision import FaceLandmarkerResult
-from src.core.models import get_face_landmarker
-from src.schemas.schemas import FaceAnalysisResult, Landmark, RecommendationResult
-from typing import List, Optional, Tuple
+from src.core.config import settings
+from src.core.landmark_backends import LandmarkBackend, get_landmark_backend
+from src.core.decoding import decode_image_rgb
+from src.core.detection_fallback import detect_with_fallback
+from src.core.expression import assess_capture, blendshape_scores, compact_scores
+from src.core.quality import quality_rejection_message
+from src.core.recommendation_table import get_recommendation_table
+from src.core.smoothing import get_session_smoother
+# Indices des landmarks et seuils : définis avec le classifieur de forme versionné
+from src.core.shape_classifier import (
+    TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE,
+    FEATURE_LANDMARKS, MIN_LANDMARKS, features_from_points, get_shape_classifier,
+)
+from src.schemas.schemas import AnalysisLevel, CaptureQuality, FaceAnalysisResult, HeadPose, Landmark, RecommendationResult
+from src.utils.gfxmath_utils import DecomposePose, FrontalizeLandmarks
+from pydantic import TypeAdapter
+from typing import List, Optional, Tuple, get_args
 import logging
 import math
+import threading
+import time
 
 # Utilise le logger configuré au niveau racine (ou via settings si importé)
 logger = logging.getLogger(__name__)
 
-# --- Indices des Landmarks (Seulement ceux nécessaires pour L/W) ---
-TOP_FOREHEAD = 10
-BOTTOM_CHIN = 152
-LEFT_TEMPLE = 234 # Point externe pommette gauche
-RIGHT_TEMPLE = 454 # Point externe pommette droite
+# Le FaceLandmarker (mode IMAGE) n'est pas garanti thread-safe : une détection à la fois
+# (sauf backend thread-safe, ex. ONNX Runtime). Décodage, pré-contrôle et post-traitement
+# restent parallèles dans le pool d'analyse.
+_detect_lock = threading.Lock()
+
+# Validation groupée des landmarks (plus rapide que 478 constructions Landmark(...))
+_LANDMARK_LIST_ADAPTER = TypeAdapter(List[Landmark])
+
+def _detect(backend: LandmarkBackend, image_rgb: np.ndarray) -> Optional[FaceLandmarkerResult]:
+    """ Une détection par le backend de landmarks sur une image RGB contiguë. """
+    if backend.thread_safe:
+        return backend.detect(image_rgb)
+    with _detect_lock:
+        return backend.detect(image_rgb)
 
 # --- Fonction Distance ---
 def distance(p1: Optional[Landmark], p2: Optional[Landmark]) -> float:
@@ -30,107 +53,187 @@ def distance(p1: Optional[Landmark], p2: Optional[Landmark]) -> float:
         return 0.0
     return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
 
-# --- Logique Simplifiée V6 pour determine_face_shape ---
-def determine_face_shape(landmarks: List[Landmark]) -> str:
+# --- Détermination de la Forme (classifieur versionné, cf. shape_classifier.py) ---
+def determine_face_shape(landmarks: List[Landmark], frontalize_pose: Optional[np.ndarray] = None) -> str:
     """
-    Détermine une forme de visage simplifiée (Long, Proportionné, Autre)
-    basée principalement sur le ratio Longueur/Largeur.
+    Détermine la forme du visage avec le classifieur actif (artefact SHAPE_CLASSIFIER_PATH).
+    Par défaut : règles V6 sur le ratio Longueur/Largeur (long, proportionné, autre).
+    Avec `frontalize_pose` (matrice 4x4), les points sont redressés avant la mesure.
     """
     shape = "inconnue" # Forme par défaut
     # Vérification basique du nombre de landmarks
-    if not landmarks or len(landmarks) < max(TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE) + 1:
+    if not landmarks or len(landmarks) < MIN_LANDMARKS:
         logger.warning(f"Nombre insuffisant de landmarks ({len(landmarks)} fournis) pour les indices requis.")
         return shape
 
     try:
         # Récupérer seulement les points nécessaires
-        p_top_forehead = landmarks[TOP_FOREHEAD]
-        p_bottom_chin = landmarks[BOTTOM_CHIN]
-        p_left_temple = landmarks[LEFT_TEMPLE]
-        p_right_temple = landmarks[RIGHT_TEMPLE]
-
-        # Calculer longueur et largeur principale
-        face_length = distance(p_top_forehead, p_bottom_chin)
-        cheekbone_width = distance(p_left_temple, p_right_temple) # Largeur max approx
+        points = np.array([[(landmarks[i].x, landmarks[i].y, landmarks[i].z) for i in FEATURE_LANDMARKS]], dtype=np.float64)
+        if frontalize_pose is not None:
+            points = FrontalizeLandmarks(points, frontalize_pose)
+        features = features_from_points(points[..., :2])
 
         # Gérer division par zéro ou mesures invalides
-        if face_length < 1e-6 or cheekbone_width < 1e-6:
-            logger.warning(f"Mesures faciales invalides (L={face_length:.2f}, W={cheekbone_width:.2f}).")
+        if np.isnan(features).any():
+            logger.warning("Mesures faciales invalides (longueur ou largeur nulle).")
             return "inconnue"
+        logger.info(f"Ratio L/W calculé : {features[0, 0]:.2f}")
 
-        length_width_ratio = face_length / cheekbone_width
-        logger.info(f"Ratio L/W calculé (simple) : {length_width_ratio:.2f}")
-
-        # --- Classification Simplifiée V6 ---
-        RATIO_LONG = 1.20 # Seuil pour considérer "long"
-        RATIO_PROP_LOW = 0.90 # Borne inférieure pour "proportionné"
-
-        if length_width_ratio > RATIO_LONG:
-            shape = "long"
-        elif length_width_ratio >= RATIO_PROP_LOW: # Implicitement <= RATIO_LONG
-            shape = "proportionné"
-        else: # ratio < RATIO_PROP_LOW
-            shape = "autre"
-
-        logger.info(f"Forme de visage déterminée (v6 simple) : {shape}")
+        classifier = get_shape_classifier()
+        shape = str(classifier.predict_features(features)[0])
+        logger.info(f"Forme de visage déterminée ({classifier.version}) : {shape}")
         return shape.lower()
 
     except IndexError:
-        logger.error(f"Erreur d'indice lors de l'accès aux landmarks (indices requis jusqu'à {max(TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE)}).", exc_info=True)
+        logger.error(f"Erreur d'indice lors de l'accès aux landmarks (indices requis jusqu'à {MIN_LANDMARKS - 1}).", exc_info=True)
         return "erreur_indices"
     except Exception as e:
         logger.error(f"Erreur inattendue lors de la détermination de la forme : {e}", exc_info=True)
         return "erreur_calcul"
 
+# --- Version Vectorisée (re-classification en masse) ---
+def determine_face_shapes_batch(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Équivalent vectorisé de determine_face_shape pour un tableau (N, nb_landmarks, 2 ou 3).
+    Les visages sans landmarks (NaN) ou aux mesures invalides sont classés "inconnue".
+    """
+    return get_shape_classifier().classify_batch(landmarks)
+
+# --- Orientation de la Tête ---
+HEAD_TURNED_MESSAGE = "Tête trop tournée"
+
+def head_pose_from_matrix(matrix: np.ndarray) -> HeadPose:
+    """ Lacet/tangage/roulis (degrés) de la matrice de transformation faciale. """
+    pitch, yaw, roll = DecomposePose(matrix).tolist()
+    return HeadPose(yaw=yaw, pitch=pitch, roll=roll)
+
+def head_pose_out_of_budget(head_pose: HeadPose) -> Optional[str]:
+    """ Message de guidage si un angle dépasse le budget configuré (POSE_MAX_*_DEG), sinon None. """
+    if not settings.POSE_GATING_ENABLED:
+        return None
+    # Angles arrondis au dixième avant comparaison : la décision et le message affiché concordent
+    limits = (
+        ("lacet", round(head_pose.yaw, 1), settings.POSE_MAX_YAW_DEG),
+        ("tangage", round(head_pose.pitch, 1), settings.POSE_MAX_PITCH_DEG),
+        ("roulis", round(head_pose.roll, 1), settings.POSE_MAX_ROLL_DEG),
+    )
+    exceeded = [f"{name} {value:.1f}°, limite {limit:g}°" for name, value, limit in limits if abs(value) > limit]
+    if not exceeded:
+        return None
+    return f"{HEAD_TURNED_MESSAGE} : regardez l'objectif ({', '.join(exceeded)})."
+
+# --- Niveaux d'Analyse ---
+# "pose" : matrice et orientation seulement (ré-ancrage du rendu) ;
+# "landmarks" : + landmarks, blendshapes et verdict de capture, sans forme ;
+# "full" : + forme du visage (et budget d'angles), nécessaire aux recommandations.
+ANALYSIS_LEVELS = get_args(AnalysisLevel)
+
 # --- Analyse Faciale (Utilise la forme simplifiée) ---
-def analyze_face_from_image_bytes(image_bytes: bytes) -> FaceAnalysisResult:
+def analyze_face_from_image_bytes(
+    image_bytes: bytes,
+    session_id: Optional[str] = None,
+    timestamp: Optional[float] = None,
+    analysis_level: AnalysisLevel = "full",
+) -> FaceAnalysisResult:
     """
     Analyse une image (fournie en bytes) pour détecter la pose du visage,
     les landmarks, et déterminer la forme du visage (simplifiée).
+    Avec `session_id`, landmarks et pose sont lissés avec les captures précédentes
+    de la session (`timestamp` = date de capture en secondes, cf. smoothing.py).
+    `analysis_level` (ANALYSIS_LEVELS) saute les étapes inutiles : pas de conversion des
+    landmarks ni de blendshapes pour "pose", pas de calcul de forme hors de "full".
     """
-    logger.info("Début de l'analyse faciale (landmarks + pose + forme simple)...")
-    landmarker = get_face_landmarker()
+    if analysis_level not in ANALYSIS_LEVELS:
+        raise ValueError(f"Niveau d'analyse inconnu : {analysis_level!r} (attendu : {', '.join(ANALYSIS_LEVELS)}).")
+    logger.info(f"Début de l'analyse faciale (niveau {analysis_level})...")
+    backend = get_landmark_backend()
 
-    if landmarker is None:
-        logger.error("FaceLandmarker non initialisé.")
+    if backend is None:
+        logger.error("Backend de landmarks non initialisé.")
         return FaceAnalysisResult(detection_successful=False, error_message="Erreur interne: Modèle non disponible.")
 
     try:
-        image_np = np.frombuffer(image_bytes, np.uint8)
-        image_cv = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-        if image_cv is None:
+        # Décodage via le backend JPEG sélectionné au démarrage (sortie RGB identique à OpenCV)
+        image_rgb = decode_image_rgb(image_bytes)
+        if image_rgb is None:
             logger.warning("Impossible de décoder l'image.")
             return FaceAnalysisResult(detection_successful=False, error_message="Format d'image invalide ou corrompu.")
     except Exception as e:
         logger.error(f"Erreur lors du décodage de l'image: {e}", exc_info=True)
         return FaceAnalysisResult(detection_successful=False, error_message="Erreur de décodage image.")
 
-    try:
-        image_rgb = cv2.cvtColor(image_cv, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+    # Pré-contrôle qualité (copie réduite) : évite une inférence complète sur une image inexploitable
+    rejection_msg = quality_rejection_message(image_rgb)
+    if rejection_msg:
+        return FaceAnalysisResult(detection_successful=False, error_message=rejection_msg)
 
-        logger.info("Exécution de la détection FaceLandmarker...")
-        detection_result: Optional[FaceLandmarkerResult] = landmarker.detect(mp_image)
+    try:
+        logger.info(f"Exécution de la détection (backend {backend.name})...")
+        detect_start = time.perf_counter()
+        detection_result: Optional[FaceLandmarkerResult] = _detect(backend, image_rgb)
         logger.info("Détection terminée.")
+        if settings.FALLBACK_DETECTION_ENABLED and not (detection_result and detection_result.face_landmarks):
+            # Visage petit ou lointain : nouvelle tentative sur des recadrages, dans un budget strict
+            fallback = detect_with_fallback(
+                lambda crop: _detect(backend, crop),
+                image_rgb,
+                budget_s=settings.FALLBACK_DETECTION_BUDGET_MS / 1000.0,
+                expected_attempt_s=time.perf_counter() - detect_start,
+            )
+            if fallback.result is not None:
+                detection_result = fallback.result
 
         matrix_list: Optional[List[List[float]]] = None
         landmarks_list: Optional[List[Landmark]] = None
+        matrix_array: Optional[np.ndarray] = None
+        landmarks_array: Optional[np.ndarray] = None
+        head_pose: Optional[HeadPose] = None
+        blendshapes: Optional[List[float]] = None
+        capture_quality: Optional[CaptureQuality] = None
+        pose_gated: bool = False
         detected_shape: Optional[str] = None
         error_msg: Optional[str] = None
         success: bool = False
 
         if detection_result and detection_result.facial_transformation_matrixes and len(detection_result.facial_transformation_matrixes) > 0:
-            matrix = detection_result.facial_transformation_matrixes[0]
-            matrix_list = matrix.tolist()
+            matrix_array = np.asarray(detection_result.facial_transformation_matrixes[0])
+            matrix_list = matrix_array.tolist()
 
             if detection_result.face_landmarks and len(detection_result.face_landmarks) > 0:
                 landmarks_raw = detection_result.face_landmarks[0]
                 if landmarks_raw:
-                     landmarks_list = [Landmark(x=lm.x, y=lm.y, z=lm.z) for lm in landmarks_raw if hasattr(lm, 'x')]
-                     # Appelle la fonction de détermination de forme SIMPLIFIÉE V6
-                     detected_shape = determine_face_shape(landmarks_list)
-                     if "erreur" in detected_shape:
-                         error_msg = f"Erreur de calcul de forme ({detected_shape})."
+                     with_landmarks = analysis_level != "pose"
+                     # Niveau "pose" : landmarks convertis seulement pour le lissage de session
+                     if with_landmarks or session_id is not None:
+                         landmarks_array = np.array([(lm.x, lm.y, lm.z) for lm in landmarks_raw if hasattr(lm, 'x')], dtype=np.float64)
+                     if session_id is not None:
+                         landmarks_array, matrix_array = get_session_smoother().smooth(session_id, landmarks_array, matrix_array, timestamp)
+                         matrix_list = matrix_array.tolist()
+                     head_pose = head_pose_from_matrix(matrix_array)
+                     if with_landmarks:
+                         landmarks_list = _LANDMARK_LIST_ADAPTER.validate_python(
+                             [{"x": x, "y": y, "z": z} for x, y, z in landmarks_array.tolist()]
+                         )
+                         if detection_result.face_blendshapes:
+                             scores = blendshape_scores(detection_result.face_blendshapes[0])
+                             if scores is not None:
+                                 blendshapes = compact_scores(scores)
+                                 capture_quality = assess_capture(scores)
+                     else:
+                         landmarks_array = None
+                     # Budget d'angles : ne protège que la mesure de forme (niveau "full")
+                     turned_msg = head_pose_out_of_budget(head_pose) if analysis_level == "full" else None
+                     if turned_msg:
+                         # Court-circuit : ratios 2D faussés par la rotation, forme non calculée
+                         logger.info(turned_msg)
+                         error_msg = turned_msg
+                         pose_gated = True
+                     elif analysis_level == "full":
+                         # Appelle la fonction de détermination de forme SIMPLIFIÉE V6
+                         frontalize_pose = matrix_array if settings.SHAPE_FRONTALIZE_LANDMARKS else None
+                         detected_shape = determine_face_shape(landmarks_list, frontalize_pose)
+                         if "erreur" in detected_shape:
+                             error_msg = f"Erreur de calcul de forme ({detected_shape})."
                      success = True
                      logger.info("Visage détecté, landmarks extraits.")
                 else:
@@ -151,8 +254,13 @@ def analyze_face_from_image_bytes(image_bytes: bytes) -> FaceAnalysisResult:
             facial_transformation_matrix=matrix_list,
             face_landmarks=landmarks_list,
             detected_face_shape=detected_shape if success and "erreur" not in (detected_shape or "") else None,
-            error_message=error_msg if not success or "erreur" in (detected_shape or "") else None
+            error_message=error_msg if not success or pose_gated or "erreur" in (detected_shape or "") else None,
+            head_pose=head_pose,
+            blendshapes=blendshapes,
+            capture_quality=capture_quality,
         )
+        # Copies NumPy pour la sérialisation rapide (hors schéma, cf. src/api/responses.py)
+        analysis_result.attach_arrays(landmarks=landmarks_array, matrix=matrix_array)
         return analysis_result
 
     except Exception as e:
@@ -183,24 +291,8 @@ def get_recommendations_based_on_analysis(analysis: FaceAnalysisResult) -> Optio
 def get_recommendations_for_face(face_shape: str) -> tuple[List[str], str]:
     """
     Génère des recommandations basées sur les formes simplifiées (long, proportionné, autre).
+    Simple lecture dans la table précompilée (voir recommendation_table.py).
     """
-    face_shape_lower = face_shape.lower().strip()
-    analysis_info = f"Forme de visage simplifiée utilisée : {face_shape_lower.capitalize()}"
-    logger.info(f"Génération de recommandations pour la forme simplifiée : '{face_shape_lower}'")
-
-    model1 = "sunglass_model_1" # Ex: Styles Angulaires/Rectangles
-    model2 = "sunglass_model_2" # Ex: Styles Ronds/Ovales
-    model3 = "sunglass_model_3" # Ex: Styles Pilote/Variés
-
-    if face_shape_lower == "long": # Ovale, Rectangle -> Styles larges ou contrastants
-        recommendations = [model2, model3]
-    elif face_shape_lower == "proportionné": # Rond, Carré -> Styles contrastants
-        recommendations = [model1, model2, model3]
-    elif face_shape_lower == "autre": # Coeur, Diamant, Large -> Styles équilibrants
-        recommendations = [model1, model3]
-    else: # Inconnue, erreur_indices, erreur_calcul
-        recommendations = [model1, model2] # Défaut générique
-        analysis_info = f"Forme de visage '{face_shape}' non reconnue ou erreur, recommandations par défaut."
-
-    logger.info(f"Recommandations générées (simple) : {recommendations}")
-    return recommendations, analysis_info
\ No newline at end of file
+    entry = get_recommendation_table().lookup(face_shape)
+    logger.debug(f"Recommandations pour la forme '{face_shape}' : {entry.recommended_ids}")
+    return list(entry.recommended_ids), entry.analysis_info
@@ -0,0 +1,170 @@
+# src/core/recommendation_table.py
+"""
+Table de recommandations précompilée.
+
+Les règles (forme -> modèles) et le catalogue (settings.MODEL_IDS_TO_PATHS) sont compilés
+une fois en une table immuable : IDs recommandés, message d'information et corps JSON de
+la réponse /recommend_glasses déjà sérialisé. Une recherche est alors un simple accès dict.
+La table est reconstruite puis remplacée atomiquement par reload_recommendation_table(),
+appelée au démarrage puis par get_recommendation_table() dès que le fichier de règles
+(chemin, date de modification, taille) ou le catalogue change. La vérification coûte un
+stat et est faite au plus toutes les RECOMMENDATION_RELOAD_CHECK_S secondes.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.core.config import settings
+from src.schemas.schemas import RecommendationResult
+
+logger = logging.getLogger(__name__)
+
+# Règles intégrées (utilisées si RECOMMENDATION_RULES_PATH est absent ou invalide)
+DEFAULT_RECOMMENDATION_RULES: Dict[str, List[str]] = {
+    "long": ["sunglass_model_2", "sunglass_model_3"], # Ovale, Rectangle -> Styles larges ou contrastants
+    "proportionné": ["sunglass_model_1", "sunglass_model_2", "sunglass_model_3"], # Rond, Carré -> Styles contrastants
+    "autre": ["sunglass_model_1", "sunglass_model_3"], # Coeur, Diamant, Large -> Styles équilibrants
+}
+DEFAULT_FALLBACK_IDS: List[str] = ["sunglass_model_1", "sunglass_model_2"] # Défaut générique
+
+
+@dataclass(frozen=True)
+class RecommendationEntry:
+    """ Recommandation précompilée pour une forme. """
+    face_shape: str
+    recommended_ids: Tuple[str, ...]
+    analysis_info: str
+    response_body: bytes # JSON RecommendationResult prêt à envoyer
+
+
+def _build_entry(face_shape: str, recommended_ids: Tuple[str, ...], analysis_info: str) -> RecommendationEntry:
+    body = RecommendationResult(recommended_glasses_ids=list(recommended_ids), analysis_info=analysis_info).model_dump_json()
+    return RecommendationEntry(face_shape, recommended_ids, analysis_info, body.encode("utf-8"))
+
+
+class RecommendationTable:
+    """ Table immuable forme -> RecommendationEntry. """
+
+    def __init__(self, entries: Mapping[str, RecommendationEntry], fallback_ids: Tuple[str, ...]):
+        self.entries = MappingProxyType(dict(entries))
+        self.fallback_ids = fallback_ids
+
+    def lookup(self, face_shape: str) -> RecommendationEntry:
+        """
+        Retourne la recommandation pour une forme. Les formes connues (exactes ou après
+        normalisation minuscules/espaces) sont servies depuis la table ; les autres reçoivent
+        la recommandation par défaut (construite à la volée, non mise en cache).
+        """
+        entry = self.entries.get(face_shape)
+        if entry is not None:
+            return entry
+        entry = self.entries.get(face_shape.lower().strip())
+        if entry is not None:
+            return entry
+        return _build_entry(
+            face_shape,
+            self.fallback_ids,
+            f"Forme de visage '{face_shape}' non reconnue ou erreur, recommandations par défaut.",
+        )
+
+
+def compile_recommendation_table(
+    rules: Mapping[str, Iterable[str]],
+    fallback_ids: Iterable[str],
+    catalogue_ids: Iterable[str],
+) -> RecommendationTable:
+    """ Compile règles + catalogue en table. Les IDs absents du catalogue sont ignorés (avec avertissement). """
+    catalogue = set(catalogue_ids)
+
+    def keep_available(shape: str, ids: Iterable[str]) -> Tuple[str, ...]:
+        ids = list(ids)
+        missing = [model_id for model_id in ids if model_id not in catalogue]
+        if missing:
+            logger.warning(f"Règle '{shape}': modèles absents du catalogue ignorés : {missing}")
+        return tuple(model_id for model_id in ids if model_id in catalogue)
+
+    entries = {}
+    for shape, ids in rules.items():
+        normalized = shape.lower().strip()
+        entries[normalized] = _build_entry(
+            normalized,
+            keep_available(normalized, ids),
+            f"Forme de visage simplifiée utilisée : {normalized.capitalize()}",
+        )
+    return RecommendationTable(entries, keep_available("défaut", fallback_ids))
+
+
+def _rules_path() -> Path:
+    path = Path(settings.RECOMMENDATION_RULES_PATH)
+    return path if path.is_absolute() else settings.BASE_DIR / path
+
+
+def _sources_fingerprint() -> Tuple:
+    """ Empreinte des sources de la table : fichier de règles (chemin, mtime, taille) et catalogue. """
+    path = _rules_path()
+    try:
+        stat = os.stat(path)
+        rules_state = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        rules_state = None
+    return str(path), rules_state, tuple(settings.MODEL_IDS_TO_PATHS.items())
+
+
+def _load_rules() -> Tuple[Dict[str, List[str]], List[str]]:
+    """ Lit les règles depuis RECOMMENDATION_RULES_PATH (JSON {"rules": {...}, "fallback": [...]}). """
+    path = _rules_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["rules"], data["fallback"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Règles de recommandation illisibles ({path}): {e}. Utilisation des règles intégrées.")
+        return DEFAULT_RECOMMENDATION_RULES, DEFAULT_FALLBACK_IDS
+
+
+# --- Table Active ---
+_recommendation_table: Optional[RecommendationTable] = None
+_recommendation_table_sources: Optional[Tuple] = None
+_recommendation_table_checked_at = 0.0
+_recommendation_table_lock = threading.Lock()
+
+
+def reload_recommendation_table() -> RecommendationTable:
+    """
+    Recompile la table depuis les règles et le catalogue courants, puis la publie
+    atomiquement (les lectures en cours continuent sur l'ancienne table).
+    """
+    global _recommendation_table, _recommendation_table_sources
+    with _recommendation_table_lock:
+        # Empreinte prise avant la lecture : une modification pendant la compilation déclenchera un nouveau rechargement
+        sources = _sources_fingerprint()
+        rules, fallback_ids = _load_rules()
+        table = compile_recommendation_table(rules, fallback_ids, settings.MODEL_IDS_TO_PATHS.keys())
+        _recommendation_table = table
+        _recommendation_table_sources = sources
+    logger.info(f"Table de recommandations compilée ({len(table.entries)} formes).")
+    return table
+
+
+def get_recommendation_table() -> RecommendationTable:
+    """ Retourne la table active (compilée au premier appel, recompilée si les règles ou le catalogue ont changé). """
+    global _recommendation_table_checked_at
+    table = _recommendation_table
+    if table is None:
+        return reload_recommendation_table()
+    interval = settings.RECOMMENDATION_RELOAD_CHECK_S
+    if interval >= 0:
+        now = time.monotonic()
+        if now - _recommendation_table_checked_at >= interval:
+            _recommendation_table_checked_at = now
+            if _sources_fingerprint() != _recommendation_table_sources:
+                logger.info("Règles ou catalogue modifiés : recompilation de la table de recommandations.")
+                table = reload_recommendation_table()
+    return table
@@ -0,0 +1,308 @@
+# src/core/result_store.py
+"""
+Stockage local des résultats d'analyse (landmarks, pose, métadonnées) en tableaux
+memory-mapped, pour rejouer la classification de forme ou la recommandation sans
+refaire la détection.
+
+Organisation sur disque (un dossier par store) :
+    store.json                      En-tête (version, nb de landmarks, taille de segment, nb de lignes)
+    segment_XXXXX.landmarks.f32     float32 (nb_landmarks, taille_segment, 3), landmark-major
+    segment_XXXXX.poses.f32         float32 (taille_segment, 4, 4)
+    segment_XXXXX.meta.npy          tableau structuré (id, succès, forme, date, offset métadonnées)
+    metadata.jsonl                  métadonnées libres (optionnelles), une ligne JSON par résultat
+
+Les données grandissent par segments de taille fixe (pas de réécriture lors d'un ajout).
+Les landmarks sont rangés point par point dans chaque segment : lire quelques points
+(ex: les 4 utilisés par determine_face_shape) pour un million de visages ne touche que
+quelques dizaines de Mo, au lieu de parcourir tous les landmarks.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.config import settings
+from src.schemas.schemas import FaceAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 1
+HEADER_FILENAME = "store.json"
+METADATA_FILENAME = "metadata.jsonl"
+DEFAULT_NUM_LANDMARKS = 478
+ID_MAX_LENGTH = 64
+
+META_DTYPE = np.dtype([
+    ("id", f"S{ID_MAX_LENGTH}"),
+    ("detection_successful", np.bool_),
+    ("detected_face_shape", "U24"),
+    ("created_at", np.float64),
+    ("metadata_offset", np.int64),  # -1 si pas de métadonnées libres
+])
+
+
+@dataclass
+class StoredResult:
+    """ Un résultat relu depuis le store (copies, indépendantes du memmap). """
+    result_id: str
+    landmarks: np.ndarray  # (nb_landmarks, 3) float32, NaN si non détecté
+    facial_transformation_matrix: np.ndarray  # (4, 4) float32, NaN si non détecté
+    detection_successful: bool
+    detected_face_shape: str
+    created_at: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class _Segment:
+    """ Les trois fichiers memory-mapped d'un segment. """
+
+    def __init__(self, root: Path, index: int, num_landmarks: int, size: int, create: bool):
+        prefix = root / f"segment_{index:05d}"
+        mode = "w+" if create else "r+"
+        self.landmarks = np.memmap(f"{prefix}.landmarks.f32", dtype=np.float32, mode=mode, shape=(num_landmarks, size, 3))
+        self.poses = np.memmap(f"{prefix}.poses.f32", dtype=np.float32, mode=mode, shape=(size, 4, 4))
+        if create:
+            self.meta = np.lib.format.open_memmap(f"{prefix}.meta.npy", mode="w+", dtype=META_DTYPE, shape=(size,))
+        else:
+            self.meta = np.lib.format.open_memmap(f"{prefix}.meta.npy", mode="r+")
+
+    def flush(self) -> None:
+        self.landmarks.flush()
+        self.poses.flush()
+        self.meta.flush()
+
+
+class LandmarkResultStore:
+    """
+    Store append-only de résultats d'analyse, indexé par ID.
+    Thread-safe pour les écritures. Appeler flush() (ou utiliser un bloc `with`)
+    pour persister le nombre de lignes.
+    """
+
+    def __init__(self, path: Path, segment_size: int = 65536, num_landmarks: int = DEFAULT_NUM_LANDMARKS):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        header_path = self.path / HEADER_FILENAME
+
+        if header_path.exists():
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("version") != STORE_FORMAT_VERSION:
+                raise ValueError(f"Version de store non supportée : {header.get('version')}")
+            self.segment_size = header["segment_size"]
+            self.num_landmarks = header["num_landmarks"]
+            self._count = header["count"]
+        else:
+            self.segment_size = segment_size
+            self.num_landmarks = num_landmarks
+            self._count = 0
+
+        num_segments = -(-self._count // self.segment_size)
+        self._segments: List[_Segment] = [
+            _Segment(self.path, i, self.num_landmarks, self.segment_size, create=False) for i in range(num_segments)
+        ]
+        self._index: Dict[str, int] = {}
+        for row, result_id in enumerate(self._iter_column("id")):
+            self._index[result_id.decode("utf-8")] = row
+        self._metadata_file = open(self.path / METADATA_FILENAME, "ab+")  # Écritures toujours en fin de fichier
+        self._write_header()
+        logger.info(f"Store de résultats ouvert : {self.path} ({self._count} résultats).")
+
+    # --- Gestion interne ---
+    def _write_header(self) -> None:
+        header = {
+            "version": STORE_FORMAT_VERSION,
+            "num_landmarks": self.num_landmarks,
+            "segment_size": self.segment_size,
+            "count": self._count,
+        }
+        tmp_path = self.path / (HEADER_FILENAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        tmp_path.replace(self.path / HEADER_FILENAME)
+
+    def _iter_column(self, name: str) -> Iterator[Any]:
+        for seg_index, segment in enumerate(self._segments):
+            rows = min(self.segment_size, self._count - seg_index * self.segment_size)
+            yield from segment.meta[name][:rows]
+
+    def _segment_for_row(self, row: int) -> _Segment:
+        seg_index = row // self.segment_size
+        while seg_index >= len(self._segments):
+            self._segments.append(_Segment(self.path, len(self._segments), self.num_landmarks, self.segment_size, create=True))
+        return self._segments[seg_index]
+
+    def _write_metadata(self, result_id: str, metadata: Optional[Dict[str, Any]]) -> int:
+        if not metadata:
+            return -1
+        self._metadata_file.seek(0, 2)
+        offset = self._metadata_file.tell()
+        self._metadata_file.write((json.dumps({"id": result_id, **metadata}) + "\n").encode("utf-8"))
+        return offset
+
+    # --- API publique ---
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, result_id: str) -> bool:
+        return result_id in self._index
+
+    def __enter__(self) -> "LandmarkResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(
+        self,
+        result_id: str,
+        landmarks: Optional[np.ndarray],
+        facial_transformation_matrix: Optional[np.ndarray],
+        detected_face_shape: Optional[str] = None,
+        detection_successful: bool = True,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """ Ajoute un résultat et retourne son numéro de ligne. Lève ValueError si l'ID existe déjà. """
+        if len(result_id.encode("utf-8")) > ID_MAX_LENGTH:
+            raise ValueError(f"ID trop long (> {ID_MAX_LENGTH} octets) : {result_id}")
+        with self._lock:
+            if result_id in self._index:
+                raise ValueError(f"ID déjà présent dans le store : {result_id}")
+            row = self._count
+            segment = self._segment_for_row(row)
+            offset = row % self.segment_size
+            # Les fichiers sont créés creux (zéros) : les valeurs absentes sont écrites explicitement en NaN
+            segment.landmarks[:, offset, :] = np.nan
+            if landmarks is not None:
+                landmarks = np.asarray(landmarks, dtype=np.float32)
+                n = min(len(landmarks), self.num_landmarks)
+                segment.landmarks[:n, offset, :] = landmarks[:n, :3]
+            segment.poses[offset] = np.nan if facial_transformation_matrix is None else np.asarray(facial_transformation_matrix, dtype=np.float32)
+            segment.meta[offset] = (
+                result_id.encode("utf-8"),
+                detection_successful,
+                detected_face_shape or "",
+                time.time(),
+                self._write_metadata(result_id, metadata),
+            )
+            self._index[result_id] = row
+            self._count += 1
+            return row
+
+    def append_analysis(self, result_id: str, analysis: FaceAnalysisResult, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """ Ajoute un FaceAnalysisResult (conversion des landmarks pydantic en tableau). """
+        landmarks = None
+        if analysis.face_landmarks:
+            landmarks = np.array([(lm.x, lm.y, lm.z) for lm in analysis.face_landmarks], dtype=np.float32)
+        matrix = np.array(analysis.facial_transformation_matrix, dtype=np.float32) if analysis.facial_transformation_matrix else None
+        return self.append(result_id, landmarks, matrix, analysis.detected_face_shape, analysis.detection_successful, metadata)
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        """ Relit un résultat par ID (None si absent). """
+        row = self._index.get(result_id)
+        if row is None:
+            return None
+        segment = self._segments[row // self.segment_size]
+        offset = row % self.segment_size
+        meta = segment.meta[offset]
+        metadata: Dict[str, Any] = {}
+        if meta["metadata_offset"] >= 0:
+            with self._lock:
+                self._metadata_file.seek(int(meta["metadata_offset"]))
+                metadata = json.loads(self._metadata_file.readline().decode("utf-8"))
+            metadata.pop("id", None)
+        return StoredResult(
+            result_id=result_id,
+            landmarks=np.array(segment.landmarks[:, offset, :]),
+            facial_transformation_matrix=np.array(segment.poses[offset]),
+            detection_successful=bool(meta["detection_successful"]),
+            detected_face_shape=str(meta["detected_face_shape"]),
+            created_at=float(meta["created_at"]),
+            metadata=metadata,
+        )
+
+    def scan(self, landmark_indices: Optional[Sequence[int]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Parcourt le store segment par segment et produit des vues (sans copie) :
+            "ids", "detection_successful", "detected_face_shape", "facial_transformation_matrix",
+            "landmarks" (n, nb_landmarks, 3) ou (n, len(landmark_indices), 3) si des indices sont fournis.
+        Avec landmark_indices, seuls les points demandés sont lus depuis le disque.
+        """
+        for seg_index, segment in enumerate(self._segments):
+            rows = min(self.segment_size, self._count - seg_index * self.segment_size)
+            if rows <= 0:
+                break
+            if landmark_indices is None:
+                landmarks = segment.landmarks[:, :rows, :].transpose(1, 0, 2)
+            else:
+                landmarks = segment.landmarks[list(landmark_indices), :rows, :].transpose(1, 0, 2)
+            meta = segment.meta[:rows]
+            yield {
+                "ids": meta["id"],
+                "detection_successful": meta["detection_successful"],
+                "detected_face_shape": meta["detected_face_shape"],
+                "facial_transformation_matrix": segment.poses[:rows],
+                "landmarks": landmarks,
+            }
+
+    def reclassify(
+        self,
+        classify_batch: Callable[[np.ndarray], np.ndarray],
+        landmark_indices: Optional[Sequence[int]] = None,
+        update: bool = False,
+    ) -> np.ndarray:
+        """
+        Ré-applique une classification vectorisée (N, nb_points, 3) -> (N,) sur tout le store.
+        Si landmark_indices est fourni, classify_batch reçoit uniquement ces points (dans cet ordre).
+        Avec update=True, la colonne detected_face_shape est mise à jour.
+        """
+        outputs = []
+        for seg_index, batch in enumerate(self.scan(landmark_indices)):
+            shapes = np.asarray(classify_batch(batch["landmarks"]))
+            shapes = np.where(batch["detection_successful"], shapes, "")
+            if update:
+                with self._lock:
+                    self._segments[seg_index].meta["detected_face_shape"][:len(shapes)] = shapes
+            outputs.append(shapes)
+        return np.concatenate(outputs) if outputs else np.array([], dtype="<U24")
+
+    def flush(self) -> None:
+        """ Persiste les données et l'en-tête (nombre de lignes). """
+        with self._lock:
+            for segment in self._segments:
+                segment.flush()
+            self._metadata_file.flush()
+            self._write_header()
+
+    def close(self) -> None:
+        self.flush()
+        self._metadata_file.close()
+
+
+# --- Store global optionnel (persistance des résultats de l'API) ---
+_result_store_instance: Optional[LandmarkResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[LandmarkResultStore]:
+    """
+    Retourne le store global si RESULT_STORE_DIR est configuré (sinon None). Thread-safe.
+    """
+    global _result_store_instance
+    if not settings.RESULT_STORE_DIR:
+        return None
+    if _result_store_instance is None:
+        with _result_store_lock:
+            if _result_store_instance is None:
+                store_path = Path(settings.RESULT_STORE_DIR)
+                if not store_path.is_absolute():
+                    store_path = settings.BASE_DIR / store_path
+                _result_store_instance = LandmarkResultStore(store_path, segment_size=settings.RESULT_STORE_SEGMENT_SIZE)
+    return _result_store_instance
@@ -0,0 +1,275 @@
+# src/core/shape_classifier.py
+"""
+Classification de la forme du visage à partir des landmarks, pilotée par des artefacts
+versionnés (fichiers JSON dans models/shape_classifiers/).
+
+Deux types de classifieurs sont supportés :
+    - "rules"            : seuils sur le ratio Longueur/Largeur (comportement historique V6)
+    - "nearest_centroid" : plus proche centroïde sur des caractéristiques géométriques standardisées
+
+Format d'un artefact :
+    {
+        "format_version": 1,
+        "type": "rules" | "nearest_centroid",
+        "version": "rules-v1",
+        "feature_names": [...],
+        "params": {...},
+        "training": {...}   # optionnel (taille du jeu, date, précision...)
+    }
+"""
+
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+UNKNOWN_SHAPE = "inconnue"
+
+# --- Indices des Landmarks (maillage MediaPipe) ---
+TOP_FOREHEAD = 10
+BOTTOM_CHIN = 152
+LEFT_TEMPLE = 234 # Point externe pommette gauche
+RIGHT_TEMPLE = 454 # Point externe pommette droite
+LEFT_JAW = 172
+RIGHT_JAW = 397
+LEFT_FOREHEAD = 54
+RIGHT_FOREHEAD = 284
+
+FEATURE_LANDMARKS = [TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE, LEFT_JAW, RIGHT_JAW, LEFT_FOREHEAD, RIGHT_FOREHEAD]
+MIN_LANDMARKS = max(FEATURE_LANDMARKS) + 1
+FEATURE_NAMES = [
+    "length_width_ratio",    # Longueur (front-menton) / largeur pommettes
+    "jaw_cheek_ratio",       # Largeur mâchoire / largeur pommettes
+    "forehead_cheek_ratio",  # Largeur front / largeur pommettes
+    "chin_length_ratio",     # Distance milieu mâchoire-menton / longueur
+]
+
+
+# --- Caractéristiques Géométriques (vectorisées) ---
+def extract_geometry_features(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Calcule les caractéristiques géométriques 2D pour un tableau (N, nb_landmarks, 2 ou 3).
+    Retourne un tableau (N, len(FEATURE_NAMES)) en float64 ; les lignes invalides
+    (mesures nulles, NaN) contiennent NaN.
+    """
+    landmarks = np.asarray(landmarks)
+    if landmarks.ndim != 3 or landmarks.shape[1] < MIN_LANDMARKS:
+        logger.warning(f"Tableau de landmarks de forme {landmarks.shape} insuffisant pour les indices requis.")
+        return np.full((landmarks.shape[0], len(FEATURE_NAMES)), np.nan)
+    # Ne lit que les points utiles (2D) : un seul accès strié par point
+    return features_from_points(landmarks[:, FEATURE_LANDMARKS, :2])
+
+
+def features_from_points(points: np.ndarray) -> np.ndarray:
+    """ Caractéristiques à partir des seuls points FEATURE_LANDMARKS, tableau (N, len(FEATURE_LANDMARKS), 2). """
+    points = np.asarray(points, dtype=np.float64)
+    features = np.full((points.shape[0], len(FEATURE_NAMES)), np.nan)
+    top, chin, cheek_l, cheek_r, jaw_l, jaw_r, forehead_l, forehead_r = (points[:, i] for i in range(len(FEATURE_LANDMARKS)))
+    face_length = np.linalg.norm(top - chin, axis=1)
+    cheekbone_width = np.linalg.norm(cheek_l - cheek_r, axis=1)
+
+    valid = (face_length >= 1e-6) & (cheekbone_width >= 1e-6)  # False pour NaN
+    safe_length = np.where(valid, face_length, 1.0)
+    safe_width = np.where(valid, cheekbone_width, 1.0)
+    features[:, 0] = face_length / safe_width
+    features[:, 1] = np.linalg.norm(jaw_l - jaw_r, axis=1) / safe_width
+    features[:, 2] = np.linalg.norm(forehead_l - forehead_r, axis=1) / safe_width
+    features[:, 3] = np.linalg.norm((jaw_l + jaw_r) / 2 - chin, axis=1) / safe_length
+    features[~valid] = np.nan
+    return features
+
+
+# --- Interface des Classifieurs ---
+class FaceShapeClassifier(ABC):
+    """ Classifieur de forme vectorisé : caractéristiques (N, F) -> formes (N,). """
+    type_name: str = "abstract"
+
+    def __init__(self, version: str, training: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.training = training or {}
+
+    @property
+    @abstractmethod
+    def labels(self) -> List[str]:
+        """ Formes pouvant être retournées (hors "inconnue"). """
+
+    @abstractmethod
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """ Classe des caractéristiques valides (sans NaN). """
+
+    @abstractmethod
+    def params(self) -> Dict[str, Any]:
+        """ Paramètres sérialisés dans l'artefact. """
+
+    def classify_batch(self, landmarks: np.ndarray) -> np.ndarray:
+        """ Classe un tableau de landmarks (N, nb_landmarks, 2|3). Les lignes invalides -> "inconnue". """
+        features = extract_geometry_features(landmarks)
+        shapes = np.full(features.shape[0], UNKNOWN_SHAPE, dtype="<U24")
+        valid = ~np.isnan(features).any(axis=1)
+        if valid.any():
+            shapes[valid] = self.predict_features(features[valid])
+        return shapes
+
+    def to_artifact(self) -> Dict[str, Any]:
+        return {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "type": self.type_name,
+            "version": self.version,
+            "feature_names": FEATURE_NAMES,
+            "params": self.params(),
+            "training": self.training,
+        }
+
+
+class RulesClassifier(FaceShapeClassifier):
+    """ Seuils sur le ratio Longueur/Largeur : "long", "proportionné", "autre". """
+    type_name = "rules"
+
+    def __init__(self, version: str, ratio_long: float, ratio_prop_low: float, training: Optional[Dict[str, Any]] = None):
+        super().__init__(version, training)
+        self.ratio_long = ratio_long
+        self.ratio_prop_low = ratio_prop_low
+
+    @property
+    def labels(self) -> List[str]:
+        return ["long", "proportionné", "autre"]
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        ratio = features[:, 0]
+        return np.where(ratio > self.ratio_long, "long", np.where(ratio >= self.ratio_prop_low, "proportionné", "autre"))
+
+    def params(self) -> Dict[str, Any]:
+        return {"ratio_long": self.ratio_long, "ratio_prop_low": self.ratio_prop_low}
+
+
+class NearestCentroidClassifier(FaceShapeClassifier):
+    """ Plus proche centroïde (distance euclidienne) sur caractéristiques standardisées. """
+    type_name = "nearest_centroid"
+
+    def __init__(self, version: str, labels: Sequence[str], centroids: np.ndarray, feature_mean: np.ndarray,
+                 feature_std: np.ndarray, training: Optional[Dict[str, Any]] = None):
+        super().__init__(version, training)
+        self._labels = np.array(labels)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.feature_mean = np.asarray(feature_mean, dtype=np.float64)
+        self.feature_std = np.asarray(feature_std, dtype=np.float64)
+
+    @property
+    def labels(self) -> List[str]:
+        return self._labels.tolist()
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        standardized = (features - self.feature_mean) / self.feature_std
+        # (N, 1, F) - (1, C, F) -> distances au carré (N, C)
+        diff = standardized[:, None, :] - self.centroids[None, :, :]
+        distances = np.einsum("ncf,ncf->nc", diff, diff)
+        return self._labels[np.argmin(distances, axis=1)]
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "centroids": self.centroids.tolist(),
+            "feature_mean": self.feature_mean.tolist(),
+            "feature_std": self.feature_std.tolist(),
+        }
+
+
+def fit_nearest_centroid(features: np.ndarray, labels: Sequence[str], version: str) -> NearestCentroidClassifier:
+    """ Entraîne un classifieur plus-proche-centroïde sur des caractéristiques (lignes NaN ignorées). """
+    features = np.asarray(features, dtype=np.float64)
+    labels = np.asarray(labels)
+    valid = ~np.isnan(features).any(axis=1)
+    features, labels = features[valid], labels[valid]
+    if len(features) == 0:
+        raise ValueError("Aucune donnée valide pour l'entraînement.")
+
+    feature_mean = features.mean(axis=0)
+    feature_std = features.std(axis=0)
+    feature_std[feature_std < 1e-9] = 1.0
+    standardized = (features - feature_mean) / feature_std
+    classes = sorted(set(labels.tolist()))
+    centroids = np.stack([standardized[labels == c].mean(axis=0) for c in classes])
+    training = {
+        "num_samples": int(len(features)),
+        "samples_per_label": {c: int((labels == c).sum()) for c in classes},
+        "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return NearestCentroidClassifier(version, classes, centroids, feature_mean, feature_std, training)
+
+
+# --- Chargement / Sauvegarde des Artefacts ---
+CLASSIFIER_TYPES = {
+    RulesClassifier.type_name: lambda version, params, training: RulesClassifier(
+        version, params["ratio_long"], params["ratio_prop_low"], training),
+    NearestCentroidClassifier.type_name: lambda version, params, training: NearestCentroidClassifier(
+        version, params["labels"], params["centroids"], params["feature_mean"], params["feature_std"], training),
+}
+
+
+def load_classifier(path: Path) -> FaceShapeClassifier:
+    """ Charge un classifieur depuis un artefact JSON. Lève ValueError si l'artefact est invalide. """
+    with open(path, "r", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Version de format d'artefact non supportée : {artifact.get('format_version')}")
+    if artifact.get("feature_names", FEATURE_NAMES) != FEATURE_NAMES:
+        raise ValueError(f"Caractéristiques incompatibles : {artifact.get('feature_names')}")
+    factory = CLASSIFIER_TYPES.get(artifact.get("type"))
+    if factory is None:
+        raise ValueError(f"Type de classifieur inconnu : {artifact.get('type')}")
+    return factory(artifact["version"], artifact["params"], artifact.get("training"))
+
+
+def save_classifier(classifier: FaceShapeClassifier, path: Path) -> None:
+    """ Sauvegarde un classifieur sous forme d'artefact JSON. """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(classifier.to_artifact(), f, indent=2, ensure_ascii=False)
+
+
+# --- Classifieur Actif ---
+_shape_classifier_instance: Optional[FaceShapeClassifier] = None
+_shape_classifier_lock = threading.Lock()
+
+# Utilisé si l'artefact configuré est absent ou invalide (seuils historiques V6)
+DEFAULT_RULES_CLASSIFIER = RulesClassifier("rules-v1-builtin", ratio_long=1.20, ratio_prop_low=0.90)
+
+
+def _resolve_classifier_path() -> Path:
+    path = Path(settings.SHAPE_CLASSIFIER_PATH)
+    return path if path.is_absolute() else settings.BASE_DIR / path
+
+
+def reload_shape_classifier() -> FaceShapeClassifier:
+    """ (Re)charge le classifieur configuré (SHAPE_CLASSIFIER_PATH). Thread-safe. """
+    global _shape_classifier_instance
+    path = _resolve_classifier_path()
+    try:
+        classifier = load_classifier(path)
+        logger.info(f"Classifieur de forme chargé : {classifier.type_name} {classifier.version} ({path})")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Impossible de charger le classifieur de forme depuis {path}: {e}. Utilisation des règles par défaut.")
+        classifier = DEFAULT_RULES_CLASSIFIER
+    with _shape_classifier_lock:
+        _shape_classifier_instance = classifier
+    return classifier
+
+
+def get_shape_classifier() -> FaceShapeClassifier:
+    """ Retourne le classifieur actif (chargé au premier appel). """
+    if _shape_classifier_instance is None:
+        with _shape_classifier_lock:
+            if _shape_classifier_instance is not None:
+                return _shape_classifier_instance
+        return reload_shape_classifier()
+    return _shape_classifier_instance
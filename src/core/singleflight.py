@@ -0,0 +1,53 @@
+# src/core/singleflight.py
+"""
+Single-flight : une seule exécution à la fois par clé.
+
+Des requêtes identiques concurrentes (ex. retry d'un client mobile arrivant quelques ms après
+l'original) attendent l'analyse déjà en cours au lieu d'en lancer une seconde. Aucun résultat
+n'est conservé après la fin de l'exécution : ce n'est pas un cache. Le calcul tourne dans sa
+propre tâche, si bien que l'annulation de la requête initiatrice (client déconnecté)
+n'interrompt pas les requêtes en attente.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """ Regroupe les appels concurrents de même clé sur une seule tâche (boucle d'événements uniquement). """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """ Retourne (résultat, partagé) ; partagé=True si l'appel a rejoint une exécution en cours. """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+            logger.debug(f"Single-flight : requête regroupée sur l'exécution en cours ({key!r}).")
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight : exécution en échec ({key!r}): {task.exception()}")
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
@@ -0,0 +1,207 @@
+# src/core/smoothing.py
+"""
+Lissage temporel par session (captures successives d'un même client).
+
+Filtre One-Euro vectorisé : un seul jeu d'opérations NumPy pour tous les landmarks (N, 3)
+et un second pour la pose (4, 4). La rotation lissée est reprojetée sur la rotation la plus
+proche (SVD) pour que la matrice reste rigide. L'état d'une session tient dans quelques
+tableaux float64 ; les sessions inactives depuis SMOOTHING_SESSION_TTL_S sont évincées, et le
+nombre de sessions est borné par SMOOTHING_MAX_SESSIONS (les plus anciennes partent d'abord).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OneEuroParams:
+    """ Paramètres du filtre : coupure minimale (Hz), réactivité à la vitesse, coupure de la dérivée (Hz). """
+    min_cutoff: float
+    beta: float
+    d_cutoff: float = 1.0
+
+
+def _alpha(cutoff: np.ndarray, dt: float) -> np.ndarray:
+    tau = 1.0 / (2.0 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """ Filtre One-Euro appliqué élément par élément à un tableau de forme fixe. """
+
+    __slots__ = ("params", "value", "derivative")
+
+    def __init__(self, params: OneEuroParams):
+        self.params = params
+        self.value: Optional[np.ndarray] = None
+        self.derivative: Optional[np.ndarray] = None
+
+    def __call__(self, x: np.ndarray, dt: float) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if self.value is None or self.value.shape != x.shape or dt <= 0:
+            self.value = x.copy()
+            self.derivative = np.zeros_like(x)
+            return self.value
+        derivative = (x - self.value) / dt
+        self.derivative += _alpha(self.params.d_cutoff, dt) * (derivative - self.derivative)
+        cutoff = self.params.min_cutoff + self.params.beta * np.abs(self.derivative)
+        self.value += _alpha(cutoff, dt) * (x - self.value)
+        return self.value
+
+
+def nearest_rotation(matrix: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """ Projette la partie 3x3 d'une pose sur la rotation la plus proche (SVD) * `scale`, translation inchangée. """
+    pose = matrix.copy()
+    u, _, vt = np.linalg.svd(pose[:3, :3])
+    if np.linalg.det(u @ vt) < 0:
+        u[:, -1] *= -1
+    pose[:3, :3] = (u @ vt) * scale
+    pose[3] = (0.0, 0.0, 0.0, 1.0)
+    return pose
+
+
+def pose_scale(matrix: np.ndarray) -> float:
+    """ Échelle uniforme de la partie 3x3 d'une pose (moyenne des normes des colonnes). """
+    return float(np.linalg.norm(matrix[:3, :3], axis=0).mean())
+
+
+class SmoothingSession:
+    """
+    État de lissage d'une session : filtres landmarks/pose, date de la dernière capture et horloge
+    de la session (celle de la première capture : client si elle est horodatée, réception sinon).
+    """
+
+    __slots__ = ("landmarks_filter", "pose_filter", "last_timestamp", "last_seen", "client_clock", "clock_offset")
+
+    def __init__(self, landmark_params: OneEuroParams, pose_params: OneEuroParams):
+        self.landmarks_filter = OneEuroFilter(landmark_params)
+        self.pose_filter = OneEuroFilter(pose_params)
+        self.last_timestamp: Optional[float] = None
+        self.last_seen = time.monotonic()
+        self.client_clock: Optional[bool] = None
+        self.clock_offset = 0.0  # Horloge client - horloge de réception, à la dernière capture horodatée
+
+    def session_time(self, timestamp: Optional[float], now: float) -> float:
+        """
+        Date d'une capture dans l'horloge de la session. Session horodatée par le client : une capture
+        sans timestamp est datée à réception, convertie par le dernier décalage observé. Session à
+        l'heure de réception : les timestamps client sont ignorés (origine sans rapport).
+        """
+        if self.client_clock is None:
+            self.client_clock = timestamp is not None
+        if not self.client_clock:
+            return now
+        if timestamp is None:
+            return now + self.clock_offset
+        self.clock_offset = timestamp - now
+        return timestamp
+
+    def update(
+        self,
+        landmarks: Optional[np.ndarray],
+        matrix: Optional[np.ndarray],
+        timestamp: float,
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """ Filtre une capture (timestamp en secondes) et retourne des copies lissées. """
+        dt = 0.0 if self.last_timestamp is None else timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+        self.last_seen = time.monotonic()
+        smoothed_landmarks = None if landmarks is None else self.landmarks_filter(landmarks, dt).copy()
+        smoothed_matrix = None
+        if matrix is not None:
+            # La moyenne de rotations n'est pas une rotation : reprojection, à l'échelle de la capture
+            smoothed_matrix = nearest_rotation(self.pose_filter(matrix, dt), pose_scale(matrix))
+        return smoothed_landmarks, smoothed_matrix
+
+
+class SessionSmoother:
+    """ Registre thread-safe des sessions de lissage, avec éviction TTL et taille bornée. """
+
+    def __init__(
+        self,
+        landmark_params: OneEuroParams,
+        pose_params: OneEuroParams,
+        ttl_s: float = 30.0,
+        max_sessions: int = 10000,
+    ):
+        self.landmark_params = landmark_params
+        self.pose_params = pose_params
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SmoothingSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float) -> None:
+        """ Retire les sessions expirées (ordre LRU : les plus anciennes en tête). """
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.ttl_s and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def smooth(
+        self,
+        session_id: str,
+        landmarks: Optional[np.ndarray],
+        matrix: Optional[np.ndarray],
+        timestamp: Optional[float] = None,
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Lisse landmarks (N, 3) et pose (4, 4) pour la session. `timestamp` (secondes) est la date
+        de capture côté client ; à défaut, l'heure de réception est utilisée. Une session garde
+        l'horloge de sa première capture (voir SmoothingSession.session_time).
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session.last_seen > self.ttl_s:
+                session = SmoothingSession(self.landmark_params, self.pose_params)
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            timestamp = session.session_time(timestamp, now)
+            # Une capture plus ancienne que la précédente (réordonnancement réseau) réinitialise le filtre
+            if session.last_timestamp is not None and timestamp < session.last_timestamp:
+                clock = session.client_clock, session.clock_offset
+                session = SmoothingSession(self.landmark_params, self.pose_params)
+                session.client_clock, session.clock_offset = clock
+                self._sessions[session_id] = session
+            return session.update(landmarks, matrix, timestamp)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+# --- Instance Globale ---
+_session_smoother: Optional[SessionSmoother] = None
+_session_smoother_lock = threading.Lock()
+
+
+def get_session_smoother() -> SessionSmoother:
+    """ Retourne le registre de sessions (créé au premier appel depuis les settings). """
+    global _session_smoother
+    if _session_smoother is None:
+        with _session_smoother_lock:
+            if _session_smoother is None:
+                _session_smoother = SessionSmoother(
+                    OneEuroParams(settings.SMOOTHING_LANDMARK_MIN_CUTOFF, settings.SMOOTHING_LANDMARK_BETA),
+                    OneEuroParams(settings.SMOOTHING_POSE_MIN_CUTOFF, settings.SMOOTHING_POSE_BETA),
+                    ttl_s=settings.SMOOTHING_SESSION_TTL_S,
+                    max_sessions=settings.SMOOTHING_MAX_SESSIONS,
+                )
+                logger.info("Lissage temporel par session initialisé.")
+    return _session_smoother
@@ -0,0 +1,193 @@
+# src/core/traffic_capture.py
+"""
+Capture du trafic réel (opt-in, TRAFFIC_CAPTURE_ENABLED) pour le rejouer en test de performance.
+
+Le middleware de capture (src/api/middleware.py) transmet chaque requête des routes capturées
+à un TrafficRecorder, qui écrit dans TRAFFIC_CAPTURE_DIR :
+  - requests.jsonl : une ligne par requête. Elle contient l'heure d'arrivée (inter-arrivées),
+    la méthode et le chemin, le statut et la latence serveur. Pour chaque partie multipart :
+    nom du champ, taille et, pour les fichiers, format et dimensions lus dans l'en-tête.
+    Les valeurs des champs texte ne sont pas conservées, sauf les paramètres numériques
+    (priority, capture_timestamp_ms) ; session_id est haché pour garder le regroupement par
+    session sans l'identifiant ;
+  - payloads/<sha256>.bin : corps complet de la requête, uniquement pour les comptes de test
+    consentants (en-tête TRAFFIC_CAPTURE_ACCOUNT_HEADER dans TRAFFIC_CAPTURE_PAYLOAD_ACCOUNTS).
+Les corps des requêtes non consentantes sont réduits à leurs métadonnées dès la soumission (seuls
+les en-têtes d'images sont lus) : la file d'écriture ne retient alors aucun corps. Les corps
+conservés sont bornés en octets (TRAFFIC_CAPTURE_QUEUE_MAX_BYTES) en plus du nombre de requêtes ;
+l'écriture se fait dans un thread dédié et, file pleine, la requête n'est pas capturée (compteur
+`dropped`) plutôt que de ralentir le service ou d'accumuler des images en mémoire.
+Rejeu : python -m benchmark.traffic_replay
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+from src.core.decoding import read_image_header
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_FILE = "requests.jsonl"
+PAYLOADS_DIR = "payloads"
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+_DISPOSITION_PARAM_RE = re.compile(r'(\w+)="([^"]*)"')
+_HASHED_FIELDS = frozenset({"session_id"})
+_KEPT_FIELDS = frozenset({"priority", "capture_timestamp_ms"})
+
+
+def parse_multipart(body: bytes, content_type: str) -> List[Dict]:
+    """ Parties d'un corps multipart/form-data : {"name", "filename", "content_type", "data"}. """
+    match = _BOUNDARY_RE.search(content_type or "")
+    if not match:
+        return []
+    delimiter = b"--" + match.group(1).encode("latin-1")
+    parts = []
+    for chunk in body.split(delimiter)[1:]:
+        if chunk.startswith(b"--"):
+            break  # Délimiteur final
+        header_block, _, data = chunk.partition(b"\r\n\r\n")
+        headers = {}
+        for line in header_block.strip(b"\r\n").split(b"\r\n"):
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        params = dict(_DISPOSITION_PARAM_RE.findall(headers.get("content-disposition", "")))
+        parts.append({
+            "name": params.get("name"),
+            "filename": params.get("filename"),
+            "content_type": headers.get("content-type"),
+            "data": data[:-2] if data.endswith(b"\r\n") else data,
+        })
+    return parts
+
+
+def describe_parts(parts: List[Dict]) -> List[Dict]:
+    """ Métadonnées des parties : taille et format/dimensions des fichiers, valeurs des seuls paramètres numériques. """
+    described = []
+    for part in parts:
+        entry = {"name": part["name"], "bytes": len(part["data"])}
+        if part["filename"] is not None:
+            image_format, width, height = read_image_header(part["data"])
+            entry.update(file=True, content_type=part["content_type"], format=image_format, width=width, height=height)
+        elif part["name"] in _HASHED_FIELDS:
+            entry["hash"] = hashlib.sha256(part["data"]).hexdigest()[:16]
+        elif part["name"] in _KEPT_FIELDS:
+            entry["value"] = part["data"].decode("utf-8", errors="replace")
+        described.append(entry)
+    return described
+
+
+class TrafficRecorder:
+    """ Écriture asynchrone (thread dédié) des requêtes capturées dans un dossier local. """
+
+    def __init__(self, directory: Path, max_queue: int = 1000, max_queue_bytes: int = 200 * 1024 * 1024):
+        self.directory = Path(directory)
+        (self.directory / PAYLOADS_DIR).mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self.max_queue_bytes = max_queue_bytes
+        self._pending_bytes = 0
+        self._bytes_lock = threading.Lock()
+        self._file = open(self.directory / REQUESTS_FILE, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+        self.recorded = 0
+        self.dropped = 0
+
+    def submit(self, record: Dict, body: bytes, keep_payload: bool = False) -> None:
+        """
+        Non bloquant : la requête est ignorée si le thread d'écriture est en retard (file pleine en
+        nombre de requêtes ou en octets). Sans payload conservé, seules les métadonnées sont mises en file.
+        """
+        if not keep_payload:
+            self._describe_body(record, body)
+            body = b""
+        with self._bytes_lock:
+            if self._pending_bytes + len(body) > self.max_queue_bytes:
+                self.dropped += 1
+                return
+            self._pending_bytes += len(body)
+        try:
+            self._queue.put_nowait((record, body, keep_payload))
+        except queue.Full:
+            self._release(len(body))
+            self.dropped += 1
+
+    @staticmethod
+    def _describe_body(record: Dict, body: bytes) -> None:
+        content_type = record.get("content_type") or ""
+        if body and content_type.startswith("multipart/form-data"):
+            record["parts"] = describe_parts(parse_multipart(body, content_type))
+
+    def _release(self, size: int) -> None:
+        with self._bytes_lock:
+            self._pending_bytes -= size
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            record, body, keep_payload = item
+            try:
+                self._write(record, body, keep_payload)
+            except Exception as e:
+                logger.error(f"Erreur d'écriture de la capture de trafic : {e}", exc_info=True)
+            finally:
+                self._release(len(body))
+
+    def _write(self, record: Dict, body: bytes, keep_payload: bool) -> None:
+        if keep_payload:
+            self._describe_body(record, body)
+        if keep_payload and body:
+            digest = hashlib.sha256(body).hexdigest()
+            payload_path = self.directory / PAYLOADS_DIR / f"{digest}.bin"
+            if not payload_path.exists():
+                payload_path.write_bytes(body)
+            record["payload"] = f"{PAYLOADS_DIR}/{digest}.bin"
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.recorded += 1
+
+    def close(self) -> None:
+        """ Écrit les requêtes en attente puis ferme le fichier. """
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"recorded": self.recorded, "dropped": self.dropped, "pending": self._queue.qsize(), "pending_bytes": self._pending_bytes}
+
+
+_traffic_recorder_instance: Optional[TrafficRecorder] = None
+_traffic_recorder_lock = threading.Lock()
+
+
+def get_traffic_recorder() -> Optional[TrafficRecorder]:
+    """ Recorder global si TRAFFIC_CAPTURE_ENABLED (sinon None). Thread-safe. """
+    global _traffic_recorder_instance
+    if not settings.TRAFFIC_CAPTURE_ENABLED:
+        return None
+    if _traffic_recorder_instance is None:
+        with _traffic_recorder_lock:
+            if _traffic_recorder_instance is None:
+                capture_dir = Path(settings.TRAFFIC_CAPTURE_DIR)
+                if not capture_dir.is_absolute():
+                    capture_dir = settings.BASE_DIR / capture_dir
+                _traffic_recorder_instance = TrafficRecorder(capture_dir, max_queue=settings.TRAFFIC_CAPTURE_QUEUE_SIZE,
+                                                             max_queue_bytes=settings.TRAFFIC_CAPTURE_QUEUE_MAX_BYTES)
+                logger.info(f"Capture de trafic active : {capture_dir}")
+    return _traffic_recorder_instance
+
+
+def close_traffic_recorder() -> None:
+    global _traffic_recorder_instance
+    with _traffic_recorder_lock:
+        if _traffic_recorder_instance is not None:
+            _traffic_recorder_instance.close()
+            _traffic_recorder_instance = None
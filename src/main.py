@@ -1,8 +1,20 @@
 # src/main.py
 
 from fastapi import FastAPI
-from src.api.endpoints import router as api_router
-from src.core.models import get_face_landmarker # Garde l'initialisation Mediapipe
+from src.api.endpoints import router as api_router, analysis_single_flight
+from src.api.assets import router as assets_router
+from src.api.jobs import router as jobs_router, get_job_worker_pool, start_job_workers, stop_job_workers
+from src.api.middleware import AdaptiveConcurrencyMiddleware, TrafficCaptureMiddleware, create_concurrency_limiter
+from src.api.rpc import get_rpc_server, start_rpc_server, stop_rpc_server
+from src.core.landmark_backends import get_landmark_backend # Garde l'initialisation du modèle (Mediapipe par défaut)
+from src.core.decoding import get_image_decoder
+from src.core.executor import get_analysis_executor, shutdown_analysis_executor
+from src.core.assets import reload_asset_manifest
+from src.core.job_queue import close_job_queue
+from src.core.traffic_capture import close_traffic_recorder, get_traffic_recorder
+from src.core.result_store import get_result_store
+from src.core.shape_classifier import reload_shape_classifier
+from src.core.recommendation_table import reload_recommendation_table
 # from src.core.rendering import initialize_renderer <<< LIGNE SUPPRIMÉE
 import logging
 import os
@@ -17,6 +29,27 @@ app = FastAPI(
     version="0.2.0" # Version indiquant le changement d'archi
 )
 
+# --- Limitation de concurrence adaptative (délestage 503 des analyses en excès) ---
+concurrency_limiter = create_concurrency_limiter()
+if settings.ADAPTIVE_CONCURRENCY_ENABLED:
+    app.add_middleware(
+        AdaptiveConcurrencyMiddleware,
+        limiter=concurrency_limiter,
+        priority_paths=settings.ADAPTIVE_CONCURRENCY_PRIORITY_PATHS,
+    )
+
+# --- Capture de trafic (opt-in) : ajoutée en dernier, donc la plus externe (requêtes délestées incluses) ---
+traffic_recorder = get_traffic_recorder()
+if traffic_recorder is not None:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        recorder=traffic_recorder,
+        paths=settings.TRAFFIC_CAPTURE_PATHS,
+        account_header=settings.TRAFFIC_CAPTURE_ACCOUNT_HEADER,
+        consenting_accounts=settings.TRAFFIC_CAPTURE_PAYLOAD_ACCOUNTS,
+        max_body_bytes=settings.TRAFFIC_CAPTURE_MAX_BODY_BYTES,
+    )
+
 # --- Événements de Démarrage/Arrêt ---
 @app.on_event("startup")
 async def startup_event():
@@ -24,15 +57,44 @@ async def startup_event():
     logger.info("="*10 + " ÉVÉNEMENT DE DÉMARRAGE " + "="*10)
     logger.info(f"Log Level: {settings.LOG_LEVEL}")
 
-    # 1. Charge le modèle Mediapipe
-    logger.info("Initialisation du modèle Mediapipe...")
-    if not get_face_landmarker():
-        logger.error(">>> ÉCHEC de l'initialisation du modèle Mediapipe.")
+    # 1. Charge le backend de landmarks (Mediapipe par défaut, cf. LANDMARK_BACKEND)
+    logger.info(f"Initialisation du backend de landmarks ({settings.LANDMARK_BACKEND})...")
+    backend = get_landmark_backend()
+    if not backend:
+        logger.error(">>> ÉCHEC de l'initialisation du backend de landmarks.")
         # On pourrait vouloir arrêter l'app ici si le modèle est critique
     else:
-        logger.info(">>> Modèle Mediapipe OK.")
+        logger.info(f">>> Backend de landmarks OK : {backend.name}.")
+
+    # 2. Sélectionne le décodeur JPEG (micro-benchmark sur benchmark/test_data si disponible)
+    decoder = get_image_decoder()
+    logger.info(f">>> Décodeur JPEG actif : {decoder.name}")
+
+    # 3. Charge le classifieur de forme versionné
+    classifier = reload_shape_classifier()
+    logger.info(f">>> Classifieur de forme : {classifier.type_name} {classifier.version}")
+
+    # 4. Compile la table de recommandations (règles + catalogue)
+    table = reload_recommendation_table()
+    logger.info(f">>> Table de recommandations : {len(table.entries)} formes")
 
-    # 2. Initialise PyRender <<< SECTION SUPPRIMÉE
+    # 4b. Manifeste des assets 3D construits (servis par /api/v1/models/{id}/assets)
+    if reload_asset_manifest() is None:
+        logger.warning(">>> Assets 3D non construits : python -m src.tools.build_assets")
+
+    # 5. Démarre le pool d'analyse
+    get_analysis_executor()
+
+    # 5b. Démarre le serveur RPC binaire (même pool d'analyse et même limiteur que l'API REST)
+    rpc_server = await start_rpc_server(concurrency_limiter if settings.ADAPTIVE_CONCURRENCY_ENABLED else None)
+    if rpc_server is not None:
+        logger.info(f">>> Serveur RPC binaire : port {rpc_server.port}")
+
+    # 6. Démarre les workers de jobs (tâches interrompues remises en file)
+    if start_job_workers() is not None:
+        logger.info(f">>> Workers de jobs : {settings.JOB_WORKERS} (file {settings.JOB_QUEUE_PATH})")
+
+    # 7. Initialise PyRender <<< SECTION SUPPRIMÉE
     # logger.info("Initialisation du Renderer PyRender...")
     # if not initialize_renderer():
     #      logger.error(">>> ÉCHEC de l'initialisation du Renderer PyRender.")
@@ -41,8 +103,23 @@ async def startup_event():
 
     logger.info("="*10 + " INITIALISATION TERMINÉE " + "="*10)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """ Arrête le serveur RPC, termine les analyses et tâches de jobs en cours puis persiste le store local de résultats (si configuré). """
+    await stop_rpc_server()
+    stop_job_workers()
+    close_job_queue()
+    close_traffic_recorder()
+    shutdown_analysis_executor()
+    store = get_result_store()
+    if store is not None:
+        store.close()
+        logger.info(f"Store de résultats fermé ({len(store)} résultats).")
+
 # --- Inclusion des Routes API ---
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
+app.include_router(assets_router, prefix="/api/v1")
 
 # --- Routes de Base ---
 @app.get("/", tags=["Root"], include_in_schema=False)
@@ -51,8 +128,8 @@ async def read_root():
 
 @app.get("/health", tags=["Health Check"])
 async def health_check():
-    """ Vérifie si le modèle Mediapipe est chargé. """
-    landmarker_ok = get_face_landmarker() is not None
+    """ Vérifie si le backend de landmarks est chargé. """
+    landmarker_ok = get_landmark_backend() is not None
 
     if os.environ.get("TESTING", "false").lower() == "true":
         status = "ok" # En mode test, on dit OK même si modèle absent
@@ -63,7 +140,16 @@ async def health_check():
 
     if landmarker_ok:
         logger.info("Health check: OK")
-        return {"status": "ok", "models_loaded": True}
+        return {
+            "status": "ok",
+            "models_loaded": True,
+            "landmark_backend": get_landmark_backend().name,
+            "concurrency": concurrency_limiter.snapshot(),
+            "single_flight": analysis_single_flight.snapshot(),
+            "jobs": get_job_worker_pool().snapshot() if get_job_worker_pool() is not None else None,
+            "traffic_capture": traffic_recorder.snapshot() if traffic_recorder is not None else None,
+            "rpc": get_rpc_server().snapshot() if get_rpc_server() is not None else None,
+        }
     else:
         logger.error("Health check: FAILED - FaceLandmarker non initialisé.")
         return {"status": "error", "models_loaded": False, "detail": "FaceLandmarker failed to initialize."}
\ No newline at end of file
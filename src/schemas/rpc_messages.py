@@ -0,0 +1,253 @@
+# src/schemas/rpc_messages.py
+"""
+Messages de l'interface RPC binaire (src/api/rpc.py), au format protobuf.
+
+Le schéma est src/schemas/optical_factory.proto. grpcio et protobuf ne sont pas des dépendances
+du projet : l'encodage est fait ici, limité aux types du schéma (varints, chaînes et octets,
+float, double, messages imbriqués, flottants répétés "packed"). Landmarks (x, y, z entrelacés),
+matrice (16 valeurs) et blendshapes sont écrits en float32 directement depuis les tableaux
+NumPy du traitement : ~5,7 Ko pour 478 landmarks au lieu de ~35 Ko de JSON.
+
+Les réponses décodées sont des dicts aux clés de FaceAnalysisResult, avec des tableaux NumPy
+float32 pour la matrice (4, 4), les landmarks (N, 3) et les blendshapes.
+"""
+
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.schemas.schemas import AnalysisLevel, AnalyzeAndRecommendResult, FaceAnalysisResult
+
+# Types de fil protobuf
+WIRE_VARINT, WIRE_FIXED64, WIRE_BYTES, WIRE_FIXED32 = 0, 1, 2, 5
+
+# Enum AnalysisLevel du .proto : 0 (valeur par défaut) = analyse complète
+ANALYSIS_LEVEL_CODES: Dict[str, int] = {"full": 0, "pose": 1, "landmarks": 2}
+ANALYSIS_LEVEL_NAMES: Dict[int, str] = {code: name for name, code in ANALYSIS_LEVEL_CODES.items()}
+
+
+class MessageDecodeError(ValueError):
+    """ Message protobuf tronqué ou invalide. """
+
+
+# --- Encodage ---
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field: int, data: bytes) -> bytes:
+    return _key(field, WIRE_BYTES) + _varint(len(data)) + data
+
+
+def _string_field(field: int, text: str) -> bytes:
+    return _bytes_field(field, text.encode("utf-8"))
+
+
+def _bool_field(field: int, value: bool) -> bytes:
+    return _key(field, WIRE_VARINT) + (b"\x01" if value else b"\x00")
+
+
+def _float_field(field: int, value: float) -> bytes:
+    return _key(field, WIRE_FIXED32) + struct.pack("<f", value)
+
+
+def _packed_floats(field: int, values: Any) -> bytes:
+    return _bytes_field(field, np.ascontiguousarray(values, dtype="<f4").tobytes())
+
+
+def encode_analyze_request(image: bytes, analysis_level: AnalysisLevel = "full", session_id: Optional[str] = None,
+                           capture_timestamp_ms: Optional[float] = None) -> bytes:
+    """ AnalyzeRequest. """
+    parts = [_bytes_field(1, image)]
+    if analysis_level != "full":
+        parts.append(_key(2, WIRE_VARINT) + _varint(ANALYSIS_LEVEL_CODES[analysis_level]))
+    if session_id:
+        parts.append(_string_field(3, session_id))
+    if capture_timestamp_ms is not None:
+        parts.append(_key(4, WIRE_FIXED64) + struct.pack("<d", capture_timestamp_ms))
+    return b"".join(parts)
+
+
+def encode_face_analysis(result: FaceAnalysisResult) -> bytes:
+    """ FaceAnalysis, landmarks et matrice lus depuis les tableaux NumPy du traitement s'ils existent. """
+    parts = [_bool_field(1, result.detection_successful)]
+    if result.facial_transformation_matrix is not None:
+        matrix = result.field_array("facial_transformation_matrix")
+        parts.append(_packed_floats(2, matrix if matrix is not None else result.facial_transformation_matrix))
+    if result.face_landmarks is not None:
+        points = result.field_array("face_landmarks")
+        if points is None:
+            points = [(lm.x, lm.y, lm.z) for lm in result.face_landmarks]
+        else:
+            points = points[:, :3]
+        parts.append(_packed_floats(3, points))
+    if result.detected_face_shape is not None:
+        parts.append(_string_field(4, result.detected_face_shape))
+    if result.error_message is not None:
+        parts.append(_string_field(5, result.error_message))
+    if result.head_pose is not None:
+        pose = result.head_pose
+        parts.append(_bytes_field(6, _float_field(1, pose.yaw) + _float_field(2, pose.pitch) + _float_field(3, pose.roll)))
+    if result.blendshapes is not None:
+        parts.append(_packed_floats(7, result.blendshapes))
+    if result.capture_quality is not None:
+        quality = result.capture_quality
+        parts.append(_bytes_field(8, b"".join([
+            _bool_field(1, quality.acceptable), _bool_field(2, quality.eyes_open), _bool_field(3, quality.neutral_expression),
+            _float_field(4, quality.eye_openness), _float_field(5, quality.expression_intensity),
+            *(_string_field(6, reason) for reason in quality.reasons),
+        ])))
+    return b"".join(parts)
+
+
+def encode_analyze_and_recommend(result: AnalyzeAndRecommendResult) -> bytes:
+    """ AnalyzeAndRecommendResponse. """
+    message = _bytes_field(1, encode_face_analysis(result.analysis))
+    if result.recommendation is not None:
+        recommendation = b"".join(_string_field(1, model_id) for model_id in result.recommendation.recommended_glasses_ids)
+        if result.recommendation.analysis_info is not None:
+            recommendation += _string_field(2, result.recommendation.analysis_info)
+        message += _bytes_field(2, recommendation)
+    return message
+
+
+# --- Décodage ---
+def _read_varint(data: bytes, pos: int) -> tuple:
+    result = shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise MessageDecodeError("Varint tronqué ou trop long.")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def parse_fields(data: bytes) -> Dict[int, List[Any]]:
+    """
+    Champs d'un message : numéro -> valeurs dans l'ordre du message. Varints en int, autres types
+    en octets bruts : un flottant répété se lit pareil qu'il soit "packed" ou non (concaténation).
+    """
+    fields: Dict[int, List[Any]] = {}
+    pos, end = 0, len(data)
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        field, wire_type = key >> 3, key & 0x07
+        if wire_type == WIRE_VARINT:
+            value, pos = _read_varint(data, pos)
+        else:
+            if wire_type == WIRE_BYTES:
+                length, pos = _read_varint(data, pos)
+            elif wire_type in (WIRE_FIXED64, WIRE_FIXED32):
+                length = 8 if wire_type == WIRE_FIXED64 else 4
+            else:
+                raise MessageDecodeError(f"Type de fil non supporté : {wire_type} (champ {field}).")
+            if pos + length > end:
+                raise MessageDecodeError(f"Champ {field} tronqué.")
+            value = data[pos:pos + length]
+            pos += length
+        fields.setdefault(field, []).append(value)
+    return fields
+
+
+def _last(fields: Dict[int, List[Any]], field: int, default: Any = None) -> Any:
+    # Champ non répété présent plusieurs fois : la dernière valeur l'emporte (règle protobuf)
+    values = fields.get(field)
+    return values[-1] if values else default
+
+
+def _floats(fields: Dict[int, List[Any]], field: int) -> Optional[np.ndarray]:
+    values = fields.get(field)
+    if not values:
+        return None
+    raw = b"".join(values)
+    if len(raw) % 4:
+        raise MessageDecodeError(f"Champ {field} : longueur incompatible avec des float32.")
+    return np.frombuffer(raw, dtype="<f4")
+
+
+def _float(fields: Dict[int, List[Any]], field: int) -> float:
+    values = _floats(fields, field)
+    return float(values[-1]) if values is not None else 0.0
+
+
+def _string(fields: Dict[int, List[Any]], field: int) -> Optional[str]:
+    value = _last(fields, field)
+    return value.decode("utf-8") if value is not None else None
+
+
+def decode_analyze_request(data: bytes) -> Dict[str, Any]:
+    """ AnalyzeRequest -> arguments de l'analyse (image, analysis_level, session_id, capture_timestamp_ms). """
+    fields = parse_fields(data)
+    level_code = _last(fields, 2, 0)
+    if level_code not in ANALYSIS_LEVEL_NAMES:
+        raise MessageDecodeError(f"Niveau d'analyse inconnu : {level_code}")
+    timestamp = _last(fields, 4)
+    if any(not isinstance(value, bytes) for field in (1, 3, 4) for value in fields.get(field, [])):
+        raise MessageDecodeError("AnalyzeRequest invalide : type de champ inattendu.")
+    try:
+        return {
+            "image": _last(fields, 1, b""),
+            "analysis_level": ANALYSIS_LEVEL_NAMES[level_code],
+            "session_id": _string(fields, 3) or None,
+            "capture_timestamp_ms": struct.unpack("<d", timestamp)[0] if timestamp is not None else None,
+        }
+    except (UnicodeDecodeError, struct.error) as e:
+        raise MessageDecodeError(f"AnalyzeRequest invalide : {e}") from e
+
+
+def decode_face_analysis(data: bytes) -> Dict[str, Any]:
+    """ FaceAnalysis -> dict aux clés de FaceAnalysisResult (matrice et landmarks en tableaux NumPy). """
+    fields = parse_fields(data)
+    matrix = _floats(fields, 2)
+    landmarks = _floats(fields, 3)
+    head_pose = _last(fields, 6)
+    quality = _last(fields, 8)
+    if head_pose is not None:
+        pose_fields = parse_fields(head_pose)
+        head_pose = {"yaw": _float(pose_fields, 1), "pitch": _float(pose_fields, 2), "roll": _float(pose_fields, 3)}
+    if quality is not None:
+        quality_fields = parse_fields(quality)
+        quality = {
+            "acceptable": bool(_last(quality_fields, 1, 0)),
+            "eyes_open": bool(_last(quality_fields, 2, 0)),
+            "neutral_expression": bool(_last(quality_fields, 3, 0)),
+            "eye_openness": _float(quality_fields, 4),
+            "expression_intensity": _float(quality_fields, 5),
+            "reasons": [reason.decode("utf-8") for reason in quality_fields.get(6, [])],
+        }
+    return {
+        "detection_successful": bool(_last(fields, 1, 0)),
+        "facial_transformation_matrix": matrix.reshape(4, 4) if matrix is not None else None,
+        "face_landmarks": landmarks.reshape(-1, 3) if landmarks is not None else None,
+        "detected_face_shape": _string(fields, 4),
+        "error_message": _string(fields, 5),
+        "head_pose": head_pose,
+        "blendshapes": _floats(fields, 7),
+        "capture_quality": quality,
+    }
+
+
+def decode_analyze_and_recommend(data: bytes) -> Dict[str, Any]:
+    """ AnalyzeAndRecommendResponse -> {"analysis": ..., "recommendation": ...} (clés d'AnalyzeAndRecommendResult). """
+    fields = parse_fields(data)
+    recommendation = _last(fields, 2)
+    if recommendation is not None:
+        recommendation_fields = parse_fields(recommendation)
+        recommendation = {
+            "recommended_glasses_ids": [model_id.decode("utf-8") for model_id in recommendation_fields.get(1, [])],
+            "analysis_info": _string(recommendation_fields, 2),
+        }
+    return {"analysis": decode_face_analysis(_last(fields, 1, b"")), "recommendation": recommendation}
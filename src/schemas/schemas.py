@@ -1,18 +1,43 @@
 # src/schemas/schemas.py
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Tuple
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+# Niveau de détail d'une analyse : chaque niveau saute les étapes des niveaux supérieurs
+AnalysisLevel = Literal["pose", "landmarks", "full"]
 
 class Landmark(BaseModel):
     x: float
     y: float
     z: float
 
+class HeadPose(BaseModel):
+    yaw: float = Field(..., description="Lacet (rotation gauche/droite, autour de l'axe vertical), en degrés.")
+    pitch: float = Field(..., description="Tangage (tête levée/baissée), en degrés.")
+    roll: float = Field(..., description="Roulis (tête penchée sur l'épaule), en degrés.")
+
+class CaptureQuality(BaseModel):
+    acceptable: bool = Field(..., description="Capture exploitable : yeux ouverts et expression neutre.")
+    eyes_open: bool = Field(..., description="Yeux ouverts et non plissés.")
+    neutral_expression: bool = Field(..., description="Pas de sourire, bouche ouverte ou autre expression marquée.")
+    eye_openness: float = Field(..., description="Ouverture des yeux (1 - clignement du moins ouvert), 0-1.")
+    expression_intensity: float = Field(..., description="Score du blendshape d'expression le plus marqué, 0-1.")
+    reasons: List[str] = Field(default_factory=list, description="Raisons d'un refus (vide si la capture est exploitable).")
+
 class FaceAnalysisResult(BaseModel):
     detection_successful: bool = Field(..., description="Indique si un visage a été détecté avec succès.")
     facial_transformation_matrix: Optional[List[List[float]]] = Field(None, description="Matrice de transformation 4x4 représentant la pose du visage détecté.")
     face_landmarks: Optional[List[Landmark]] = Field(None, description="Liste des 468+ landmarks faciaux détectés (coordonnées normalisées).")
     detected_face_shape: Optional[str] = Field(None, description="Forme du visage estimée à partir des landmarks.")
     error_message: Optional[str] = Field(None, description="Message d'erreur en cas d'échec de la détection ou de l'analyse.")
+    head_pose: Optional[HeadPose] = Field(None, description="Orientation de la tête décomposée depuis la matrice de pose (guidage du client).")
+    blendshapes: Optional[List[float]] = Field(None, description="Scores des 52 blendshapes (0-1), dans l'ordre de GET /api/v1/blendshape_names.")
+    capture_quality: Optional[CaptureQuality] = Field(None, description="Verdict de capture calculé depuis les blendshapes (yeux ouverts, expression neutre).")
+    # Copies NumPy (N,3) / (4,4) des champs ci-dessus, hors schéma : sérialisation rapide (src/api/responses.py,
+    # src/schemas/rpc_messages.py). Attachées par attach_arrays, lues par field_array
+    _landmarks_array: Optional[Any] = PrivateAttr(default=None)
+    _matrix_array: Optional[Any] = PrivateAttr(default=None)
+    # Objets des champs au moment de l'attache : une copie n'est valable que pour ces objets-là
+    _array_sources: Dict[str, Any] = PrivateAttr(default_factory=dict)
     # Met l'exemple dans json_schema_extra via model_config
     model_config = ConfigDict(
         json_schema_extra={
@@ -23,11 +48,32 @@ class FaceAnalysisResult(BaseModel):
                 ],
                 "face_landmarks": [{"x": 0.5, "y": 0.5, "z": -0.02}, {"x": 0.6, "y": 0.4, "z": -0.01}],
                 "detected_face_shape": "ovale",
-                "error_message": None
+                "error_message": None,
+                "head_pose": {"yaw": -4.2, "pitch": 6.1, "roll": 1.3},
+                "blendshapes": [0.0, 0.0312, 0.0287, 0.0104],
+                "capture_quality": {"acceptable": True, "eyes_open": True, "neutral_expression": True, "eye_openness": 0.91, "expression_intensity": 0.12, "reasons": []}
             }
         }
     )
 
+    def attach_arrays(self, landmarks: Optional[Any] = None, matrix: Optional[Any] = None) -> None:
+        """ Attache les copies NumPy des champs face_landmarks / facial_transformation_matrix tels qu'ils sont maintenant. """
+        self._landmarks_array = landmarks
+        self._matrix_array = matrix
+        self._array_sources = {"face_landmarks": self.face_landmarks, "facial_transformation_matrix": self.facial_transformation_matrix}
+
+    def field_array(self, name: str) -> Optional[Any]:
+        """
+        Copie NumPy du champ `name`, ou None si aucune n'est attachée ou si le champ a été réassigné
+        depuis (affectation, model_copy(update=...)) : le champ fait alors foi. Une modification en place
+        d'une liste attachée doit être suivie d'une réassignation du champ ou d'un nouvel attach_arrays.
+        """
+        array = self._landmarks_array if name == "face_landmarks" else self._matrix_array
+        value = getattr(self, name)
+        if array is None or value is None or self._array_sources.get(name) is not value or len(array) != len(value):
+            return None
+        return array
+
 class RecommendationRequest(BaseModel):
     # Met l'exemple dans json_schema_extra via Field directement
     face_shape: str = Field(..., description="Forme du visage détectée ou supposée (ex: 'ronde', 'carrée', 'ovale').", json_schema_extra={'example': "ovale"})
@@ -0,0 +1,256 @@
+# src/tools/build_assets.py
+"""
+Build des assets 3D du catalogue (MODEL_IDS_TO_PATHS) pour le téléchargement par les clients.
+
+Usage :
+    python -m src.tools.build_assets [--output-dir data/assets] [--hint-sizes 256 512 1024]
+
+Pour chaque modèle du catalogue :
+  - résolution des matériaux réellement utilisés : `mtllib` de l'OBJ (nom insensible à la casse
+    si besoin) et `usemtl` ; le MTL construit ne garde que ces matériaux ;
+  - textures référencées par ces matériaux (map_Kd, map_Bump...) : niveaux de mip (divisions par 2
+    jusqu'à ASSET_MIN_MIP_SIZE) en PNG et WebP ;
+  - maillage : OBJ aux coordonnées arrondies (ASSET_MESH_DECIMALS) et sa version gzip ;
+  - aperçu du catalogue (thumbnail.png du dossier du modèle) : mêmes niveaux que les textures.
+Chaque fichier est écrit sous son empreinte de contenu (<sha256[:16]>.<ext>) : un fichier déjà
+construit n'est pas réécrit et les clients peuvent le garder en cache indéfiniment. Le manifeste
+(manifest.json, cf. src/core/assets.py) liste les variantes, les fichiers source inutilisés
+(doublons FBX/PLY/STL/blend, MTL redondants) et les octets transférés par session d'essayage
+avant / après le build pour chaque taille de texture de --hint-sizes.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.assets import MANIFEST_FILE, MANIFEST_VERSION, asset_build_dir, session_transfer_bytes
+from src.core.config import settings
+from src.core.mtl import parse_mtl, parse_obj_materials, resolve_file, texture_reference
+
+logger = logging.getLogger("build_assets")
+
+PREVIEW_NAMES = ("thumbnail.png", "thumbnail.jpg")
+_VERTEX_DIRECTIVES = (b"v ", b"vn ", b"vt ")
+_NUMBER_RE = re.compile(rb"-?\d+\.\d+(?:[eE][-+]?\d+)?")
+
+
+def _display_path(path: Path) -> str:
+    """ Chemin relatif au projet quand c'est possible (manifeste comparable entre machines). """
+    return path.relative_to(settings.BASE_DIR).as_posix() if path.is_relative_to(settings.BASE_DIR) else path.as_posix()
+
+
+# --- Cache adressé par contenu ---
+class AssetCache:
+    """ Fichiers nommés par l'empreinte de leur contenu ; un contenu déjà présent n'est pas réécrit. """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.written = 0
+        self.reused = 0
+
+    def put(self, data: bytes, suffix: str, name: Optional[str] = None) -> Dict:
+        """ Écrit `data` sous <sha256[:16]><suffix> (ou `name` pour une variante dérivée d'un autre fichier). """
+        name = name or f"{hashlib.sha256(data).hexdigest()[:16]}{suffix}"
+        path = self.directory / name
+        if path.exists():
+            self.reused += 1
+        else:
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+            self.written += 1
+        return {"file": name, "bytes": len(data)}
+
+
+# --- Textures ---
+def _encode(image: np.ndarray, image_format: str) -> bytes:
+    if image_format == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, settings.ASSET_WEBP_QUALITY]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 9]
+    ok, buffer = cv2.imencode(f".{image_format}", image, params)
+    if not ok:
+        raise ValueError(f"Encodage {image_format} impossible.")
+    return buffer.tobytes()
+
+
+def build_texture(path: Path, cache: AssetCache, min_size: int) -> Dict:
+    """ Niveaux de mip (taille d'origine puis divisions par 2) en PNG et WebP. """
+    image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Texture illisible : {path}")
+    levels = []
+    while True:
+        height, width = image.shape[:2]
+        levels.append({"size": max(width, height), "width": width, "height": height,
+                       "png": cache.put(_encode(image, "png"), ".png"), "webp": cache.put(_encode(image, "webp"), ".webp")})
+        if max(width, height) // 2 < min_size or min(width, height) < 2:
+            break
+        image = cv2.resize(image, (max(width // 2, 1), max(height // 2, 1)), interpolation=cv2.INTER_AREA)
+    return {"source": path.name, "source_bytes": path.stat().st_size, "levels": levels}
+
+
+# --- Maillage ---
+def _round_number(number: bytes, decimals: int) -> bytes:
+    text = f"{float(number):.{decimals}f}".rstrip("0").rstrip(".")
+    return b"0" if text in ("", "-0") else text.encode("ascii")
+
+
+def compact_obj(obj_bytes: bytes, decimals: int, mtl_file: Optional[str]) -> bytes:
+    """ OBJ sans commentaires, coordonnées arrondies, mtllib pointant vers le MTL construit. """
+    lines = []
+    for line in obj_bytes.splitlines():
+        if not line.strip() or line.startswith(b"#"):
+            continue
+        if line.startswith(b"mtllib "):
+            if mtl_file is not None:
+                lines.append(b"mtllib " + mtl_file.encode("ascii"))
+            continue
+        if line.startswith(_VERTEX_DIRECTIVES):
+            line = _NUMBER_RE.sub(lambda match: _round_number(match.group(), decimals), line)
+        lines.append(line)
+    return b"\n".join(lines) + b"\n"
+
+
+# --- Modèles ---
+def build_model(model_id: str, obj_path: Path, cache: AssetCache, textures_built: Dict[Path, Dict]) -> Dict:
+    """ Entrée du manifeste pour un modèle du catalogue. """
+    directory = obj_path.parent
+    obj_bytes = obj_path.read_bytes()
+    libraries, used = parse_obj_materials(obj_bytes)
+    source_files = {_display_path(obj_path): len(obj_bytes)}
+
+    definitions: Dict[str, List[str]] = {}
+    referenced: List[Path] = []
+    for library in libraries:
+        library_path = resolve_file(directory, library)
+        if library_path is None:
+            logger.warning(f"[{model_id}] MTL introuvable : {library}")
+            continue
+        referenced.append(library_path)
+        for name, lines in parse_mtl(library_path.read_text(encoding="utf-8", errors="replace")).items():
+            definitions.setdefault(name, lines)  # Premier MTL gagnant, comme les chargeurs OBJ
+
+    textures, mtl_blocks, missing = [], [], []
+    for name in used:
+        if name not in definitions:
+            missing.append(name)
+            continue
+        lines = []
+        for line in definitions[name]:
+            reference = texture_reference(line)
+            texture_path = resolve_file(directory, reference[1]) if reference else None
+            if reference and texture_path is None:
+                logger.warning(f"[{model_id}] Texture introuvable pour {name} : {reference[1]}")
+                continue
+            if texture_path is not None:
+                if texture_path not in textures_built:
+                    textures_built[texture_path] = build_texture(texture_path, cache, settings.ASSET_MIN_MIP_SIZE)
+                texture = textures_built[texture_path]
+                referenced.append(texture_path)
+                textures.append({"material": name, "map": reference[0], **texture})
+                # Le MTL construit pointe vers la pleine taille PNG ; le manifeste donne les variantes
+                line = f"{reference[0]} {texture['levels'][0]['png']['file']}"
+            lines.append(line)
+        mtl_blocks.append("\n".join([f"newmtl {name}", *lines]))
+    if missing:
+        logger.warning(f"[{model_id}] Matériaux sans définition : {', '.join(missing)}")
+
+    for path in referenced:
+        source_files[_display_path(path)] = path.stat().st_size
+    mtl = cache.put(("\n\n".join(mtl_blocks) + "\n").encode("utf-8"), ".mtl") if mtl_blocks else None
+    obj = compact_obj(obj_bytes, settings.ASSET_MESH_DECIMALS, mtl["file"] if mtl else None)
+    obj_entry = cache.put(obj, ".obj")
+    preview_path = next((directory / name for name in PREVIEW_NAMES if (directory / name).is_file()), None)
+    if preview_path is not None and preview_path not in textures_built:
+        textures_built[preview_path] = build_texture(preview_path, cache, settings.ASSET_MIN_MIP_SIZE)
+    preview = None
+    if preview_path is not None:
+        preview = {**textures_built[preview_path], "source": _display_path(preview_path)}
+    return {
+        "source": next(iter(source_files)),
+        "materials": [name for name in used if name in definitions],
+        "missing_materials": missing,
+        "mesh": {
+            "obj": obj_entry,
+            # Nommé d'après l'OBJ (compression déterministe) : servi à la place de l'OBJ si gzip est accepté
+            "obj_gzip": cache.put(gzip.compress(obj, compresslevel=9, mtime=0), ".obj.gz", name=obj_entry["file"] + ".gz"),
+        },
+        "mtl": mtl,
+        "textures": textures,
+        "preview": preview,
+        "source_files": source_files,
+        "_referenced": [obj_path, *referenced, *([preview_path] if preview_path else [])],
+    }
+
+
+def build_assets(model_paths: Dict[str, str], output_dir: Path, hint_sizes: List[int]) -> Dict:
+    """ Construit tous les modèles du catalogue et écrit le manifeste (retourné). """
+    cache = AssetCache(output_dir)
+    textures_built: Dict[Path, Dict] = {}
+    models, referenced, directories = {}, set(), set()
+    for model_id, model_path in model_paths.items():
+        obj_path = Path(model_path)
+        if not obj_path.is_file():
+            logger.error(f"[{model_id}] Modèle introuvable : {obj_path}")
+            continue
+        entry = build_model(model_id, obj_path.resolve(), cache, textures_built)
+        referenced.update(entry.pop("_referenced"))
+        directories.add(obj_path.resolve().parent)
+        models[model_id] = entry
+        logger.info(f"[{model_id}] {len(entry['materials'])} matériau(x), {len(entry['textures'])} texture(s).")
+
+    manifest = {"version": MANIFEST_VERSION, "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "models": models}
+    manifest["unreferenced_sources"] = sorted(
+        _display_path(p)
+        for directory in directories for p in directory.iterdir()
+        if p.is_file() and p not in referenced and p.suffix.lower() != ".md"
+    )
+    manifest["session_bytes"] = {
+        "before": session_transfer_bytes(manifest),
+        "after": {str(size): session_transfer_bytes(manifest, max_size=size) for size in hint_sizes},
+        "after_without_webp_gzip": {str(size): session_transfer_bytes(manifest, max_size=size, accept_webp=False, accept_gzip=False) for size in hint_sizes},
+    }
+    manifest["cache"] = {"written": cache.written, "reused": cache.reused}
+    with open(output_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Construit les assets 3D du catalogue (mips, WebP, gzip, manifeste).")
+    parser.add_argument("--output-dir", type=Path, default=None, help="Dossier de sortie (défaut : ASSET_BUILD_DIR).")
+    parser.add_argument("--hint-sizes", type=int, nargs="+", default=[256, 512, 1024], help="Tailles de texture pour la mesure des octets par session.")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or asset_build_dir()
+    manifest = build_assets(settings.MODEL_IDS_TO_PATHS, output_dir, args.hint_sizes)
+    if not manifest["models"]:
+        logger.error("Aucun modèle construit.")
+        return 1
+
+    print("\n" + "=" * 15 + " BUILD DES ASSETS " + "=" * 15)
+    print(f"  {len(manifest['models'])} modèles -> {output_dir} ({manifest['cache']['written']} fichiers écrits, {manifest['cache']['reused']} réutilisés)")
+    print(f"  Sources inutilisées : {', '.join(Path(p).name for p in manifest['unreferenced_sources']) or 'aucune'}")
+    before = manifest["session_bytes"]["before"]
+    print(f"  Octets par session d'essayage (aperçus + tous les modèles) : avant {before / 1024:.1f} Ko")
+    for size, after in manifest["session_bytes"]["after"].items():
+        raw = manifest["session_bytes"]["after_without_webp_gzip"][size]
+        print(f"    - textures {size:>5} px : {after / 1024:8.1f} Ko ({after / before:.0%}) | sans WebP ni gzip {raw / 1024:8.1f} Ko")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
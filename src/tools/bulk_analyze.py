@@ -0,0 +1,260 @@
+# src/tools/bulk_analyze.py
+"""
+Analyse hors-ligne d'une arborescence d'images (sans passer par l'API HTTP).
+
+Usage :
+    python -m src.tools.bulk_analyze <dossier_images> --output-dir <dossier_sortie> [--workers 4]
+
+Chaque worker du pool de processus possède son propre FaceLandmarker. Les résultats
+(landmarks, pose, forme) sont écrits en shards NPZ colonnaires et un fichier de
+checkpoint permet de reprendre un traitement interrompu.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.result_store import LandmarkResultStore
+
+logger = logging.getLogger("bulk_analyze")
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+SHARD_PATTERN = "shard_{:05d}.npz"
+DEFAULT_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+NUM_LANDMARKS = 478  # Landmarks MediaPipe FaceLandmarker v2 (468 + 10 iris)
+
+# Résultat compact renvoyé par un worker : (chemin relatif, succès, landmarks, matrice, forme, erreur, sha256)
+WorkerResult = Tuple[str, bool, Optional[np.ndarray], Optional[np.ndarray], str, str, str]
+
+_input_root: Optional[Path] = None
+
+
+# --- Côté Worker ---
+def _init_worker(input_root: str, log_level: str) -> None:
+    """ Initialise un worker : un backend de landmarks (FaceLandmarker par défaut) par processus. """
+    global _input_root
+    _input_root = Path(input_root)
+    logging.getLogger().setLevel(log_level)
+    from src.core.landmark_backends import get_landmark_backend
+    if get_landmark_backend() is None:
+        logger.error(f"[worker {os.getpid()}] Backend de landmarks non initialisé.")
+
+
+def _analyze_one(relative_path: str) -> WorkerResult:
+    """ Analyse une image via src.core.processing et retourne un résultat sérialisable compact. """
+    from src.core.processing import analyze_face_from_image_bytes
+    try:
+        image_bytes = (_input_root / relative_path).read_bytes()
+    except OSError as e:
+        return relative_path, False, None, None, "", f"Lecture impossible: {e}", ""
+
+    result = analyze_face_from_image_bytes(image_bytes)
+    landmarks = None
+    if result.face_landmarks:
+        landmarks = np.array([(lm.x, lm.y, lm.z) for lm in result.face_landmarks], dtype=np.float32)
+    matrix = None
+    if result.facial_transformation_matrix:
+        matrix = np.array(result.facial_transformation_matrix, dtype=np.float32)
+    return (
+        relative_path,
+        result.detection_successful,
+        landmarks,
+        matrix,
+        result.detected_face_shape or "",
+        result.error_message or "",
+        hashlib.sha256(image_bytes).hexdigest(),
+    )
+
+
+# --- Côté Coordinateur ---
+def list_images(input_dir: Path, extensions: Iterable[str] = DEFAULT_EXTENSIONS) -> List[str]:
+    """ Liste (triée, relative à input_dir) des images de l'arborescence. """
+    extensions = {ext.lower() for ext in extensions}
+    return sorted(
+        p.relative_to(input_dir).as_posix()
+        for p in input_dir.rglob("*")
+        if p.is_file() and p.suffix.lower() in extensions
+    )
+
+
+def load_checkpoint(output_dir: Path) -> Dict:
+    """ Charge le checkpoint (shards terminés) ou retourne un checkpoint vide. """
+    checkpoint_path = output_dir / CHECKPOINT_FILENAME
+    if checkpoint_path.exists():
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"shards": []}
+
+
+def _write_atomic_json(path: Path, data: Dict) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def processed_paths(output_dir: Path, checkpoint: Dict) -> Set[str]:
+    """ Chemins déjà traités, lus depuis les shards enregistrés dans le checkpoint. """
+    done: Set[str] = set()
+    for shard in checkpoint["shards"]:
+        shard_path = output_dir / shard["file"]
+        if shard_path.exists():
+            with np.load(shard_path) as data:
+                done.update(data["paths"].tolist())
+        else:
+            logger.warning(f"Shard référencé mais absent : {shard_path}, ses images seront retraitées.")
+    return done
+
+
+def write_shard(output_dir: Path, shard_index: int, results: List[WorkerResult], compress: bool = False) -> str:
+    """ Écrit un shard NPZ colonnaire (écriture atomique) et retourne son nom de fichier. """
+    count = len(results)
+    landmarks = np.full((count, NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    matrices = np.full((count, 4, 4), np.nan, dtype=np.float32)
+    for i, (_, _, lm, mat, _, _, _) in enumerate(results):
+        if lm is not None:
+            n = min(len(lm), NUM_LANDMARKS)
+            landmarks[i, :n] = lm[:n]
+        if mat is not None:
+            matrices[i] = mat
+
+    filename = SHARD_PATTERN.format(shard_index)
+    tmp_path = output_dir / (filename + ".tmp")
+    save = np.savez_compressed if compress else np.savez
+    with open(tmp_path, "wb") as f:
+        save(
+            f,
+            paths=np.array([r[0] for r in results], dtype=str),
+            detection_successful=np.array([r[1] for r in results], dtype=bool),
+            landmarks=landmarks,
+            facial_transformation_matrix=matrices,
+            detected_face_shape=np.array([r[4] for r in results], dtype=str),
+            error_message=np.array([r[5] for r in results], dtype=str),
+            sha256=np.array([r[6] for r in results], dtype=str),
+        )
+    os.replace(tmp_path, output_dir / filename)
+    return filename
+
+
+def append_to_store(store: LandmarkResultStore, results: List[WorkerResult]) -> int:
+    """ Ajoute les résultats au store (ID = SHA-256 de l'image, chemin en métadonnée). Retourne le nb d'ajouts. """
+    added = 0
+    for path, success, lm, mat, shape, error, digest in results:
+        if digest and digest not in store:
+            store.append(digest, lm, mat, shape, success, {"path": path, "error_message": error})
+            added += 1
+    store.flush()
+    return added
+
+
+def run_bulk_analysis(
+    input_dir: Path,
+    output_dir: Path,
+    workers: int = 1,
+    shard_size: int = 500,
+    compress: bool = False,
+    extensions: Iterable[str] = DEFAULT_EXTENSIONS,
+    store: Optional[LandmarkResultStore] = None,
+) -> Dict:
+    """
+    Analyse toutes les images non encore traitées de input_dir et retourne un résumé.
+    workers <= 1 : traitement séquentiel dans le processus courant.
+    Si un store est fourni, chaque shard y est aussi ajouté (voir src.core.result_store).
+    """
+    input_dir = input_dir.resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = load_checkpoint(output_dir)
+    checkpoint["input_dir"] = str(input_dir)
+
+    all_paths = list_images(input_dir, extensions)
+    done = processed_paths(output_dir, checkpoint)
+    pending = [p for p in all_paths if p not in done]
+    logger.info(f"{len(all_paths)} images trouvées, {len(done)} déjà traitées, {len(pending)} à traiter.")
+
+    summary = {"total_images": len(all_paths), "already_processed": len(done), "processed": 0, "successful_detections": 0}
+    if not pending:
+        return summary
+
+    next_index = max((s["index"] for s in checkpoint["shards"]), default=-1) + 1
+    start_time = time.perf_counter()
+    log_level = logging.getLevelName(logging.getLogger().level)
+
+    executor = None
+    if workers > 1:
+        # "spawn" : chaque worker initialise proprement son propre graphe MediaPipe
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(input_dir), log_level),
+        )
+    else:
+        _init_worker(str(input_dir), log_level)
+
+    try:
+        for offset in range(0, len(pending), shard_size):
+            batch = pending[offset:offset + shard_size]
+            if executor is not None:
+                results = list(executor.map(_analyze_one, batch, chunksize=max(1, len(batch) // (workers * 4))))
+            else:
+                results = [_analyze_one(p) for p in batch]
+
+            filename = write_shard(output_dir, next_index, results, compress)
+            if store is not None:
+                append_to_store(store, results)
+            checkpoint["shards"].append({"index": next_index, "file": filename, "count": len(results)})
+            _write_atomic_json(output_dir / CHECKPOINT_FILENAME, checkpoint)
+            next_index += 1
+
+            summary["processed"] += len(results)
+            summary["successful_detections"] += sum(1 for r in results if r[1])
+            logger.info(f"Shard {filename} écrit ({summary['processed']}/{len(pending)} images).")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start_time
+    summary["duration_s"] = elapsed
+    summary["images_per_second"] = summary["processed"] / elapsed if elapsed > 0 else 0.0
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse faciale hors-ligne d'un dossier d'images (shards NPZ, reprise sur interruption).")
+    parser.add_argument("input_dir", type=Path, help="Dossier racine des images (parcouru récursivement).")
+    parser.add_argument("--output-dir", type=Path, required=True, help="Dossier de sortie (shards NPZ + checkpoint).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus (<= 1 : séquentiel).")
+    parser.add_argument("--shard-size", type=int, default=500, help="Nombre d'images par shard (et par checkpoint).")
+    parser.add_argument("--compress", action="store_true", help="Compresse les shards (np.savez_compressed).")
+    parser.add_argument("--extensions", nargs="+", default=list(DEFAULT_EXTENSIONS), help="Extensions d'images à traiter.")
+    parser.add_argument("--store", type=Path, default=None, help="Ajoute aussi les résultats à un store local memory-mapped.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.input_dir.is_dir():
+        logger.error(f"Dossier d'entrée introuvable : {args.input_dir}")
+        return 1
+
+    store = LandmarkResultStore(args.store) if args.store else None
+    try:
+        summary = run_bulk_analysis(args.input_dir, args.output_dir, args.workers, args.shard_size, args.compress, args.extensions, store)
+    finally:
+        if store is not None:
+            store.close()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
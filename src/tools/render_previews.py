@@ -0,0 +1,183 @@
+# src/tools/render_previews.py
+"""
+Génération par lots des aperçus d'essayage (src/core/preview.py) d'une arborescence d'images.
+
+Usage :
+    python -m src.tools.render_previews <dossier_images> [--models sunglass_model_1 ...]
+        [--output-dir data/previews] [--poses <sortie de bulk_analyze>] [--workers 4]
+
+Pour chaque image : pose estimée (analyse "pose", ou matrice relue dans les shards de
+src.tools.bulk_analyze avec --poses), puis un aperçu JPEG par monture. Les aperçus sont rangés par
+empreinte de l'image et par variante (monture ajustée, réglages PREVIEW_*) : une image déjà traitée
+(même contenu, même monture, mêmes réglages) n'est ni réanalysée ni recomposée, ce qui sert aussi
+de reprise après interruption ; après un changement de monture ou de réglage, tout est recomposé.
+Les montures sont relues à chaque lancement ; leurs sprites sont partagés entre workers par le
+cache disque (PREVIEW_SPRITE_DIR).
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.preview import PreviewCache, SpriteCache, preview_variant, render_previews
+from src.tools.bulk_analyze import CHECKPOINT_FILENAME, DEFAULT_EXTENSIONS, list_images, load_checkpoint
+
+logger = logging.getLogger("render_previews")
+
+# Résultat d'un worker : (chemin relatif, aperçus composés, aperçus déjà en cache, secondes d'analyse, secondes de composition, erreur)
+WorkerResult = Tuple[str, int, int, float, float, str]
+
+_input_root: Optional[Path] = None
+_cache: Optional[PreviewCache] = None
+_sprites: Optional[SpriteCache] = None
+_model_ids: List[str] = []
+
+
+# --- Côté Worker ---
+def _init_worker(input_root: str, output_dir: str, model_ids: List[str], log_level: str) -> None:
+    global _input_root, _cache, _sprites, _model_ids
+    _input_root, _cache, _model_ids = Path(input_root), PreviewCache(Path(output_dir)), model_ids
+    # Cache de sprites propre au lancement (pas le singleton du processus) : OBJ et MTL relus
+    sprite_dir = Path(settings.PREVIEW_SPRITE_DIR)
+    _sprites = SpriteCache(sprite_dir if sprite_dir.is_absolute() else settings.BASE_DIR / sprite_dir)
+    logging.getLogger().setLevel(log_level)
+
+
+def _render_one(task: Tuple[str, Optional[np.ndarray]]) -> WorkerResult:
+    """ Aperçus d'une image ; la pose n'est estimée que si une monture manque dans le cache. """
+    relative_path, matrix = task
+    try:
+        image_bytes = (_input_root / relative_path).read_bytes()
+    except OSError as e:
+        return relative_path, 0, 0, 0.0, 0.0, f"Lecture impossible: {e}"
+
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    cached = sum(1 for model_id in _model_ids if _cache.path(digest, model_id, preview_variant(_sprites.mesh(model_id))).is_file())
+    if cached == len(_model_ids):
+        return relative_path, 0, cached, 0.0, 0.0, ""
+
+    analysis_s = 0.0
+    if matrix is None:
+        from src.core.processing import analyze_face_from_image_bytes
+        start = time.perf_counter()
+        result = analyze_face_from_image_bytes(image_bytes, analysis_level="pose")
+        analysis_s = time.perf_counter() - start
+        if not result.detection_successful or result.facial_transformation_matrix is None:
+            return relative_path, 0, 0, analysis_s, 0.0, result.error_message or "Aucun visage détecté"
+        matrix = np.asarray(result.facial_transformation_matrix)
+
+    start = time.perf_counter()
+    try:
+        render_previews(image_bytes, matrix, _model_ids, _sprites, _cache)
+    except ValueError as e:
+        return relative_path, 0, 0, analysis_s, time.perf_counter() - start, str(e)
+    return relative_path, len(_model_ids) - cached, cached, analysis_s, time.perf_counter() - start, ""
+
+
+# --- Côté Coordinateur ---
+def load_poses(bulk_output_dir: Path) -> Dict[str, np.ndarray]:
+    """ Matrices de pose des détections réussies d'une sortie de bulk_analyze, par chemin relatif. """
+    poses: Dict[str, np.ndarray] = {}
+    for shard in load_checkpoint(bulk_output_dir)["shards"]:
+        shard_path = bulk_output_dir / shard["file"]
+        if not shard_path.exists():
+            continue
+        with np.load(shard_path) as data:
+            for path, success, matrix in zip(data["paths"].tolist(), data["detection_successful"], data["facial_transformation_matrix"]):
+                if success and np.isfinite(matrix).all():
+                    poses[path] = matrix.astype(np.float64)
+    return poses
+
+
+def run_render_previews(
+    input_dir: Path,
+    output_dir: Path,
+    model_ids: List[str],
+    workers: int = 1,
+    poses: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict:
+    """ Compose les aperçus manquants de toutes les images de input_dir et retourne un résumé. """
+    unknown = [model_id for model_id in model_ids if model_id not in settings.MODEL_IDS_TO_PATHS]
+    if unknown:
+        raise ValueError(f"Montures inconnues : {unknown}")
+    input_dir = input_dir.resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = list_images(input_dir, DEFAULT_EXTENSIONS)
+    tasks = [(path, (poses or {}).get(path)) for path in paths]
+    logger.info(f"{len(paths)} images, {len(model_ids)} montures, {sum(1 for _, m in tasks if m is not None)} poses fournies.")
+
+    log_level = logging.getLevelName(logging.getLogger().level)
+    initargs = (str(input_dir), str(output_dir), list(model_ids), log_level)
+    start_time = time.perf_counter()
+    if workers > 1:
+        # "spawn" comme bulk_analyze : un graphe MediaPipe propre par worker
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=initargs) as executor:
+            results = list(executor.map(_render_one, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        _init_worker(*initargs)
+        results = [_render_one(task) for task in tasks]
+    elapsed = time.perf_counter() - start_time
+
+    failures = {path: error for path, _, _, _, _, error in results if error}
+    for path, error in failures.items():
+        logger.warning(f"{path} : {error}")
+    rendered = sum(r[1] for r in results)
+    composite_s = sum(r[4] for r in results)
+    return {
+        "total_images": len(paths),
+        "previews_rendered": rendered,
+        "previews_cached": sum(r[2] for r in results),
+        "failures": len(failures),
+        "analysis_s": sum(r[3] for r in results),
+        "composite_s": composite_s,
+        "duration_s": elapsed,
+        # Débit de la composition seule (décodage, réduction, composition, encodage JPEG), par cœur
+        "previews_per_core_second": rendered / composite_s if composite_s > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aperçus d'essayage par lots (composition CPU, cache par empreinte d'image).")
+    parser.add_argument("input_dir", type=Path, help="Dossier racine des images (parcouru récursivement).")
+    parser.add_argument("--models", nargs="+", default=list(settings.MODEL_IDS_TO_PATHS), help="Montures à composer.")
+    parser.add_argument("--output-dir", type=Path, default=None, help="Cache des aperçus (défaut : PREVIEW_CACHE_DIR).")
+    parser.add_argument("--poses", type=Path, default=None, help="Sortie de bulk_analyze : matrices de pose déjà calculées.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus (<= 1 : séquentiel).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.input_dir.is_dir():
+        logger.error(f"Dossier d'entrée introuvable : {args.input_dir}")
+        return 1
+    if args.poses is not None and not (args.poses / CHECKPOINT_FILENAME).exists():
+        logger.error(f"Pas de sortie de bulk_analyze dans {args.poses}")
+        return 1
+    output_dir = args.output_dir
+    if output_dir is None:
+        output_dir = Path(settings.PREVIEW_CACHE_DIR)
+        output_dir = output_dir if output_dir.is_absolute() else settings.BASE_DIR / output_dir
+
+    poses = load_poses(args.poses) if args.poses is not None else None
+    try:
+        summary = run_render_previews(args.input_dir, output_dir, args.models, args.workers, poses)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,48 +4,38 @@ import math
 
 '''
 make and return a 4x4 3d transformation matrix (also known as a pose)
+T . Rx(rotation[0]) . Ry(rotation[1]) . Rz(rotation[2]) . S, angles in degrees
 '''
 def makePose(translation =[0,0,0], rotation = [0,0,0], scale=[1,1,1]):
-    # Translation matrix to place the object at the origin
-    translation_matrix = np.array([
-        [1, 0, 0, translation[0]],
-        [0, 1, 0, translation[1]],
-        [0, 0, 1, translation[2]],
-        [0, 0, 0, 1]
-    ])
-    
-    rotation = [i * (np.pi/180.0) for i in rotation]
-    rot_x = np.array([
-        [1, 0, 0, 0],
-        [0, np.cos(rotation[0]), -np.sin(rotation[0]), 0],
-        [0, np.sin(rotation[0]), np.cos(rotation[0]), 0],
-        [0, 0, 0, 1]
-    ])
+    return makePoses(translation, rotation, scale)[0]
 
-    rot_y = np.array([
-        [np.cos(rotation[1]), 0, np.sin(rotation[1]), 0],
-        [0, 1, 0, 0],
-        [-np.sin(rotation[1]), 0, np.cos(rotation[1]), 0],
-        [0, 0, 0, 1]
-    ])
-
-    rot_z = np.array([
-        [np.cos(rotation[2]), -np.sin(rotation[2]), 0, 0],
-        [np.sin(rotation[2]), np.cos(rotation[2]), 0, 0],
-        [0, 0, 1, 0],
-        [0, 0, 0, 1]
-    ])
-    rotation_matrix = np.dot(np.dot(rot_x, rot_y), rot_z)
-
-    scaling_matrix = np.array([
-        [scale[0], 0, 0, 0],
-        [0, scale[1], 0, 0],
-        [0, 0, scale[2], 0],
-        [0, 0, 0, 1]
-    ])
-
-    transformation_matrix = np.dot(translation_matrix, np.dot(rotation_matrix, scaling_matrix))
-    return transformation_matrix
+'''
+batched makePose: translations, rotations (degrees) and scales are (N,3) arrays, or (3,) broadcast
+to the others. the rotation is written in closed form (no per-pose matrix products). returns (N,4,4)
+'''
+def makePoses(translations=(0, 0, 0), rotations=(0, 0, 0), scales=(1, 1, 1)):
+    translations, rotations, scales = np.broadcast_arrays(
+        np.atleast_2d(np.asarray(translations, dtype=np.float64)),
+        np.atleast_2d(np.radians(np.asarray(rotations, dtype=np.float64))),
+        np.atleast_2d(np.asarray(scales, dtype=np.float64)),
+    )
+    cx, cy, cz = np.cos(rotations).T
+    sx, sy, sz = np.sin(rotations).T
+    poses = np.zeros((len(translations), 4, 4))
+    # Rx . Ry . Rz
+    poses[:, 0, 0] = cy * cz
+    poses[:, 0, 1] = -cy * sz
+    poses[:, 0, 2] = sy
+    poses[:, 1, 0] = sx * sy * cz + cx * sz
+    poses[:, 1, 1] = cx * cz - sx * sy * sz
+    poses[:, 1, 2] = -sx * cy
+    poses[:, 2, 0] = sx * sz - cx * sy * cz
+    poses[:, 2, 1] = cx * sy * sz + sx * cz
+    poses[:, 2, 2] = cx * cy
+    poses[:, :3, :3] *= scales[:, None, :]  # R . S: column j scaled by scale j
+    poses[:, :3, 3] = translations
+    poses[:, 3, 3] = 1.0
+    return poses
 
 def GetPsudoCamera(frame_width, frame_height):
     # pseudo camera internals
@@ -60,18 +50,84 @@ def GetPsudoCamera(frame_width, frame_height):
     return camera_matrix, distortion
 
 def VecDist(vecA, vecB):
-    return math.sqrt(sum((px - qx) ** 2.0 for px, qx in zip(vecA, vecB)))
+    return math.dist(vecA, vecB)
 
-#
+'''
+batched VecDist: euclidean distances along the last axis of (...,D) arrays (broadcast)
+'''
+def VecDists(vecsA, vecsB):
+    diff = np.asarray(vecsA, dtype=np.float64) - np.asarray(vecsB, dtype=np.float64)
+    return np.sqrt(np.einsum("...i,...i->...", diff, diff))
+
+'''
+solve the pose of N model points (N,3) seen at image_points (N,2) and return them in world space (N,4),
+homogeneous. the transformation consists only of the translation, because the rotation is accounted for
+in the model coordinates (mediapipe world landmarks rotate but don't translate, see https://codepen.io/mediapipe/pen/RwGWYJw):
+the inverse is a subtraction, no 4x4 inversion
+'''
 def GetWorldPoints(model_points, image_points, camera_matrix, distortion):
-    success, rotation_vector, translation_vector = cv2.solvePnP(model_points, image_points, camera_matrix, distortion, flags=cv2.SOLVEPNP_SQPNP)
-    transformation = np.eye(4)  # needs to 4x4 because you have to use homogeneous coordinates
-    transformation[0:3, 3] = translation_vector.squeeze()
-    # the transformation consists only of the translation, because the rotation is accounted for in the model coordinates. Take a look at this (https://codepen.io/mediapipe/pen/RwGWYJw to see how the model coordinates behave - the hand rotates, but doesn't translate
-    # transform model coordinates into homogeneous coordinates
-        
-    model_points_hom = np.concatenate((model_points, np.ones((21, 1))), axis=1)
-    # apply the transformation
-    world_points = model_points_hom.dot(np.linalg.inv(transformation).T)
-    
-    return world_points
\ No newline at end of file
+    model_points = np.asarray(model_points, dtype=np.float64).reshape(-1, 3)
+    success, rotation_vector, translation_vector = cv2.solvePnP(model_points, np.asarray(image_points, dtype=np.float64).reshape(-1, 2), camera_matrix, distortion, flags=cv2.SOLVEPNP_SQPNP)
+    world_points = np.ones((len(model_points), 4))
+    world_points[:, :3] = model_points - translation_vector.reshape(1, 3)
+    return world_points
+
+'''
+invert poses made of rotation, per-axis scale and translation ((...,4,4), as built by makePose/makePoses)
+without a general inverse: (R S)^-1 = S^-1 R^T, obtained by scaling the rows of the transposed block
+by 1/s^2. for rigid poses (s = 1) this is just R^T and -R^T t
+'''
+def InvertPoses(poses):
+    poses = np.asarray(poses, dtype=np.float64)
+    linear = poses[..., :3, :3]
+    inverse_linear = np.swapaxes(linear, -1, -2) / np.einsum("...ij,...ij->...j", linear, linear)[..., :, None]
+    inverse = np.zeros(poses.shape)
+    inverse[..., :3, :3] = inverse_linear
+    inverse[..., :3, 3] = -np.einsum("...ij,...j->...i", inverse_linear, poses[..., :3, 3])
+    inverse[..., 3, 3] = 1.0
+    return inverse
+
+'''
+apply poses ((...,4,4)) to points ((...,N,3)), broadcasting over the leading axes: one pose for many
+face points, or one pose per frame. returns (...,N,3)
+'''
+def TransformPoints(points, poses):
+    points = np.asarray(points, dtype=np.float64)
+    poses = np.asarray(poses, dtype=np.float64)
+    rotations, translations = poses[..., :3, :3], poses[..., None, :3, 3]
+    if points.ndim == 2 and poses.ndim > 2:
+        # Shared points, many poses: a single (N,3) x (3, K*3) product instead of K small ones
+        stacked = np.moveaxis(rotations, -1, 0).reshape(3, -1)
+        transformed = (points @ stacked).reshape((len(points),) + poses.shape[:-2] + (3,))
+        return np.moveaxis(transformed, 0, -2) + translations
+    return np.matmul(points, np.swapaxes(rotations, -1, -2)) + translations
+
+'''
+decompose 4x4 poses (single (4,4) or batch (...,4,4)) into euler angles in degrees,
+inverse of makePose: R = Rx(rotation[0]) . Ry(rotation[1]) . Rz(rotation[2]), so
+DecomposePose(makePose(rotation=r)) == r. Returns (..., 3) [x (pitch), y (yaw), z (roll)].
+scale is removed first (columns normalized)
+'''
+def DecomposePose(poses):
+    poses = np.asarray(poses, dtype=np.float64)
+    rotation = poses[..., :3, :3] / np.linalg.norm(poses[..., :3, :3], axis=-2, keepdims=True)
+    rot_x = np.arctan2(-rotation[..., 1, 2], rotation[..., 2, 2])
+    rot_y = np.arcsin(np.clip(rotation[..., 0, 2], -1.0, 1.0))
+    rot_z = np.arctan2(-rotation[..., 0, 1], rotation[..., 0, 0])
+    return np.degrees(np.stack([rot_x, rot_y, rot_z], axis=-1))
+
+'''
+undo the head rotation of mediapipe landmarks ((...,N,3), normalized image coordinates: x right, y down,
+z into the screen) using the matching facial transformation matrices ((...,4,4), camera space: y up, z towards
+the viewer). points are rotated around their centroid, so the result stays in image coordinates.
+x and y are normalized by width and height: exact for square images, approximate otherwise
+'''
+def FrontalizeLandmarks(landmarks, poses):
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    poses = np.asarray(poses, dtype=np.float64)
+    rotation = poses[..., :3, :3] / np.linalg.norm(poses[..., :3, :3], axis=-2, keepdims=True)
+    flip = np.array([1.0, -1.0, -1.0])  # image <-> camera axes
+    # F . R^T . F applied to row vectors: p' = p . (F R F)
+    frontal_rotation = flip[:, None] * rotation * flip[None, :]
+    centroid = landmarks.mean(axis=-2, keepdims=True)
+    return np.einsum("...ni,...ij->...nj", landmarks - centroid, frontal_rotation) + centroid
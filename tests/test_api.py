@@ -83,6 +83,37 @@ def test_analyze_face_no_face_in_image():
      assert json_response["detection_successful"] is False
      assert "invalide" in json_response["error_message"].lower()
 
+@skip_if_no_valid_image
+def test_analyze_face_with_session_smoothing():
+    """ Deux captures d'une même session : la pose lissée reste une matrice 4x4 valide. """
+    for timestamp_ms in (0, 100):
+        with open(VALID_FACE_IMAGE_PATH, "rb") as img_file:
+            response = client.post(
+                "/api/v1/analyze_face",
+                files={"image_file": ("test_face.jpg", img_file, "image/jpeg")},
+                data={"session_id": "test-session", "capture_timestamp_ms": str(timestamp_ms)},
+            )
+        assert response.status_code == 200
+        json_response = response.json()
+        assert json_response["detection_successful"] is True
+        assert len(json_response["facial_transformation_matrix"]) == 4
+
+@skip_if_no_valid_image
+def test_analyze_face_pose_level():
+    """ Niveau 'pose' : matrice et orientation seules, sans landmarks ni forme. """
+    with open(VALID_FACE_IMAGE_PATH, "rb") as img_file:
+        response = client.post("/api/v1/analyze_face", files={"image_file": ("test_face.jpg", img_file, "image/jpeg")}, data={"analysis_level": "pose"})
+    assert response.status_code == 200
+    json_response = response.json()
+    assert json_response["detection_successful"] is True
+    assert len(json_response["facial_transformation_matrix"]) == 4 and json_response["head_pose"] is not None
+    assert json_response["face_landmarks"] is None and json_response["detected_face_shape"] is None
+
+def test_analyze_face_unknown_level():
+    """ Niveau d'analyse inconnu : rejeté par la validation (422). """
+    response = client.post("/api/v1/analyze_face", files={"image_file": ("a.jpg", b"data", "image/jpeg")}, data={"analysis_level": "everything"})
+    assert response.status_code == 422
+
 def test_analyze_face_no_file():
      """ Teste l'appel sans fichier. """
      response = client.post("/api/v1/analyze_face")
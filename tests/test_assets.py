@@ -0,0 +1,98 @@
+# tests/test_assets.py
+
+import gzip
+from pathlib import Path
+import cv2
+import numpy as np
+from fastapi.testclient import TestClient
+from src.core.assets import reload_asset_manifest, resolve_model_assets, select_texture_level, session_transfer_bytes, texture_size_hint
+from src.core.config import settings
+from src.core.mtl import parse_mtl, parse_obj_materials
+from src.tools.build_assets import build_assets, compact_obj
+
+
+def _make_catalogue(root):
+    """ Modèle texturé (MTL à casse différente, matériaux inutilisés) et fichiers redondants. """
+    root.mkdir()
+    (root / "frame.obj").write_bytes(
+        b"# export\nmtllib Frame.MTL\nv 0.123456789 -0.0000001 2.5\nv 1.0 2.0 3.0\nvt 0.5 0.25\n"
+        b"usemtl metal\nf 1 2 1\nusemtl lens\nf 2 1 2\nusemtl ghost\n"
+    )
+    (root / "frame.mtl").write_text(
+        "# comment\nnewmtl metal\nKd 0.5 0.5 0.5\nmap_Kd -s 1 1 1 metal.png\n\nnewmtl lens\nd 0.2\n\nnewmtl unused\nKd 1 0 0\n"
+    )
+    cv2.imwrite(str(root / "metal.png"), np.random.default_rng(0).integers(0, 255, (300, 500, 3), dtype=np.uint8))
+    cv2.imwrite(str(root / "thumbnail.png"), np.full((128, 128, 3), 200, np.uint8))
+    (root / "frame.fbx").write_bytes(b"duplicate mesh")
+    return root / "frame.obj"
+
+
+def test_obj_and_mtl_parsing():
+    libraries, used = parse_obj_materials(b"mtllib a.mtl b.mtl\nusemtl x\nusemtl y\nusemtl x\n")
+    assert libraries == ["a.mtl", "b.mtl"] and used == ["x", "y"]
+    assert parse_mtl("newmtl a\n  Kd 1 1 1\n# c\nnewmtl b\n") == {"a": ["Kd 1 1 1"], "b": []}
+    compacted = compact_obj(b"# c\nmtllib old.mtl\nv 0.123456789 -0.0000001 1.5e-7\nf 1 2 3\n", 5, "new.mtl")
+    assert compacted == b"mtllib new.mtl\nv 0.12346 0 0\nf 1 2 3\n"
+
+
+def test_build_resolves_materials_mips_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ASSET_MIN_MIP_SIZE", 64)
+    obj_path = _make_catalogue(tmp_path / "catalogue")
+    manifest = build_assets({"frame": str(obj_path)}, tmp_path / "build", [128, 1024])
+    entry = manifest["models"]["frame"]
+    assert entry["materials"] == ["metal", "lens"] and entry["missing_materials"] == ["ghost"]
+    assert [Path(p).name for p in manifest["unreferenced_sources"]] == ["frame.fbx"]
+
+    mtl = (tmp_path / "build" / entry["mtl"]["file"]).read_text()
+    assert "unused" not in mtl and f"map_Kd {entry['textures'][0]['levels'][0]['png']['file']}" in mtl
+    texture = entry["textures"][0]
+    assert [(level["width"], level["height"]) for level in texture["levels"]] == [(500, 300), (250, 150), (125, 75)]
+    obj = (tmp_path / "build" / entry["mesh"]["obj"]["file"]).read_bytes()
+    assert gzip.decompress((tmp_path / "build" / entry["mesh"]["obj_gzip"]["file"]).read_bytes()) == obj
+    assert obj.startswith(f"mtllib {entry['mtl']['file']}\nv 0.12346 0 2.5\n".encode())
+
+    # Fichiers adressés par contenu : un second build ne réécrit rien
+    rebuilt = build_assets({"frame": str(obj_path)}, tmp_path / "build", [128])
+    assert rebuilt["cache"]["written"] == 0 and rebuilt["models"]["frame"]["mesh"] == entry["mesh"]
+    assert manifest["session_bytes"]["after"]["128"] < manifest["session_bytes"]["after"]["1024"] < manifest["session_bytes"]["before"]
+
+
+def test_variant_selection_and_client_hints(monkeypatch):
+    monkeypatch.setattr(settings, "ASSET_DEFAULT_TEXTURE_SIZE", 1024)
+    monkeypatch.setattr(settings, "ASSET_MAX_TEXTURE_SIZE", 2048)
+    assert texture_size_hint() == 1024 and texture_size_hint(5000) == 2048
+    assert texture_size_hint(viewport_width=390, dpr=3) == 1024  # 585 px physiques -> 1024
+    texture = {"levels": [{"size": s, "width": s, "height": s, "png": {"file": f"{s}.png", "bytes": s * 4},
+                           "webp": {"file": f"{s}.webp", "bytes": s}} for s in (512, 256, 128)]}
+    assert select_texture_level(texture, 300)["file"] == "256.webp"
+    assert select_texture_level(texture, 300, accept_webp=False)["file"] == "256.png"
+    assert select_texture_level(texture, 10)["file"] == "128.webp"  # Plus petit niveau disponible
+    entry = {"mesh": {"obj": {"file": "m.obj", "bytes": 100}, "obj_gzip": {"file": "m.obj.gz", "bytes": 30}},
+             "mtl": None, "textures": [], "preview": texture, "source_files": {"m.obj": 100}}
+    assert resolve_model_assets(entry, 512, accept_gzip=False)["mesh"] == {"file": "m.obj", "bytes": 100, "encoding": None}
+    assert session_transfer_bytes({"models": {"a": entry}}, max_size=128) == 30 + 128
+    assert session_transfer_bytes({"models": {"a": {**entry, "preview": None}}}) == 100
+
+
+def test_asset_endpoints_serve_hinted_variants(tmp_path, monkeypatch):
+    from src.main import app
+    build_dir = tmp_path / "build"
+    monkeypatch.setattr(settings, "ASSET_BUILD_DIR", str(build_dir))
+    build_assets({"frame": str(_make_catalogue(tmp_path / "catalogue"))}, build_dir, [256])
+    reload_asset_manifest()
+    try:
+        client = TestClient(app)
+        response = client.get("/api/v1/models/frame/assets", params={"max_texture_size": 200}, headers={"Accept": "image/webp", "Accept-Encoding": "gzip"})
+        assert response.status_code == 200 and "Sec-CH-DPR" in response.headers["accept-ch"]
+        body = response.json()
+        assert body["textures"][0]["format"] == "webp" and body["textures"][0]["width"] == 125
+        assert body["mesh"]["encoding"] == "gzip"
+
+        mesh = client.get(body["mesh"]["url"], headers={"Accept-Encoding": "gzip"})
+        assert mesh.status_code == 200 and mesh.headers["content-encoding"] == "gzip"
+        assert "immutable" in mesh.headers["cache-control"] and mesh.content.startswith(b"mtllib ")  # Décompressé par le client
+        assert client.get("/api/v1/assets/..%2Fmanifest.json").status_code == 404
+        assert client.get("/api/v1/models/unknown/assets").status_code == 404
+    finally:
+        monkeypatch.undo()
+        reload_asset_manifest()
@@ -0,0 +1,73 @@
+# tests/test_benchmark_history.py
+
+import numpy as np
+import pytest
+from benchmark.history import (
+    append_run, compare_runs, host_fingerprint, load_runs, main, mann_whitney_u, metric, select_run, settings_snapshot, windowed_throughput,
+)
+from src.core.config import settings
+
+
+def test_mann_whitney_detects_shift_and_ignores_noise():
+    rng = np.random.default_rng(0)
+    baseline = rng.lognormal(np.log(25), 0.1, 150)
+    assert mann_whitney_u(baseline, rng.lognormal(np.log(25), 0.1, 150))["p_value"] > 0.01
+    shifted = mann_whitney_u(baseline, baseline * 1.1)
+    assert shifted["p_value"] < 1e-6 and shifted["effect"] > 0.5  # b tend à dépasser a
+    # Valeurs toutes égales (ex-aequo) : pas de différence, pas de division par zéro
+    assert mann_whitney_u([5.0] * 10, [5.0] * 10)["p_value"] == 1.0
+    # U de a = nombre de paires où a l'emporte : seule 4 > 3
+    assert mann_whitney_u([1, 2, 4], [3, 5, 6])["u"] == pytest.approx(1.0)
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    rng = np.random.default_rng(1)
+    latencies = rng.normal(25, 1, 100)
+    baseline = {"metrics": {
+        "latency_ms": metric(latencies, "ms"),
+        "throughput_rps": metric(1000 / latencies, "req/s", higher_is_better=True),
+        "rare": metric([1, 2], "ms"),
+    }}
+    slower = {"metrics": {
+        "latency_ms": metric(latencies * 1.2, "ms"),
+        "throughput_rps": metric(1000 / (latencies * 1.2), "req/s", higher_is_better=True),
+        "rare": metric([9, 9], "ms"),
+    }}
+    verdicts = {v["metric"]: v["verdict"] for v in compare_runs(baseline, slower)}
+    assert verdicts == {"latency_ms": "regression", "throughput_rps": "regression", "rare": "insufficient_samples"}
+    assert {v["verdict"] for v in compare_runs(slower, baseline) if v["metric"] != "rare"} == {"improvement"}
+    # Écart significatif mais sous l'effet minimal : inchangé
+    tiny = {"metrics": {"latency_ms": metric(latencies * 1.01, "ms")}}
+    assert compare_runs(baseline, tiny, min_effect=0.05)[0]["verdict"] == "unchanged"
+
+
+def test_history_append_select_and_compare_exit_code(tmp_path, capsys):
+    history = tmp_path / "history.jsonl"
+    rng = np.random.default_rng(2)
+    first = append_run("bench", {"latency_ms": metric(rng.normal(20, 1, 50), "ms")}, history_path=history)
+    append_run("other", {"latency_ms": metric([1.0] * 50, "ms")}, history_path=history)
+    append_run("bench", {"latency_ms": metric(rng.normal(30, 1, 50), "ms")}, history_path=history)
+
+    runs = load_runs(history, "bench")
+    assert len(runs) == 2 and runs[0]["run_id"] == first["run_id"]
+    assert select_run(runs, first["run_id"][:6]) is runs[0] and select_run(runs, "-1") is runs[1]
+    runs[0]["run_id"] = "123456abcdef"  # Préfixe numérique : pas confondu avec un index
+    assert select_run(runs, "123456") is runs[0]
+    assert set(runs[0]["host"]) >= {"id", "cpu_model", "cpu_count", "packages"}
+    assert runs[0]["host"]["id"] == host_fingerprint()["id"]
+
+    assert main(["--history", str(history), "compare", "--benchmark", "bench"]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert main(["--history", str(history), "compare", "--benchmark", "bench", "--baseline", "-1", "--candidate", "-2"]) == 0
+    assert main(["--history", str(history), "compare", "--benchmark", "bench", "--baseline", "-5"]) == 2
+
+
+def test_windowed_throughput():
+    assert windowed_throughput([0.1] * 25, window=10) == pytest.approx([10.0, 10.0])
+    assert windowed_throughput([0.5, 0.5], window=10) == pytest.approx([2.0])
+
+
+def test_settings_snapshot_filters_by_prefix():
+    snapshot = settings_snapshot("QUALITY_")
+    assert snapshot and all(key.startswith("QUALITY_") for key in snapshot)
+    assert snapshot["QUALITY_GATE_ENABLED"] == settings.QUALITY_GATE_ENABLED
@@ -0,0 +1,54 @@
+# tests/test_bulk_analyze.py
+
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+from src.tools.bulk_analyze import CHECKPOINT_FILENAME, NUM_LANDMARKS, list_images, run_bulk_analysis
+
+BENCHMARK_IMAGES = sorted((Path(__file__).parent.parent / "benchmark" / "test_data").glob("*.jpg"))[:2]
+
+
+def make_input_tree(root: Path) -> Path:
+    """ Arborescence : 2 vraies images (dont une en sous-dossier) + 1 fichier indécodable. """
+    input_dir = root / "images"
+    (input_dir / "sub").mkdir(parents=True)
+    shutil.copy(BENCHMARK_IMAGES[0], input_dir / "a.jpg")
+    shutil.copy(BENCHMARK_IMAGES[1], input_dir / "sub" / "b.jpg")
+    (input_dir / "corrupt.jpg").write_bytes(b"not image data")
+    (input_dir / "notes.txt").write_text("ignored")
+    return input_dir
+
+
+def test_list_images_recursive_and_filtered(tmp_path):
+    input_dir = make_input_tree(tmp_path)
+    assert list_images(input_dir) == ["a.jpg", "corrupt.jpg", "sub/b.jpg"]
+
+
+def test_bulk_analysis_writes_shards_and_resumes(tmp_path):
+    """ Écrit des shards colonnaires puis ne retraite que les images manquantes à la reprise. """
+    input_dir = make_input_tree(tmp_path)
+    output_dir = tmp_path / "out"
+
+    summary = run_bulk_analysis(input_dir, output_dir, workers=0, shard_size=2)
+    assert summary["processed"] == 3
+    checkpoint = json.loads((output_dir / CHECKPOINT_FILENAME).read_text())
+    assert [s["count"] for s in checkpoint["shards"]] == [2, 1]
+
+    with np.load(output_dir / "shard_00000.npz") as shard:
+        assert shard["paths"].tolist() == ["a.jpg", "corrupt.jpg"]
+        assert shard["landmarks"].shape == (2, NUM_LANDMARKS, 3)
+        assert shard["facial_transformation_matrix"].shape == (2, 4, 4)
+        assert not shard["detection_successful"][1]
+        assert np.isnan(shard["landmarks"][1]).all()
+        assert "invalide" in shard["error_message"][1].lower()
+
+    # Reprise complète : rien à refaire
+    assert run_bulk_analysis(input_dir, output_dir, workers=0, shard_size=2)["processed"] == 0
+
+    # Simule une interruption : le dernier shard n'a jamais été enregistré dans le checkpoint
+    checkpoint["shards"] = checkpoint["shards"][:1]
+    (output_dir / CHECKPOINT_FILENAME).write_text(json.dumps(checkpoint))
+    resumed = run_bulk_analysis(input_dir, output_dir, workers=0, shard_size=2)
+    assert resumed["already_processed"] == 2
+    assert resumed["processed"] == 1
@@ -0,0 +1,94 @@
+# tests/test_decoding.py
+
+import io
+import pytest
+import numpy as np
+import cv2
+from src.core import decoding
+from src.core.decoding import (
+    OpenCVDecoder,
+    DECODER_CLASSES,
+    apply_exif_orientation,
+    benchmark_image_decoders,
+    decode_image_rgb,
+    get_available_decoder_names,
+    read_jpeg_exif_orientation,
+)
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image
+
+
+# --- Fonctions utilitaires ---
+def make_jpeg(orientation: int = 1, width: int = 64, height: int = 40) -> bytes:
+    """ Crée un JPEG synthétique (dégradé asymétrique) avec un tag d'orientation EXIF. """
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    image[:, :, 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    image[:10, :20, 2] = 255  # Coin marqué pour détecter les rotations
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, "JPEG", exif=exif.tobytes(), quality=95)
+    return buffer.getvalue()
+
+
+# --- Tests ---
+@pytest.mark.parametrize("orientation", range(1, 9))
+def test_read_and_apply_exif_orientation_matches_opencv(orientation):
+    """ L'orientation EXIF appliquée manuellement doit reproduire cv2.imdecode. """
+    jpeg = make_jpeg(orientation)
+    assert read_jpeg_exif_orientation(jpeg) == orientation
+    raw = cv2.cvtColor(cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION), cv2.COLOR_BGR2RGB)
+    expected = OpenCVDecoder().decode_jpeg(jpeg)
+    assert np.array_equal(apply_exif_orientation(raw, orientation), expected)
+
+@pytest.mark.parametrize("scale, name", [(scale, name) for scale in (1, 2, 4) for name in get_available_decoder_names(scale)])
+def test_decoders_output_identical_to_opencv(scale, name):
+    """ Chaque backend proposé à ce facteur de réduction doit produire exactement les mêmes pixels qu'OpenCV. """
+    jpeg = make_jpeg(orientation=6, width=128, height=96)
+    expected = OpenCVDecoder().decode_jpeg(jpeg, scale)
+    decoded = DECODER_CLASSES[name]().decode_jpeg(jpeg, scale)
+    assert decoded.dtype == np.uint8
+    assert np.array_equal(decoded, expected)
+
+@pytest.mark.parametrize("name", get_available_decoder_names())
+def test_decoders_return_none_on_corrupt_data(name):
+    """ Un JPEG tronqué/corrompu retourne None (pas d'exception). """
+    assert DECODER_CLASSES[name]().decode_jpeg(b"\xff\xd8\xff" + b"garbage") is None
+
+def test_decode_image_rgb_non_jpeg_uses_opencv():
+    """ Les formats non JPEG (PNG) passent par OpenCV et restent en RGB. """
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    image[:, :, 0] = 200  # Rouge en RGB
+    ok, png = cv2.imencode(".png", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    assert ok
+    decoded = decode_image_rgb(png.tobytes())
+    assert np.array_equal(decoded, image)
+    assert decode_image_rgb(b"not image data") is None
+
+def test_benchmark_reports_all_backends(tmp_path):
+    """ Le micro-benchmark mesure chaque backend et vérifie l'identité des sorties. """
+    sample = tmp_path / "sample.jpg"
+    sample.write_bytes(make_jpeg())
+    report = benchmark_image_decoders([sample], repeats=1)
+    assert set(report) == set(get_available_decoder_names())
+    for stats in report.values():
+        assert stats["ms_per_image"] >= 0
+        assert stats["identical_output"] == 1.0
+
+def test_forced_backend_selection(monkeypatch):
+    """ Un backend imposé par la configuration est respecté s'il est disponible. """
+    monkeypatch.setattr(decoding.settings, "IMAGE_DECODER_BACKEND", "opencv")
+    assert decoding._select_image_decoder().name == "opencv"
+    monkeypatch.setattr(decoding.settings, "IMAGE_DECODER_BACKEND", "inexistant")
+    monkeypatch.setattr(decoding.settings, "IMAGE_DECODER_BENCHMARK_ON_STARTUP", False)
+    assert decoding._select_image_decoder().name == get_available_decoder_names()[0]
+
+def test_draft_decoders_excluded_when_scaling(monkeypatch):
+    """ Avec réduction DCT, Pillow (draft) n'est ni proposé ni retenu, même imposé. """
+    assert "pillow" in get_available_decoder_names(1)
+    assert "pillow" not in get_available_decoder_names(2)
+    monkeypatch.setattr(decoding.settings, "IMAGE_DECODE_SCALE_DENOMINATOR", 2)
+    monkeypatch.setattr(decoding.settings, "IMAGE_DECODER_BACKEND", "pillow")
+    assert decoding._select_image_decoder().name != "pillow"
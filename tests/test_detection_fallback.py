@@ -0,0 +1,81 @@
+# tests/test_detection_fallback.py
+
+import math
+import numpy as np
+import pytest
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+from mediapipe.tasks.python.vision import FaceLandmarkerResult
+from src.core.detection_fallback import (
+    MEDIAPIPE_VERTICAL_FOV_DEG, candidate_regions, detect_with_fallback, remap_landmarks,
+    remap_transformation_matrix, saliency_crop, tile_grid,
+)
+
+
+def _project(matrix, width, height):
+    """ Pixel où se projette l'origine du repère visage (caméra virtuelle Mediapipe). """
+    focal = 1.0 / math.tan(math.radians(MEDIAPIPE_VERTICAL_FOV_DEG) / 2)
+    tx, ty, tz = matrix[:3, 3]
+    ndc_x, ndc_y = focal * tx / (-tz) / (width / height), focal * ty / (-tz)
+    return (ndc_x + 1) / 2 * width, (1 - ndc_y) / 2 * height
+
+
+def test_tile_grid_overlaps_and_covers_frame():
+    tiles = tile_grid(1000, 600, 3, 0.25)
+    assert len(tiles) == 9
+    assert tiles[0] == (300, 180, 700, 420)  # Tuile centrale d'abord
+    assert min(t[0] for t in tiles) == 0 and max(t[2] for t in tiles) == 1000
+    assert min(t[1] for t in tiles) == 0 and max(t[3] for t in tiles) == 600
+    left = sorted(tiles)[0]
+    assert left[2] - left[0] == 400  # 3 tuiles de 400 px avec 100 px de recouvrement
+    assert tile_grid(1000, 600, 1, 0.25) == [(0, 0, 1000, 600)]
+
+
+def test_saliency_crop_zooms_on_skin_region():
+    image = np.full((480, 640, 3), 90, np.uint8)
+    image[300:340, 500:530] = (224, 172, 150)  # Zone de teinte chair
+    x0, y0, x1, y1 = saliency_crop(image)
+    assert x0 <= 500 and x1 >= 530 and y0 <= 300 and y1 >= 340
+    assert x1 - x0 < 200
+    assert saliency_crop(np.full((480, 640, 3), 90, np.uint8)) is None
+    assert all(min(r[2] - r[0], r[3] - r[1]) >= 96 for r in candidate_regions(image, min_region_side=96))
+
+
+def test_remap_landmarks_and_pose_to_full_frame():
+    region = (400, 200, 800, 500)
+    landmarks = np.array([[0.5, 0.5, 0.1], [0.0, 1.0, -0.2]])
+    remapped = remap_landmarks(landmarks, region, 1000, 1000)
+    np.testing.assert_allclose(remapped, [[0.6, 0.35, 0.04], [0.4, 0.5, -0.08]])
+
+    matrix = np.eye(4)
+    matrix[:3, 3] = (1.5, -2.0, -40.0)
+    full = remap_transformation_matrix(matrix, (0, 0, 1000, 1000), 1000, 1000)
+    np.testing.assert_allclose(full, matrix)
+
+    full = remap_transformation_matrix(matrix, region, 1000, 1000)
+    crop_x, crop_y = _project(matrix, 400, 300)
+    np.testing.assert_allclose(_project(full, 1000, 1000), (400 + crop_x, 200 + crop_y))
+    np.testing.assert_allclose(full[:3, :3], matrix[:3, :3])
+    assert full[2, 3] == pytest.approx(-40.0 * 1000 / 300)  # Plus petit à l'écran -> plus loin
+
+
+def test_detect_with_fallback_stops_at_first_face_and_respects_budget():
+    regions = [(0, 0, 50, 50), (50, 0, 100, 50), (0, 50, 100, 100)]
+    seen = []
+    pose = np.eye(4)
+    pose[2, 3] = -40.0
+
+    def detect(crop):
+        seen.append(crop.shape)
+        found = len(seen) == 2
+        landmarks = [[NormalizedLandmark(x=0.5, y=0.5, z=0.0)]] if found else []
+        return FaceLandmarkerResult(face_landmarks=landmarks, face_blendshapes=[], facial_transformation_matrixes=[pose] if found else [])
+
+    image = np.zeros((100, 100, 3), np.uint8)
+    outcome = detect_with_fallback(detect, image, budget_s=1.0, regions=regions)
+    assert outcome.region == (50, 0, 100, 50) and outcome.attempts == 2
+    point = outcome.result.face_landmarks[0][0]
+    assert (point.x, point.y) == pytest.approx((0.75, 0.25))
+
+    seen.clear()
+    exhausted = detect_with_fallback(detect, image, budget_s=0.01, expected_attempt_s=0.02, regions=regions)
+    assert exhausted.result is None and exhausted.budget_exhausted and exhausted.attempts == 0 and not seen
@@ -0,0 +1,51 @@
+# tests/test_expression.py
+
+import numpy as np
+from fastapi.testclient import TestClient
+from mediapipe.tasks.python.components.containers.category import Category
+from src.core.expression import BLENDSHAPE_NAMES, assess_capture, blendshape_scores, capture_verdicts, compact_scores
+from src.main import app
+
+
+def _scores(**values):
+    scores = np.zeros(len(BLENDSHAPE_NAMES), dtype=np.float32)
+    for name, value in values.items():
+        scores[BLENDSHAPE_NAMES.index(name)] = value
+    return scores
+
+
+def test_scores_are_indexed_by_category_index():
+    categories = [Category(index=25, score=0.5, category_name="jawOpen"), Category(index=9, score=0.25, category_name="eyeBlinkLeft")]
+    scores = blendshape_scores(categories)
+    assert scores.shape == (52,) and scores[25] == 0.5 and scores[9] == 0.25
+    assert blendshape_scores([]) is None
+    assert compact_scores(np.array([0.123456, 1e-7], dtype=np.float32)) == [0.1235, 0.0]
+
+
+def test_capture_verdicts_are_vectorized():
+    batch = np.stack([
+        _scores(eyeBlinkLeft=0.1, mouthSmileLeft=0.2),   # Exploitable
+        _scores(eyeBlinkRight=0.9),                      # Yeux fermés
+        _scores(mouthSmileRight=0.8, eyeSquintLeft=0.7), # Sourire (plissement toléré)
+    ])
+    verdicts = capture_verdicts(batch)
+    assert verdicts["acceptable"].tolist() == [True, False, False]
+    assert verdicts["eyes_open"].tolist() == [True, False, True]
+    assert verdicts["neutral_expression"].tolist() == [True, True, False]
+    np.testing.assert_allclose(verdicts["eye_openness"], [0.9, 0.1, 1.0], atol=1e-6)
+
+
+def test_assess_capture_reports_reasons():
+    good = assess_capture(_scores(eyeBlinkLeft=0.2))
+    assert good.acceptable and good.reasons == [] and good.eye_openness == 0.8
+    bad = assess_capture(_scores(eyeBlinkLeft=0.7, jawOpen=0.9))
+    assert not bad.acceptable
+    assert bad.reasons == ["yeux fermés", "expression non neutre (jawOpen)"]
+    assert assess_capture(_scores(eyeSquintRight=0.95)).reasons == ["yeux plissés"]
+
+
+def test_blendshape_names_endpoint():
+    response = TestClient(app).get("/api/v1/blendshape_names")
+    assert response.status_code == 200
+    names = response.json()
+    assert len(names) == 52 and names[9] == "eyeBlinkLeft" and names[-1] == "noseSneerRight"
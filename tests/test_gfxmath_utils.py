@@ -0,0 +1,58 @@
+# tests/test_gfxmath_utils.py
+
+import math
+import numpy as np
+from src.utils.gfxmath_utils import (GetPsudoCamera, GetWorldPoints, InvertPoses, TransformPoints,
+                                     VecDist, VecDists, makePose, makePoses)
+
+
+def _rotation(axis, degrees):
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    rotation = np.eye(4)
+    rotation[i, i], rotation[i, j], rotation[j, i], rotation[j, j] = c, -s, s, c
+    return rotation
+
+
+def test_make_poses_matches_composed_matrices():
+    """ makePoses(t, r, s)[k] == T . Rx . Ry . Rz . S pour chaque ligne (et makePose pour une pose). """
+    rng = np.random.default_rng(0)
+    translations, rotations, scales = rng.normal(0, 10, (50, 3)), rng.uniform(-180, 180, (50, 3)), rng.uniform(0.5, 2, (50, 3))
+    poses = makePoses(translations, rotations, scales)
+    for pose, t, r, s in zip(poses, translations, rotations, scales):
+        translation = np.eye(4)
+        translation[:3, 3] = t
+        expected = translation @ _rotation(0, r[0]) @ _rotation(1, r[1]) @ _rotation(2, r[2]) @ np.diag([*s, 1.0])
+        np.testing.assert_allclose(pose, expected, atol=1e-12)
+    np.testing.assert_allclose(makePose(translations[0], rotations[0], scales[0]), poses[0])
+    assert makePoses([0, 0, 1], rotations[:3]).shape == (3, 4, 4)  # Translation commune diffusée
+
+
+def test_invert_and_transform_points_batched():
+    rng = np.random.default_rng(1)
+    poses = makePoses(rng.normal(0, 10, (8, 3)), rng.uniform(-90, 90, (8, 3)), rng.uniform(0.5, 2, (8, 3))).reshape(2, 4, 4, 4)
+    np.testing.assert_allclose(InvertPoses(poses), np.linalg.inv(poses), atol=1e-12)
+
+    mesh = rng.normal(size=(478, 3))
+    transformed = TransformPoints(mesh, poses)  # Maillage commun, 2 x 4 poses
+    assert transformed.shape == (2, 4, 478, 3)
+    np.testing.assert_allclose(transformed[1, 2], mesh @ poses[1, 2, :3, :3].T + poses[1, 2, :3, 3], atol=1e-12)
+    np.testing.assert_allclose(TransformPoints(transformed, InvertPoses(poses)), np.broadcast_to(mesh, transformed.shape), atol=1e-9)
+
+    a, b = rng.normal(size=(10, 3)), rng.normal(size=(10, 3))
+    np.testing.assert_allclose(VecDists(a, b), [VecDist(p, q) for p, q in zip(a, b)])
+    np.testing.assert_allclose(VecDists(a, b[0]), np.linalg.norm(a - b[0], axis=1))
+
+
+def test_get_world_points_any_number_of_points():
+    """ 478 points (maillage facial) : les points du modèle sont translatés par l'opposé de la translation PnP. """
+    rng = np.random.default_rng(2)
+    model_points = rng.normal(0, 5, (478, 3))
+    camera_matrix, distortion = GetPsudoCamera(640, 480)
+    translation = np.array([1.0, -2.0, 60.0])
+    projected = (model_points + translation) @ camera_matrix.T
+    image_points = projected[:, :2] / projected[:, 2:]
+    world_points = GetWorldPoints(model_points, image_points, camera_matrix, distortion)
+    assert world_points.shape == (478, 4)
+    np.testing.assert_allclose(world_points[:, 3], 1.0)
+    np.testing.assert_allclose(world_points[:, :3], model_points - translation, atol=1e-6)
@@ -0,0 +1,123 @@
+# tests/test_job_queue.py
+
+import json
+import threading
+import time
+from fastapi.testclient import TestClient
+from src.api import jobs
+from src.core import job_queue
+from src.core.config import settings
+from src.core.job_queue import JobQueue, JobWorkerPool
+from src.main import app
+from src.schemas.schemas import FaceAnalysisResult
+
+
+def _wait_completed(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.progress(job_id).status != "completed":
+        assert time.monotonic() < deadline, "job non terminé dans le délai"
+        time.sleep(0.01)
+    return queue.progress(job_id)
+
+
+def test_queue_orders_by_priority_and_survives_restart(tmp_path):
+    """ Priorité de job d'abord ; une tâche interrompue par un arrêt brutal est remise en file. """
+    path = tmp_path / "jobs.sqlite3"
+    queue = JobQueue(path)
+    low = queue.submit([("a.jpg", b"a0"), ("b.jpg", b"a1")], priority=0)
+    high = queue.submit([("c.jpg", b"h0")], priority=5)
+
+    first, second = queue.claim_next(), queue.claim_next()
+    assert (first.job_id, first.image) == (high, b"h0")
+    assert (second.job_id, second.seq, second.filename) == (low, 0, "a.jpg")
+    queue.complete(first, b'{"ok":true}')
+    assert queue.progress(low).as_dict()["running"] == 1
+    queue.close()  # Arrêt avec la tâche `second` en cours
+
+    queue = JobQueue(path)
+    assert queue.progress(low).queued == 2 and queue.progress(low).status == "queued"
+    assert queue.progress(high).status == "completed"
+    assert queue.results(high) == [(0, "c.jpg", "done", b'{"ok":true}', None)]
+    assert queue.progress("inconnu") is None
+    queue.close()
+
+
+def test_worker_pool_yields_to_interactive_traffic(tmp_path):
+    """ Aucune tâche n'est réclamée tant qu'une analyse interactive est en cours. """
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    busy = threading.Event()
+    busy.set()
+
+    def process(image):
+        if image == b"bad":
+            raise ValueError("image illisible")
+        return b'"' + image + b'"'
+
+    pool = JobWorkerPool(queue, process, is_busy=busy.is_set, workers=2, idle_poll_s=0.01, yield_poll_s=0.01)
+    pool.start()
+    job_id = queue.submit([("1.jpg", b"one"), ("2.jpg", b"bad"), ("3.jpg", b"three")])
+    pool.notify()
+    time.sleep(0.1)
+    assert queue.progress(job_id).queued == 3 and pool.yields > 0
+
+    busy.clear()
+    progress = _wait_completed(queue, job_id)
+    pool.stop()
+    assert (progress.done, progress.failed, progress.finished_at is not None) == (2, 1, True)
+    rows = queue.results(job_id)
+    assert sorted(row[0] for row in rows) == [0, 1, 2]
+    assert {row[0]: row[3] or row[4] for row in rows} == {0: b'"one"', 1: "image illisible", 2: b'"three"'}
+    assert queue.results(job_id, offset=2) == rows[2:]  # Curseur = nombre de résultats déjà reçus
+    queue.close()
+
+
+def test_worker_pool_purges_expired_jobs_periodically(tmp_path):
+    """ Rétention appliquée par les workers en cours d'exécution, pas seulement au démarrage. """
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    pool = JobWorkerPool(queue, lambda image: b"{}", idle_poll_s=0.01, retention_s=0.0, purge_interval_s=0.05)
+    pool.start()
+    job_id = queue.submit([("a.jpg", b"a")])
+    pool.notify()
+    deadline = time.monotonic() + 5.0
+    while queue.progress(job_id) is not None:
+        assert time.monotonic() < deadline, "job terminé non purgé"
+        time.sleep(0.01)
+    pool.stop()
+    assert pool.snapshot()["purged"] == 1 and pool.processed == 1
+    queue.close()
+
+
+def test_jobs_api_submit_progress_and_stream(tmp_path, monkeypatch):
+    """ POST /jobs -> 202 + ID ; le flux NDJSON suivi se termine avec le job. """
+    monkeypatch.setattr(settings, "JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(jobs, "analyze_face_from_image_bytes",
+                        lambda image_bytes: FaceAnalysisResult(detection_successful=False, error_message="Aucun visage détecté."))
+    job_queue.close_job_queue()
+    jobs.start_job_workers()
+    try:
+        client = TestClient(app)
+        files = [("images", ("a.jpg", b"aaa", "image/jpeg")), ("images", ("b.jpg", b"bbb", "image/jpeg"))]
+        response = client.post("/api/v1/jobs", files=files, data={"priority": "3"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.headers["location"] == f"/api/v1/jobs/{job_id}"
+        assert response.json()["total"] == 2 and response.json()["priority"] == 3
+
+        stream = client.get(f"/api/v1/jobs/{job_id}/results", params={"follow": "true"})
+        assert stream.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in stream.text.splitlines()]
+        assert sorted(line["filename"] for line in lines) == ["a.jpg", "b.jpg"]
+        assert all(line["status"] == "done" and line["result"]["recommendation"] is None for line in lines)
+
+        progress = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert (progress["status"], progress["succeeded"], progress["failed"]) == ("completed", 2, 0)
+        assert client.get("/api/v1/jobs/inconnu").status_code == 404
+
+        # Volume total borné : 413 sans rien persister
+        monkeypatch.setattr(settings, "JOB_MAX_BYTES", 5)
+        response = client.post("/api/v1/jobs", files=files)
+        assert response.status_code == 413
+        assert job_queue.get_job_queue()._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+    finally:
+        jobs.stop_job_workers()
+        job_queue.close_job_queue()
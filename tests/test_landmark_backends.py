@@ -0,0 +1,75 @@
+# tests/test_landmark_backends.py
+
+import math
+import struct
+import numpy as np
+import pytest
+from src.core import landmark_backends
+from src.core.face_geometry import VERTICAL_FOV_DEG, get_face_geometry, parse_geometry_metadata
+from src.core.landmark_backends import MediaPipeLandmarkBackend, approximate_iris, create_landmark_backend
+from src.utils.gfxmath_utils import DecomposePose, makePose
+
+geometry = get_face_geometry()
+skip_if_no_model = pytest.mark.skipif(geometry is None, reason="Bundle .task Mediapipe absent (FACE_MODEL_PATH)")
+
+
+def _synthetic_landmarks(matrix, width, height):
+    """ Projette le visage canonique placé par `matrix` avec la caméra virtuelle Mediapipe. """
+    points = geometry.canonical @ matrix[:3, :3].T + matrix[:3, 3]
+    near_h = 2 * math.tan(math.radians(VERTICAL_FOV_DEG) / 2)
+    near_w = near_h * width / height
+    x = (points[:, 0] / -points[:, 2] + near_w / 2) / near_w
+    y = 1 - (points[:, 1] / -points[:, 2] + near_h / 2) / near_h
+    z = -(points[:, 2] - points[:, 2].mean()) / -matrix[2, 3] / near_w  # Plus proche = z plus petit
+    return np.stack([x, y, z], axis=1)
+
+
+def test_parse_geometry_metadata_wire_format():
+    def tag(field, wire):
+        return bytes([field << 3 | wire])
+
+    vertices = b"".join(tag(3, 5) + struct.pack("<f", v) for v in [1, 2, 3, 0, 0, 4, 5, 6, 0, 0])
+    mesh = tag(1, 0) + b"\x00" + vertices
+    basis = tag(1, 0) + b"\x01" + tag(2, 5) + struct.pack("<f", 0.5)
+    data = tag(1, 2) + bytes([len(mesh)]) + mesh + tag(2, 2) + bytes([len(basis)]) + basis + tag(3, 0) + b"\x01"
+    metadata = parse_geometry_metadata(data)
+    np.testing.assert_allclose(metadata.canonical_vertices, [[1, 2, 3], [4, 5, 6]])
+    np.testing.assert_allclose(metadata.procrustes_weights, [0.0, 0.5])
+    with pytest.raises(ValueError):
+        parse_geometry_metadata(tag(3, 0) + b"\x01")
+
+
+@skip_if_no_model
+def test_estimate_pose_recovers_synthetic_pose():
+    """ Pose retrouvée à ~2° / 4 % près (approximation du pipeline géométrique Mediapipe). """
+    assert geometry.canonical.shape == (468, 3)
+    for rotation, translation in [([10, -20, 5], [2, -1, -40]), ([-15, 30, -10], [-3, 4, -25])]:
+        matrix = makePose(translation, rotation)
+        estimated = geometry.estimate_pose(_synthetic_landmarks(matrix, 640, 480), 640, 480)
+        np.testing.assert_allclose(DecomposePose(estimated), DecomposePose(matrix), atol=2.5)
+        np.testing.assert_allclose(estimated[:3, 3], matrix[:3, 3], rtol=0.04, atol=0.2)
+
+
+def test_approximate_iris_follows_eye_contours():
+    mesh = np.zeros((468, 3))
+    mesh[landmark_backends._RIGHT_EYE_RING] = (0.30, 0.40, 0.01)
+    mesh[landmark_backends._LEFT_EYE_RING] = (0.70, 0.40, 0.02)
+    mesh[33], mesh[133] = (0.25, 0.40, 0.0), (0.35, 0.40, 0.0)
+    mesh[362], mesh[263] = (0.65, 0.40, 0.0), (0.75, 0.40, 0.0)
+    landmarks = approximate_iris(mesh)
+    assert landmarks.shape == (478, 3)
+    right_ring = np.mean(mesh[landmark_backends._RIGHT_EYE_RING], axis=0)
+    np.testing.assert_allclose(landmarks[468], right_ring)
+    np.testing.assert_allclose(landmarks[469, :2] - landmarks[468, :2], (0.022, 0.0), atol=1e-9)
+    np.testing.assert_allclose(landmarks[470, :2] - landmarks[468, :2], (0.0, -0.022), atol=1e-9)
+    assert landmarks[473, 0] > 0.6  # Iris gauche du sujet à droite de l'image
+
+
+def test_onnx_backend_falls_back_to_mediapipe(monkeypatch):
+    monkeypatch.setattr(landmark_backends, "ort", None)
+    backend = create_landmark_backend("onnx")
+    if backend is None:
+        pytest.skip("FaceLandmarker Mediapipe non disponible")
+    assert isinstance(backend, MediaPipeLandmarkBackend) and not backend.thread_safe
+    result = backend.detect(np.zeros((64, 64, 3), np.uint8))
+    assert result.face_landmarks == []
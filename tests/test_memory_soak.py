@@ -0,0 +1,27 @@
+# tests/test_memory_soak.py
+
+import pytest
+from benchmark.memory_soak import check_thresholds, growth_per_1k, run_soak
+
+
+def test_growth_per_1k_is_linear_slope():
+    assert growth_per_1k([0, 500, 1000], [10.0, 11.0, 12.0]) == pytest.approx(2.0)
+    assert growth_per_1k([0], [10.0]) == 0.0
+
+
+def test_soak_flags_leaking_pipeline():
+    """ Un pipeline qui retient ~1 Ko par requête dépasse le seuil ; un pipeline sans état le respecte. """
+    retained = []
+
+    def leaking(payload):
+        retained.append(bytearray(1024))
+        return payload
+
+    report = run_soak(leaking, [b"x"], iterations=400, warmup=10, sample_every=100, top_sites=3)
+    assert report["traced_growth_kb_per_1k"] > 500
+    assert any("tracemalloc" in failure for failure in check_thresholds(report, 1e9, 256))
+    assert report["top_allocation_sites"][0]["count_diff"] >= 400
+    assert len(report["samples"]) == 5
+
+    clean = run_soak(lambda payload: bytes(payload) * 1024, [b"x"], iterations=400, warmup=10, sample_every=100)
+    assert check_thresholds(clean, 1e9, 256) == []
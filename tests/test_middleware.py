@@ -0,0 +1,74 @@
+# tests/test_middleware.py
+
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.api.middleware import AdaptiveConcurrencyLimiter, AdaptiveConcurrencyMiddleware
+from src.core.config import settings
+
+
+def test_limiter_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=2, max_limit=5, target_latency_s=1.0, backoff=0.5)
+    for _ in range(4):
+        assert limiter.try_acquire()
+    assert not limiter.try_acquire()  # Limite atteinte : délestage
+    assert limiter.shed == 1
+
+    for _ in range(4):
+        limiter.release(0.1, now=0.0)
+    assert limiter.limit == pytest.approx(5.0, abs=0.1)  # ~+1 par fenêtre de 4 requêtes rapides
+
+    limiter.try_acquire(), limiter.try_acquire()
+    limiter.release(3.0, now=10.0)
+    limiter.release(3.0, now=10.2)  # Même fenêtre : une seule diminution
+    assert limiter.limit == pytest.approx(2.5, abs=0.1)
+    limiter.try_acquire()
+    limiter.release(3.0, now=20.0)
+    assert limiter.limit == 2.0  # Borne basse
+    assert limiter.in_flight == 0
+
+
+def test_middleware_sheds_excess_and_keeps_priority_lane():
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/jobs/{job_id}")
+    async def job(job_id: str):
+        return {"job_id": job_id}
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1, target_latency_s=5.0)
+    app.add_middleware(AdaptiveConcurrencyMiddleware, limiter=limiter, priority_paths=["/health", "/jobs*"])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow_calls = [asyncio.create_task(client.get("/slow")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            health = await client.get("/health")
+            job = await client.get("/jobs/abc")  # Préfixe prioritaire
+            return health, job, await asyncio.gather(*slow_calls)
+
+    health, job, responses = asyncio.run(scenario())
+    assert health.status_code == 200 and job.status_code == 200
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 503, 503]
+    shed = next(r for r in responses if r.status_code == 503)
+    assert shed.headers["retry-after"] == "5"
+    assert "saturé" in shed.json()["detail"]
+    assert limiter.snapshot()["shed"] == 2 and limiter.in_flight == 0
+
+
+def test_job_submission_is_not_a_priority_path():
+    """ Suivi des jobs prioritaire, soumission (lecture et persistance des images) limitée. """
+    middleware = AdaptiveConcurrencyMiddleware(None, AdaptiveConcurrencyLimiter(), settings.ADAPTIVE_CONCURRENCY_PRIORITY_PATHS)
+    assert not middleware._is_priority("/api/v1/jobs")
+    assert middleware._is_priority("/api/v1/jobs/abc") and middleware._is_priority("/api/v1/jobs/abc/results")
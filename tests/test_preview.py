@@ -0,0 +1,137 @@
+# tests/test_preview.py
+
+import cv2
+import numpy as np
+import pytest
+from src.core.config import settings
+from src.core.preview import (
+    CANONICAL_FACE_WIDTH, PreviewCache, SpriteCache, load_frame_mesh, pose_camera, render_previews, render_sprite,
+    sprite_placement,
+)
+from src.tools.render_previews import run_render_previews
+from src.utils.gfxmath_utils import makePose
+
+# Deux carrés de 4 x 2 : un opaque rouge à gauche, un translucide bleu à droite (verre), faces vers +z
+OBJ = """mtllib frame.mtl
+v -4 -1 0
+v 0 -1 0
+v 0 1 0
+v -4 1 0
+v 0 -1 0
+v 4 -1 0
+v 4 1 0
+v 0 1 0
+usemtl rouge
+f 1/1/1 2/2/1 3/3/1 4/4/1
+usemtl verre
+f -4 -3 -2 -1
+"""
+MTL = """newmtl rouge
+Kd 1.0 0.0 0.0
+newmtl verre
+Kd 0.0 0.0 1.0
+d 0.5
+"""
+
+
+@pytest.fixture
+def frame_obj(tmp_path, monkeypatch):
+    (tmp_path / "frame.obj").write_text(OBJ)
+    (tmp_path / "frame.mtl").write_text(MTL)
+    monkeypatch.setattr(settings, "MODEL_IDS_TO_PATHS", {"test_frame": str(tmp_path / "frame.obj")})
+    monkeypatch.setattr(settings, "PREVIEW_MODEL_ROTATIONS", {})
+    return tmp_path / "frame.obj"
+
+
+def test_mesh_is_fitted_to_the_canonical_face_and_rendered_with_materials(frame_obj):
+    mesh = load_frame_mesh(frame_obj)
+    assert mesh.triangles.shape == (4, 3)  # Quadrilatères triangulés en éventail, indices négatifs compris
+    width = mesh.vertices[:, 0].max() - mesh.vertices[:, 0].min()
+    assert width == pytest.approx(CANONICAL_FACE_WIDTH * settings.PREVIEW_FRAME_WIDTH_RATIO)
+    assert mesh.alphas.tolist() == [1.0, 1.0, 0.5, 0.5]
+    assert mesh.colors[0].tolist() == [0.0, 0.0, 255.0]  # Kd RVB -> BGR
+
+    sprite = render_sprite(mesh, 0, 0, px_per_cm=10)
+    height, width_px = sprite.image.shape[:2]
+    covered = np.count_nonzero(sprite.image[height // 2, :, 3] >= 64)  # Marges transparentes exclues
+    assert covered == pytest.approx(width * 10, abs=2)
+    left, right = sprite.image[height // 2, width_px // 4], sprite.image[height // 2, 3 * width_px // 4]
+    assert left.tolist() == [0, 0, 255, 255]
+    assert right[3] == pytest.approx(128, abs=1) and right[0] == pytest.approx(128, abs=1)  # Prémultiplié
+    assert sprite.image[0, 0, 3] == 0  # Marge transparente
+    # Rotation d'un autre angle : autre rendu, largeur apparente réduite par le lacet
+    assert render_sprite(mesh, 0, 40, px_per_cm=10).image.shape[1] < width_px
+
+
+def test_placement_recovers_angles_scale_and_anchor():
+    width, height = 640, 480
+    focal = pose_camera(width, height)[0, 0]
+    matrix = makePose(translation=(0, 0, -50), rotation=(12, -21, 0), scale=(1.1, 1.1, 1.1))
+    (pitch, yaw), roll, anchor, px_per_cm = sprite_placement(matrix, width, height)
+    assert (pitch, yaw) == (10, -20) and roll == pytest.approx(0, abs=1e-6)
+    assert anchor == pytest.approx((320, 240)) and px_per_cm == pytest.approx(focal * 1.1 / 50)
+
+    # Roulis appliqué après tangage et lacet (Rz.Rx.Ry), retrouvé exactement
+    matrix = makePose(translation=(0, 0, -50), rotation=(0, 0, 15)) @ makePose(rotation=(-8, 33, 0))
+    (pitch, yaw), roll, _, _ = sprite_placement(matrix, width, height)
+    assert (pitch, yaw) == (-10, 30) and roll == pytest.approx(15)
+    # Angles extrêmes bornés aux tranches rendues
+    assert sprite_placement(makePose(translation=(0, 0, -50), rotation=(80, 0, 0)), width, height)[0][0] == settings.PREVIEW_MAX_PITCH_DEG
+
+    # Visage décentré tourné vers la caméra : vu de face, pas de lacet ; ancre projetée en perspective
+    translation = np.array([20.0, 0.0, -50.0])
+    matrix = makePose(translation=translation, rotation=(0, -np.degrees(np.arctan2(20, 50)), 0))  # +z du visage vers la caméra
+    (pitch, yaw), _, anchor, _ = sprite_placement(matrix, width, height)
+    assert (pitch, yaw) == (0, 0) and anchor[0] == pytest.approx(320 + focal * 20 / 50)
+
+
+def test_previews_are_composited_and_cached(frame_obj, tmp_path):
+    image = np.full((300, 400, 3), 90, dtype=np.uint8)
+    image_bytes = cv2.imencode(".png", image)[1].tobytes()
+    matrix = makePose(translation=(0, -2.664, -40))  # Ligne des yeux au centre de l'image
+    sprites = SpriteCache(tmp_path / "sprites")
+    cache = PreviewCache(tmp_path / "previews")
+
+    previews = render_previews(image_bytes, matrix, ["test_frame"], sprites, cache)
+    preview = cv2.imdecode(np.frombuffer(previews["test_frame"], dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert preview.shape == image.shape
+    focal = pose_camera(400, 300)[0, 0]
+    offset = int(2 * focal / 40)  # 2 cm de part et d'autre du centre
+    assert preview[150, 200 - offset, 2] > 200 and preview[150, 200 - offset, 0] < 60  # Monture rouge opaque
+    assert 140 < preview[150, 200 + offset, 0] < 200  # Verre bleu à 50 % sur le fond gris
+    assert np.abs(preview[20, 20].astype(int) - 90).max() <= 3  # Fond intact (hors artefacts JPEG)
+
+    # Deuxième appel : relu du cache, aucun sprite demandé
+    hits = sprites.snapshot()
+    assert render_previews(image_bytes, matrix, ["test_frame"], sprites, cache) == previews
+    assert sprites.snapshot() == hits
+    # Sprites relus depuis le disque par un autre cache (autre processus)
+    reloaded = SpriteCache(tmp_path / "sprites")
+    np.testing.assert_array_equal(reloaded.get("test_frame", 0, 0).image, sprites.get("test_frame", 0, 0).image)
+    assert reloaded.snapshot()["loaded"] == 1 and reloaded.snapshot()["rendered"] == 0
+
+
+def test_batch_rendering_skips_cached_previews(frame_obj, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PREVIEW_SPRITE_DIR", str(tmp_path / "sprites"))
+    input_dir = tmp_path / "images"
+    (input_dir / "sub").mkdir(parents=True)
+    cv2.imwrite(str(input_dir / "sub" / "a.jpg"), np.full((120, 160, 3), 128, dtype=np.uint8))
+    (input_dir / "corrupt.jpg").write_bytes(b"not image data")
+    poses = {"sub/a.jpg": makePose(translation=(0, 0, -40)), "corrupt.jpg": makePose(translation=(0, 0, -40))}
+
+    summary = run_render_previews(input_dir, tmp_path / "out", ["test_frame"], workers=0, poses=poses)
+    assert summary["previews_rendered"] == 1 and summary["failures"] == 1
+    assert len(list((tmp_path / "out").rglob("*_test_frame_*.jpg"))) == 1
+    summary = run_render_previews(input_dir, tmp_path / "out", ["test_frame"], workers=0, poses=poses)
+    assert summary["previews_rendered"] == 0 and summary["previews_cached"] == 1
+
+    # Matériau ou réglage modifié : nouvelle variante, aperçus recomposés au lieu de l'ancien cache
+    (frame_obj.parent / "frame.mtl").write_text(MTL.replace("Kd 1.0 0.0 0.0", "Kd 0.0 1.0 0.0"))
+    summary = run_render_previews(input_dir, tmp_path / "out", ["test_frame"], workers=0, poses=poses)
+    assert summary["previews_rendered"] == 1 and summary["previews_cached"] == 0
+    monkeypatch.setattr(settings, "PREVIEW_JPEG_QUALITY", 60)
+    summary = run_render_previews(input_dir, tmp_path / "out", ["test_frame"], workers=0, poses=poses)
+    assert summary["previews_rendered"] == 1
+    assert len(list((tmp_path / "out").rglob("*_test_frame_*.jpg"))) == 3
+    with pytest.raises(ValueError):
+        run_render_previews(input_dir, tmp_path / "out", ["inconnue"], workers=0, poses=poses)
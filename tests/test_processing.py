@@ -1,13 +1,24 @@
 # tests/test_processing.py
 
 import pytest
+import cv2
+import numpy as np
+from types import SimpleNamespace
+from src.core import processing
 from src.core.processing import (
+    analyze_face_from_image_bytes,
     get_recommendations_for_face,
     determine_face_shape,
+    determine_face_shapes_batch,
+    head_pose_from_matrix,
+    head_pose_out_of_budget,
+    HEAD_TURNED_MESSAGE,
     # Importe les indices nécessaires
     TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE
 )
-from src.schemas.schemas import Landmark
+from src.core.config import settings
+from src.schemas.schemas import HeadPose, Landmark
+from src.utils.gfxmath_utils import DecomposePose, FrontalizeLandmarks, makePose
 from typing import List
 
 # --- Fonctions utilitaires pour créer des landmarks simulés ---
@@ -82,4 +93,88 @@ def test_determine_face_shape_simulated_other_wide():
 
 # Les anciens tests pour carré, rond, ovale, coeur, diamant ne sont plus pertinents
 # car la logique ne distingue plus ces formes spécifiquement.
-# On pourrait ajouter des tests aux limites des ratios RATIO_LONG et RATIO_PROP_LOW si besoin.
\ No newline at end of file
+# On pourrait ajouter des tests aux limites des ratios RATIO_LONG et RATIO_PROP_LOW si besoin.
+# --- Tests pour la version vectorisée determine_face_shapes_batch ---
+def test_determine_face_shapes_batch_matches_scalar_version():
+    """ La version vectorisée doit donner exactement les mêmes formes que determine_face_shape. """
+    rng = np.random.default_rng(0)
+    landmarks = rng.uniform(0, 1, size=(200, 478, 3)).astype(np.float32)
+    landmarks[0] = 0.5 # Mesures nulles -> inconnue
+    shapes = determine_face_shapes_batch(landmarks)
+    expected = [determine_face_shape([Landmark(x=float(x), y=float(y), z=float(z)) for x, y, z in face]) for face in landmarks]
+    assert shapes.tolist() == expected
+    assert shapes[0] == "inconnue"
+
+def test_determine_face_shapes_batch_nan_rows_are_unknown():
+    """ Les lignes NaN (visage non détecté dans un store/shard) sont classées inconnue. """
+    landmarks = np.full((2, 478, 3), np.nan, dtype=np.float32)
+    assert determine_face_shapes_batch(landmarks).tolist() == ["inconnue", "inconnue"]
+
+def test_determine_face_shapes_batch_insufficient_landmarks():
+    """ Trop peu de landmarks : tout est classé inconnue. """
+    assert determine_face_shapes_batch(np.zeros((3, 10, 3))).tolist() == ["inconnue"] * 3
+
+# --- Tests orientation de la tête (DecomposePose / redressement / budget d'angles) ---
+def test_decompose_pose_inverts_make_pose_batched():
+    rotations = np.array([[10, -25, 7], [0, 40, 0], [-15, 5, -30]], dtype=np.float64)
+    poses = np.stack([makePose([1, 2, -40], r, [1.5, 1.5, 1.5]) for r in rotations])
+    np.testing.assert_allclose(DecomposePose(poses), rotations, atol=1e-9)
+
+def test_frontalized_turned_head_keeps_its_shape():
+    """ Un visage 'proportionné' tourné de 35° paraît étroit en 2D ; redressé, il retrouve sa forme. """
+    points = { TOP_FOREHEAD: (0.5, 0.1, 0), BOTTOM_CHIN: (0.5, 0.9, 0), LEFT_TEMPLE: (0.1, 0.5, 0.1), RIGHT_TEMPLE: (0.9, 0.5, 0.1) }
+    pose = makePose(rotation=[0, 35, 0])
+    flip = np.diag([1.0, -1.0, -1.0])
+    frontal = np.array([(lm.x, lm.y, lm.z) for lm in create_mock_landmarks(points)])
+    center = frontal.mean(axis=0)
+    turned = (frontal - center) @ (flip @ pose[:3, :3] @ flip).T + center
+    turned_landmarks = [Landmark(x=x, y=y, z=z) for x, y, z in turned]
+    assert determine_face_shape(turned_landmarks) == "long"
+    assert determine_face_shape(turned_landmarks, frontalize_pose=pose) == "proportionné"
+    np.testing.assert_allclose(FrontalizeLandmarks(turned, pose), frontal, atol=1e-12)
+
+def test_head_pose_budget(monkeypatch):
+    head_pose = head_pose_from_matrix(makePose(rotation=[5, 40, -3]))
+    assert (round(head_pose.yaw), round(head_pose.pitch), round(head_pose.roll)) == (40, 5, -3)
+    message = head_pose_out_of_budget(head_pose)
+    assert message.startswith(HEAD_TURNED_MESSAGE) and "lacet 40.0°, limite " in message
+    # Juste au-delà de la limite : l'angle affiché la dépasse aussi
+    limit = settings.POSE_MAX_PITCH_DEG
+    assert f"tangage {limit + 0.3:.1f}°, limite {limit:g}°" in head_pose_out_of_budget(HeadPose(yaw=0.0, pitch=limit + 0.3, roll=0.0))
+    assert head_pose_out_of_budget(HeadPose(yaw=0.0, pitch=limit + 0.04, roll=0.0)) is None
+    assert head_pose_out_of_budget(head_pose_from_matrix(makePose(rotation=[5, 10, -3]))) is None
+    monkeypatch.setattr(settings, "POSE_GATING_ENABLED", False)
+    assert head_pose_out_of_budget(head_pose) is None
+
+
+class _FixedBackend:
+    """ Backend de landmarks simulé : un visage de face (478 points) et une pose fixe. """
+    name = "fixed"
+    thread_safe = True
+
+    def detect(self, image_rgb):
+        points = np.random.default_rng(0).uniform(0.3, 0.7, (478, 3))
+        points[[TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE]] = [(0.5, 0.1, 0), (0.5, 0.9, 0), (0.2, 0.5, 0), (0.8, 0.5, 0)]
+        return SimpleNamespace(
+            face_landmarks=[[SimpleNamespace(x=x, y=y, z=z) for x, y, z in points]],
+            facial_transformation_matrixes=[makePose([0, 0, -40], [5, 50, 0])],  # Lacet hors budget
+            face_blendshapes=None,
+        )
+
+@pytest.mark.parametrize("level, has_landmarks, shape_computed", [("pose", False, False), ("landmarks", True, False), ("full", True, True)])
+def test_analysis_levels_skip_unneeded_stages(monkeypatch, level, has_landmarks, shape_computed):
+    image = cv2.imencode(".jpg", np.random.default_rng(1).integers(0, 255, (240, 320, 3), dtype=np.uint8))[1].tobytes()
+    shape_calls = []
+    monkeypatch.setattr(processing, "get_landmark_backend", lambda: _FixedBackend())
+    monkeypatch.setattr(processing, "head_pose_out_of_budget", lambda head_pose: shape_calls.append("gate"))
+    monkeypatch.setattr(processing, "determine_face_shape", lambda landmarks, pose=None: shape_calls.append("shape") or "long")
+    result = analyze_face_from_image_bytes(image, analysis_level=level)
+    assert result.detection_successful and len(result.facial_transformation_matrix) == 4
+    assert round(result.head_pose.yaw) == 50  # Orientation fournie à tous les niveaux
+    assert (result.face_landmarks is not None) == has_landmarks and (result.field_array("face_landmarks") is not None) == has_landmarks
+    assert shape_calls == (["gate", "shape"] if shape_computed else [])
+    assert result.detected_face_shape == ("long" if shape_computed else None) and result.error_message is None
+
+def test_analysis_level_rejects_unknown_level():
+    with pytest.raises(ValueError):
+        analyze_face_from_image_bytes(b"", analysis_level="everything")
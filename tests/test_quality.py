@@ -0,0 +1,67 @@
+# tests/test_quality.py
+
+import cv2
+import numpy as np
+import pytest
+from src.core import quality
+from src.core.quality import QUALITY_REJECTED_MESSAGE, assess_image_quality, quality_rejection_message
+from benchmark.quality_gate_benchmark import summarize
+
+
+def textured_image(height: int = 480, width: int = 640) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def shaded_image(height: int = 480, width: int = 640) -> np.ndarray:
+    """ Dégradé horizontal bruité : le contraste survit à un flou, contrairement au bruit seul. """
+    rng = np.random.default_rng(0)
+    shade = np.repeat(np.linspace(0, 255, width)[None, :, None], height, axis=0)
+    return np.clip(shade + rng.normal(0, 30, (height, width, 3)), 0, 255).astype(np.uint8)
+
+
+@pytest.fixture(autouse=True)
+def gate_enabled(monkeypatch):
+    monkeypatch.setattr(quality.settings, "QUALITY_GATE_ENABLED", True)
+
+
+def test_textured_image_is_accepted():
+    assert assess_image_quality(shaded_image()).accepted
+    report = assess_image_quality(textured_image())
+    assert report.accepted
+    assert report.blur_variance > 100 and report.contrast > 10
+
+
+@pytest.mark.parametrize("image, reason", [
+    (textured_image(12, 20), "trop petite"),
+    (np.zeros((480, 640, 3), dtype=np.uint8), "trop sombre"),
+    (np.full((480, 640, 3), 255, dtype=np.uint8), "surexposée"),
+    (np.full((480, 640, 3), 128, dtype=np.uint8), "contraste"),
+    # Dégradé linéaire : contraste suffisant mais aucun détail (Laplacien nul hors bords)
+    (np.repeat(np.arange(256, dtype=np.uint8)[None, :, None], 256, axis=0).repeat(3, axis=2), "floue"),
+    # Dégradations de benchmark.quality_gate_benchmark --degrade : sous-exposition et flou nets
+    ((textured_image() * 0.02).astype(np.uint8), "trop sombre"),
+    (cv2.GaussianBlur(shaded_image(), (0, 0), 640 / 40), "floue"),
+])
+def test_unusable_images_are_rejected_with_reason(image, reason):
+    message = quality_rejection_message(image)
+    assert message.startswith(QUALITY_REJECTED_MESSAGE)
+    assert reason in message
+
+
+def test_gate_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(quality.settings, "QUALITY_GATE_ENABLED", False)
+    assert quality_rejection_message(np.zeros((480, 640, 3), dtype=np.uint8)) is None
+
+
+def test_benchmark_summary_counts_savings_and_false_rejects():
+    samples = [
+        {"rejected": True, "detected": False, "detect_ms": 30.0, "gate_ms": 0.5, "reason": "image trop sombre"},
+        {"rejected": True, "detected": True, "detect_ms": 30.0, "gate_ms": 0.5, "reason": "image trop floue"},
+        {"rejected": False, "detected": True, "detect_ms": 30.0, "gate_ms": 0.5, "reason": None},
+        {"rejected": False, "detected": False, "detect_ms": 30.0, "gate_ms": 0.5, "reason": None},
+    ]
+    summary = summarize(samples)
+    assert summary["false_reject_rate"] == pytest.approx(0.5)
+    assert summary["failure_interception_rate"] == pytest.approx(0.5)
+    assert summary["net_saved_ms"] == pytest.approx(58.0)
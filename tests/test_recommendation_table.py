@@ -0,0 +1,89 @@
+# tests/test_recommendation_table.py
+
+import json
+import pytest
+from src.core import recommendation_table
+from src.core.recommendation_table import (
+    DEFAULT_FALLBACK_IDS,
+    DEFAULT_RECOMMENDATION_RULES,
+    compile_recommendation_table,
+    get_recommendation_table,
+    reload_recommendation_table,
+)
+from src.schemas.schemas import RecommendationResult
+
+CATALOGUE = ["sunglass_model_1", "sunglass_model_2", "sunglass_model_3"]
+
+
+def test_compiled_entries_hold_preserialized_bodies():
+    """ Le corps précompilé est exactement la sérialisation du RecommendationResult. """
+    table = compile_recommendation_table(DEFAULT_RECOMMENDATION_RULES, DEFAULT_FALLBACK_IDS, CATALOGUE)
+    entry = table.lookup("long")
+    assert entry.recommended_ids == ("sunglass_model_2", "sunglass_model_3")
+    expected = RecommendationResult(recommended_glasses_ids=list(entry.recommended_ids), analysis_info=entry.analysis_info)
+    assert entry.response_body == expected.model_dump_json().encode("utf-8")
+    with pytest.raises(TypeError):
+        table.entries["long"] = entry  # Table immuable
+
+
+@pytest.mark.parametrize("face_shape", ["proportionné", "  Proportionné ", "PROPORTIONNÉ"])
+def test_lookup_normalizes_known_shapes(face_shape):
+    table = compile_recommendation_table(DEFAULT_RECOMMENDATION_RULES, DEFAULT_FALLBACK_IDS, CATALOGUE)
+    assert table.lookup(face_shape) is table.entries["proportionné"]
+
+
+def test_unknown_shape_uses_fallback_without_caching():
+    table = compile_recommendation_table(DEFAULT_RECOMMENDATION_RULES, DEFAULT_FALLBACK_IDS, CATALOGUE)
+    entry = table.lookup("triangle")
+    assert entry.recommended_ids == tuple(DEFAULT_FALLBACK_IDS)
+    assert "'triangle' non reconnue" in json.loads(entry.response_body)["analysis_info"]
+    assert "triangle" not in table.entries
+
+
+def test_ids_missing_from_catalogue_are_dropped():
+    table = compile_recommendation_table({"long": ["sunglass_model_2", "retired_model"]}, ["retired_model"], CATALOGUE)
+    assert table.lookup("long").recommended_ids == ("sunglass_model_2",)
+    assert table.fallback_ids == ()
+
+
+def test_reload_swaps_table_atomically(monkeypatch, tmp_path):
+    """ Le rechargement publie une nouvelle table ; l'ancienne reste valide pour les lecteurs en cours. """
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"rules": {"long": ["sunglass_model_1"]}, "fallback": ["sunglass_model_3"]}))
+    old_table = get_recommendation_table()
+    monkeypatch.setattr(recommendation_table.settings, "RECOMMENDATION_RULES_PATH", str(rules_path))
+    try:
+        new_table = reload_recommendation_table()
+        assert get_recommendation_table() is new_table
+        assert new_table.lookup("long").recommended_ids == ("sunglass_model_1",)
+        assert old_table.lookup("long").recommended_ids == ("sunglass_model_2", "sunglass_model_3")
+    finally:
+        monkeypatch.undo()
+        reload_recommendation_table()
+
+
+def test_table_is_recompiled_when_catalogue_or_rules_change(monkeypatch, tmp_path):
+    """ Sans redémarrage : une modification du catalogue ou du fichier de règles change le corps servi. """
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"rules": {"long": ["sunglass_model_1", "sunglass_model_2"]}, "fallback": []}))
+    monkeypatch.setattr(recommendation_table.settings, "RECOMMENDATION_RULES_PATH", str(rules_path))
+    monkeypatch.setattr(recommendation_table.settings, "RECOMMENDATION_RELOAD_CHECK_S", 0.0)
+    try:
+        reload_recommendation_table()
+        before = get_recommendation_table().lookup("long").response_body
+        assert json.loads(before)["recommended_glasses_ids"] == ["sunglass_model_1", "sunglass_model_2"]
+
+        # Modèle retiré du catalogue
+        catalogue = dict(recommendation_table.settings.MODEL_IDS_TO_PATHS)
+        del catalogue["sunglass_model_1"]
+        monkeypatch.setattr(recommendation_table.settings, "MODEL_IDS_TO_PATHS", catalogue)
+        assert json.loads(get_recommendation_table().lookup("long").response_body)["recommended_glasses_ids"] == ["sunglass_model_2"]
+
+        # Règles réécrites
+        rules_path.write_text(json.dumps({"rules": {"long": ["sunglass_model_3"]}, "fallback": []}))
+        assert json.loads(get_recommendation_table().lookup("long").response_body)["recommended_glasses_ids"] == ["sunglass_model_3"]
+        # Sources inchangées : même table, pas de recompilation
+        assert get_recommendation_table() is get_recommendation_table()
+    finally:
+        monkeypatch.undo()
+        reload_recommendation_table()
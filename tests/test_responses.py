@@ -0,0 +1,75 @@
+# tests/test_responses.py
+
+import json
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from src.api import responses
+from src.api.responses import FastJSONResponse, landmarks_array_to_json
+from src.schemas.rpc_messages import decode_face_analysis, encode_face_analysis
+from src.schemas.schemas import AnalyzeAndRecommendResult, FaceAnalysisResult, Landmark, RecommendationResult
+from benchmark.serialization_benchmark import run_serialization_benchmark, synthetic_analysis
+
+
+def combined_result(analysis: FaceAnalysisResult) -> AnalyzeAndRecommendResult:
+    recommendation = RecommendationResult(recommended_glasses_ids=["sunglass_model_1"], analysis_info="Forme : Long")
+    return AnalyzeAndRecommendResult(analysis=analysis, recommendation=recommendation)
+
+
+def test_fast_response_matches_default_serialization():
+    """ Même JSON (clés, ordre, valeurs) que pydantic et que le chemin FastAPI par défaut. """
+    model = combined_result(synthetic_analysis())
+    body = FastJSONResponse(content=model).body
+    assert body == model.model_dump_json().encode("utf-8")
+    assert json.loads(body) == jsonable_encoder(model)
+
+
+def test_fast_path_ignores_stale_arrays():
+    """ Un tableau NumPy incohérent avec le champ n'est pas utilisé : le champ fait foi. """
+    analysis = synthetic_analysis()
+    analysis.face_landmarks = analysis.face_landmarks[:10]
+    analysis.attach_arrays(landmarks=analysis._landmarks_array)  # Matrice sans copie NumPy
+    assert FastJSONResponse(content=analysis).body == analysis.model_dump_json().encode("utf-8")
+
+
+def test_reassigned_fields_of_same_length_replace_the_arrays():
+    """ Champ réassigné à longueur égale : la nouvelle valeur est sérialisée (JSON et RPC), pas l'ancienne copie. """
+    analysis = synthetic_analysis()
+    analysis.face_landmarks = [Landmark(x=1.0, y=2.0, z=3.0) for _ in analysis.face_landmarks]
+    analysis.facial_transformation_matrix = [[float(i == j) for j in range(4)] for i in range(4)]
+    assert FastJSONResponse(content=analysis).body == analysis.model_dump_json().encode("utf-8")
+    decoded = decode_face_analysis(encode_face_analysis(analysis))
+    np.testing.assert_array_equal(decoded["face_landmarks"], np.tile([1.0, 2.0, 3.0], (len(analysis.face_landmarks), 1)))
+    np.testing.assert_array_equal(decoded["facial_transformation_matrix"], np.eye(4))
+    # Copie par model_copy : les tableaux restent valables tant que les champs ne changent pas
+    copy = analysis.model_copy()
+    assert copy.field_array("face_landmarks") is None  # Déjà invalidé sur l'original
+    analysis.attach_arrays(landmarks=np.tile(np.float32([1.0, 2.0, 3.0]), (len(analysis.face_landmarks), 1)))
+    assert analysis.model_copy().field_array("face_landmarks") is not None
+    assert analysis.model_copy(update={"face_landmarks": analysis.face_landmarks[:]}).field_array("face_landmarks") is None
+
+
+def test_failed_analysis_and_json_fallback(monkeypatch):
+    """ Sans orjson, repli sur json avec le même résultat. """
+    failed = FaceAnalysisResult(detection_successful=False, error_message="Aucun visage détecté.")
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(FastJSONResponse(content=failed).body) == failed.model_dump()
+    points = np.array([[0.5, 0.25, -0.125], [1.0, 0.0, 2.5]], dtype=np.float32)
+    assert json.loads(landmarks_array_to_json(points)) == [
+        {"x": 0.5, "y": 0.25, "z": -0.125}, {"x": 1.0, "y": 0.0, "z": 2.5}
+    ]
+
+
+def test_private_arrays_stay_out_of_schema():
+    """ Le contrat JSON (schéma OpenAPI) est inchangé par les tableaux attachés. """
+    properties = FaceAnalysisResult.model_json_schema()["properties"]
+    assert list(properties) == [
+        "detection_successful", "facial_transformation_matrix", "face_landmarks", "detected_face_shape", "error_message",
+        "head_pose", "blendshapes", "capture_quality",
+    ]
+
+
+def test_serialization_benchmark_reports_identical_json():
+    results = run_serialization_benchmark(combined_result(synthetic_analysis()), repeats=3)
+    assert set(results) == {"fastapi_default", "model_dump_json", "fast_response"}
+    assert all(entry["same_json"] for entry in results.values())
@@ -0,0 +1,80 @@
+# tests/test_result_store.py
+
+import numpy as np
+import pytest
+from src.core.processing import determine_face_shapes_batch, TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE
+from src.core.result_store import LandmarkResultStore
+from src.schemas.schemas import FaceAnalysisResult, Landmark
+
+
+def random_face(rng: np.random.Generator) -> np.ndarray:
+    return rng.uniform(0, 1, size=(478, 3)).astype(np.float32)
+
+
+def test_append_get_and_reopen(tmp_path):
+    """ Ajout, relecture par ID, persistance après réouverture et croissance par segments. """
+    rng = np.random.default_rng(1)
+    faces = [random_face(rng) for _ in range(5)]
+    with LandmarkResultStore(tmp_path / "store", segment_size=2) as store:
+        for i, face in enumerate(faces):
+            store.append(f"id-{i}", face, np.eye(4) * i, "long", metadata={"source": f"img{i}.jpg"})
+        store.append("missing", None, None, None, detection_successful=False)
+        with pytest.raises(ValueError):
+            store.append("id-0", faces[0], np.eye(4))
+
+    store = LandmarkResultStore(tmp_path / "store")
+    assert len(store) == 6
+    stored = store.get("id-3")
+    assert np.array_equal(stored.landmarks, faces[3])
+    assert np.array_equal(stored.facial_transformation_matrix, np.eye(4, dtype=np.float32) * 3)
+    assert stored.detected_face_shape == "long"
+    assert stored.metadata == {"source": "img3.jpg"}
+    missing = store.get("missing")
+    assert not missing.detection_successful
+    assert np.isnan(missing.landmarks).all() and np.isnan(missing.facial_transformation_matrix).all()
+    assert store.get("inexistant") is None
+    store.close()
+
+
+def test_append_analysis_result(tmp_path):
+    """ Un FaceAnalysisResult pydantic est converti en tableaux. """
+    analysis = FaceAnalysisResult(
+        detection_successful=True,
+        facial_transformation_matrix=np.eye(4).tolist(),
+        face_landmarks=[Landmark(x=0.1, y=0.2, z=0.3)] * 478,
+        detected_face_shape="autre",
+    )
+    with LandmarkResultStore(tmp_path / "store") as store:
+        store.append_analysis("abc", analysis)
+        stored = store.get("abc")
+    assert np.allclose(stored.landmarks[0], [0.1, 0.2, 0.3])
+    assert stored.detected_face_shape == "autre"
+
+
+def test_scan_and_vectorized_reclassify(tmp_path):
+    """ La re-classification vectorisée (scan par segments) égale la classification directe. """
+    rng = np.random.default_rng(2)
+    faces = np.stack([random_face(rng) for _ in range(7)])
+    with LandmarkResultStore(tmp_path / "store", segment_size=3) as store:
+        for i, face in enumerate(faces):
+            store.append(f"id-{i}", face, np.eye(4))
+
+        batches = list(store.scan(landmark_indices=[TOP_FOREHEAD, BOTTOM_CHIN]))
+        assert [len(b["ids"]) for b in batches] == [3, 3, 1]
+        assert np.array_equal(np.concatenate([b["landmarks"] for b in batches]), faces[:, [TOP_FOREHEAD, BOTTOM_CHIN]])
+
+        shapes = store.reclassify(determine_face_shapes_batch, update=True)
+        assert shapes.tolist() == determine_face_shapes_batch(faces).tolist()
+        assert store.get("id-4").detected_face_shape == shapes[4]
+
+        # Même résultat en ne lisant que les 4 points utiles
+        indices = [TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE]
+        compact = store.reclassify(_classify_compact, landmark_indices=indices)
+        assert compact.tolist() == shapes.tolist()
+
+
+def _classify_compact(points: np.ndarray) -> np.ndarray:
+    """ Replace les 4 points lus dans un tableau 478 points creux pour réutiliser la classification. """
+    full = np.zeros((points.shape[0], 478, 3), dtype=np.float32)
+    full[:, [TOP_FOREHEAD, BOTTOM_CHIN, LEFT_TEMPLE, RIGHT_TEMPLE]] = points
+    return determine_face_shapes_batch(full)
@@ -0,0 +1,125 @@
+# tests/test_rpc.py
+
+import asyncio
+import numpy as np
+import pytest
+from src.api import endpoints
+from src.api.middleware import AdaptiveConcurrencyLimiter
+from src.api.rpc import RpcClient, RpcError, RpcServer
+from src.schemas.rpc_messages import (
+    MessageDecodeError, decode_analyze_and_recommend, decode_analyze_request, decode_face_analysis,
+    encode_analyze_and_recommend, encode_analyze_request, encode_face_analysis,
+)
+from src.schemas.schemas import AnalyzeAndRecommendResult, CaptureQuality, FaceAnalysisResult, HeadPose, Landmark, RecommendationResult
+
+
+def _result(seed=0.0, shape="ovale"):
+    points = np.arange(478 * 3, dtype=np.float64).reshape(478, 3) / 1000 + seed
+    matrix = np.eye(4) * 2 + seed
+    result = FaceAnalysisResult(
+        detection_successful=True,
+        facial_transformation_matrix=matrix.tolist(),
+        face_landmarks=[Landmark(x=x, y=y, z=z) for x, y, z in points],
+        detected_face_shape=shape,
+        head_pose=HeadPose(yaw=-4.5, pitch=6.25, roll=1.0),
+        blendshapes=[0.0, 0.5, 0.25],
+        capture_quality=CaptureQuality(acceptable=False, eyes_open=True, neutral_expression=False, eye_openness=0.9,
+                                       expression_intensity=0.75, reasons=["Expression marquée", "sourire"]),
+    )
+    result.attach_arrays(landmarks=points, matrix=matrix)
+    return result
+
+
+def test_messages_round_trip_with_packed_floats():
+    result = _result()
+    message = encode_face_analysis(result)
+    decoded = decode_face_analysis(message)
+    assert len(message) < 6000  # 478 x 3 float32 + champs scalaires
+    assert decoded["face_landmarks"].dtype == np.float32 and decoded["face_landmarks"].shape == (478, 3)
+    np.testing.assert_allclose(decoded["face_landmarks"], result.field_array("face_landmarks"), rtol=1e-6)
+    np.testing.assert_allclose(decoded["facial_transformation_matrix"], result.field_array("facial_transformation_matrix"), rtol=1e-6)
+    assert decoded["head_pose"] == {"yaw": -4.5, "pitch": 6.25, "roll": 1.0}
+    assert decoded["capture_quality"]["reasons"] == ["Expression marquée", "sourire"] and decoded["capture_quality"]["eyes_open"]
+    assert decoded["detected_face_shape"] == "ovale" and decoded["error_message"] is None
+
+    # Sans tableaux NumPy attachés (résultat reconstruit), mêmes octets
+    assert encode_face_analysis(FaceAnalysisResult(**result.model_dump())) == message
+    # Champs absents : None, pas de valeurs par défaut inventées
+    empty = decode_face_analysis(encode_face_analysis(FaceAnalysisResult(detection_successful=False, error_message="Aucun visage")))
+    assert empty["face_landmarks"] is None and empty["head_pose"] is None and empty["error_message"] == "Aucun visage"
+
+    combined = AnalyzeAndRecommendResult(analysis=result, recommendation=RecommendationResult(recommended_glasses_ids=["a", "b"]))
+    decoded = decode_analyze_and_recommend(encode_analyze_and_recommend(combined))
+    assert decoded["recommendation"] == {"recommended_glasses_ids": ["a", "b"], "analysis_info": None}
+
+
+def test_request_decoding_and_validation():
+    request = decode_analyze_request(encode_analyze_request(b"img", "pose", "s-1", 1500.5))
+    assert request == {"image": b"img", "analysis_level": "pose", "session_id": "s-1", "capture_timestamp_ms": 1500.5}
+    assert decode_analyze_request(encode_analyze_request(b"img"))["analysis_level"] == "full"
+    with pytest.raises(MessageDecodeError):
+        decode_analyze_request(b"\x10\x09")  # Niveau 9 inconnu
+    with pytest.raises(MessageDecodeError):
+        decode_analyze_request(b"\x0a\x05ab")  # Image tronquée
+
+
+def _serve(client_calls, limiter=None):
+    """ Serveur RPC sur un port libre ; client_calls(port) exécuté dans un thread (client bloquant). """
+    async def scenario():
+        server = RpcServer(limiter)
+        port = await server.start("127.0.0.1", 0)
+        try:
+            return await asyncio.to_thread(client_calls, port), server.snapshot()
+        finally:
+            await server.stop()
+    return asyncio.run(scenario())
+
+
+def test_unary_and_streaming_calls_share_the_rest_processing(monkeypatch):
+    calls = []
+
+    def fake_analysis(image_bytes, session_id=None, timestamp=None, analysis_level="full"):
+        calls.append((image_bytes, session_id, timestamp, analysis_level))
+        return _result(seed=len(image_bytes))
+
+    monkeypatch.setattr(endpoints, "analyze_face_from_image_bytes", fake_analysis)
+
+    def client_calls(port):
+        with RpcClient(port=port) as client:
+            single = client.analyze_face(b"a", analysis_level="pose")
+            combined = client.analyze_and_recommend(b"bb")
+            frames = [{"image": b"x" * (i + 3), "session_id": "cam-1", "capture_timestamp_ms": 1000.0 * i} for i in range(6)]
+            streamed = list(client.analyze_stream(frames, window=3))
+            pipelined = list(client.analyze_face_pipelined([{"image": b"p" * n} for n in (5, 1, 3)], window=2))
+            with pytest.raises(RpcError) as empty_image:
+                client.analyze_face(b"")
+            after_error = client.analyze_face(b"c")  # La connexion reste utilisable
+        return single, combined, streamed, pipelined, empty_image.value, after_error
+
+    (single, combined, streamed, pipelined, empty_image, after_error), snapshot = _serve(client_calls)
+    assert single["face_landmarks"][0, 0] == pytest.approx(1.0)
+    assert combined["recommendation"]["recommended_glasses_ids"] and combined["analysis"]["detected_face_shape"] == "ovale"
+    # Flux : réponses dans l'ordre d'envoi, session et horodatage transmis au traitement
+    assert [frame["face_landmarks"][0, 0] for frame in streamed] == pytest.approx([3, 4, 5, 6, 7, 8])
+    assert [c[1:] for c in calls[2:8]] == [("cam-1", float(i), "full") for i in range(6)]
+    assert calls[0][3] == "pose" and calls[1][3] == "full"
+    assert [frame["face_landmarks"][0, 0] for frame in pipelined] == pytest.approx([5, 1, 3])  # Ordre des requêtes
+    assert empty_image.status == 400 and after_error["detection_successful"]
+    assert snapshot["requests"] == 13 and snapshot["errors"] == 1
+
+
+def test_rpc_requests_go_through_the_concurrency_limiter(monkeypatch):
+    monkeypatch.setattr(endpoints, "analyze_face_from_image_bytes", lambda image_bytes, **kwargs: _result())
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1)
+    limiter.in_flight = 1  # Limite atteinte par une requête HTTP en cours
+
+    def client_calls(port):
+        with RpcClient(port=port) as client:
+            with pytest.raises(RpcError) as shed:
+                client.analyze_face(b"a")
+            limiter.in_flight = 0
+            return shed.value, client.analyze_face(b"a")
+
+    (shed, admitted), _ = _serve(client_calls, limiter)
+    assert shed.status == 503 and admitted["detection_successful"]
+    assert limiter.shed == 1 and limiter.admitted == 1 and limiter.in_flight == 0
@@ -0,0 +1,104 @@
+# tests/test_shape_classifier.py
+
+import json
+import numpy as np
+import pytest
+from pathlib import Path
+from src.core import shape_classifier
+from src.core.shape_classifier import (
+    FEATURE_LANDMARKS,
+    NearestCentroidClassifier,
+    RulesClassifier,
+    extract_geometry_features,
+    fit_nearest_centroid,
+    load_classifier,
+    reload_shape_classifier,
+    save_classifier,
+)
+from benchmark.shape_classifier_evaluation import evaluate_classifier
+
+SHIPPED_RULES_ARTIFACT = Path(__file__).parent.parent / "models" / "shape_classifiers" / "rules_v1.json"
+
+
+def synthetic_faces(length: float, width: float, count: int, rng: np.random.Generator) -> np.ndarray:
+    """ Visages synthétiques (478 points) de longueur/largeur données, avec un léger bruit. """
+    faces = np.full((count, 478, 3), 0.5, dtype=np.float32)
+    noise = rng.normal(0, 0.005, size=(count, len(FEATURE_LANDMARKS), 2))
+    base = np.array([
+        (0.5, 0.5 - length / 2), (0.5, 0.5 + length / 2),   # front, menton
+        (0.5 - width / 2, 0.5), (0.5 + width / 2, 0.5),     # pommettes
+        (0.5 - width / 3, 0.7), (0.5 + width / 3, 0.7),     # mâchoire
+        (0.5 - width / 2.5, 0.3), (0.5 + width / 2.5, 0.3), # front (largeur)
+    ])
+    faces[:, FEATURE_LANDMARKS, :2] = base + noise
+    return faces
+
+
+def test_shipped_rules_artifact_matches_historic_thresholds():
+    """ L'artefact livré reproduit les seuils V6 (1.20 / 0.90). """
+    classifier = load_classifier(SHIPPED_RULES_ARTIFACT)
+    assert isinstance(classifier, RulesClassifier)
+    assert (classifier.ratio_long, classifier.ratio_prop_low) == (1.20, 0.90)
+    features = np.array([[1.5, 1, 1, 1], [1.2, 1, 1, 1], [0.9, 1, 1, 1], [0.5, 1, 1, 1]])
+    assert classifier.predict_features(features).tolist() == ["long", "proportionné", "proportionné", "autre"]
+
+
+def test_features_invalid_rows_are_nan():
+    faces = np.full((2, 478, 3), 0.5, dtype=np.float32)
+    faces[1] = np.nan
+    assert np.isnan(extract_geometry_features(faces)).all()
+    assert np.isnan(extract_geometry_features(np.zeros((1, 10, 3)))).all()
+
+
+def test_nearest_centroid_fit_roundtrip_and_classify(tmp_path):
+    """ Entraînement, sauvegarde/rechargement de l'artefact et classification vectorisée. """
+    rng = np.random.default_rng(0)
+    long_faces = synthetic_faces(0.6, 0.4, 20, rng)
+    wide_faces = synthetic_faces(0.4, 0.6, 20, rng)
+    landmarks = np.concatenate([long_faces, wide_faces])
+    labels = ["long"] * 20 + ["large"] * 20
+
+    model = fit_nearest_centroid(extract_geometry_features(landmarks), labels, "nc-test")
+    artifact_path = tmp_path / "nc.json"
+    save_classifier(model, artifact_path)
+    reloaded = load_classifier(artifact_path)
+    assert isinstance(reloaded, NearestCentroidClassifier)
+    assert reloaded.version == "nc-test"
+    assert reloaded.training["num_samples"] == 40
+
+    landmarks[0] = np.nan  # Visage non détecté
+    predictions = reloaded.classify_batch(landmarks)
+    assert predictions[0] == "inconnue"
+    assert predictions[1:].tolist() == labels[1:]
+
+
+@pytest.mark.parametrize("artifact, message", [
+    ({"format_version": 99, "type": "rules"}, "format"),
+    ({"format_version": 1, "type": "svm", "version": "x", "params": {}}, "inconnu"),
+])
+def test_load_invalid_artifacts(tmp_path, artifact, message):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps(artifact))
+    with pytest.raises(ValueError, match=message):
+        load_classifier(path)
+
+
+def test_reload_falls_back_to_builtin_rules(monkeypatch, tmp_path):
+    """ Un artefact absent n'empêche pas l'analyse : retour aux règles intégrées. """
+    monkeypatch.setattr(shape_classifier.settings, "SHAPE_CLASSIFIER_PATH", str(tmp_path / "absent.json"))
+    try:
+        assert reload_shape_classifier() is shape_classifier.DEFAULT_RULES_CLASSIFIER
+    finally:
+        monkeypatch.undo()
+        reload_shape_classifier()
+
+
+def test_evaluate_classifier_reports_accuracy_and_cost():
+    rng = np.random.default_rng(1)
+    landmarks = np.concatenate([synthetic_faces(0.7, 0.4, 5, rng), synthetic_faces(0.4, 0.7, 5, rng)])
+    labels = ["long"] * 5 + ["proportionné"] * 5
+    report = evaluate_classifier(RulesClassifier("rules-test", 1.20, 0.90), landmarks, labels, repeats=2)
+    assert report["value"] == pytest.approx(0.5)
+    assert report["details"]["per_label_recall"] == {"long": 1.0, "proportionné": 0.0}
+    assert report["details"]["confusion"]["proportionné"] == {"autre": 5}
+    assert report["details"]["throughput_faces_per_s"] > 0
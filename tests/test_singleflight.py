@@ -0,0 +1,84 @@
+# tests/test_singleflight.py
+
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from src.api import endpoints
+from src.core.singleflight import SingleFlight
+from src.main import app
+from src.schemas.schemas import FaceAnalysisResult
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def scenario():
+        same = [flight.do("a", lambda: compute(21)) for _ in range(4)]
+        other = flight.do("b", lambda: compute(5))
+        return await asyncio.gather(*same, other)
+
+    results = asyncio.run(scenario())
+    assert [r[0] for r in results] == [42, 42, 42, 42, 10]
+    assert [r[1] for r in results] == [False, True, True, True, False]
+    assert calls == [21, 5]
+    assert flight.snapshot() == {"executions": 2, "coalesced": 3, "in_flight": 0}
+
+
+def test_errors_propagate_to_waiters_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("échec")
+
+    async def scenario():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(flight) == 0  # Rien n'est conservé : l'appel suivant ré-exécute
+
+
+def test_identical_uploads_run_one_analysis(monkeypatch):
+    """ Deux envois simultanés de la même image : une analyse, deux réponses indépendantes. """
+    calls = []
+    lock = threading.Lock()
+
+    def fake_analysis(image_bytes, session_id=None, timestamp=None, analysis_level="full"):
+        with lock:
+            calls.append(image_bytes)
+        time.sleep(0.2)
+        return FaceAnalysisResult(detection_successful=True, detected_face_shape=None)
+
+    monkeypatch.setattr(endpoints, "analyze_face_from_image_bytes", fake_analysis)
+    flight = endpoints.analysis_single_flight
+    before = flight.snapshot()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            def post(path, payload):
+                return client.post(path, files={"image_file": ("a.jpg", payload, "image/jpeg")})
+            return await asyncio.gather(
+                post("/api/v1/analyze_face", b"same-image"),
+                post("/api/v1/analyze_and_recommend", b"same-image"),
+                post("/api/v1/analyze_face", b"other-image"),
+            )
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert sorted(calls) == [b"other-image", b"same-image"]
+    after = flight.snapshot()
+    assert after["coalesced"] - before["coalesced"] == 1
+    assert after["executions"] - before["executions"] == 2
+    # La copie modifiée par /analyze_and_recommend n'affecte pas la réponse partagée
+    assert "Forme non déterminée" in responses[1].json()["analysis"]["error_message"]
+    assert responses[0].json()["error_message"] is None
@@ -0,0 +1,79 @@
+# tests/test_smoothing.py
+
+import numpy as np
+import pytest
+from src.core.smoothing import OneEuroParams, SessionSmoother, nearest_rotation
+from src.utils.gfxmath_utils import makePose
+
+LANDMARK_PARAMS = OneEuroParams(min_cutoff=1.0, beta=10.0)
+POSE_PARAMS = OneEuroParams(min_cutoff=1.0, beta=0.5)
+
+
+def test_static_jitter_is_reduced():
+    """ Sur un visage immobile bruité, la sortie lissée varie beaucoup moins que l'entrée. """
+    rng = np.random.default_rng(0)
+    smoother = SessionSmoother(LANDMARK_PARAMS, POSE_PARAMS)
+    base = rng.random((478, 3))
+    raw, smoothed = [], []
+    for i in range(60):
+        noisy = base + rng.normal(0, 0.002, base.shape)
+        out, _ = smoother.smooth("s1", noisy, None, timestamp=i / 10.0)  # 10 captures/s
+        raw.append(noisy)
+        smoothed.append(out)
+    assert np.std(smoothed[20:], axis=0).mean() < 0.7 * np.std(raw[20:], axis=0).mean()
+
+
+def test_motion_is_tracked():
+    """ Un déplacement franc est suivi (peu de retard grâce au terme de vitesse). """
+    smoother = SessionSmoother(LANDMARK_PARAMS, POSE_PARAMS)
+    points = np.zeros((478, 3))
+    for i in range(30):
+        out, _ = smoother.smooth("s1", points + 0.02 * i, None, timestamp=i / 10.0)
+    assert np.abs(out - (points + 0.02 * 29)).max() < 0.02
+
+
+def test_smoothed_pose_stays_rigid():
+    smoother = SessionSmoother(LANDMARK_PARAMS, POSE_PARAMS)
+    for i, yaw in enumerate([0, 20, -15, 30]):
+        _, pose = smoother.smooth("s1", None, makePose([1, 2, -40], [0, yaw, 5]), timestamp=i / 10.0)
+    rotation = pose[:3, :3]
+    np.testing.assert_allclose(rotation @ rotation.T, np.eye(3), atol=1e-9)
+    assert np.linalg.det(rotation) == pytest.approx(1.0)
+    np.testing.assert_allclose(nearest_rotation(makePose([0, 0, 0], [10, 20, 30])), makePose([0, 0, 0], [10, 20, 30]), atol=1e-12)
+
+
+def test_sessions_are_independent_and_evicted(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.core.smoothing.time.monotonic", lambda: clock[0])
+    smoother = SessionSmoother(LANDMARK_PARAMS, POSE_PARAMS, ttl_s=10.0, max_sessions=2)
+    zeros, ones = np.zeros((478, 3)), np.ones((478, 3))
+    smoother.smooth("a", zeros, None)
+    clock[0] += 0.1
+    out, _ = smoother.smooth("b", ones, None)
+    np.testing.assert_array_equal(out, ones)  # Première capture d'une session : inchangée
+    clock[0] += 0.1
+    smoother.smooth("c", zeros, None)
+    assert len(smoother) == 2  # "a", la plus ancienne, est évincée
+    clock[0] += 11.0
+    smoother.smooth("d", zeros, None)
+    assert len(smoother) == 1  # "b" et "c" ont expiré
+
+
+def test_session_keeps_one_clock_when_timestamps_are_missing(monkeypatch):
+    """ Captures avec et sans timestamp client dans une session : dt reste celui d'une horloge unique. """
+    clock = [1000.0]
+    monkeypatch.setattr("src.core.smoothing.time.monotonic", lambda: clock[0])
+    smoother = SessionSmoother(LANDMARK_PARAMS, POSE_PARAMS)
+    zeros, ones = np.zeros((478, 3)), np.ones((478, 3))
+    epoch_s = 1.7e9  # Horloge client (epoch), sans rapport avec time.monotonic()
+
+    # Session horodatée par le client : capture sans timestamp datée par décalage, pas de réinitialisation
+    smoother.smooth("client", zeros, None, timestamp=epoch_s)
+    clock[0] += 0.1
+    out, _ = smoother.smooth("client", ones, None)
+    assert 0.0 < out.mean() < 1.0
+    # Session à l'heure de réception : le timestamp client est ignoré, pas de dt démesuré
+    smoother.smooth("server", zeros, None)
+    clock[0] += 0.1
+    out, _ = smoother.smooth("server", ones, None, timestamp=epoch_s)
+    assert 0.0 < out.mean() < 1.0
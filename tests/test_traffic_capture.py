@@ -0,0 +1,125 @@
+# tests/test_traffic_capture.py
+
+import asyncio
+import json
+import cv2
+import httpx
+import numpy as np
+from fastapi import FastAPI, File, Form, UploadFile
+from benchmark.traffic_replay import (
+    BodySynthesizer, build_schedule, completions_per_window, load_capture, replay, summarize_capture, summarize_replay,
+)
+from src.api.middleware import TrafficCaptureMiddleware
+from src.core.decoding import read_image_header
+from src.core.traffic_capture import TrafficRecorder, describe_parts, parse_multipart
+
+
+def _png(width, height):
+    return cv2.imencode(".png", np.zeros((height, width, 3), np.uint8))[1].tobytes()
+
+
+def _multipart(image, session_id="client-42"):
+    request = httpx.Request("POST", "http://test/", files={"image_file": ("a.png", image, "image/png")}, data={"session_id": session_id})
+    return request.read(), request.headers["content-type"]
+
+
+def _capture_app(recorder):
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(image_file: UploadFile = File(...), session_id: str = Form(None)):
+        return {"bytes": len(await image_file.read()), "session_id": session_id}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(TrafficCaptureMiddleware, recorder=recorder, paths=["/analyze"], consenting_accounts=["qa-1"])
+    return app
+
+
+def test_multipart_described_without_text_values():
+    body, content_type = _multipart(_png(64, 48))
+    parts = parse_multipart(body, content_type)
+    assert [p["name"] for p in parts] == ["session_id", "image_file"]
+    described = {entry["name"]: entry for entry in describe_parts(parts)}
+    assert described["image_file"]["format"] == "png" and (described["image_file"]["width"], described["image_file"]["height"]) == (64, 48)
+    assert "client-42" not in json.dumps(described) and len(described["session_id"]["hash"]) == 16
+    assert read_image_header(b"not an image") == ("other", None, None)
+
+
+def test_middleware_captures_metadata_and_consented_payloads_only(tmp_path):
+    recorder = TrafficRecorder(tmp_path)
+    app = _capture_app(recorder)
+    body, content_type = _multipart(_png(32, 24))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            anonymous = await client.post("/analyze", content=body, headers={"content-type": content_type})
+            consenting = await client.post("/analyze", content=body, headers={"content-type": content_type, "x-test-account": "qa-1"})
+            await client.get("/health")  # Route non capturée
+            return anonymous, consenting
+
+    anonymous, consenting = asyncio.run(scenario())
+    assert anonymous.json()["bytes"] == consenting.json()["bytes"] > 0  # Corps intact pour l'application
+    recorder.close()
+
+    records = load_capture(tmp_path)
+    assert [r["path"] for r in records] == ["/analyze", "/analyze"] and all(r["status"] == 200 for r in records)
+    assert "payload" not in records[0] and "account" not in records[0]
+    assert records[1]["account"] == "qa-1" and (tmp_path / records[1]["payload"]).read_bytes() == body
+    image_part = next(p for p in records[0]["parts"] if p.get("file"))
+    assert (image_part["width"], image_part["height"], image_part["bytes"]) == (32, 24, len(_png(32, 24)))
+
+
+def test_replay_schedule_and_synthesized_bodies(tmp_path):
+    source_dir = tmp_path / "sources"
+    source_dir.mkdir()
+    cv2.imwrite(str(source_dir / "face.jpg"), np.full((100, 80, 3), 128, np.uint8))
+    records = [
+        {"ts": 100.0, "method": "POST", "path": "/analyze", "content_type": "multipart/form-data; boundary=x", "status": 200,
+         "parts": [{"name": "image_file", "bytes": 10, "file": True, "format": "png", "width": 40, "height": 30},
+                   {"name": "session_id", "bytes": 9, "hash": "abcdef0123456789"}]},
+        {"ts": 101.0, "method": "GET", "path": "/health", "status": 200},
+    ]
+    assert build_schedule(records, speed=4) == [0.0, 0.25]
+    summary = summarize_capture(records)
+    assert summary["formats"] == {"png": 1} and summary["duration_s"] == 1.0
+
+    synthesizer = BodySynthesizer(tmp_path, source_dir)
+    body, content_type = synthesizer.build(records[0])
+    assert body == BodySynthesizer(tmp_path, source_dir).build(records[0])[0]  # Déterministe
+    parts = {p["name"]: p for p in parse_multipart(body, content_type)}
+    assert read_image_header(parts["image_file"]["data"]) == ("png", 40, 30)
+    assert parts["session_id"]["data"] == b"abcdef0123456789"
+
+    recorder = TrafficRecorder(tmp_path / "replayed")
+    bodies = [(body, content_type), synthesizer.build(records[1])]
+    results = asyncio.run(replay(records, bodies, "http://test", speed=100, transport=httpx.ASGITransport(app=_capture_app(recorder))))
+    recorder.close()
+    assert [r["status"] for r in results] == [200, 200]
+    stats = summarize_replay(results, wall_time_s=0.5)
+    assert stats["successful"] == 2 and stats["status_mismatches"] == 0 and set(stats["per_path"]) == {"/analyze", "/health"}
+    assert all(0 <= r["completed_s"] < 5 for r in results)
+
+
+def test_replay_throughput_counts_completions_per_wall_clock_window():
+    """ Requêtes concurrentes : débit = réussites terminées par fenêtre, indépendant des latences individuelles. """
+    # 10 requêtes de ~2 s lancées ensemble, toutes terminées dans la 2e seconde (et non 0,5 req/s tiré des latences)
+    results = [{"status": 200, "completed_s": 2.0 - i * 0.01} for i in range(10)] + [{"status": 500, "completed_s": 1.0}]
+    assert completions_per_window(results, window_s=1.0) == [0.0, 10.0]
+    assert completions_per_window(results, window_s=2.5) == [10 / 2.0]  # Rejeu plus court qu'une fenêtre
+    assert completions_per_window([{"status": None, "completed_s": 1.0}]) == []
+
+
+def test_recorder_queues_metadata_only_and_bounds_payload_bytes(tmp_path):
+    """ Sans consentement, aucun corps en file ; les payloads consentants sont bornés en octets. """
+    body, content_type = _multipart(_png(32, 24))
+    recorder = TrafficRecorder(tmp_path, max_queue_bytes=len(body) - 1)
+    record = {"ts": 1.0, "method": "POST", "path": "/analyze", "content_type": content_type}
+    recorder.submit(dict(record), body)  # Plus gros que le budget, mais réduit aux métadonnées
+    recorder.submit(dict(record, account="qa-1"), body, keep_payload=True)  # Payload au-delà du budget : abandonné
+    recorder.close()
+    assert recorder.snapshot() == {"recorded": 1, "dropped": 1, "pending": 0, "pending_bytes": 0}
+    (captured,) = load_capture(tmp_path)
+    assert "payload" not in captured and next(p for p in captured["parts"] if p.get("file"))["width"] == 32